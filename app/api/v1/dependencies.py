@@ -1,34 +1,56 @@
 import logging
+import math
+from time import perf_counter
 from typing import Annotated
 from uuid import UUID, uuid4
 
-from fastapi import Header, HTTPException, status
+from fastapi import Depends, Header, HTTPException, Response, status
 
-from ...db.session.provider import manager
+from ...common.admission import admission_controller
+from ...common.breaker import database_breaker
+from ...config import SKETCH_ENABLED, SPOOL_ENABLED
+from ...db.exceptions import DatabaseManagerException
+from ...db.session.provider import get_manager
 from ...db.types import DatabaseSession
+from ...schemas.errors import CommonErrorSchema, ErrorCode
+from ...schemas.events.send_events_request_schema import SendEventsRequestSchema
+from ...services.live.main import LocalBroker
+from ...services.live.provider import get_live_broker as get_process_live_broker
+from ...services.ratelimit.main import RateLimiter
+from ...services.sketches.main import SketchRecorder
+from ...services.sketches.provider import get_sketch_recorder as get_process_sketch_recorder
+from ...services.spool.main import IngestSpool
+from ...services.spool.provider import get_ingest_spool as get_process_ingest_spool
+from ...services.ratelimit.provider import get_rate_limiter as get_process_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+USER_ID_HEADER = "X-User-ID"
+
 
 def get_user_id_from_header(
     x_user_id: Annotated[
         str | None,
         Header(
-            alias="X-User-ID",
+            alias=USER_ID_HEADER,
             description="Уникальный идентификатор пользователя (UUID4). "
             "Если не указан — создаётся временный анонимный профиль",
             example="f47ac10b-58cc-4372-a567-0e02b2c3d479",
         ),
     ] = None,
+    response: Response = None,
 ) -> UUID:
     """Функция Dependency Injection для извлечения X-User-ID из HTTP-заголовка
     Зависимость извлекает X-User-ID из HTTP-заголовка.
-    - Если заголовок отсутствует -> генерируется новый временный UUID4 (анонимный режим).
+    - Если заголовок отсутствует -> генерируется новый UUID4 (анонимный режим) и возвращается клиенту
+      в заголовке ответа X-User-ID: клиент сохраняет его и передаёт в следующих запросах, иначе
+      каждый запрос создавал бы нового пользователя.
     - Если заголовок присутствует, но не является валидным UUID4 -> ошибка 400.
     - Поддерживается только UUID версии 4.
 
     Args:
         x_user_id: Значение HTTP-заголовка X-User-ID, переданное клиентом, None - пользователь анонимный.
+        response: Ответ, в заголовки которого записывается выданный идентификатор.
 
     Returns:
         Валидный идентификатор пользователя UUID4.
@@ -37,7 +59,10 @@ def get_user_id_from_header(
         HTTPException: HTTP 400 Bad Request с соответствующим сообщением.
     """
     if x_user_id is None:
-        return uuid4()
+        user_id = uuid4()
+        if response is not None:
+            response.headers[USER_ID_HEADER] = str(user_id)
+        return user_id
 
     try:
         user_uuid = UUID(x_user_id)
@@ -53,19 +78,219 @@ def get_user_id_from_header(
         )
 
 
+def get_required_user_id(
+    x_user_id: Annotated[
+        str,
+        Header(
+            alias=USER_ID_HEADER,
+            description="Уникальный идентификатор пользователя (UUID4)",
+            example="f47ac10b-58cc-4372-a567-0e02b2c3d479",
+        ),
+    ],
+) -> UUID:
+    """Функция Dependency Injection для извлечения обязательного X-User-ID из HTTP-заголовка.
+
+    В отличие от get_user_id_from_header не создаёт анонимного пользователя: чтение данных
+    под новым идентификатором не имеет смысла.
+
+    Args:
+        x_user_id: Значение HTTP-заголовка X-User-ID.
+
+    Returns:
+        Валидный идентификатор пользователя UUID4.
+
+    Raises:
+        HTTPException: HTTP 400 Bad Request, если идентификатор не является UUID4.
+    """
+    return get_user_id_from_header(x_user_id)
+
+
 async def get_db_session() -> DatabaseSession:
     """Функция Dependency Injection предоставления сессии базы данных.
 
+    Соединение из пула берётся сразу, а время его ожидания передаётся контролю допуска:
+    по нему воркер определяет перегрузку базы данных и отклоняет новые запросы.
+
     Yields:
         Сессия SQLAlchemy для выполнения запросов.
 
+    Raises:
+        HTTPException: HTTP 500 Internal Server Error в случае сбоя при создании сессии.
+    """
+    async for session in _open_session(None):
+        yield session
+
+
+async def get_user_db_session(user_id: Annotated[UUID, Depends(get_user_id_from_header)]) -> DatabaseSession:
+    """Функция Dependency Injection предоставления сессии шарда базы данных пользователя.
+
+    Args:
+        user_id: Идентификатор пользователя.
+
+    Yields:
+        Сессия SQLAlchemy шарда, хранящего данные пользователя.
+
+    Raises:
+        HTTPException: HTTP 500 Internal Server Error в случае сбоя при создании сессии.
+    """
+    async for session in _open_session(user_id):
+        yield session
+
+
+async def get_required_user_db_session(
+    user_id: Annotated[UUID, Depends(get_required_user_id)],
+) -> DatabaseSession:
+    """Функция Dependency Injection предоставления сессии шарда базы данных существующего пользователя.
+
+    Args:
+        user_id: Обязательный идентификатор пользователя.
+
+    Yields:
+        Сессия SQLAlchemy шарда, хранящего данные пользователя.
+
+    Raises:
+        HTTPException: HTTP 500 Internal Server Error в случае сбоя при создании сессии.
+    """
+    async for session in _open_session(user_id):
+        yield session
+
+
+def get_ingest_spool() -> IngestSpool | None:
+    """Функция Dependency Injection предоставления локальной очереди событий процесса.
+
+    Returns:
+        Локальная очередь событий, None - очередь отключена.
+    """
+    return get_process_ingest_spool() if SPOOL_ENABLED else None
+
+
+async def get_ingest_db_session(
+    user_id: Annotated[UUID, Depends(get_user_id_from_header)],
+    spool: Annotated[IngestSpool | None, Depends(get_ingest_spool)],
+) -> DatabaseSession | None:
+    """Функция Dependency Injection предоставления сессии шарда пользователя для приёма событий.
+
+    С локальной очередью недоступность базы данных не является ошибкой: вместо сессии
+    предоставляется None, и события записываются в очередь. Пока автомат защиты базы данных
+    разомкнут, соединение не запрашивается вовсе.
+
+    Args:
+        user_id: Идентификатор пользователя.
+        spool: Локальная очередь событий, None - очередь отключена.
+
+    Yields:
+        Сессия SQLAlchemy шарда пользователя или None, если база данных недоступна.
+
+    Raises:
+        HTTPException: HTTP 500 Internal Server Error в случае сбоя при создании сессии без локальной очереди.
+    """
+    if spool is None:
+        async for session in _open_session(user_id):
+            yield session
+        return
+    if not database_breaker.allow():
+        yield None
+        return
+
+    connected = False
+    try:
+        async with get_manager().get_session(user_id=user_id) as session:
+            start = perf_counter()
+            try:
+                await session.connection()
+            finally:
+                admission_controller.observe_pool_wait(perf_counter() - start)
+            connected = True
+            yield session
+    except Exception as e:
+        if connected:
+            # Исключение обработчика менеджер оборачивает: пробрасывается исходное (например, HTTPException)
+            raise e.__cause__ if isinstance(e, DatabaseManagerException) and e.__cause__ else e
+        logger.warning(f"Database is unavailable, events will be spooled: {e}")
+        database_breaker.record_failure()
+        yield None
+
+
+async def _open_session(user_id: UUID | None) -> DatabaseSession:
+    """Функция открытия сессии базы данных с учётом ожидания соединения контролем допуска.
+
+    Args:
+        user_id: Идентификатор пользователя для выбора шарда, None - шард по умолчанию.
+
+    Yields:
+        Сессия SQLAlchemy.
+
     Raises:
         HTTPException: HTTP 500 Internal Server Error в случае сбоя при создании сессии.
     """
     try:
-        async with manager.get_session() as session:
+        async with get_manager().get_session(user_id=user_id) as session:
+            start = perf_counter()
+            try:
+                await session.connection()
+            finally:
+                admission_controller.observe_pool_wait(perf_counter() - start)
             yield session
     except Exception as e:
         logger.warning(f"Failed to create database session: {e}")
         message = "Failed to create database session"
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Функция Dependency Injection предоставления ограничителя запросов процесса.
+
+    Returns:
+        Ограничитель запросов.
+    """
+    return get_process_rate_limiter()
+
+
+def get_live_broker() -> LocalBroker:
+    """Функция Dependency Injection предоставления брокера изменений использования процесса.
+
+    Returns:
+        Брокер изменений.
+    """
+    return get_process_live_broker()
+
+
+def get_sketch_recorder() -> SketchRecorder | None:
+    """Функция Dependency Injection предоставления учёта вероятностных оценок процесса.
+
+    Returns:
+        Учёт вероятностных оценок, None - оценки отключены.
+    """
+    return get_process_sketch_recorder() if SKETCH_ENABLED else None
+
+
+async def enforce_ingest_rate_limit(
+    events: SendEventsRequestSchema,
+    user_id: Annotated[UUID, Depends(get_user_id_from_header)],
+    limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
+) -> UUID:
+    """Функция Dependency Injection ограничения приёма событий пользователя.
+
+    Стоимость запроса - количество событий в пачке: лимит ограничивает нагрузку на attention_events,
+    а не число запросов. Зависимость объявляется до сессии базы данных, чтобы отклонённый запрос
+    не занимал соединение из пула.
+
+    Args:
+        events: Пачка событий.
+        user_id: Идентификатор пользователя.
+        limiter: Ограничитель запросов.
+
+    Returns:
+        Идентификатор пользователя.
+
+    Raises:
+        HTTPException: HTTP 429 Too Many Requests с заголовком Retry-After.
+    """
+    decision = await limiter.acquire(user_id, cost=len(events.data))
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=CommonErrorSchema(code=ErrorCode.RATE_LIMITED, message="Too many events, retry later").model_dump(),
+            headers={"Retry-After": str(max(1, math.ceil(decision.retry_after)))},
+        )
+    return user_id
@@ -0,0 +1,172 @@
+from typing import Annotated, Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_202_ACCEPTED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+    HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+from ....common.admission import admission_controller
+from ....common.breaker import database_breaker
+from ....config import ADMISSION_RETRY_AFTER
+from ....db.types import DatabaseSession
+from ....schemas.errors import CommonErrorSchema, ErrorCode
+from ....schemas.events.list_events_response_schema import (
+    MAX_EVENTS_PAGE_SIZE,
+    EventItemSchema,
+    ListEventsResponseSchema,
+)
+from ....schemas.events.send_events_request_schema import SendEventsRequestSchema
+from ....schemas.events.send_events_response_schema import FlushAdviceSchema, SendEventsResponseSchema
+from ....services.events.browse import EventsBrowseService
+from ....services.events.exceptions import (
+    EventsBrowseInvalidCursorException,
+    EventsBrowseServiceException,
+    EventsServiceException,
+    EventsServiceUnavailableException,
+)
+from ....services.events.flush import flush_policy
+from ....services.events.main import EventsService
+from ....services.live.main import LocalBroker, build_delta
+from ....services.sketches.main import SketchRecorder
+from ....services.spool.exceptions import SpoolServiceException
+from ....services.spool.main import IngestSpool
+from ..dependencies import (
+    enforce_ingest_rate_limit,
+    get_ingest_db_session,
+    get_ingest_spool,
+    get_live_broker,
+    get_required_user_db_session,
+    get_required_user_id,
+    get_sketch_recorder,
+)
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.post(
+    "",
+    response_model=SendEventsResponseSchema,
+    responses={
+        HTTP_200_OK: {"description": "События приняты"},
+        HTTP_202_ACCEPTED: {"description": "База данных недоступна, события приняты в локальную очередь"},
+        HTTP_429_TOO_MANY_REQUESTS: {
+            "model": CommonErrorSchema,
+            "description": "Превышен лимит событий пользователя, повтор через Retry-After секунд",
+        },
+        HTTP_500_INTERNAL_SERVER_ERROR: {"model": CommonErrorSchema, "description": "Ошибка сохранения событий"},
+        HTTP_503_SERVICE_UNAVAILABLE: {
+            "model": CommonErrorSchema,
+            "description": "Воркер перегружен или локальная очередь заполнена, повтор через Retry-After секунд",
+        },
+    },
+    summary="Отправка событий внимания",
+    description="Приём пачки событий внимания от расширения. Ответ содержит рекомендацию по отправке следующей "
+    "пачки, рассчитанную по текущей нагрузке сервиса",
+)
+async def send_events(
+    events: SendEventsRequestSchema,
+    user_id: Annotated[UUID, Depends(enforce_ingest_rate_limit)],
+    session: Annotated[DatabaseSession | None, Depends(get_ingest_db_session)],
+    spool: Annotated[IngestSpool | None, Depends(get_ingest_spool)],
+    broker: Annotated[LocalBroker, Depends(get_live_broker)],
+    sketches: Annotated[SketchRecorder | None, Depends(get_sketch_recorder)],
+    response: Response,
+):
+    spooled = session is None
+    if not spooled:
+        try:
+            await EventsService(session).exec(events, user_id)
+            database_breaker.record_success()
+        except EventsServiceUnavailableException as e:
+            if spool is None:
+                raise _database_error(e)
+            database_breaker.record_failure()
+            spooled = True
+        except EventsServiceException as e:
+            raise _database_error(e)
+    if spooled:
+        try:
+            await spool.append(user_id, events.data, events.device_id)
+        except SpoolServiceException as e:
+            raise HTTPException(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                detail=CommonErrorSchema(code=ErrorCode.SERVICE_UNAVAILABLE, message=e.message).model_dump(),
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+            )
+        response.status_code = HTTP_202_ACCEPTED
+
+    await broker.publish(user_id, build_delta(events.data))
+    if sketches is not None:
+        sketches.record(user_id, events.data)
+    # Пока база данных недоступна, клиентам рекомендуется отправлять события как можно реже
+    advice = flush_policy.advise(1.0 if spooled else admission_controller.load())
+    return SendEventsResponseSchema(
+        status_code=response.status_code or HTTP_200_OK,
+        description="Events spooled" if spooled else "Events accepted",
+        accepted=len(events.data),
+        flush=FlushAdviceSchema(next_flush_in=advice.interval, max_batch_size=advice.max_batch, jitter=advice.jitter),
+    )
+
+
+@router.get(
+    "",
+    response_model=ListEventsResponseSchema,
+    responses={
+        HTTP_200_OK: {"description": "Страница событий"},
+        HTTP_400_BAD_REQUEST: {"model": CommonErrorSchema, "description": "Повреждённый курсор"},
+        HTTP_500_INTERNAL_SERVER_ERROR: {"model": CommonErrorSchema, "description": "Ошибка чтения событий"},
+    },
+    summary="Просмотр событий внимания",
+    description="События пользователя от новых к старым, включая сжатые дни. Следующая страница запрашивается "
+    "по курсору из ответа (keyset), поэтому время ответа не зависит от глубины истории",
+)
+async def list_events(
+    user_id: Annotated[UUID, Depends(get_required_user_id)],
+    session: Annotated[DatabaseSession, Depends(get_required_user_db_session)],
+    cursor: Annotated[str | None, Query(max_length=128, description="Курсор предыдущей страницы")] = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_EVENTS_PAGE_SIZE, description="Количество событий")] = 100,
+    domain: Annotated[str | None, Query(min_length=1, max_length=255, description="Домен событий")] = None,
+    event: Annotated[Literal["active", "inactive"] | None, Query(description="Тип событий")] = None,
+):
+    try:
+        page = await EventsBrowseService(session).exec(
+            user_id, cursor, limit, domain=domain.strip().lower() if domain else None, event_type=event
+        )
+    except EventsBrowseInvalidCursorException as e:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=CommonErrorSchema(code=ErrorCode.VALIDATION_ERROR, message=e.message).model_dump(),
+        )
+    except EventsBrowseServiceException as e:
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=CommonErrorSchema(code=ErrorCode.DATABASE_ERROR, message=e.message).model_dump(),
+        )
+    return ListEventsResponseSchema(
+        events=[
+            EventItemSchema(event=event_type, domain=event_domain, timestamp=timestamp, device_id=device_id)
+            for timestamp, event_domain, event_type, device_id in page.events
+        ],
+        next_cursor=page.next_cursor,
+    )
+
+
+def _database_error(error: EventsServiceException) -> HTTPException:
+    """Функция построения ответа об ошибке сохранения событий.
+
+    Args:
+        error: Исключение сервиса событий.
+
+    Returns:
+        HTTP 500 Internal Server Error.
+    """
+    return HTTPException(
+        status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=CommonErrorSchema(code=ErrorCode.DATABASE_ERROR, message=error.message).model_dump(),
+    )
@@ -4,8 +4,12 @@ from starlette.status import (
     HTTP_503_SERVICE_UNAVAILABLE,
 )
 
+from ....common.responses import prevalidated_response
 from ....schemas.errors import CommonErrorSchema, ErrorCode
 from ....schemas.healthcheck.healthcheck_response_schema import HealthcheckResponseSchema
+from ....schemas.healthcheck.readiness_response_schema import ReadinessResponseSchema
+from ....services.healthcheck.main import HealthStatus
+from ....services.healthcheck.provider import prober
 
 router = APIRouter(prefix="/healthcheck", tags=["healthcheck"])
 
@@ -34,3 +38,19 @@ async def check_service_health():
                 message="Service is not available",
             ).model_dump(),
         )
+
+
+@router.get(
+    "/readiness",
+    response_model=ReadinessResponseSchema,
+    responses={
+        HTTP_200_OK: {"description": "Зависимости доступны (возможно, с деградацией)"},
+        HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessResponseSchema, "description": "Зависимости не доступны"},
+    },
+    summary="Готовность сервиса",
+    description="Состояние PostgreSQL, Redis и брокера Celery по результатам фоновых проверок",
+)
+async def check_service_readiness():
+    report = prober.report()
+    status_code = HTTP_503_SERVICE_UNAVAILABLE if report.status == HealthStatus.UNAVAILABLE else HTTP_200_OK
+    return prevalidated_response(report.payload, status_code=status_code)
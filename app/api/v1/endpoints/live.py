@@ -0,0 +1,49 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from ....config import ADMISSION_RETRY_AFTER, LIVE_HEARTBEAT, LIVE_MIN_INTERVAL
+from ....schemas.errors import CommonErrorSchema, ErrorCode
+from ....services.live.main import LocalBroker, event_stream
+from ..dependencies import get_live_broker, get_required_user_id
+
+router = APIRouter(prefix="/live", tags=["live"])
+
+
+@router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={
+        HTTP_200_OK: {
+            "content": {"text/event-stream": {}},
+            "description": "Поток Server-Sent Events с изменениями использования доменов",
+        },
+        HTTP_503_SERVICE_UNAVAILABLE: {
+            "model": CommonErrorSchema,
+            "description": "Достигнут лимит потоков воркера, повтор через Retry-After секунд",
+        },
+    },
+    summary="Живое использование",
+    description="Поток изменений использования доменов пользователя по мере приёма событий. Обновления "
+    "объединяются и отправляются не чаще раза в интервал, без обращений к базе данных",
+)
+async def stream_usage(
+    user_id: Annotated[UUID, Depends(get_required_user_id)],
+    broker: Annotated[LocalBroker, Depends(get_live_broker)],
+):
+    if not broker.available():
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail=CommonErrorSchema(
+                code=ErrorCode.SERVICE_UNAVAILABLE, message="Too many live connections, retry later"
+            ).model_dump(),
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
+    return StreamingResponse(
+        event_stream(broker, user_id, heartbeat=LIVE_HEARTBEAT, min_interval=LIVE_MIN_INTERVAL),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+
+from ....common.metrics import render_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get(
+    "",
+    include_in_schema=False,
+    summary="Метрики сервиса",
+    description="Метрики сервиса в текстовом формате Prometheus",
+)
+async def get_metrics() -> Response:
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,135 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from ....config import SKETCH_RETENTION_DAYS, SKETCH_TOP_CAPACITY
+from ....schemas.errors import CommonErrorSchema, ErrorCode
+from ....schemas.stats.sketches_response_schema import (
+    DomainUsersResponseSchema,
+    TopDomainSchema,
+    TopDomainsResponseSchema,
+    UserDomainsResponseSchema,
+)
+from ....services.sketches.exceptions import SketchesServiceException
+from ....services.sketches.main import SketchRecorder, SketchStore
+from ..dependencies import get_required_user_id, get_sketch_recorder
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+_UNAVAILABLE = {HTTP_503_SERVICE_UNAVAILABLE: {"model": CommonErrorSchema, "description": "Оценки недоступны"}}
+
+
+def get_sketch_store(recorder: Annotated[SketchRecorder | None, Depends(get_sketch_recorder)]) -> SketchStore:
+    """Функция Dependency Injection предоставления хранилища вероятностных оценок.
+
+    Args:
+        recorder: Учёт вероятностных оценок, None - оценки отключены.
+
+    Returns:
+        Хранилище оценок.
+
+    Raises:
+        HTTPException: HTTP 503 Service Unavailable, если оценки отключены.
+    """
+    if recorder is None:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail=CommonErrorSchema(code=ErrorCode.SERVICE_UNAVAILABLE, message="Sketches are disabled").model_dump(),
+        )
+    return recorder.store
+
+
+def _period(days: int) -> list[date]:
+    """Функция получения дней периода, заканчивающегося сегодня (UTC).
+
+    Args:
+        days: Количество дней.
+
+    Returns:
+        Дни периода по возрастанию.
+    """
+    today = datetime.now(timezone.utc).date()
+    return [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+
+
+def _unavailable(e: SketchesServiceException) -> HTTPException:
+    """Функция преобразования ошибки хранилища оценок в HTTP 503.
+
+    Args:
+        e: Ошибка хранилища.
+
+    Returns:
+        HTTP-исключение.
+    """
+    return HTTPException(
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        detail=CommonErrorSchema(code=ErrorCode.SERVICE_UNAVAILABLE, message=e.message).model_dump(),
+    )
+
+
+@router.get(
+    "/domains/top",
+    response_model=TopDomainsResponseSchema,
+    responses={HTTP_200_OK: {"description": "Наиболее посещаемые домены"}, **_UNAVAILABLE},
+    summary="Наиболее посещаемые домены",
+    description="Оценка наиболее посещаемых доменов всех пользователей за последние дни по count-min sketch. "
+    "Стоимость запроса не зависит от количества событий",
+)
+async def get_top_domains(
+    store: Annotated[SketchStore, Depends(get_sketch_store)],
+    days: Annotated[int, Query(ge=1, le=SKETCH_RETENTION_DAYS, description="Количество дней до сегодня")] = 7,
+    limit: Annotated[int, Query(ge=1, le=SKETCH_TOP_CAPACITY, description="Количество доменов")] = 100,
+):
+    period = _period(days)
+    try:
+        top = await store.top_domains(period, limit)
+    except SketchesServiceException as e:
+        raise _unavailable(e)
+    return TopDomainsResponseSchema(
+        first_day=period[0],
+        last_day=period[-1],
+        domains=[TopDomainSchema(domain=domain, visits=visits) for domain, visits in top],
+    )
+
+
+@router.get(
+    "/domains/{domain}/users",
+    response_model=DomainUsersResponseSchema,
+    responses={HTTP_200_OK: {"description": "Количество пользователей домена"}, **_UNAVAILABLE},
+    summary="Количество пользователей домена",
+    description="Оценка количества различных пользователей домена за последние дни по HyperLogLog",
+)
+async def get_domain_users(
+    domain: str,
+    store: Annotated[SketchStore, Depends(get_sketch_store)],
+    days: Annotated[int, Query(ge=1, le=SKETCH_RETENTION_DAYS, description="Количество дней до сегодня")] = 7,
+):
+    period = _period(days)
+    try:
+        users = await store.distinct_users(domain.lower(), period)
+    except SketchesServiceException as e:
+        raise _unavailable(e)
+    return DomainUsersResponseSchema(domain=domain.lower(), first_day=period[0], last_day=period[-1], users=users)
+
+
+@router.get(
+    "/users/me/domains",
+    response_model=UserDomainsResponseSchema,
+    responses={HTTP_200_OK: {"description": "Количество доменов пользователя"}, **_UNAVAILABLE},
+    summary="Количество доменов пользователя за день",
+    description="Оценка количества различных доменов, посещённых пользователем за день, по HyperLogLog",
+)
+async def get_user_domains(
+    user_id: Annotated[UUID, Depends(get_required_user_id)],
+    store: Annotated[SketchStore, Depends(get_sketch_store)],
+    day: Annotated[date | None, Query(description="День (UTC), по умолчанию сегодня")] = None,
+):
+    day = day or datetime.now(timezone.utc).date()
+    try:
+        domains = await store.distinct_domains(user_id, day)
+    except SketchesServiceException as e:
+        raise _unavailable(e)
+    return UserDomainsResponseSchema(day=day, domains=domains)
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from starlette.status import HTTP_200_OK, HTTP_500_INTERNAL_SERVER_ERROR
+
+from ....config import AGGREGATION_MAX_GAP
+from ....db.types import DatabaseSession
+from ....schemas.errors import CommonErrorSchema, ErrorCode
+from ....schemas.users.user_settings_schema import UpdateUserSettingsRequestSchema, UserSettingsResponseSchema
+from ....services.users.exceptions import UserSettingsServiceException
+from ....services.users.main import UserSettingsService, queue_summaries_recompute
+from ..dependencies import get_required_user_db_session, get_required_user_id
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.put(
+    "/me/settings",
+    response_model=UserSettingsResponseSchema,
+    responses={
+        HTTP_200_OK: {"description": "Настройки сохранены"},
+        HTTP_500_INTERNAL_SERVER_ERROR: {"model": CommonErrorSchema, "description": "Ошибка сохранения настроек"},
+    },
+    summary="Изменение настроек пользователя",
+    description="Установка часового пояса пользователя. Дни дневных сводок начинаются в местную полночь; "
+    "пока сводки не пересчитаны в установленном часовом поясе, пересчёт за всю историю пользователя ставится "
+    "в очередь при каждом сохранении",
+)
+async def update_settings(
+    settings: UpdateUserSettingsRequestSchema,
+    user_id: Annotated[UUID, Depends(get_required_user_id)],
+    session: Annotated[DatabaseSession, Depends(get_required_user_db_session)],
+):
+    service = UserSettingsService(session, max_gap=timedelta(seconds=AGGREGATION_MAX_GAP))
+    try:
+        pending = await service.exec(user_id, settings.time_zone)
+    except UserSettingsServiceException as e:
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=CommonErrorSchema(code=ErrorCode.DATABASE_ERROR, message=e.message).model_dump(),
+        )
+    queued = await queue_summaries_recompute(user_id) if pending else False
+    return UserSettingsResponseSchema(time_zone=settings.time_zone, recompute_queued=queued)
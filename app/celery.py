@@ -1,4 +1,25 @@
 from .config import REDIS_URL
-from .services.scheduler.main import CeleryConfigurator
 
-celery = CeleryConfigurator(url=REDIS_URL).exec()
+
+def __getattr__(name: str):
+    """Функция ленивого создания приложения Celery при первом обращении к ``app.celery.celery``.
+
+    Импорт модуля не загружает Celery: приложение собирается, когда его запрашивает CLI Celery
+    (``-A app.celery``) или код, ставящий задачи.
+
+    Args:
+        name: Имя атрибута модуля.
+
+    Returns:
+        Приложение Celery.
+
+    Raises:
+        AttributeError: Если атрибут не существует.
+    """
+    if name == "celery":
+        from .services.scheduler.main import CeleryConfigurator
+
+        celery = CeleryConfigurator(url=REDIS_URL).exec()
+        globals()["celery"] = celery
+        return celery
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
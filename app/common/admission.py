@@ -0,0 +1,183 @@
+import time
+from typing import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config import ADMISSION_MAX_IN_FLIGHT, ADMISSION_POOL_WAIT_HALF_LIFE, ADMISSION_POOL_WAIT_THRESHOLD
+from ..schemas.errors import CommonErrorSchema, ErrorCode
+from .metrics import observe_pool_wait, observe_shed
+from .responses import FastJSONResponse
+
+IN_FLIGHT = "in_flight"
+POOL_WAIT = "pool_wait"
+
+
+class AdmissionController:
+    """Класс контроля допуска запросов в воркер.
+
+    Отслеживает количество запросов в обработке, время ожидания соединения из пула и долю
+    отклонённых запросов. Ожидание и доля сглаживаются экспоненциально и затухают со временем
+    без новых замеров: пока запросы отклоняются, замеров ожидания нет, и без затухания воркер
+    не вышел бы из перегрузки. Счётчики изменяются без точек переключения корутин и не требуют
+    блокировок в цикле событий воркера.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        pool_wait_threshold: float,
+        half_life: float = 5.0,
+        alpha: float = 0.3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            max_in_flight: Наибольшее количество запросов в обработке.
+            pool_wait_threshold: Порог сглаженного ожидания соединения в секундах.
+            half_life: Время уменьшения сглаженного ожидания вдвое без новых замеров, секунды.
+            alpha: Вес нового замера при сглаживании (0..1).
+            clock: Монотонные часы в секундах.
+        """
+        self.max_in_flight = max_in_flight
+        self.pool_wait_threshold = pool_wait_threshold
+        self.half_life = half_life
+        self.alpha = alpha
+        self._clock = clock
+        self.in_flight = 0
+        self._pool_wait = 0.0
+        self._observed_at = clock()
+        self._admitted = 0.0
+        self._shed = 0.0
+        self._recorded_at = clock()
+
+    @property
+    def pool_wait(self) -> float:
+        """Сглаженное время ожидания соединения из пула с учётом затухания.
+
+        Returns:
+            Время ожидания в секундах.
+        """
+        elapsed = self._clock() - self._observed_at
+        return self._pool_wait * 0.5 ** (elapsed / self.half_life)
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        """Метод учёта замера ожидания соединения из пула.
+
+        Args:
+            seconds: Время получения соединения в секундах.
+        """
+        self._pool_wait = self.alpha * seconds + (1 - self.alpha) * self.pool_wait
+        self._observed_at = self._clock()
+        observe_pool_wait(seconds)
+
+    def record(self, shed: bool) -> None:
+        """Метод учёта решения по запросу для доли отклонённых запросов.
+
+        Args:
+            shed: Запрос отклонён.
+        """
+        now = self._clock()
+        decay = 0.5 ** ((now - self._recorded_at) / self.half_life)
+        self._recorded_at = now
+        self._admitted = self._admitted * decay + (not shed)
+        self._shed = self._shed * decay + shed
+
+    @property
+    def shed_fraction(self) -> float:
+        """Доля отклонённых запросов среди недавних.
+
+        Returns:
+            Доля в диапазоне [0, 1].
+        """
+        total = self._admitted + self._shed
+        return self._shed / total if total else 0.0
+
+    def load(self) -> float:
+        """Метод оценки нагрузки воркера по всем сигналам.
+
+        Returns:
+            Нагрузка в диапазоне [0, 1]: 1 - воркер на пороге отклонения запросов или отклоняет их.
+        """
+        return min(
+            1.0,
+            max(
+                self.in_flight / self.max_in_flight,
+                self.pool_wait / self.pool_wait_threshold,
+                self.shed_fraction,
+            ),
+        )
+
+    def overload_reason(self) -> str | None:
+        """Метод проверки перегрузки воркера.
+
+        Returns:
+            Причина перегрузки или None, если новые запросы допускаются.
+        """
+        if self.in_flight >= self.max_in_flight:
+            return IN_FLIGHT
+        if self.pool_wait >= self.pool_wait_threshold:
+            return POOL_WAIT
+        return None
+
+
+class AdmissionMiddleware:
+    """Класс ASGI Middleware отклонения запросов при перегрузке воркера.
+
+    Новый запрос при перегрузке сразу получает HTTP 503 с Retry-After, не ожидая соединения из пула
+    до таймаута воркера: задержка принятых запросов остаётся ограниченной. Запросы к путям
+    из ``exempt_paths`` (проверки готовности, метрики) не учитываются и не отклоняются.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        exempt_paths: tuple[str, ...] = (),
+        retry_after: int = 5,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            app: Следующее ASGI-приложение в цепочке.
+            controller: Контроллер допуска.
+            exempt_paths: Префиксы путей, которые всегда обрабатываются.
+            retry_after: Значение заголовка Retry-After в секундах.
+        """
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = exempt_paths
+        self.retry_after = retry_after
+        self._detail = CommonErrorSchema(
+            code=ErrorCode.SERVICE_UNAVAILABLE, message="Service is overloaded, retry later"
+        ).model_dump()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.controller.overload_reason()
+        self.controller.record(shed=reason is not None)
+        if reason is not None:
+            observe_shed(reason)
+            response = FastJSONResponse(
+                content={"detail": self._detail},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.controller.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.in_flight -= 1
+
+
+admission_controller = AdmissionController(
+    max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+    pool_wait_threshold=ADMISSION_POOL_WAIT_THRESHOLD,
+    half_life=ADMISSION_POOL_WAIT_HALF_LIFE,
+)
@@ -0,0 +1,82 @@
+import logging
+import time
+from typing import Callable
+
+from ..config import DB_BREAKER_FAILURES, DB_BREAKER_RESET_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Класс автомата защиты от обращений к недоступной зависимости.
+
+    После ``failure_threshold`` ошибок подряд автомат размыкается: запросы не ждут таймаута
+    соединения с заведомо недоступной зависимостью. В разомкнутом состоянии раз в ``reset_timeout``
+    секунд пропускается одна пробная попытка; её успех замыкает автомат. Состояние изменяется
+    без точек переключения корутин и не требует блокировок в цикле событий воркера.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        reset_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            name: Имя зависимости для логов.
+            failure_threshold: Количество ошибок подряд, после которого автомат размыкается.
+            reset_timeout: Интервал пробных попыток в разомкнутом состоянии, секунды.
+            clock: Монотонные часы в секундах.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Автомат разомкнут.
+
+        Returns:
+            True, если количество ошибок подряд достигло порога.
+        """
+        return self._failures >= self.failure_threshold
+
+    def allow(self) -> bool:
+        """Метод проверки допуска обращения к зависимости.
+
+        Returns:
+            True, если автомат замкнут или наступило время пробной попытки.
+        """
+        if not self.is_open:
+            return True
+        now = self._clock()
+        if now - self._opened_at < self.reset_timeout:
+            return False
+        # Следующая пробная попытка - не раньше чем через reset_timeout, даже если эта не завершится
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        """Метод учёта успешного обращения к зависимости."""
+        if self.is_open:
+            logger.warning(f"Circuit breaker for {self.name} closed")
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Метод учёта ошибки обращения к зависимости."""
+        self._failures += 1
+        if self._failures == self.failure_threshold:
+            logger.warning(f"Circuit breaker for {self.name} opened after {self._failures} failures")
+        if self.is_open:
+            self._opened_at = self._clock()
+
+
+database_breaker = CircuitBreaker(
+    "database", failure_threshold=DB_BREAKER_FAILURES, reset_timeout=DB_BREAKER_RESET_TIMEOUT
+)
@@ -1,18 +1,194 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Callable
 
+# Атрибуты LogRecord, которые не переносятся в JSON как дополнительные поля
+_RECORD_ATTRIBUTES = frozenset(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "taskName"}
 
-def setup_logging(level=logging.INFO, forma="[%(levelname)s][%(name)s]:%(message)s", **kwargs) -> logging.Logger:
+_listener: QueueListener | None = None
+_queue_handler: "DroppingQueueHandler | None" = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Класс форматирования записей лога в JSON-строку.
+
+    Помимо времени, уровня, логгера и сообщения в вывод попадают поля, переданные через ``extra``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Метод форматирования записи.
+
+        Args:
+            record: Запись лога.
+
+        Returns:
+            JSON-строка.
+        """
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Класс обработчика, передающего записи в ограниченную очередь без блокировки.
+
+    Записи не форматируются в вызывающем потоке: сообщение собирается в фоновом потоке
+    ``QueueListener``. При переполнении очереди запись отбрасывается, учитывается в счётчике
+    и передаётся наблюдателю (метрика log_records_dropped_total).
+    """
+
+    def __init__(self, log_queue: queue.Queue, on_drop: Callable[[], None] | None = None) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            log_queue: Ограниченная очередь записей.
+            on_drop: Функция, вызываемая для каждой отброшенной записи.
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._on_drop = on_drop
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Метод подготовки записи к постановке в очередь без форматирования сообщения.
+
+        Args:
+            record: Запись лога.
+
+        Returns:
+            Запись для очереди.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Метод неблокирующей постановки записи в очередь.
+
+        Args:
+            record: Запись лога.
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            if self._on_drop is not None:
+                self._on_drop()
+
+
+def setup_logging(
+    level=logging.INFO,
+    forma="[%(levelname)s][%(name)s]:%(message)s",
+    use_queue: bool = False,
+    json_format: bool = False,
+    queue_size: int = 10000,
+    on_drop: Callable[[], None] | None = None,
+    **kwargs,
+) -> logging.Logger:
     """Метод настройки базовой конфигурации логирования.
 
     Args:
         level: Уровень логирования.
         forma: Формат сообщений лога.
+        use_queue: Запись в stdout из фонового потока через ограниченную очередь.
+        json_format: Вывод записей в формате JSON.
+        queue_size: Размер очереди записей, при переполнении записи отбрасываются.
+        on_drop: Функция, вызываемая для каждой записи, отброшенной при переполнении очереди.
         **kwargs: Дополнительные аргументы, передаваемые в logging.basicConfig.
 
     Returns:
         Логгер текущего модуля.
     """
-    logging.basicConfig(level=level, format=forma, handlers=[logging.StreamHandler(sys.stdout)], **kwargs)
+    handler = logging.StreamHandler(sys.stdout)
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+
+    # basicConfig не меняет уже настроенный root-логгер, фоновый поток в этом случае не нужен
+    if use_queue and (kwargs.get("force") or not logging.getLogger().handlers):
+        handler.setFormatter(handler.formatter or logging.Formatter(forma, kwargs.get("datefmt")))
+        handler = _start_queue_listener(handler, queue_size, on_drop)
+
+    logging.basicConfig(level=level, format=forma, handlers=[handler], **kwargs)
     logger = logging.getLogger(__name__)
     return logger
+
+
+def _start_queue_listener(
+    handler: logging.Handler, queue_size: int, on_drop: Callable[[], None] | None = None
+) -> DroppingQueueHandler:
+    """Метод запуска фонового потока записи логов.
+
+    Повторный вызов останавливает ранее запущенный поток.
+
+    Args:
+        handler: Обработчик, выполняющий запись в фоновом потоке.
+        queue_size: Размер очереди записей.
+        on_drop: Функция, вызываемая для каждой отброшенной записи.
+
+    Returns:
+        Обработчик для подключения к логгерам.
+    """
+    global _listener, _queue_handler
+
+    stop_queue_listener()
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = DroppingQueueHandler(log_queue, on_drop)
+    return _queue_handler
+
+
+def get_dropped_records() -> int:
+    """Метод получения количества записей, отброшенных из-за переполнения очереди.
+
+    Returns:
+        Количество отброшенных записей.
+    """
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def restart_queue_listener() -> None:
+    """Метод перезапуска фонового потока записи логов в дочернем процессе после fork.
+
+    Поток QueueListener не переживает fork, а унаследованная очередь может содержать записи
+    родителя и захваченные им блокировки. Обработчик получает новую очередь того же размера,
+    записи пишутся новым потоком через те же обработчики.
+    """
+    global _listener
+
+    if _listener is None or _queue_handler is None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=_queue_handler.queue.maxsize)
+    _queue_handler.queue = log_queue
+    _queue_handler.dropped = 0
+    _queue_handler._dropped_lock = threading.Lock()
+    _listener = QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_queue_listener() -> None:
+    """Метод остановки фонового потока записи логов с дозаписью очереди."""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_queue_listener)
@@ -0,0 +1,300 @@
+import os
+import threading
+from functools import lru_cache, wraps
+from typing import Callable, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+T = TypeVar("T")
+
+# Маршрут для запросов, не сопоставленных ни с одним маршрутом приложения
+UNMATCHED_ROUTE = "__unmatched__"
+
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Количество обработанных HTTP-запросов",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Длительность обработки HTTP-запросов",
+    ["method", "route", "status"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+INGEST_EVENTS = Counter("ingest_events_total", "Количество принятых событий внимания")
+INGEST_BATCHES = Counter("ingest_batches_total", "Количество обработанных пачек событий", ["outcome"])
+INGEST_COMPACTED = Counter(
+    "ingest_events_compacted_total", "Количество событий, отброшенных сжатием пачек перед сохранением", ["reason"]
+)
+CACHE_REQUESTS = Counter("cache_requests_total", "Обращения к кэшам приложения", ["cache", "result"])
+DB_POOL_SIZE = Gauge("db_pool_size", "Размер пула соединений с базой данных", multiprocess_mode="livesum")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Количество выданных соединений пула", multiprocess_mode="livesum")
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Количество выдач соединений из пула")
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Длительность выполнения SQL-запросов по отпечаткам",
+    ["fingerprint"],
+    buckets=REQUEST_LATENCY_BUCKETS,
+)
+RATE_LIMITED_REQUESTS = Counter(
+    "rate_limited_requests_total", "Количество запросов, отклонённых ограничителем", ["tier"]
+)
+RATE_LIMITED_USERS = Counter(
+    "rate_limited_users_total", "Количество попаданий пользователей под ограничение запросов", ["tier"]
+)
+ADMISSION_SHED_REQUESTS = Counter(
+    "admission_shed_requests_total", "Количество запросов, отклонённых при перегрузке воркера", ["reason"]
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Время ожидания соединения из пула в запросах", buckets=REQUEST_LATENCY_BUCKETS
+)
+LIVE_CONNECTIONS = Gauge(
+    "live_connections", "Количество открытых потоков живого использования", multiprocess_mode="livesum"
+)
+LIVE_UPDATES = Counter("live_updates_total", "Количество отправленных обновлений живого использования")
+DB_QUERY_ROWS = Counter("db_query_rows_total", "Количество строк, затронутых SQL-запросами", ["fingerprint"])
+SPOOL_BATCHES = Counter(
+    "spool_batches_total", "Количество пачек событий, записанных в локальную очередь и воспроизведённых", ["outcome"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total", "Количество записей лога, отброшенных при переполнении очереди логирования"
+)
+SPOOL_BYTES = Gauge("spool_bytes", "Объём невоспроизведённых записей локальной очереди", multiprocess_mode="livesum")
+
+
+# Engine процесса с метриками пула по id: размер пулов вычисляется по ним, а не накапливается
+_pool_engines: dict[int, Engine] = {}
+_pools_lock = threading.Lock()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    """Функция учёта обработанного HTTP-запроса.
+
+    Args:
+        method: HTTP-метод.
+        route: Шаблон маршрута (например, '/api/v1/healthcheck').
+        status: HTTP-статус ответа.
+        seconds: Длительность обработки в секундах.
+    """
+    status_label = str(status)
+    HTTP_REQUESTS.labels(method, route, status_label).inc()
+    HTTP_REQUEST_DURATION.labels(method, route, status_label).observe(seconds)
+
+
+def observe_ingest(events: int, outcome: str = "success") -> None:
+    """Функция учёта обработанной пачки событий.
+
+    Args:
+        events: Количество событий в пачке.
+        outcome: Результат обработки пачки.
+    """
+    INGEST_BATCHES.labels(outcome).inc()
+    if outcome == "success":
+        INGEST_EVENTS.inc(events)
+
+
+def observe_compaction(dropped: dict[str, int]) -> None:
+    """Функция учёта событий, отброшенных сжатием пачки.
+
+    Args:
+        dropped: Количество отброшенных событий по причинам.
+    """
+    for reason, events in dropped.items():
+        INGEST_COMPACTED.labels(reason).inc(events)
+
+
+def observe_cache(cache: str, hit: bool) -> None:
+    """Функция учёта обращения к кэшу.
+
+    Args:
+        cache: Имя кэша.
+        hit: Признак попадания в кэш.
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def observed_lru_cache(cache: str, maxsize: int) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Функция построения декоратора ``lru_cache`` с учётом обращений к кэшу.
+
+    Промах определяется по счётчику промахов ``cache_info`` до и после вызова: при одновременных
+    вызовах из разных потоков попадание может быть учтено как промах.
+
+    Args:
+        cache: Имя кэша в метрике cache_requests_total.
+        maxsize: Размер кэша.
+
+    Returns:
+        Декоратор функции; ``cache_info`` и ``cache_clear`` доступны у результата.
+    """
+
+    def decorator(function: Callable[..., T]) -> Callable[..., T]:
+        cached = lru_cache(maxsize=maxsize)(function)
+        hits, misses = CACHE_REQUESTS.labels(cache, "hit"), CACHE_REQUESTS.labels(cache, "miss")
+
+        @wraps(function)
+        def wrapper(*args, **kwargs) -> T:
+            before = cached.cache_info().misses
+            result = cached(*args, **kwargs)
+            (misses if cached.cache_info().misses != before else hits).inc()
+            return result
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+
+    return decorator
+
+
+def observe_rate_limit(tier: str, newly_limited: bool) -> None:
+    """Функция учёта запроса, отклонённого ограничителем.
+
+    Идентификаторы пользователей не используются как метки (неограниченная кардинальность):
+    попадание пользователя под ограничение учитывается отдельным счётчиком.
+
+    Args:
+        tier: Уровень ограничителя, отклонивший запрос.
+        newly_limited: Пользователь только что попал под ограничение.
+    """
+    RATE_LIMITED_REQUESTS.labels(tier).inc()
+    if newly_limited:
+        RATE_LIMITED_USERS.labels(tier).inc()
+
+
+def observe_shed(reason: str) -> None:
+    """Функция учёта запроса, отклонённого контролем допуска.
+
+    Args:
+        reason: Причина перегрузки.
+    """
+    ADMISSION_SHED_REQUESTS.labels(reason).inc()
+
+
+def observe_pool_wait(seconds: float) -> None:
+    """Функция учёта ожидания соединения из пула.
+
+    Args:
+        seconds: Время получения соединения в секундах.
+    """
+    DB_POOL_WAIT.observe(seconds)
+
+
+def observe_live_connection(change: int) -> None:
+    """Функция учёта открытия или закрытия потока живого использования.
+
+    Args:
+        change: 1 - поток открыт, -1 - закрыт.
+    """
+    LIVE_CONNECTIONS.inc(change)
+
+
+def observe_live_update() -> None:
+    """Функция учёта отправленного обновления живого использования."""
+    LIVE_UPDATES.inc()
+
+
+def observe_spool(outcome: str, batches: int = 1) -> None:
+    """Функция учёта пачек событий локальной очереди.
+
+    Args:
+        outcome: Результат: spooled - записана, replayed - воспроизведена, rejected - не поместилась.
+        batches: Количество пачек.
+    """
+    SPOOL_BATCHES.labels(outcome).inc(batches)
+
+
+def observe_spool_size(size: int) -> None:
+    """Функция учёта объёма невоспроизведённых записей локальной очереди воркера.
+
+    Args:
+        size: Объём в байтах.
+    """
+    SPOOL_BYTES.set(size)
+
+
+def observe_dropped_log_record() -> None:
+    """Функция учёта записи лога, отброшенной при переполнении очереди, наблюдатель для setup_logging."""
+    LOG_RECORDS_DROPPED.inc()
+
+
+def observe_query(fingerprint: str, seconds: float, rows: int) -> None:
+    """Функция учёта выполненного SQL-запроса, наблюдатель для QueryInstrumentation.
+
+    Args:
+        fingerprint: Нормализованный отпечаток запроса.
+        seconds: Длительность выполнения в секундах.
+        rows: Количество затронутых строк, отрицательное значение - неизвестно.
+    """
+    DB_QUERY_DURATION.labels(fingerprint).observe(seconds)
+    if rows > 0:
+        DB_QUERY_ROWS.labels(fingerprint).inc(rows)
+
+
+def _refresh_pool_size() -> None:
+    """Функция установки размера пулов по engine процесса, не закрытым через ``dispose``."""
+    with _pools_lock:
+        engines = list(_pool_engines.values())
+    sizes = (getattr(engine.pool, "size", None) for engine in engines)
+    DB_POOL_SIZE.set(sum(size() for size in sizes if callable(size)))
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """Функция подключения метрик пула соединений к engine.
+
+    Размер пула не накапливается при каждом создании engine, а вычисляется по действующим engine
+    процесса: закрытый engine (``dispose``) перестаёт учитываться.
+
+    Args:
+        engine: Асинхронный engine SQLAlchemy.
+    """
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+    with _pools_lock:
+        _pool_engines[id(sync_engine)] = sync_engine
+    _refresh_pool_size()
+
+    def _on_disposed(disposed: Engine) -> None:
+        with _pools_lock:
+            _pool_engines.pop(id(disposed), None)
+        _refresh_pool_size()
+
+    event.listen(sync_engine, "engine_disposed", _on_disposed)
+
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    def _on_checkin(dbapi_connection, connection_record) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+
+    event.listen(pool, "checkout", _on_checkout)
+    event.listen(pool, "checkin", _on_checkin)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Функция формирования метрик в текстовом формате Prometheus.
+
+    Если задан PROMETHEUS_MULTIPROC_DIR, метрики собираются со всех процессов воркеров Gunicorn.
+
+    Returns:
+        Тело ответа и его Content-Type.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
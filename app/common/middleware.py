@@ -1,42 +1,115 @@
-import time
 import logging
-from fastapi import Request
-from fastapi.responses import Response
+import random
+from time import perf_counter_ns
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import UNMATCHED_ROUTE, observe_request
 
 logger = logging.getLogger(__name__)
 
-_REQUEST_LOG_FORMAT = "Method: {method} | URL: {url} | Duration: {duration:.5f}s"
+_REQUEST_LOG_FORMAT = "Response: %d | Method: %s | URL: %s | Duration: %.5fs"
+_ERROR_LOG_FORMAT = "Error: %s | Method: %s | URL: %s | Duration: %.5fs"
+
+
+class RequestLoggingMiddleware:
+    """Класс ASGI Middleware логирования HTTP-запросов и учёта их в метриках.
+
+    В отличие от ``BaseHTTPMiddleware`` не создаёт отдельную задачу и обёртку потока ответа на каждый
+    запрос: статус перехватывается из сообщения ``http.response.start``, длительность измеряется через
+    ``perf_counter_ns``. Успешные запросы логируются выборочно, ошибки и медленные запросы - всегда.
+    URL формируется только при фактической записи в лог.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, slow_request_threshold: float = 1.0) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            app: Следующее ASGI-приложение в цепочке.
+            sample_rate: Доля успешных запросов (0..1), попадающих в лог.
+            slow_request_threshold: Порог медленного запроса в секундах.
+        """
+        self.app = app
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.slow_request_threshold_ns = int(slow_request_threshold * 1e9)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = perf_counter_ns()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            duration_ns = perf_counter_ns() - start
+            observe_request(scope["method"], _route_template(scope), 500, duration_ns / 1e9)
+            logger.error(_ERROR_LOG_FORMAT, e, scope["method"], _request_url(scope), duration_ns / 1e9)
+            raise
 
-async def log_requests_middleware(request: Request, call_next):
-    """Метод для Middleware логирования всех входящих HTTP-запросов и исходящих ответов.
+        duration_ns = perf_counter_ns() - start
+        observe_request(scope["method"], _route_template(scope), status_code, duration_ns / 1e9)
+        self._log_response(scope, status_code, duration_ns)
 
-    Логирует метод и URL каждого запроса до его обработки, а также статус-код,
-    метод, URL и длительность обработки после получения ответа. В случае возникновения
-    исключения во время обработки запроса, логирует ошибку с теми же метаданными.
+    def _log_response(self, scope: Scope, status_code: int, duration_ns: int) -> None:
+        """Метод записи завершённого запроса в лог с учётом выборки.
+
+        Args:
+            scope: ASGI scope запроса.
+            status_code: HTTP-статус ответа.
+            duration_ns: Длительность обработки в наносекундах.
+        """
+        if status_code >= 500:
+            level = logging.ERROR
+        elif duration_ns >= self.slow_request_threshold_ns:
+            level = logging.WARNING
+        elif status_code >= 400 or self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            level = logging.INFO
+        else:
+            return
+
+        if logger.isEnabledFor(level):
+            logger.log(
+                level, _REQUEST_LOG_FORMAT, status_code, scope["method"], _request_url(scope), duration_ns / 1e9
+            )
+
+
+def _request_url(scope: Scope) -> str:
+    """Метод формирования URL запроса из ASGI scope.
 
     Args:
-        request: Объект входящего HTTP-запроса.
-        call_next: Функция для передачи запроса следующему обработчику в цепочке middleware.
+        scope: ASGI scope запроса.
 
     Returns:
-        Объект HTTP-ответа после обработки запроса.
+        URL запроса вида 'http://host/path?query'.
+    """
+    host = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"host"), None)
+    if host is None and scope.get("server"):
+        server_host, port = scope["server"]
+        host = server_host if port in (80, 443, None) else f"{server_host}:{port}"
+    url = f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}{scope['path']}"
+    query_string = scope.get("query_string")
+    if query_string:
+        url = f"{url}?{query_string.decode('latin-1')}"
+    return url
 
-    Raises:
-        Любое исключение, возникшее при обработке запроса, будет залогировано и повторно выброшено.
+
+def _route_template(scope: Scope) -> str:
+    """Метод получения шаблона маршрута запроса для меток метрик.
+
+    Args:
+        scope: ASGI scope запроса после обработки роутером.
+
+    Returns:
+        Шаблон маршрута или UNMATCHED_ROUTE, если маршрут не найден.
     """
-    logger.info(f"Request: {request.method} {request.url}")
-
-    start_time = time.time()
-
-    try:
-        response: Response = await call_next(request)
-        process_time = time.time() - start_time
-        log_message = _REQUEST_LOG_FORMAT.format(method=request.method, url=request.url, duration=process_time)
-        logger.info(f"Response: {response.status_code} | {log_message}")
-        return response
-    except Exception as e:
-        process_time = time.time() - start_time
-        log_message = _REQUEST_LOG_FORMAT.format(method=request.method, url=request.url, duration=process_time)
-        logger.error(f"Error: {e} | {log_message}")
-        raise
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
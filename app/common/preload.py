@@ -0,0 +1,65 @@
+import importlib
+import logging
+import pkgutil
+
+from fastapi import FastAPI
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import configure_mappers
+
+from ..config import DATABASE_URL
+from ..db.session.provider import reset_manager_after_fork
+from .logging import restart_queue_listener
+
+logger = logging.getLogger(__name__)
+
+# Пакеты, модули которых импортируются до fork: модели и схемы с их валидаторами
+_WARM_UP_PACKAGES = ("app.schemas", "app.db.models")
+
+
+def _import_package(name: str) -> None:
+    """Функция импорта всех модулей пакета.
+
+    Args:
+        name: Имя пакета.
+    """
+    package = importlib.import_module(name)
+    for module in pkgutil.walk_packages(package.__path__, prefix=f"{name}."):
+        importlib.import_module(module.name)
+
+
+def _warm_up_database_driver() -> None:
+    """Функция загрузки диалекта и драйвера базы данных без создания engine и соединений."""
+    try:
+        dialect = make_url(DATABASE_URL).get_dialect()
+        dialect.import_dbapi()
+    except Exception as e:
+        logger.warning(f"Database driver warm-up skipped: {e}")
+
+
+def warm_up(application: FastAPI) -> None:
+    """Функция прогрева приложения в мастер-процессе перед fork воркеров.
+
+    Всё, что построено здесь, воркеры получают через copy-on-write и не строят повторно:
+    модели Pydantic со скомпилированными валидаторами, мапперы SQLAlchemy, диалект и драйвер
+    базы данных, схема OpenAPI и стек middleware. Соединения и фоновые задачи не создаются.
+
+    Args:
+        application: Приложение FastAPI.
+    """
+    for package in _WARM_UP_PACKAGES:
+        _import_package(package)
+    configure_mappers()
+    _warm_up_database_driver()
+    application.openapi()
+    if application.middleware_stack is None:
+        application.middleware_stack = application.build_middleware_stack()
+
+
+def after_fork() -> None:
+    """Функция восстановления ресурсов процесса в воркере после fork.
+
+    Пул соединений, унаследованный от мастер-процесса, отбрасывается, а фоновый поток записи
+    логов запускается заново.
+    """
+    reset_manager_after_fork()
+    restart_queue_listener()
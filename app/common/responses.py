@@ -0,0 +1,110 @@
+import json
+from typing import Any
+
+from fastapi import Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ставится вместе с приложением
+    orjson = None
+
+
+def _orjson_default(value: Any) -> Any:
+    """Функция приведения типов, которые orjson не поддерживает напрямую.
+
+    Модели Pydantic выгружаются в python-режиме: даты, UUID и вложенные структуры orjson
+    сериализует сам, что заметно быстрее режима 'json'.
+
+    Args:
+        value: Значение.
+
+    Returns:
+        Представление значения, поддерживаемое orjson.
+    """
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return jsonable_encoder(value)
+
+
+def dumps(content: Any) -> bytes:
+    """Функция сериализации в JSON через orjson, при его отсутствии - через стандартный json.
+
+    Args:
+        content: Сериализуемые данные; поддерживаются модели Pydantic, UUID, datetime и dataclass.
+
+    Returns:
+        JSON в байтах.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, default=jsonable_encoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Класс JSON-ответа с сериализацией через orjson."""
+
+    def render(self, content: Any) -> bytes:
+        """Метод сериализации тела ответа.
+
+        Args:
+            content: Тело ответа.
+
+        Returns:
+            JSON в байтах.
+        """
+        return dumps(content)
+
+
+def prevalidated_response(content: Any, status_code: int = status.HTTP_200_OK, **kwargs) -> FastJSONResponse:
+    """Функция построения ответа из уже проверенных данных.
+
+    Возврат экземпляра Response из обработчика отключает повторную валидацию через response_model:
+    данные, собранные из моделей Pydantic или из базы данных, сериализуются сразу.
+
+    Args:
+        content: Проверенные данные (модели Pydantic, словари, списки).
+        status_code: HTTP-статус ответа.
+        **kwargs: Дополнительные аргументы FastJSONResponse (headers, background).
+
+    Returns:
+        JSON-ответ.
+    """
+    return FastJSONResponse(content=content, status_code=status_code, **kwargs)
+
+
+async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    """Обработчик HTTPException с сериализацией через FastJSONResponse.
+
+    Args:
+        request: Объект HTTP-запроса.
+        exc: Исключение.
+
+    Returns:
+        JSON-ответ с полем detail, для статусов без тела - пустой ответ.
+    """
+    headers = getattr(exc, "headers", None)
+    if exc.status_code in (status.HTTP_204_NO_CONTENT, status.HTTP_304_NOT_MODIFIED):
+        return Response(status_code=exc.status_code, headers=headers)
+    return FastJSONResponse(content={"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> FastJSONResponse:
+    """Обработчик ошибок валидации запроса с сериализацией через FastJSONResponse.
+
+    Args:
+        request: Объект HTTP-запроса.
+        exc: Исключение валидации.
+
+    Returns:
+        JSON-ответ HTTP 422 со списком ошибок.
+    """
+    return FastJSONResponse(
+        content={"detail": jsonable_encoder(exc.errors())}, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
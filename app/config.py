@@ -7,4 +7,106 @@ POSTGRES_DB: str = os.getenv("POSTGRES_DB", "mindfulweb")
 DATABASE_URL: str = os.getenv(
     "DATABASE_URL", f"postgresql+asyncpg://${POSTGRES_USER}:${POSTGRES_PASSWORD}@db:5432/${POSTGRES_DB}"
 )
+# Карта шардов "имя=URL,имя=URL"; пустая - одна база данных DATABASE_URL
+DATABASE_SHARDS: str = os.getenv("DATABASE_SHARDS", "")
+DATABASE_SHARD_VNODES: int = int(os.getenv("DATABASE_SHARD_VNODES", "128"))
 REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+DB_QUERY_INSTRUMENTATION: bool = os.getenv("DB_QUERY_INSTRUMENTATION", "false").lower() in ("1", "true", "yes")
+DB_QUERY_SAMPLE_RATE: float = float(os.getenv("DB_QUERY_SAMPLE_RATE", "1.0"))
+DB_SLOW_QUERY_THRESHOLD: float = float(os.getenv("DB_SLOW_QUERY_THRESHOLD", "0.5"))
+
+REQUEST_LOG_SAMPLE_RATE: float = float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0"))
+REQUEST_LOG_SLOW_THRESHOLD: float = float(os.getenv("REQUEST_LOG_SLOW_THRESHOLD", "1.0"))
+
+LOG_QUEUE: bool = os.getenv("LOG_QUEUE", "false").lower() in ("1", "true", "yes")
+LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_JSON: bool = os.getenv("LOG_FORMAT", "text").lower() == "json"
+
+HEALTHCHECK_INTERVAL: float = float(os.getenv("HEALTHCHECK_INTERVAL", "5.0"))
+HEALTHCHECK_TIMEOUT: float = float(os.getenv("HEALTHCHECK_TIMEOUT", "2.0"))
+HEALTHCHECK_POOL_SATURATION: float = float(os.getenv("HEALTHCHECK_POOL_SATURATION", "0.9"))
+
+CELERY_RESULT_EXPIRES: int = int(os.getenv("CELERY_RESULT_EXPIRES", "3600"))
+CELERY_VISIBILITY_TIMEOUT: int = int(os.getenv("CELERY_VISIBILITY_TIMEOUT", "7200"))
+
+AGGREGATION_SHARDS: int = int(os.getenv("AGGREGATION_SHARDS", "8"))
+AGGREGATION_INTERVAL: float = float(os.getenv("AGGREGATION_INTERVAL", "60"))
+AGGREGATION_LEASE_TTL: float = float(os.getenv("AGGREGATION_LEASE_TTL", "300"))
+AGGREGATION_BATCH_SIZE: int = int(os.getenv("AGGREGATION_BATCH_SIZE", "10000"))
+AGGREGATION_MAX_BATCHES: int = int(os.getenv("AGGREGATION_MAX_BATCHES", "10"))
+AGGREGATION_REWIND: int = int(os.getenv("AGGREGATION_REWIND", "1000"))
+AGGREGATION_MAX_GAP: float = float(os.getenv("AGGREGATION_MAX_GAP", "1800"))
+AGGREGATION_OVERLAP_RULE: str = os.getenv("AGGREGATION_OVERLAP_RULE", "latest")
+
+EVENTS_COMPACTION_ENABLED: bool = os.getenv("EVENTS_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+EVENTS_COMPACTION_MERGE_GAP: float = float(os.getenv("EVENTS_COMPACTION_MERGE_GAP", "0"))
+
+ORPHAN_GC_INTERVAL: float = float(os.getenv("ORPHAN_GC_INTERVAL", "86400"))
+ORPHAN_GC_GRACE_DAYS: int = int(os.getenv("ORPHAN_GC_GRACE_DAYS", "30"))
+ORPHAN_GC_MAX_EVENTS: int = int(os.getenv("ORPHAN_GC_MAX_EVENTS", "2"))
+ORPHAN_GC_BATCH_SIZE: int = int(os.getenv("ORPHAN_GC_BATCH_SIZE", "1000"))
+ORPHAN_GC_MAX_BATCHES: int = int(os.getenv("ORPHAN_GC_MAX_BATCHES", "50"))
+
+EVENT_BLOCKS_ENABLED: bool = os.getenv("EVENT_BLOCKS_ENABLED", "false").lower() in ("1", "true", "yes")
+EVENT_BLOCKS_INTERVAL: float = float(os.getenv("EVENT_BLOCKS_INTERVAL", "3600"))
+EVENT_BLOCKS_CLOSE_AFTER: float = float(os.getenv("EVENT_BLOCKS_CLOSE_AFTER", "172800"))
+EVENT_BLOCKS_BATCH_SIZE: int = int(os.getenv("EVENT_BLOCKS_BATCH_SIZE", "100"))
+EVENT_BLOCKS_MAX_BATCHES: int = int(os.getenv("EVENT_BLOCKS_MAX_BATCHES", "50"))
+# Наибольшее количество дней пользователя, сжимаемых в одной транзакции пакета
+EVENT_BLOCKS_MAX_DAYS: int = int(os.getenv("EVENT_BLOCKS_MAX_DAYS", "31"))
+
+RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_RATE: float = float(os.getenv("RATE_LIMIT_RATE", "20"))
+RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "300"))
+RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_REDIS: bool = os.getenv("RATE_LIMIT_REDIS", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_FLEET_RATE: float = float(os.getenv("RATE_LIMIT_FLEET_RATE", "50"))
+RATE_LIMIT_FLEET_BURST: float = float(os.getenv("RATE_LIMIT_FLEET_BURST", "600"))
+
+ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_MAX_IN_FLIGHT: int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_POOL_WAIT_THRESHOLD: float = float(os.getenv("ADMISSION_POOL_WAIT_THRESHOLD", "0.5"))
+ADMISSION_POOL_WAIT_HALF_LIFE: float = float(os.getenv("ADMISSION_POOL_WAIT_HALF_LIFE", "5.0"))
+ADMISSION_RETRY_AFTER: int = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+ADMISSION_EXEMPT_PATHS: tuple[str, ...] = tuple(
+    path.strip()
+    for path in os.getenv("ADMISSION_EXEMPT_PATHS", "/api/v1/healthcheck,/metrics,/api/v1/live").split(",")
+    if path
+)
+
+FLUSH_INTERVAL_MIN: float = float(os.getenv("FLUSH_INTERVAL_MIN", "10"))
+FLUSH_INTERVAL_MAX: float = float(os.getenv("FLUSH_INTERVAL_MAX", "120"))
+FLUSH_BATCH_MIN: int = int(os.getenv("FLUSH_BATCH_MIN", "20"))
+FLUSH_BATCH_MAX: int = int(os.getenv("FLUSH_BATCH_MAX", "100"))
+FLUSH_JITTER_MIN: float = float(os.getenv("FLUSH_JITTER_MIN", "0.1"))
+FLUSH_JITTER_MAX: float = float(os.getenv("FLUSH_JITTER_MAX", "0.5"))
+
+# Без Redis изменения доходят только до подписчиков воркера, принявшего события: false допустимо
+# только при одном воркере (GUNICORN_WORKERS=1)
+LIVE_REDIS: bool = os.getenv("LIVE_REDIS", "true").lower() in ("1", "true", "yes")
+LIVE_MAX_CONNECTIONS: int = int(os.getenv("LIVE_MAX_CONNECTIONS", "10000"))
+LIVE_MIN_INTERVAL: float = float(os.getenv("LIVE_MIN_INTERVAL", "1.0"))
+LIVE_HEARTBEAT: float = float(os.getenv("LIVE_HEARTBEAT", "15"))
+
+SKETCH_ENABLED: bool = os.getenv("SKETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# Оценки в памяти процесса видят только события своего воркера: false допустимо только при одном
+# воркере (GUNICORN_WORKERS=1)
+SKETCH_REDIS: bool = os.getenv("SKETCH_REDIS", "true").lower() in ("1", "true", "yes")
+SKETCH_FLUSH_INTERVAL: float = float(os.getenv("SKETCH_FLUSH_INTERVAL", "10"))
+SKETCH_MAX_PENDING: int = int(os.getenv("SKETCH_MAX_PENDING", "50000"))
+SKETCH_TOP_CAPACITY: int = int(os.getenv("SKETCH_TOP_CAPACITY", "1000"))
+SKETCH_CMS_WIDTH: int = int(os.getenv("SKETCH_CMS_WIDTH", "4096"))
+SKETCH_CMS_DEPTH: int = int(os.getenv("SKETCH_CMS_DEPTH", "4"))
+SKETCH_HLL_PRECISION: int = int(os.getenv("SKETCH_HLL_PRECISION", "12"))
+SKETCH_RETENTION_DAYS: int = int(os.getenv("SKETCH_RETENTION_DAYS", "35"))
+
+DB_BREAKER_FAILURES: int = int(os.getenv("DB_BREAKER_FAILURES", "5"))
+DB_BREAKER_RESET_TIMEOUT: float = float(os.getenv("DB_BREAKER_RESET_TIMEOUT", "10"))
+
+SPOOL_ENABLED: bool = os.getenv("SPOOL_ENABLED", "false").lower() in ("1", "true", "yes")
+SPOOL_DIR: str = os.getenv("SPOOL_DIR", "/var/spool/mindful-web")
+SPOOL_MAX_BYTES: int = int(os.getenv("SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+SPOOL_SYNC_INTERVAL: float = float(os.getenv("SPOOL_SYNC_INTERVAL", "0.005"))
+SPOOL_REPLAY_INTERVAL: float = float(os.getenv("SPOOL_REPLAY_INTERVAL", "5"))
+SPOOL_REPLAY_BATCH: int = int(os.getenv("SPOOL_REPLAY_BATCH", "500"))
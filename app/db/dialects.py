@@ -0,0 +1,34 @@
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+
+from .exceptions import DatabaseManagerException, DatabaseManagerMessages
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(dialect_name: str, table: Table) -> Insert:
+    """Функция построения INSERT с поддержкой ON CONFLICT для диалекта базы данных.
+
+    PostgreSQL и SQLite поддерживают ``on_conflict_do_update`` и ``on_conflict_do_nothing``
+    с одинаковой сигнатурой, но через разные конструкции insert.
+
+    Args:
+        dialect_name: Имя диалекта (``session.bind.dialect.name``).
+        table: Таблица или ORM-модель.
+
+    Returns:
+        Конструкция INSERT диалекта.
+
+    Raises:
+        DatabaseManagerException: Если диалект не поддерживается.
+    """
+    try:
+        return _INSERTS[dialect_name](table)
+    except KeyError:
+        supported = ", ".join(sorted(_INSERTS))
+        message = DatabaseManagerMessages.UNSUPPORTED_DIALECT_ERROR.format(dialect=dialect_name, supported=supported)
+        raise DatabaseManagerException(message)
@@ -23,3 +23,6 @@ class DatabaseManagerMessages(StringEnum):
     UNEXPECTED_SESSION_ERROR: ExceptionMessage = "Unexpected session error: {error}!"
     ROLLBACK_FAILED_ERROR: ExceptionMessage = "Failed to rollback session: {error}!"
     CLOSE_FAILED_ERROR: ExceptionMessage = "Failed to close session gracefully: {error}!"
+    UNSUPPORTED_DIALECT_ERROR: ExceptionMessage = "Unsupported database dialect '{dialect}'. Supported: {supported}!"
+    EMPTY_SHARD_MAP_ERROR: ExceptionMessage = "Database shard map must contain at least one shard!"
+    INVALID_SHARD_MAP_ERROR: ExceptionMessage = "Invalid database shard '{item}': expected unique 'name=url'!"
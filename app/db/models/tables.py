@@ -1,5 +1,16 @@
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, Date, ForeignKey, CheckConstraint
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    DateTime,
+    Date,
+    ForeignKey,
+    CheckConstraint,
+    Index,
+    LargeBinary,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 
 from .base import Base
@@ -28,6 +39,12 @@ class User(Base):
     deleted_at = Column(
         DateTime(timezone=True), nullable=True, comment="Время soft-delete (если не NULL — пользователь удалён)"
     )
+    time_zone = Column(String(64), nullable=True, comment="Часовой пояс IANA для границ дней сводок (NULL — UTC)")
+    summaries_time_zone = Column(
+        String(64),
+        nullable=True,
+        comment="Часовой пояс IANA построенных сводок (NULL — UTC); отличие от time_zone - ожидается пересчёт",
+    )
 
 
 class DomainCategory(Base):
@@ -76,8 +93,58 @@ class AttentionEvent(Base):
         comment="Тип события внимания: active (пользователь перешёл на вкладку) или inactive (покинул вкладку)",
     )
     timestamp = Column(DateTime(timezone=True), nullable=False, comment="Точное время события в UTC (от браузера)")
+    device_id = Column(
+        String(64), nullable=True, comment="Идентификатор устройства (экземпляра расширения); NULL - не передан"
+    )
+
+    __table_args__ = (
+        CheckConstraint(event_type.in_(["active", "inactive"]), name="valid_attention_event_type"),
+        # Ключ keyset-страниц (user_id, timestamp, id); в PostgreSQL индекс покрывающий - страница
+        # событий читается index-only scan без обращения к таблице
+        Index(
+            "ix_attention_events_user_timestamp_id",
+            "user_id",
+            "timestamp",
+            "id",
+            postgresql_include=["domain", "event_type", "device_id"],
+        ),
+        # События вставляются в порядке времени: BRIN по timestamp занимает килобайты и отсекает
+        # страницы таблицы в запросах по времени без пользователя (агрегация, сжатие)
+        Index("ix_attention_events_timestamp_brin", "timestamp", postgresql_using="brin").ddl_if(dialect="postgresql"),
+    )
+
 
-    __table_args__ = (CheckConstraint(event_type.in_(["active", "inactive"]), name="valid_attention_event_type"),)
+class EventBlock(Base):
+    """Таблица сжатых событий внимания пользователя за закрытый день.
+
+    Заменяет строки attention_events пользователя за день одной строкой; формат блока описан
+    в ``app.services.blocks.codec``. События, пришедшие после сжатия, хранятся строками
+    attention_events до следующего сжатия.
+    """
+
+    __tablename__ = "event_blocks"
+
+    user_id = Column(
+        PG_UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True, comment="ID пользователя, чьи события в блоке"
+    )
+    date = Column(Date, primary_key=True, comment="День событий блока (UTC)")
+    event_count = Column(Integer, nullable=False, comment="Количество событий в блоке")
+    data = Column(LargeBinary, nullable=False, comment="Закодированный блок событий")
+
+
+class SpoolReplayedBatch(Base):
+    """Таблица пачек локальной очереди, загруженных в базу данных.
+
+    Строка пачки вставляется в транзакции загрузки её событий: пачка, загруженная повторно после
+    аварии между фиксацией и сдвигом очереди, пропускается. Строки старше срока хранения удаляются.
+    """
+
+    __tablename__ = "spool_replayed_batches"
+
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, comment="Идентификатор пачки локальной очереди")
+    replayed_at = Column(DateTime(timezone=True), nullable=False, comment="Время загрузки пачки (UTC)")
+
+    __table_args__ = (Index("ix_spool_replayed_batches_replayed_at", "replayed_at"),)
 
 
 class DailyDomainSummary(Base):
@@ -88,9 +155,15 @@ class DailyDomainSummary(Base):
     id = Column(Integer, primary_key=True, comment="Автоинкрементный ID записи")
     user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, comment="ID пользователя")
     domain = Column(String(255), nullable=False, comment="Домен, по которому собрана статистика")
-    date = Column(Date, nullable=False, comment="Дата отчёта (без времени, в UTC)")
+    date = Column(
+        Date,
+        nullable=False,
+        comment="Дата отчёта по местному времени пользователя (users.time_zone, по умолчанию UTC)",
+    )
     total_seconds = Column(Integer, nullable=False, comment="Суммарное время активного пребывания в секундах")
     active_count = Column(Integer, nullable=False, comment="Количество переходов на домен за день")
     generated_at = Column(
         DateTime(timezone=True), nullable=False, server_default="now()", comment="Время генерации отчёта (UTC)"
     )
+
+    __table_args__ = (UniqueConstraint("user_id", "domain", "date", name="uq_daily_domain_summary_user_domain_date"),)
@@ -0,0 +1,278 @@
+import random
+import re
+import threading
+from bisect import bisect_left
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from logging import Logger
+from time import perf_counter_ns, time
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Границы корзин гистограммы латентности в секундах
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+# Отпечаток, под которым учитываются запросы сверх лимита уникальных отпечатков
+OVERFLOW_FINGERPRINT = "__other__"
+
+_START_ATTRIBUTE = "_mindful_query_start_ns"
+_SAMPLED_ATTRIBUTE = "_mindful_query_sampled"
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\([^)]+\)s|\$\d+|(?<![:\w]):[A-Za-z_]\w*|\?|%s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """Функция построения нормализованного отпечатка SQL-запроса.
+
+    Литералы и плейсхолдеры заменяются на ``?``, списки значений в ``IN (...)`` и многострочных
+    ``VALUES`` схлопываются, пробельные символы сводятся к одному пробелу. Запросы, отличающиеся
+    только параметрами, получают одинаковый отпечаток.
+
+    Args:
+        statement: Текст SQL-запроса.
+
+    Returns:
+        Нормализованный отпечаток запроса.
+    """
+    fingerprint = _STRING_LITERAL.sub("?", statement)
+    fingerprint = _PLACEHOLDER.sub("?", fingerprint)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _WHITESPACE.sub(" ", fingerprint).strip()
+    fingerprint = _IN_LIST.sub("(?)", fingerprint)
+    return _VALUES_LIST.sub(r"\1", fingerprint)
+
+
+@dataclass
+class QueryStats:
+    """Накопленная статистика по одному отпечатку запроса."""
+
+    fingerprint: str
+    buckets: tuple[float, ...]
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    bucket_counts: list[int] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if not self.bucket_counts:
+            self.bucket_counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float, rows: int) -> None:
+        """Метод учёта одного выполнения запроса.
+
+        Args:
+            seconds: Длительность выполнения в секундах.
+            rows: Количество затронутых строк, отрицательное значение - неизвестно.
+        """
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        if rows > 0:
+            self.rows += rows
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+
+    def copy(self) -> "QueryStats":
+        """Метод получения независимой копии статистики.
+
+        Returns:
+            Копия статистики.
+        """
+        return QueryStats(
+            fingerprint=self.fingerprint,
+            buckets=self.buckets,
+            count=self.count,
+            total_seconds=self.total_seconds,
+            max_seconds=self.max_seconds,
+            rows=self.rows,
+            bucket_counts=list(self.bucket_counts),
+        )
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    """Запись журнала медленных запросов."""
+
+    fingerprint: str
+    seconds: float
+    rows: int
+    occurred_at: float
+
+
+class QueryInstrumentation:
+    """Класс инструментирования SQL-запросов через события engine.
+
+    Подписывается на ``before_cursor_execute``/``after_cursor_execute`` и собирает гистограмму
+    латентности и количество строк по нормализованным отпечаткам запросов, а также журнал медленных
+    запросов. Параметры запросов не сохраняются.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        sample_rate: float = 1.0,
+        slow_query_threshold: float = 0.5,
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        max_fingerprints: int = 500,
+        slow_log_size: int = 100,
+        observer: Callable[[str, float, int], None] | None = None,
+        cache_observer: Callable[[bool], None] | None = None,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            logger: Логгер для журнала медленных запросов.
+            sample_rate: Доля выполнений (0..1), попадающих в гистограмму.
+            slow_query_threshold: Порог медленного запроса в секундах, в журнал попадают все медленные запросы.
+            buckets: Границы корзин гистограммы в секундах.
+            max_fingerprints: Предел уникальных отпечатков, остальные учитываются как OVERFLOW_FINGERPRINT.
+            slow_log_size: Размер журнала медленных запросов.
+            observer: Функция, вызываемая для каждого учтённого выполнения (отпечаток, секунды, строки).
+            cache_observer: Функция, вызываемая для каждого обращения к кэшу отпечатков (признак попадания).
+        """
+        self._logger = logger
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.slow_query_threshold = slow_query_threshold
+        self.buckets = tuple(sorted(buckets))
+        self._max_fingerprints = max_fingerprints
+        self._stats: dict[str, QueryStats] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._slow_queries: deque[SlowQuery] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self._engines: list[Engine] = []
+        self._observer = observer
+        self._cache_observer = cache_observer
+
+    def attach(self, engine: AsyncEngine | Engine) -> None:
+        """Метод подключения инструментирования к engine.
+
+        Args:
+            engine: Асинхронный или синхронный engine SQLAlchemy.
+        """
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.append(sync_engine)
+
+    def detach(self) -> None:
+        """Метод отключения инструментирования от всех подключенных engine."""
+        for sync_engine in self._engines:
+            event.remove(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        self._engines.clear()
+
+    def _fingerprint(self, statement: str) -> str:
+        """Метод получения отпечатка запроса с кэшированием по тексту запроса.
+
+        Args:
+            statement: Текст SQL-запроса.
+
+        Returns:
+            Нормализованный отпечаток.
+        """
+        fingerprint = self._fingerprints.get(statement)
+        if self._cache_observer is not None:
+            self._cache_observer(fingerprint is not None)
+        if fingerprint is None:
+            fingerprint = normalize_statement(statement)
+            if len(self._fingerprints) < self._max_fingerprints * 4:
+                self._fingerprints[statement] = fingerprint
+        return fingerprint
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is None:
+            return
+        setattr(context, _SAMPLED_ATTRIBUTE, self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+        setattr(context, _START_ATTRIBUTE, perf_counter_ns())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        start = getattr(context, _START_ATTRIBUTE, None)
+        if start is None:
+            return
+        seconds = (perf_counter_ns() - start) / 1e9
+        sampled = getattr(context, _SAMPLED_ATTRIBUTE, False)
+        slow = seconds >= self.slow_query_threshold
+        if not (sampled or slow):
+            return
+
+        rows = getattr(cursor, "rowcount", -1)
+        rows = rows if isinstance(rows, int) else -1
+        fingerprint = self._fingerprint(statement)
+        if sampled:
+            self.record(fingerprint, seconds, rows)
+        if slow:
+            self._slow_queries.append(SlowQuery(fingerprint, seconds, rows, time()))
+            self._logger.warning("Slow query (%.3fs, rows=%d): %s", seconds, rows, fingerprint)
+
+    def record(self, fingerprint: str, seconds: float, rows: int = -1) -> None:
+        """Метод учёта выполнения запроса в гистограмме.
+
+        Args:
+            fingerprint: Отпечаток запроса.
+            seconds: Длительность выполнения в секундах.
+            rows: Количество затронутых строк.
+        """
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                if len(self._stats) >= self._max_fingerprints:
+                    fingerprint = OVERFLOW_FINGERPRINT
+                stats = self._stats.setdefault(fingerprint, QueryStats(fingerprint, self.buckets))
+            stats.observe(seconds, rows)
+        if self._observer is not None:
+            self._observer(stats.fingerprint, seconds, rows)
+
+    def snapshot(self) -> dict[str, QueryStats]:
+        """Метод получения копии накопленной статистики.
+
+        Returns:
+            Словарь отпечаток -> статистика.
+        """
+        with self._lock:
+            return {fingerprint: stats.copy() for fingerprint, stats in self._stats.items()}
+
+    def slow_queries(self) -> list[SlowQuery]:
+        """Метод получения журнала медленных запросов.
+
+        Returns:
+            Медленные запросы от старых к новым.
+        """
+        return list(self._slow_queries)
+
+    def reset(self) -> None:
+        """Метод сброса накопленной статистики."""
+        with self._lock:
+            self._stats.clear()
+            self._slow_queries.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        """Метод получения статистики в сериализуемом виде.
+
+        Returns:
+            Словарь со статистикой и журналом медленных запросов.
+        """
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_query_threshold": self.slow_query_threshold,
+            "buckets": list(self.buckets),
+            "queries": [
+                {
+                    "fingerprint": stats.fingerprint,
+                    "count": stats.count,
+                    "total_seconds": stats.total_seconds,
+                    "max_seconds": stats.max_seconds,
+                    "rows": stats.rows,
+                    "bucket_counts": stats.bucket_counts,
+                }
+                for stats in self.snapshot().values()
+            ],
+            "slow_queries": [asdict(slow) for slow in self.slow_queries()],
+        }
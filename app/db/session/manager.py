@@ -3,11 +3,13 @@ from contextlib import asynccontextmanager
 from logging import Logger
 from typing import Any, NoReturn
 from urllib.parse import urlparse
+from uuid import UUID
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncEngine
 from sqlalchemy.exc import ArgumentError, SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from app.db.types import DatabaseURL, DatabaseSession
+from .instrumentation import QueryInstrumentation
 from ..exceptions import DatabaseManagerException, DatabaseManagerMessages
 
 
@@ -16,11 +18,11 @@ class ManagerInterface(ABC):
 
     @abstractmethod
     @asynccontextmanager
-    async def get_session(self):
+    async def get_session(self, user_id: UUID | None = None):
         """Метод получения генератора сессии базы данных с автоматической очисткой."""
 
     @abstractmethod
-    def get_engine(self):
+    def get_engine(self, user_id: UUID | None = None):
         """Метод получения engine базы данных для прямого использования."""
 
 
@@ -107,11 +109,18 @@ class ManagerBase(ManagerValidator):
 class Manager(ManagerBase, ManagerInterface):
     """Класс менеджера базы данных."""
 
-    def __init__(self, logger: Logger, database_url: DatabaseURL, **kwargs) -> None:
+    def __init__(
+        self,
+        logger: Logger,
+        database_url: DatabaseURL,
+        instrumentation: QueryInstrumentation | None = None,
+        **kwargs,
+    ) -> None:
         """Магический метод инициализации класса.
 
         Args:
             database_url: URL базы данных в формате SQLAlchemy.
+            instrumentation: Инструментирование SQL-запросов, None - отключено.
 
         Raises:
             DatabaseManagerException: При любом нарушении формата URL.
@@ -120,6 +129,9 @@ class Manager(ManagerBase, ManagerInterface):
 
         self._engine = self._create_engine()
         self._sessionmaker = self._create_sessionmaker()
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self._engine)
 
     def _create_engine(self) -> AsyncEngine:
         """Метод создания SQLAlchemy Engine.
@@ -168,9 +180,12 @@ class Manager(ManagerBase, ManagerInterface):
             raise self.exception(message) from e
 
     @asynccontextmanager
-    async def get_session(self) -> DatabaseSession:
+    async def get_session(self, user_id: UUID | None = None) -> DatabaseSession:
         """Метод получения генератора сессии базы данных с автоматической очисткой.
 
+        Args:
+            user_id: Идентификатор пользователя; база данных одна, поэтому не влияет на выбор базы.
+
         Yields:
             Сессия SQLAlchemy для выполнения запросов.
 
@@ -184,7 +199,7 @@ class Manager(ManagerBase, ManagerInterface):
         except Exception as e:
             if session:
                 try:
-                    session.rollback()
+                    await session.rollback()
                 except Exception as rollback_err:
                     self._logger.warning(self.messages.ROLLBACK_FAILED_ERROR.format(error=str(rollback_err)))
             if isinstance(e, SQLAlchemyError):
@@ -197,13 +212,16 @@ class Manager(ManagerBase, ManagerInterface):
         finally:
             if session:
                 try:
-                    session.close()
+                    await session.close()
                 except Exception as close_err:
                     self._logger.warning(self.messages.CLOSE_FAILED_ERROR.format(error=str(close_err)))
 
-    def get_engine(self) -> AsyncEngine:
+    def get_engine(self, user_id: UUID | None = None) -> AsyncEngine:
         """Метод получения engine базы данных для прямого использования.
 
+        Args:
+            user_id: Идентификатор пользователя; база данных одна, поэтому не влияет на выбор базы.
+
         Returns:
             SQLAlchemy Engine, привязанный к указанной базе данных.
         """
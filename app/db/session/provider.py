@@ -1,8 +1,153 @@
 import logging
+import threading
+from functools import partial
+from uuid import UUID
 
+from .instrumentation import QueryInstrumentation
 from .manager import Manager
-from ...config import DATABASE_URL
+from .sharding import DEFAULT_SHARD, ShardedManager, parse_shard_map
+from ...common.metrics import instrument_pool, observe_cache, observe_query
+from ...config import (
+    DATABASE_SHARD_VNODES,
+    DATABASE_SHARDS,
+    DATABASE_URL,
+    DB_QUERY_INSTRUMENTATION,
+    DB_QUERY_SAMPLE_RATE,
+    DB_SLOW_QUERY_THRESHOLD,
+)
 
 logger = logging.getLogger(__name__)
 
-manager = Manager(logger=logger, database_url=DATABASE_URL)
+_manager: Manager | ShardedManager | None = None
+_manager_lock = threading.Lock()
+
+
+def _create_instrumentation() -> QueryInstrumentation | None:
+    """Функция создания инструментирования SQL-запросов по конфигурации приложения.
+
+    Returns:
+        Инструментирование запросов, None - отключено.
+    """
+    if not DB_QUERY_INSTRUMENTATION:
+        return None
+    return QueryInstrumentation(
+        logger=logging.getLogger("app.db.queries"),
+        sample_rate=DB_QUERY_SAMPLE_RATE,
+        slow_query_threshold=DB_SLOW_QUERY_THRESHOLD,
+        observer=observe_query,
+        cache_observer=partial(observe_cache, "query_fingerprint"),
+    )
+
+
+def _create_manager() -> Manager | ShardedManager:
+    """Функция создания менеджера базы данных по конфигурации приложения.
+
+    При заданной карте шардов DATABASE_SHARDS создаётся менеджер шардов, иначе - менеджер DATABASE_URL.
+
+    Returns:
+        Менеджер базы данных с инструментированием запросов и метриками пула.
+
+    Raises:
+        DatabaseManagerException: При некорректной конфигурации базы данных.
+    """
+    shards = parse_shard_map(DATABASE_SHARDS)
+    if shards:
+        manager = ShardedManager(
+            logger=logger, shards=shards, vnodes=DATABASE_SHARD_VNODES, instrumentation=_create_instrumentation
+        )
+    else:
+        manager = Manager(logger=logger, database_url=DATABASE_URL, instrumentation=_create_instrumentation())
+    for shard in shard_managers(manager).values():
+        instrument_pool(shard.get_engine())
+    return manager
+
+
+def shard_managers(manager: Manager | ShardedManager) -> dict[str, Manager]:
+    """Функция получения менеджеров всех шардов.
+
+    Args:
+        manager: Менеджер базы данных.
+
+    Returns:
+        Менеджеры по именам шардов; без шардирования - единственная база данных под именем DEFAULT_SHARD.
+    """
+    return manager.shards if isinstance(manager, ShardedManager) else {DEFAULT_SHARD: manager}
+
+
+def get_shards() -> dict[str, Manager]:
+    """Функция получения менеджеров всех шардов для задач, обходящих всех пользователей.
+
+    Returns:
+        Менеджеры по именам шардов.
+
+    Raises:
+        DatabaseManagerException: При некорректной конфигурации базы данных.
+    """
+    return shard_managers(get_manager())
+
+
+def get_user_shard(user_id: UUID) -> str:
+    """Функция получения имени шарда базы данных, хранящего данные пользователя.
+
+    Args:
+        user_id: Идентификатор пользователя.
+
+    Returns:
+        Имя шарда; без шардирования - DEFAULT_SHARD.
+
+    Raises:
+        DatabaseManagerException: При некорректной конфигурации базы данных.
+    """
+    manager = get_manager()
+    return manager.ring.shard_for(user_id) if isinstance(manager, ShardedManager) else DEFAULT_SHARD
+
+
+def get_manager() -> Manager | ShardedManager:
+    """Функция получения менеджера базы данных.
+
+    Менеджер и engine создаются при первом обращении, а не при импорте: импорт модулей приложения
+    не требует конфигурации базы данных и не открывает пул соединений.
+
+    Returns:
+        Менеджер базы данных.
+
+    Raises:
+        DatabaseManagerException: При некорректной конфигурации базы данных.
+    """
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = _create_manager()
+    return _manager
+
+
+async def dispose_manager() -> None:
+    """Функция закрытия пула соединений менеджера базы данных.
+
+    Следующее обращение к get_manager создаст новый менеджер.
+    """
+    global _manager
+
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        for shard in shard_managers(manager).values():
+            await shard.get_engine().dispose()
+
+
+def reset_manager_after_fork() -> None:
+    """Функция сброса менеджера, унаследованного дочерним процессом после fork.
+
+    Соединения пула принадлежат родительскому процессу: они не закрываются, а отбрасываются
+    (``dispose(close=False)``), чтобы не прервать сессии родителя. Воркер создаст собственный
+    менеджер и пул при первом обращении к get_manager.
+    """
+    global _manager, _manager_lock
+
+    _manager_lock = threading.Lock()
+    manager, _manager = _manager, None
+    if manager is not None:
+        for shard in shard_managers(manager).values():
+            shard.get_engine().sync_engine.dispose(close=False)
@@ -0,0 +1,194 @@
+import asyncio
+import bisect
+from contextlib import asynccontextmanager
+from hashlib import blake2b
+from logging import Logger
+from typing import Awaitable, Callable, TypeVar
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.types import DatabaseSession, DatabaseURL
+
+from ..exceptions import DatabaseManagerException, DatabaseManagerMessages
+from .instrumentation import QueryInstrumentation
+from .manager import Manager, ManagerInterface
+
+T = TypeVar("T")
+
+DEFAULT_SHARD = "default"
+
+
+def _point(value: bytes) -> int:
+    """Функция получения точки кольца по значению.
+
+    Args:
+        value: Значение.
+
+    Returns:
+        64-битная точка кольца.
+    """
+    return int.from_bytes(blake2b(value, digest_size=8).digest(), "big")
+
+
+def parse_shard_map(value: str) -> dict[str, DatabaseURL]:
+    """Функция разбора карты шардов из строки конфигурации.
+
+    Args:
+        value: Пары ``имя=URL`` через запятую, например ``s0=postgresql+asyncpg://...,s1=...``.
+
+    Returns:
+        URL баз данных по именам шардов в порядке объявления.
+
+    Raises:
+        DatabaseManagerException: При некорректной или повторяющейся паре.
+    """
+    shards: dict[str, DatabaseURL] = {}
+    for item in filter(None, (item.strip() for item in value.split(","))):
+        name, separator, url = item.partition("=")
+        name = name.strip()
+        if not separator or not name or not url.strip() or name in shards:
+            raise DatabaseManagerException(DatabaseManagerMessages.INVALID_SHARD_MAP_ERROR.format(item=item))
+        shards[name] = url.strip()
+    return shards
+
+
+class HashRing:
+    """Класс согласованного хэширования пользователей по шардам.
+
+    Каждый шард занимает ``vnodes`` точек кольца; пользователь принадлежит шарду первой точки
+    по часовой стрелке от хэша его идентификатора. При добавлении шарда переезжает примерно
+    1/N пользователей, и только на новый шард; при удалении - только пользователи удалённого шарда.
+    """
+
+    def __init__(self, shards: list[str], vnodes: int = 128) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            shards: Имена шардов.
+            vnodes: Количество точек кольца на шард.
+
+        Raises:
+            DatabaseManagerException: Если шардов нет.
+        """
+        if not shards:
+            raise DatabaseManagerException(DatabaseManagerMessages.EMPTY_SHARD_MAP_ERROR)
+        self.shards = list(shards)
+        ring = sorted((_point(f"{shard}#{index}".encode()), shard) for shard in shards for index in range(vnodes))
+        self._points = [point for point, _ in ring]
+        self._owners = [shard for _, shard in ring]
+
+    def shard_for(self, user_id: UUID) -> str:
+        """Метод получения шарда пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            Имя шарда.
+        """
+        index = bisect.bisect(self._points, _point(user_id.bytes))
+        return self._owners[index % len(self._owners)]
+
+
+class ShardedManager(ManagerInterface):
+    """Класс менеджера нескольких баз данных с пользователями, распределёнными по шардам.
+
+    Данные пользователя (пользователь, события, сводки) хранятся целиком в одном шарде, выбранном
+    согласованным хэшированием. Сессия без пользователя открывается в первом шарде карты:
+    задачи, обходящие всех пользователей, используют ``fan_out``.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        shards: dict[str, DatabaseURL],
+        vnodes: int = 128,
+        instrumentation: Callable[[], QueryInstrumentation | None] | None = None,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            logger: Логгер.
+            shards: URL баз данных по именам шардов.
+            vnodes: Количество точек кольца на шард.
+            instrumentation: Фабрика инструментирования SQL-запросов для engine шарда, None - отключено.
+
+        Raises:
+            DatabaseManagerException: При пустой карте или некорректном URL шарда.
+        """
+        self.ring = HashRing(list(shards), vnodes=vnodes)
+        self.shards = {
+            name: Manager(
+                logger=logger, database_url=url, instrumentation=instrumentation() if instrumentation else None
+            )
+            for name, url in shards.items()
+        }
+        self.default = self.shards[self.ring.shards[0]]
+
+    def for_user(self, user_id: UUID | None) -> Manager:
+        """Метод получения менеджера шарда пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя, None - шард по умолчанию.
+
+        Returns:
+            Менеджер шарда.
+        """
+        return self.default if user_id is None else self.shards[self.ring.shard_for(user_id)]
+
+    @asynccontextmanager
+    async def get_session(self, user_id: UUID | None = None) -> DatabaseSession:
+        """Метод получения сессии шарда пользователя с автоматической очисткой.
+
+        Args:
+            user_id: Идентификатор пользователя, None - шард по умолчанию.
+
+        Yields:
+            Сессия SQLAlchemy шарда.
+
+        Raises:
+            DatabaseManagerException: При ошибке сессии.
+        """
+        async with self.for_user(user_id).get_session() as session:
+            yield session
+
+    def get_engine(self, user_id: UUID | None = None) -> AsyncEngine:
+        """Метод получения engine шарда пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя, None - шард по умолчанию.
+
+        Returns:
+            SQLAlchemy Engine шарда.
+        """
+        return self.for_user(user_id).get_engine()
+
+
+async def fan_out(
+    shards: dict[str, Manager], job: Callable[[str, Manager], Awaitable[T]], concurrency: int | None = None
+) -> dict[str, T]:
+    """Функция выполнения задачи на всех шардах одновременно.
+
+    Args:
+        shards: Менеджеры по именам шардов.
+        job: Задача, получающая имя и менеджер шарда.
+        concurrency: Наибольшее количество одновременно обрабатываемых шардов, None - все сразу.
+
+    Returns:
+        Результаты задачи по именам шардов.
+
+    Raises:
+        Exception: Первая ошибка задачи; остальные шарды при этом доделываются.
+    """
+    semaphore = asyncio.Semaphore(concurrency or len(shards) or 1)
+
+    async def run(name: str, manager: Manager) -> T:
+        async with semaphore:
+            return await job(name, manager)
+
+    results = await asyncio.gather(*(run(name, manager) for name, manager in shards.items()), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return dict(zip(shards, results))
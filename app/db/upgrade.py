@@ -0,0 +1,57 @@
+import logging
+
+from sqlalchemy import Connection, MetaData, inspect, text
+
+logger = logging.getLogger(__name__)
+
+# Индексы, заменённые в моделях другими: удаляются при обновлении схемы
+RETIRED_INDEXES = ("ix_attention_events_user_timestamp",)
+
+
+def upgrade_schema(connection: Connection, metadata: MetaData) -> list[str]:
+    """Функция идемпотентного дополнения существующих таблиц до схемы моделей.
+
+    ``create_all`` создаёт только отсутствующие таблицы: столбцы и индексы, добавленные в модели
+    позже, в существующие таблицы не попадают. Функция добавляет недостающие столбцы, допускающие
+    NULL, создаёт недостающие индексы (с учётом ``ddl_if`` диалекта) и удаляет заменённые индексы.
+    Повторный вызов ничего не меняет. Недостающий столбец NOT NULL без значения по умолчанию
+    добавить без данных нельзя: он записывается в лог и требует ручной миграции.
+
+    Args:
+        connection: Синхронное соединение внутри транзакции (``run_sync``).
+        metadata: Метаданные моделей.
+
+    Returns:
+        Выполненные изменения схемы.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    existing = set(inspector.get_table_names())
+    changes: list[str] = []
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in columns:
+                continue
+            if not column.nullable and column.server_default is None:
+                logger.warning(f"Column {table.name}.{column.name} is NOT NULL and must be added manually")
+                continue
+            table_name, column_name = preparer.format_table(table), preparer.format_column(column)
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            changes.append(f"column {table.name}.{column.name}")
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for name in RETIRED_INDEXES:
+            if name in indexes:
+                connection.execute(text(f"DROP INDEX {preparer.quote(name)}"))
+                changes.append(f"drop index {name}")
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(connection, checkfirst=True)
+        # Индекс другого диалекта (ddl_if) не создаётся: в изменения попадают только созданные
+        created = {index["name"] for index in inspect(connection).get_indexes(table.name)} - indexes
+        changes.extend(f"index {name}" for name in sorted(created))
+    return changes
@@ -1,17 +1,84 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException
 
-from .api.v1.endpoints import healthcheck
+from .api.v1.endpoints import events, healthcheck, live, metrics, stats, users
+from .common.admission import AdmissionMiddleware, admission_controller
 from .common.logging import setup_logging
-from .common.middleware import log_requests_middleware
+from .common.metrics import observe_dropped_log_record
+from .common.middleware import RequestLoggingMiddleware
+from .common.responses import FastJSONResponse, http_exception_handler, validation_exception_handler
+from .config import (
+    ADMISSION_ENABLED,
+    ADMISSION_EXEMPT_PATHS,
+    ADMISSION_RETRY_AFTER,
+    LOG_JSON,
+    LOG_QUEUE,
+    LOG_QUEUE_SIZE,
+    REQUEST_LOG_SAMPLE_RATE,
+    REQUEST_LOG_SLOW_THRESHOLD,
+    SKETCH_ENABLED,
+    SPOOL_ENABLED,
+)
+from .db.session.provider import dispose_manager
+from .services.healthcheck.provider import prober
+from .services.live.provider import close_live_broker
+from .services.ratelimit.provider import close_rate_limiter
+from .services.sketches.provider import close_sketch_recorder, get_sketch_recorder
+from .services.spool.provider import close_spool, get_spool_replayer
+
+setup_logging(use_queue=LOG_QUEUE, json_format=LOG_JSON, queue_size=LOG_QUEUE_SIZE, on_drop=observe_dropped_log_record)
 
-setup_logging()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """Метод жизненного цикла приложения: фоновые проверки зависимостей, применение вероятностных оценок,
+    воспроизведение локальной очереди событий и закрытие пула соединений.
+
+    Менеджер базы данных создаётся при первом обращении (первая проверка готовности или запрос).
+    """
+    prober.start()
+    if SKETCH_ENABLED:
+        get_sketch_recorder().start()
+    if SPOOL_ENABLED:
+        get_spool_replayer().start()
+    yield
+    await prober.stop()
+    await close_rate_limiter()
+    await close_live_broker()
+    await close_sketch_recorder()
+    await close_spool()
+    await dispose_manager()
 
 
 app = FastAPI(
     title="Mindful-Web service",
     description="Track your web usage and get mindful insights",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+app.add_exception_handler(HTTPException, http_exception_handler)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
+if ADMISSION_ENABLED:
+    # Добавляется до логирования: отклонённые запросы попадают в логи и метрики запросов
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        exempt_paths=ADMISSION_EXEMPT_PATHS,
+        retry_after=ADMISSION_RETRY_AFTER,
+    )
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=REQUEST_LOG_SAMPLE_RATE,
+    slow_request_threshold=REQUEST_LOG_SLOW_THRESHOLD,
 )
-app.middleware("http")(log_requests_middleware)
 
+app.include_router(events.router, prefix="/api/v1")
 app.include_router(healthcheck.router, prefix="/api/v1")
+app.include_router(live.router, prefix="/api/v1")
+app.include_router(stats.router, prefix="/api/v1")
+app.include_router(users.router, prefix="/api/v1")
+app.include_router(metrics.router)
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+MAX_EVENTS_PAGE_SIZE = 500
+
+
+class EventItemSchema(BaseModel):
+    event: str = Field(..., examples=["active"], description="Тип события внимания: active или inactive")
+    domain: str = Field(..., examples=["youtube.com"], description="Домен")
+    timestamp: datetime = Field(..., examples=["2025-04-05T18:30:00Z"], description="Временная метка события (UTC)")
+    device_id: str | None = Field(None, examples=["laptop-3f2a"], description="Идентификатор устройства")
+
+
+class ListEventsResponseSchema(BaseModel):
+    events: list[EventItemSchema] = Field(..., description="События от новых к старым")
+    next_cursor: str | None = Field(
+        ...,
+        examples=["MTc0Mzg3NjIwMDAwMDAwMDoxOjQy"],
+        description="Курсор следующей страницы, null - страница последняя",
+    )
@@ -2,6 +2,8 @@ from datetime import datetime, timezone
 
 from pydantic import BaseModel, Field, field_validator
 
+MAX_EVENTS_PER_REQUEST = 100
+
 
 class SendEventData(BaseModel):
     event: str = Field(
@@ -50,10 +52,18 @@ class SendEventData(BaseModel):
 
 
 class SendEventsRequestSchema(BaseModel):
+    device_id: str | None = Field(
+        None,
+        min_length=1,
+        max_length=64,
+        examples=["laptop-3f2a"],
+        description="Идентификатор устройства (экземпляра расширения): время на устройствах пользователя, "
+        "открытых одновременно, учитывается один раз",
+    )
     data: list[SendEventData] = Field(
         ...,
         min_length=1,
-        max_length=100,
+        max_length=MAX_EVENTS_PER_REQUEST,
         description="Список событий внимания",
         examples=[
             [
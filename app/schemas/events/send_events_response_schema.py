@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+
+class FlushAdviceSchema(BaseModel):
+    next_flush_in: float = Field(..., examples=[10.0], description="Интервал до следующей отправки событий, секунды")
+    max_batch_size: int = Field(..., examples=[20], description="Рекомендуемое количество событий в пачке")
+    jitter: float = Field(
+        ..., examples=[1.0], description="Наибольшее случайное отклонение интервала отправки, секунды"
+    )
+
+
+class SendEventsResponseSchema(BaseModel):
+    status_code: int = Field(..., description="Код статуса")
+    description: str = Field(..., description="Описание статуса")
+    accepted: int = Field(..., description="Количество принятых событий")
+    flush: FlushAdviceSchema = Field(..., description="Рекомендация сервера по отправке следующей пачки")
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class DependencyCheckSchema(BaseModel):
+    healthy: bool = Field(..., description="Зависимость доступна")
+    degraded: bool = Field(..., description="Зависимость работает с деградацией (например, насыщен пул соединений)")
+    latency_ms: float = Field(..., description="Длительность проверки в миллисекундах")
+    checked_at: datetime = Field(..., description="Время проверки (UTC)")
+    error: str | None = Field(None, description="Причина недоступности")
+    details: dict[str, Any] = Field(default_factory=dict, description="Детали проверки")
+
+
+class ReadinessResponseSchema(BaseModel):
+    status: str = Field(..., examples=["ok", "degraded", "unavailable"], description="Состояние готовности")
+    checks: dict[str, DependencyCheckSchema] = Field(..., description="Результаты проверок зависимостей")
@@ -0,0 +1,26 @@
+from datetime import date
+
+from pydantic import BaseModel, Field
+
+
+class TopDomainSchema(BaseModel):
+    domain: str = Field(..., examples=["youtube.com"], description="Домен")
+    visits: int = Field(..., examples=[125000], description="Оценка количества переходов на домен (не меньше точного)")
+
+
+class TopDomainsResponseSchema(BaseModel):
+    first_day: date = Field(..., description="Первый день периода (UTC)")
+    last_day: date = Field(..., description="Последний день периода включительно (UTC)")
+    domains: list[TopDomainSchema] = Field(..., description="Наиболее посещаемые домены по убыванию")
+
+
+class DomainUsersResponseSchema(BaseModel):
+    domain: str = Field(..., examples=["youtube.com"], description="Домен")
+    first_day: date = Field(..., description="Первый день периода (UTC)")
+    last_day: date = Field(..., description="Последний день периода включительно (UTC)")
+    users: int = Field(..., examples=[5400], description="Оценка количества различных пользователей домена")
+
+
+class UserDomainsResponseSchema(BaseModel):
+    day: date = Field(..., description="День (UTC)")
+    domains: int = Field(..., examples=[17], description="Оценка количества различных доменов пользователя")
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field, field_validator
+
+from ...services.aggregation.timezones import is_valid_zone
+
+
+class UpdateUserSettingsRequestSchema(BaseModel):
+    time_zone: str = Field(
+        ...,
+        min_length=1,
+        max_length=64,
+        examples=["Europe/Moscow", "America/New_York"],
+        description="Часовой пояс IANA: дни сводок пользователя начинаются в местную полночь",
+    )
+
+    @field_validator("time_zone")
+    @classmethod
+    def validate_time_zone(cls, v: str) -> str:
+        if not is_valid_zone(v):
+            raise ValueError("Unknown time zone")
+        return v
+
+
+class UserSettingsResponseSchema(BaseModel):
+    time_zone: str = Field(..., examples=["Europe/Moscow"], description="Часовой пояс IANA пользователя")
+    recompute_queued: bool = Field(
+        ..., examples=[True], description="Пересчёт дневных сводок в новом часовом поясе поставлен в очередь"
+    )
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from multiprocessing import get_context
+from pathlib import Path
+from uuid import UUID
+
+from ...db.session.manager import Manager
+from .exceptions import AggregationServiceException, AggregationServiceMessages
+from .main import AggregationService, user_bounds
+
+logger = logging.getLogger(__name__)
+
+# Состояние процесса пула: собственный цикл событий и engine, создаются инициализатором
+_worker_loop: asyncio.AbstractEventLoop | None = None
+_worker_manager: Manager | None = None
+
+
+@dataclass(frozen=True)
+class WorkUnit:
+    """Единица работы пересчёта: диапазон пользователей за диапазон дней.
+
+    Attributes:
+        user_range: Номер диапазона идентификаторов пользователей.
+        user_ranges: Количество диапазонов, на которые делится пространство UUID.
+        first_day: Первый день.
+        last_day: Последний день (включительно).
+    """
+
+    user_range: int
+    user_ranges: int
+    first_day: date
+    last_day: date
+
+    @property
+    def key(self) -> str:
+        """Ключ единицы в файле контрольной точки.
+
+        Returns:
+            Строковый ключ.
+        """
+        return f"{self.user_range}/{self.user_ranges}:{self.first_day.isoformat()}:{self.last_day.isoformat()}"
+
+    def user_bounds(self) -> tuple[UUID | None, UUID | None]:
+        """Метод получения границ идентификаторов пользователей единицы.
+
+        Returns:
+            Нижняя граница (включительно) и верхняя граница (не включительно), None - без границы.
+        """
+        return user_bounds(self.user_range, self.user_ranges)
+
+
+def plan_units(first_day: date, last_day: date, user_ranges: int, days_per_unit: int) -> list[WorkUnit]:
+    """Функция разбиения пространства (пользователи × дни) на единицы работы.
+
+    Args:
+        first_day: Первый день пересчёта.
+        last_day: Последний день пересчёта (включительно).
+        user_ranges: Количество диапазонов пользователей.
+        days_per_unit: Количество дней в единице работы.
+
+    Returns:
+        Единицы работы, упорядоченные по дням.
+
+    Raises:
+        AggregationServiceException: При пустом диапазоне дней.
+    """
+    if last_day < first_day:
+        raise AggregationServiceException(
+            AggregationServiceMessages.INVALID_BACKFILL_RANGE_ERROR.format(first_day=first_day, last_day=last_day)
+        )
+    units = []
+    day = first_day
+    while day <= last_day:
+        chunk_end = min(day + timedelta(days=days_per_unit - 1), last_day)
+        units.extend(WorkUnit(user_range, user_ranges, day, chunk_end) for user_range in range(user_ranges))
+        day = chunk_end + timedelta(days=1)
+    return units
+
+
+class Checkpoint:
+    """Класс файла контрольной точки пересчёта.
+
+    Файл содержит ключи завершённых единиц работы, по одному в строке. Ключ дописывается
+    и сбрасывается на диск только после фиксации транзакции единицы, поэтому прерванный
+    пересчёт продолжается с первой незавершённой единицы.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            path: Путь к файлу контрольной точки.
+        """
+        self.path = path
+
+    def load(self) -> set[str]:
+        """Метод чтения ключей завершённых единиц работы.
+
+        Returns:
+            Ключи завершённых единиц, пустое множество - файла нет.
+        """
+        if not self.path.exists():
+            return set()
+        return {line.strip() for line in self.path.read_text().splitlines() if line.strip()}
+
+    def mark(self, key: str) -> None:
+        """Метод записи ключа завершённой единицы работы.
+
+        Args:
+            key: Ключ единицы.
+        """
+        with self.path.open("a") as file:
+            file.write(f"{key}\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+
+@dataclass
+class Progress:
+    """Прогресс пересчёта.
+
+    Attributes:
+        total: Количество единиц работы.
+        completed: Количество завершённых единиц, включая завершённые до возобновления.
+        users: Количество пересчитанных пользователей в этом запуске.
+        rows: Количество записанных строк сводки в этом запуске.
+    """
+
+    total: int
+    completed: int = 0
+    users: int = 0
+    rows: int = 0
+    _resumed: int = field(default=0, repr=False)
+    _started: float = field(default_factory=lambda: time.monotonic(), repr=False)
+
+    def __post_init__(self) -> None:
+        """Магический метод фиксации единиц, завершённых до возобновления."""
+        self._resumed = self.completed
+
+    def advance(self, users: int, rows: int) -> None:
+        """Метод учёта завершённой единицы работы.
+
+        Args:
+            users: Количество пересчитанных пользователей единицы.
+            rows: Количество записанных строк сводки единицы.
+        """
+        self.completed += 1
+        self.users += users
+        self.rows += rows
+
+    def eta(self) -> float | None:
+        """Метод оценки оставшегося времени по скорости этого запуска.
+
+        Returns:
+            Оставшееся время в секундах или None, если в этом запуске ещё нет завершённых единиц.
+        """
+        done = self.completed - self._resumed
+        if not done:
+            return None
+        return (time.monotonic() - self._started) / done * (self.total - self.completed)
+
+    def __str__(self) -> str:
+        """Магический метод возвращения строкового представления.
+
+        Returns:
+            Строка прогресса с оценкой оставшегося времени.
+        """
+        eta = self.eta()
+        eta_text = "?" if eta is None else str(timedelta(seconds=round(eta)))
+        percent = self.completed / self.total * 100 if self.total else 100.0
+        return (
+            f"{self.completed}/{self.total} units ({percent:.1f}%), "
+            f"{self.users} users, {self.rows} rows, ETA {eta_text}"
+        )
+
+
+def _init_worker(database_url: str) -> None:
+    """Функция инициализации процесса пула: собственные цикл событий и engine.
+
+    Args:
+        database_url: URL базы данных.
+    """
+    global _worker_loop, _worker_manager
+
+    _worker_loop = asyncio.new_event_loop()
+    _worker_manager = Manager(logger=logger, database_url=database_url)
+
+
+async def _recompute(unit: WorkUnit, max_gap: timedelta, now: datetime, batch_rows: int) -> tuple[int, int]:
+    """Функция пересчёта единицы работы в процессе пула.
+
+    Args:
+        unit: Единица работы.
+        max_gap: Наибольшая длительность интервала без событий.
+        now: Время начала пересчёта.
+        batch_rows: Количество строк сводки в одном upsert.
+
+    Returns:
+        Количество пользователей и записанных строк сводки.
+    """
+    user_low, user_high = unit.user_bounds()
+    async with _worker_manager.get_session() as session:
+        service = AggregationService(session, max_gap=max_gap)
+        return await service.recompute_range(user_low, user_high, unit.first_day, unit.last_day, now, batch_rows)
+
+
+def _run_unit(unit: WorkUnit, max_gap: timedelta, now: datetime, batch_rows: int) -> tuple[int, int]:
+    """Функция выполнения единицы работы в цикле событий процесса пула.
+
+    Args:
+        unit: Единица работы.
+        max_gap: Наибольшая длительность интервала без событий.
+        now: Время начала пересчёта.
+        batch_rows: Количество строк сводки в одном upsert.
+
+    Returns:
+        Количество пользователей и записанных строк сводки.
+    """
+    return _worker_loop.run_until_complete(_recompute(unit, max_gap, now, batch_rows))
+
+
+def run_backfill(
+    database_url: str,
+    units: list[WorkUnit],
+    checkpoint: Checkpoint,
+    workers: int,
+    max_gap: timedelta,
+    now: datetime,
+    batch_rows: int,
+) -> Progress:
+    """Функция пересчёта сводок на пуле процессов с контрольной точкой.
+
+    Единицы, записанные в контрольной точке, пропускаются. Процессы запускаются через spawn:
+    каждый создаёт собственные цикл событий и engine и не наследует соединений родителя.
+    При ошибке единицы оставшиеся единицы отменяются, а завершённые остаются в контрольной точке.
+
+    Args:
+        database_url: URL базы данных.
+        units: Единицы работы.
+        checkpoint: Контрольная точка.
+        workers: Количество процессов.
+        max_gap: Наибольшая длительность интервала без событий.
+        now: Время начала пересчёта; время после него не учитывается.
+        batch_rows: Количество строк сводки в одном upsert.
+
+    Returns:
+        Итоговый прогресс.
+
+    Raises:
+        AggregationServiceException: При ошибке пересчёта единицы работы.
+    """
+    completed = checkpoint.load()
+    pending = [unit for unit in units if unit.key not in completed]
+    progress = Progress(total=len(units), completed=len(units) - len(pending))
+    logger.info(f"Backfill started: {progress}")
+    if not pending:
+        return progress
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(database_url,),
+    ) as pool:
+        futures: dict[Future, WorkUnit] = {
+            pool.submit(_run_unit, unit, max_gap, now, batch_rows): unit for unit in pending
+        }
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                users, rows = future.result()
+            except Exception as e:
+                pool.shutdown(wait=True, cancel_futures=True)
+                logger.error(f"Backfill unit {unit.key} failed: {e}")
+                raise AggregationServiceException(
+                    AggregationServiceMessages.BACKFILL_UNIT_ERROR.format(unit=unit.key, error=e)
+                ) from e
+            checkpoint.mark(unit.key)
+            progress.advance(users, rows)
+            logger.info(f"Backfill unit {unit.key} done: {progress}")
+    return progress
@@ -0,0 +1,19 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class AggregationServiceException(FormException):
+    """Исключение сервиса агрегации."""
+
+
+class AggregationServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    LOAD_CHANGES_ERROR: ExceptionMessage = "Failed to load new events after watermark {watermark}!"
+    LOAD_EVENTS_ERROR: ExceptionMessage = "Failed to load events of user {user_id}!"
+    LOAD_ZONES_ERROR: ExceptionMessage = "Failed to load time zones of {count} users!"
+    SAVE_SUMMARIES_ERROR: ExceptionMessage = "Failed to save {count} daily summaries!"
+    RECOMPUTE_RANGE_ERROR: ExceptionMessage = "Failed to recompute daily summaries from {first_day} to {last_day}!"
+    INVALID_SHARD_ERROR: ExceptionMessage = "Shard {shard} is out of range for {shards} shards!"
+    BACKFILL_UNIT_ERROR: ExceptionMessage = "Backfill unit {unit} failed: {error}"
+    INVALID_BACKFILL_RANGE_ERROR: ExceptionMessage = "Backfill range {first_day} - {last_day} is empty!"
@@ -0,0 +1,104 @@
+import heapq
+from collections import Counter
+from datetime import datetime
+from typing import Iterable
+
+from ...common.common import StringEnum
+
+# Интервал пребывания: начало, конец (не включительно) и домен
+Interval = tuple[datetime, datetime, str]
+# Отрезок распределённого времени: начало, конец, домен и его доля времени отрезка
+Segment = tuple[datetime, datetime, str, float]
+
+# Порядок точек с одинаковым временем: интервал закрывается до открытия следующего
+_CLOSE, _OPEN = 0, 1
+
+
+class OverlapRule(StringEnum):
+    """Перечисление правил распределения времени пересекающихся интервалов между доменами.
+
+    LATEST - время принадлежит домену интервала, открытого последним (устройство, на которое
+    пользователь перешёл последним). SPLIT - время делится поровну между различными открытыми
+    доменами. Пересекающиеся интервалы одного домена учитываются один раз при любом правиле.
+    """
+
+    LATEST = "latest"
+    SPLIT = "split"
+
+
+def union_intervals(intervals: Iterable[tuple[datetime, datetime]]) -> list[tuple[datetime, datetime]]:
+    """Функция объединения интервалов.
+
+    Args:
+        intervals: Интервалы (начало, конец); пустые интервалы пропускаются.
+
+    Returns:
+        Непересекающиеся интервалы в порядке времени; соприкасающиеся интервалы объединяются.
+    """
+    merged: list[tuple[datetime, datetime]] = []
+    for begin, end in sorted(interval for interval in intervals if interval[0] < interval[1]):
+        if merged and begin <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def attribute_overlaps(intervals: Iterable[Interval], rule: OverlapRule) -> list[Segment]:
+    """Функция распределения времени пересекающихся интервалов между доменами заметающей прямой.
+
+    Точки начала и конца интервалов упорядочиваются за O(n log n); между соседними точками набор
+    открытых интервалов не меняется, и отрезок времени распределяется по ``rule``. Для LATEST
+    открытые интервалы хранятся в куче по порядку открытия с ленивым удалением закрытых: O(n log n)
+    всего. Для SPLIT отрезок делится между различными открытыми доменами, их не больше количества
+    устройств пользователя. Сумма долей времени любого отрезка равна 1, поэтому время всех доменов
+    вместе равно длине объединения интервалов (``union_intervals``).
+
+    Args:
+        intervals: Интервалы пребывания всех устройств пользователя; пустые интервалы пропускаются.
+        rule: Правило распределения времени пересечений.
+
+    Returns:
+        Отрезки в порядке времени; соседние отрезки одного домена с одинаковой долей объединяются.
+    """
+    items = [interval for interval in intervals if interval[0] < interval[1]]
+    points = sorted(
+        [(begin, _OPEN, index) for index, (begin, _, _) in enumerate(items)]
+        + [(end, _CLOSE, index) for index, (_, end, _) in enumerate(items)]
+    )
+    segments: list[Segment] = []
+    latest: list[tuple[int, int]] = []
+    closed: set[int] = set()
+    domains: Counter[str] = Counter()
+    opened = 0
+    previous: datetime | None = None
+
+    def emit(begin: datetime, end: datetime, domain: str, share: float) -> None:
+        if segments and segments[-1][1] == begin and segments[-1][2] == domain and segments[-1][3] == share:
+            segments[-1] = (segments[-1][0], end, domain, share)
+        else:
+            segments.append((begin, end, domain, share))
+
+    for moment, kind, index in points:
+        if previous is not None and previous < moment and domains:
+            if rule == OverlapRule.LATEST:
+                while latest[0][1] in closed:
+                    heapq.heappop(latest)
+                emit(previous, moment, items[latest[0][1]][2], 1.0)
+            else:
+                share = 1 / len(domains)
+                for domain in domains:
+                    emit(previous, moment, domain, share)
+        domain = items[index][2]
+        if kind == _OPEN:
+            opened += 1
+            heapq.heappush(latest, (-opened, index))
+            domains[domain] += 1
+        else:
+            closed.add(index)
+            domains[domain] -= 1
+            if not domains[domain]:
+                del domains[domain]
+        previous = moment
+    return segments
@@ -0,0 +1,526 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...config import AGGREGATION_OVERLAP_RULE
+from ...db.dialects import dialect_insert
+from ...db.models.tables import AttentionEvent, DailyDomainSummary, User
+from ..blocks.codec import Event
+from ..blocks.exceptions import EventBlocksServiceException
+from ..blocks.main import EventBlocksService, merge_events
+from .exceptions import AggregationServiceException, AggregationServiceMessages
+from .intervals import OverlapRule
+from .sessions import DomainDayTotals, as_utc, day_start, sessionize
+from .timezones import MAX_UTC_OFFSET, UTC_ZONE, local_calendar, local_date
+
+logger = logging.getLogger(__name__)
+
+
+_UUID_SPACE = 1 << 128
+
+
+def _boundary(index: int, ranges: int) -> UUID:
+    """Функция получения границы диапазона идентификаторов пользователей.
+
+    Младший полубайт границы равен 0xF: SQLite хранит UUID строкой в столбце с числовым приведением
+    типов, и граница из одних цифр сравнивалась бы со строками как число.
+
+    Args:
+        index: Номер границы.
+        ranges: Количество диапазонов.
+
+    Returns:
+        Граница диапазона.
+    """
+    return UUID(int=index * _UUID_SPACE // ranges | 0xF)
+
+
+def user_bounds(index: int, ranges: int) -> tuple[UUID | None, UUID | None]:
+    """Функция получения границ диапазона идентификаторов пользователей.
+
+    Пространство UUID делится на равные по числовому значению диапазоны: у UUID4 они содержат
+    примерно равное количество пользователей, а выборка по диапазону использует индекс по user_id.
+
+    Args:
+        index: Номер диапазона.
+        ranges: Количество диапазонов.
+
+    Returns:
+        Нижняя граница (включительно) и верхняя граница (не включительно), None - без границы.
+    """
+    low = _boundary(index, ranges) if index else None
+    high = _boundary(index + 1, ranges) if index < ranges - 1 else None
+    return low, high
+
+
+def shard_of(user_id: UUID, shards: int) -> int:
+    """Функция определения шарда пользователя.
+
+    Шард - диапазон ``user_bounds(shard, shards)``: условие шарда проверяется в SQL сравнением
+    user_id с границами. Используется числовое значение UUID, а не ``hash()``: оно одинаково
+    во всех процессах, а у UUID4 его старшие биты распределены равномерно.
+
+    Args:
+        user_id: Идентификатор пользователя.
+        shards: Количество шардов.
+
+    Returns:
+        Номер шарда в диапазоне [0, shards).
+    """
+    shard = user_id.int * shards >> 128
+    # Граница диапазона сдвинута вверх на младший полубайт
+    if shard and user_id < _boundary(shard, shards):
+        shard -= 1
+    return shard
+
+
+@dataclass(frozen=True)
+class UserChanges:
+    """Новые события пользователя после водяного знака."""
+
+    user_id: UUID
+    first_timestamp: datetime
+    last_timestamp: datetime
+
+
+@dataclass(frozen=True)
+class ShardRun:
+    """Результат обработки пакета событий шардом."""
+
+    watermark: int
+    users: int
+    rows: int
+    exhausted: bool
+
+
+class AggregationService:
+    """Класс сервиса агрегации событий внимания в дневные сводки по доменам.
+
+    Сводка пересчитывается целиком за каждый день, в котором у пользователя появились новые события,
+    и записывается через upsert по (user_id, domain, date). Повторная обработка тех же событий
+    даёт тот же результат, поэтому задачи можно безопасно доставлять повторно. Дни сводок - местные
+    дни часового пояса пользователя (users.time_zone, по умолчанию UTC).
+    """
+
+    exception = AggregationServiceException
+    messages = AggregationServiceMessages
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        max_gap: timedelta,
+        overlap: OverlapRule = OverlapRule(AGGREGATION_OVERLAP_RULE),
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            session: Сессия с базой данных.
+            max_gap: Наибольшая длительность интервала без событий.
+            overlap: Правило распределения времени пересечений интервалов разных устройств.
+        """
+        self.session = session
+        self.max_gap = max_gap
+        self.overlap = overlap
+
+    async def find_changes(
+        self,
+        watermark: int,
+        batch_size: int,
+        rewind: int = 0,
+        user_low: UUID | None = None,
+        user_high: UUID | None = None,
+    ) -> tuple[list[UserChanges], int, bool]:
+        """Метод поиска пользователей диапазона с новыми событиями после водяного знака.
+
+        Идентификаторы событий выдаются при вставке, а фиксируются транзакции в произвольном порядке:
+        событие с меньшим идентификатором может стать видимым уже после сдвига водяного знака.
+        Поэтому при наличии новых событий повторно просматриваются ``rewind`` событий до знака.
+
+        Args:
+            watermark: Идентификатор последнего обработанного события.
+            batch_size: Наибольшее количество событий в пакете.
+            rewind: Количество событий до водяного знака, просматриваемых повторно.
+            user_low: Нижняя граница идентификаторов пользователей (включительно), None - без границы.
+            user_high: Верхняя граница идентификаторов пользователей (не включительно), None - без границы.
+
+        Returns:
+            Изменения по пользователям, новый водяной знак и признак того, что новых событий больше нет.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения событий.
+        """
+        conditions = []
+        if user_low is not None:
+            conditions.append(AttentionEvent.user_id >= user_low)
+        if user_high is not None:
+            conditions.append(AttentionEvent.user_id < user_high)
+        try:
+            batch = (
+                select(AttentionEvent.id)
+                .where(AttentionEvent.id > watermark, *conditions)
+                .order_by(AttentionEvent.id)
+                .limit(batch_size)
+                .subquery()
+            )
+            high, count = (await self.session.execute(select(func.max(batch.c.id), func.count()))).one()
+            if not count:
+                return [], watermark, True
+
+            result = await self.session.execute(
+                select(AttentionEvent.user_id, func.min(AttentionEvent.timestamp), func.max(AttentionEvent.timestamp))
+                .where(AttentionEvent.id > max(watermark - rewind, 0), AttentionEvent.id <= high, *conditions)
+                .group_by(AttentionEvent.user_id)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load changes after {watermark}: {e}")
+            raise self.exception(self.messages.LOAD_CHANGES_ERROR.format(watermark=watermark)) from e
+
+        changes = [UserChanges(user_id, as_utc(first), as_utc(last)) for user_id, first, last in result]
+        return changes, high, count < batch_size
+
+    async def load_zones(self, user_ids: Iterable[UUID]) -> dict[UUID, str]:
+        """Метод загрузки часовых поясов пользователей одним запросом.
+
+        Args:
+            user_ids: Идентификаторы пользователей.
+
+        Returns:
+            Часовые пояса пользователей, у которых он задан; остальные считают дни по UTC.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения пользователей.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        try:
+            result = await self.session.execute(
+                select(User.id, User.time_zone).where(User.id.in_(user_ids), User.time_zone.is_not(None))
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load time zones of {len(user_ids)} users: {e}")
+            raise self.exception(self.messages.LOAD_ZONES_ERROR.format(count=len(user_ids))) from e
+        return dict(result.tuples().all())
+
+    async def _load_events(self, user_id: UUID, start: datetime, end: datetime) -> list[Event]:
+        """Метод загрузки событий пользователя для пересчёта окна.
+
+        Окно дополняется на ``max_gap`` в обе стороны, чтобы учесть интервалы, пересекающие его границы.
+        События сжатых дней читаются из блоков и объединяются со строками attention_events.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            start: Начало окна.
+            end: Конец окна.
+
+        Returns:
+            События (время, домен, тип, устройство) в порядке времени.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения событий.
+        """
+        try:
+            result = await self.session.execute(
+                select(
+                    AttentionEvent.timestamp,
+                    AttentionEvent.domain,
+                    AttentionEvent.event_type,
+                    AttentionEvent.device_id,
+                )
+                .where(
+                    AttentionEvent.user_id == user_id,
+                    AttentionEvent.timestamp >= start - self.max_gap,
+                    AttentionEvent.timestamp < end + self.max_gap,
+                )
+                .order_by(AttentionEvent.timestamp, AttentionEvent.id)
+            )
+            blocks = await EventBlocksService(self.session).load_events(
+                user_id, start - self.max_gap, end + self.max_gap
+            )
+        except (SQLAlchemyError, EventBlocksServiceException) as e:
+            logger.error(f"Failed to load events of user {user_id}: {e}")
+            raise self.exception(self.messages.LOAD_EVENTS_ERROR.format(user_id=user_id)) from e
+        return merge_events(blocks, list(result.tuples()))
+
+    async def aggregate_user(
+        self, user_id: UUID, first_day: date, last_day: date, now: datetime, time_zone: str | None = None
+    ) -> int:
+        """Метод пересчёта дневных сводок пользователя за диапазон местных дней.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            first_day: Первый пересчитываемый местный день.
+            last_day: Последний пересчитываемый местный день.
+            now: Текущее время; время после него не учитывается.
+            time_zone: Часовой пояс пользователя, None - читается из таблицы пользователей.
+
+        Returns:
+            Количество записанных строк сводки.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения событий или записи сводок.
+        """
+        if time_zone is None:
+            time_zone = (await self.load_zones([user_id])).get(user_id, UTC_ZONE)
+        calendar = local_calendar(time_zone, first_day, last_day)
+        start = calendar.day_start(first_day)
+        end = min(calendar.day_start(last_day + timedelta(days=1)), as_utc(now))
+        events = await self._load_events(user_id, start, end)
+        totals = sessionize(events, start, end, self.max_gap, self.overlap, calendar)
+        if not totals:
+            return 0
+
+        rows = self._summary_rows(user_id, totals, now)
+        await self.save_summaries(rows)
+        return len(rows)
+
+    async def aggregate_period(
+        self, user_id: UUID, first: datetime, last: datetime, now: datetime, time_zone: str | None = None
+    ) -> int:
+        """Метод пересчёта дневных сводок пользователя за местные дни, содержащие промежуток времени.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            first: Начало промежутка.
+            last: Конец промежутка, включительно.
+            now: Текущее время; время после него не учитывается.
+            time_zone: Часовой пояс пользователя, None - читается из таблицы пользователей.
+
+        Returns:
+            Количество записанных строк сводки.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения событий или записи сводок.
+        """
+        if time_zone is None:
+            time_zone = (await self.load_zones([user_id])).get(user_id, UTC_ZONE)
+        return await self.aggregate_user(
+            user_id, local_date(time_zone, first), local_date(time_zone, last), now, time_zone
+        )
+
+    @staticmethod
+    def _summary_rows(
+        user_id: UUID, totals: dict[tuple[date, str], DomainDayTotals], now: datetime
+    ) -> list[dict[str, Any]]:
+        """Метод построения строк дневных сводок пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            totals: Итоги по ключу (дата, домен).
+            now: Время генерации сводок.
+
+        Returns:
+            Строки таблицы сводок.
+        """
+        return [
+            {
+                "user_id": user_id,
+                "domain": domain,
+                "date": day,
+                "total_seconds": round(day_totals.seconds),
+                "active_count": day_totals.active_count,
+                "generated_at": now,
+            }
+            for (day, domain), day_totals in totals.items()
+        ]
+
+    async def save_summaries(self, rows: list[dict[str, Any]]) -> None:
+        """Метод записи дневных сводок одним upsert по (user_id, domain, date).
+
+        Args:
+            rows: Строки таблицы сводок.
+
+        Raises:
+            AggregationServiceException: При ошибке записи сводок.
+        """
+        if not rows:
+            return
+        statement = dialect_insert(self.session.bind.dialect.name, DailyDomainSummary).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "domain", "date"],
+            set_={
+                "total_seconds": statement.excluded.total_seconds,
+                "active_count": statement.excluded.active_count,
+                "generated_at": statement.excluded.generated_at,
+            },
+        )
+        try:
+            await self.session.execute(statement)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to save {len(rows)} daily summaries: {e}")
+            raise self.exception(self.messages.SAVE_SUMMARIES_ERROR.format(count=len(rows))) from e
+
+    async def recompute_range(
+        self,
+        user_low: UUID | None,
+        user_high: UUID | None,
+        first_day: date,
+        last_day: date,
+        now: datetime,
+        batch_rows: int,
+    ) -> tuple[int, int]:
+        """Метод полного пересчёта сводок диапазона пользователей за диапазон дней.
+
+        Прежние сводки диапазона удаляются в той же транзакции: после изменения логики агрегации
+        не остаётся строк, которые новая логика не порождает. События читаются потоком в порядке
+        (user_id, timestamp) и сводятся по одному пользователю за раз: в памяти находятся только
+        события текущего пользователя и строки сводок диапазона. Сводки записываются после чтения
+        (запись в соединение с открытым курсором поддерживается не всеми драйверами) пакетами
+        по ``batch_rows`` строк, транзакция фиксируется один раз в конце. Блоки сжатых дней диапазона
+        читаются до потока и объединяются с событиями пользователя при его сведении. Дни - местные
+        дни пользователей: события читаются с запасом на наибольшее смещение от UTC, а окно каждого
+        пользователя определяется календарём его часового пояса.
+
+        Args:
+            user_low: Нижняя граница идентификаторов пользователей (включительно), None - без границы.
+            user_high: Верхняя граница идентификаторов пользователей (не включительно), None - без границы.
+            first_day: Первый пересчитываемый местный день.
+            last_day: Последний пересчитываемый местный день.
+            now: Текущее время; время после него не учитывается.
+            batch_rows: Количество строк сводки в одном upsert.
+
+        Returns:
+            Количество пользователей и записанных строк сводки.
+
+        Raises:
+            AggregationServiceException: При ошибке чтения событий или записи сводок.
+        """
+        now = as_utc(now)
+        start = day_start(first_day) - MAX_UTC_OFFSET
+        end = min(day_start(last_day + timedelta(days=1)) + MAX_UTC_OFFSET, now)
+        conditions = [
+            AttentionEvent.timestamp >= start - self.max_gap,
+            AttentionEvent.timestamp < end + self.max_gap,
+        ]
+        summary_conditions = [
+            DailyDomainSummary.date >= first_day,
+            DailyDomainSummary.date <= last_day,
+        ]
+        zone_conditions = [User.time_zone.is_not(None)]
+        if user_low is not None:
+            conditions.append(AttentionEvent.user_id >= user_low)
+            summary_conditions.append(DailyDomainSummary.user_id >= user_low)
+            zone_conditions.append(User.id >= user_low)
+        if user_high is not None:
+            conditions.append(AttentionEvent.user_id < user_high)
+            summary_conditions.append(DailyDomainSummary.user_id < user_high)
+            zone_conditions.append(User.id < user_high)
+
+        users = 0
+        rows: list[dict[str, Any]] = []
+
+        def add_user(user_id: UUID, events: list[Event]) -> None:
+            nonlocal users
+            events = merge_events(blocks.pop(user_id, []), events)
+            calendar = local_calendar(zones.get(user_id, UTC_ZONE), first_day, last_day)
+            window = calendar.day_start(first_day), min(calendar.day_start(last_day + timedelta(days=1)), now)
+            totals = sessionize(events, *window, self.max_gap, self.overlap, calendar)
+            rows.extend(self._summary_rows(user_id, totals, now))
+            users += 1
+
+        try:
+            try:
+                await self.session.execute(delete(DailyDomainSummary).where(*summary_conditions))
+                zones = dict(
+                    (await self.session.execute(select(User.id, User.time_zone).where(*zone_conditions)))
+                    .tuples()
+                    .all()
+                )
+                blocks = await EventBlocksService(self.session).load_range(
+                    user_low, user_high, start - self.max_gap, end + self.max_gap
+                )
+                result = await self.session.stream(
+                    select(
+                        AttentionEvent.user_id,
+                        AttentionEvent.timestamp,
+                        AttentionEvent.domain,
+                        AttentionEvent.event_type,
+                        AttentionEvent.device_id,
+                    )
+                    .where(*conditions)
+                    .order_by(AttentionEvent.user_id, AttentionEvent.timestamp, AttentionEvent.id)
+                    .execution_options(yield_per=batch_rows)
+                )
+                user_id, events = None, []
+                async for event_user_id, timestamp, domain, event_type, device_id in result:
+                    if event_user_id != user_id:
+                        if events:
+                            add_user(user_id, events)
+                        user_id, events = event_user_id, []
+                    events.append((timestamp, domain, event_type, device_id))
+                if events:
+                    add_user(user_id, events)
+                # Пользователи, у которых в диапазоне есть только сжатые дни
+                for user_id in list(blocks):
+                    add_user(user_id, [])
+            except (SQLAlchemyError, EventBlocksServiceException) as e:
+                logger.error(f"Failed to recompute summaries from {first_day} to {last_day}: {e}")
+                raise self.exception(
+                    self.messages.RECOMPUTE_RANGE_ERROR.format(first_day=first_day, last_day=last_day)
+                ) from e
+
+            for offset in range(0, len(rows), batch_rows):
+                await self.save_summaries(rows[offset : offset + batch_rows])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return users, len(rows)
+
+    async def exec(
+        self,
+        shard: int,
+        shards: int,
+        watermark: int,
+        batch_size: int,
+        rewind: int = 0,
+        now: datetime | None = None,
+    ) -> ShardRun:
+        """Метод обработки пакета новых событий для пользователей шарда.
+
+        Условие шарда - диапазон идентификаторов пользователей - применяется в запросе: шард читает
+        только события своих пользователей, и пакет из ``batch_size`` событий целиком принадлежит шарду.
+
+        Args:
+            shard: Номер шарда.
+            shards: Количество шардов.
+            watermark: Идентификатор последнего обработанного шардом события.
+            batch_size: Наибольшее количество событий в пакете.
+            rewind: Количество событий до водяного знака, просматриваемых повторно.
+            now: Текущее время, по умолчанию время вызова.
+
+        Returns:
+            Результат обработки с новым водяным знаком.
+
+        Raises:
+            AggregationServiceException: При некорректном шарде или ошибке работы с базой данных.
+        """
+        if not 0 <= shard < shards:
+            raise self.exception(self.messages.INVALID_SHARD_ERROR.format(shard=shard, shards=shards))
+        now = now or datetime.now(timezone.utc)
+
+        owned, high, exhausted = await self.find_changes(watermark, batch_size, rewind, *user_bounds(shard, shards))
+        rows = 0
+        try:
+            zones = await self.load_zones(change.user_id for change in owned)
+            for change in owned:
+                rows += await self.aggregate_period(
+                    change.user_id,
+                    change.first_timestamp,
+                    change.last_timestamp,
+                    now,
+                    zones.get(change.user_id, UTC_ZONE),
+                )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        logger.info(f"Shard {shard}/{shards}: {len(owned)} users, {rows} rows, watermark {watermark} -> {high}")
+        return ShardRun(watermark=high, users=len(owned), rows=rows, exhausted=exhausted)
@@ -0,0 +1,50 @@
+from redis.asyncio import Redis
+
+from ...config import AGGREGATION_LEASE_TTL, REDIS_URL
+from ...db.session.sharding import DEFAULT_SHARD
+from .shards import ShardCoordinator
+
+_client: Redis | None = None
+_coordinators: dict[str, ShardCoordinator] = {}
+
+
+def get_coordinator(database: str = DEFAULT_SHARD) -> ShardCoordinator:
+    """Функция получения координатора шардов агрегации базы данных.
+
+    Идентификаторы событий у каждой базы данных свои, поэтому водяные знаки и аренды хранятся
+    отдельно для каждого шарда базы данных. Клиент Redis общий, создаётся при первом обращении
+    в процессе воркера и привязывается к его циклу событий.
+
+    Args:
+        database: Имя шарда базы данных; без шардирования - DEFAULT_SHARD.
+
+    Returns:
+        Координатор шардов агрегации.
+    """
+    global _client
+
+    if database not in _coordinators:
+        if _client is None:
+            _client = Redis.from_url(REDIS_URL)
+        # Ключи базы данных по умолчанию совпадают с ключами до шардирования
+        prefix = "aggregation" if database == DEFAULT_SHARD else f"aggregation:{database}"
+        _coordinators[database] = ShardCoordinator(_client, lease_ttl=AGGREGATION_LEASE_TTL, prefix=prefix)
+    return _coordinators[database]
+
+
+async def close_coordinator() -> None:
+    """Функция закрытия соединений координаторов шардов."""
+    global _client
+
+    client, _client = _client, None
+    _coordinators.clear()
+    if client is not None:
+        await client.aclose()
+
+
+def reset_coordinator_after_fork() -> None:
+    """Функция сброса координаторов, унаследованных дочерним процессом после fork."""
+    global _client
+
+    _client = None
+    _coordinators.clear()
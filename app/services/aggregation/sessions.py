@@ -0,0 +1,143 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable
+
+from .intervals import Interval, OverlapRule, attribute_overlaps
+from .timezones import UTC_ZONE, LocalCalendar, local_calendar
+
+ACTIVE = "active"
+INACTIVE = "inactive"
+
+
+@dataclass
+class DomainDayTotals:
+    """Итоги пользователя по домену за день."""
+
+    seconds: float = 0.0
+    active_count: int = 0
+
+
+def as_utc(value: datetime) -> datetime:
+    """Функция приведения времени к UTC; время без часового пояса считается временем UTC.
+
+    Args:
+        value: Время.
+
+    Returns:
+        Время с часовым поясом UTC.
+    """
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def day_start(day: date) -> datetime:
+    """Функция получения начала дня в UTC.
+
+    Args:
+        day: Дата.
+
+    Returns:
+        Полночь даты в UTC.
+    """
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def _add_interval(
+    totals: dict[tuple[date, str], DomainDayTotals],
+    domain: str,
+    begin: datetime,
+    end: datetime,
+    window_start: datetime,
+    window_end: datetime,
+    calendar: LocalCalendar,
+    share: float = 1.0,
+) -> None:
+    """Функция учёта интервала пребывания на домене с обрезкой по окну и разбиением по местным суткам.
+
+    Args:
+        totals: Итоги по дням и доменам.
+        domain: Домен.
+        begin: Начало интервала.
+        end: Конец интервала.
+        window_start: Начало окна учёта.
+        window_end: Конец окна учёта.
+        calendar: Календарь местных дней пользователя.
+        share: Доля времени интервала, принадлежащая домену.
+    """
+    begin, end = max(begin, window_start), min(end, window_end)
+    while begin < end:
+        day = calendar.local_date(begin)
+        boundary = min(end, calendar.day_start(day + timedelta(days=1)))
+        totals[(day, domain)].seconds += (boundary - begin).total_seconds() * share
+        begin = boundary
+
+
+def sessionize(
+    events: Iterable[tuple[datetime, str, str, str | None]],
+    window_start: datetime,
+    window_end: datetime,
+    max_gap: timedelta,
+    overlap: OverlapRule = OverlapRule.LATEST,
+    calendar: LocalCalendar | None = None,
+) -> dict[tuple[date, str], DomainDayTotals]:
+    """Функция сведения событий внимания в итоги по дням и доменам.
+
+    Событие 'active' открывает интервал пребывания на домене. Интервал закрывается событием
+    'inactive' того же домена, переходом на другой домен или через ``max_gap`` без событий
+    (закрытая вкладка без события 'inactive'). Повторное 'active' открытого домена не позже
+    ``max_gap`` от начала интервала продолжает пребывание и не считается переходом. Интервалы
+    строятся по событиям каждого устройства отдельно; пересечения интервалов разных устройств
+    учитываются один раз и распределяются между доменами по ``overlap`` (``attribute_overlaps``).
+    Интервалы, пересекающие местную полночь пользователя, делятся между днями, а переходы
+    учитываются в местный день события. Учитывается только время внутри окна [window_start, window_end).
+
+    Args:
+        events: События (время, домен, тип, устройство) в порядке времени; окно должно быть дополнено
+            событиями за ``max_gap`` до и после, чтобы интервалы на границах окна учитывались полностью.
+        window_start: Начало окна учёта.
+        window_end: Конец окна учёта.
+        max_gap: Наибольшая длительность интервала без событий.
+        overlap: Правило распределения времени пересечений интервалов разных устройств.
+        calendar: Календарь местных дней пользователя, покрывающий окно, None - дни по UTC.
+
+    Returns:
+        Итоги по ключу (местная дата, домен).
+    """
+    window_start, window_end = as_utc(window_start), as_utc(window_end)
+    if calendar is None:
+        calendar = local_calendar(UTC_ZONE, window_start.date(), window_end.date())
+    totals: dict[tuple[date, str], DomainDayTotals] = defaultdict(DomainDayTotals)
+    devices: dict[str | None, list[tuple[datetime, str, str]]] = defaultdict(list)
+    for timestamp, domain, event_type, device in events:
+        devices[device].append((as_utc(timestamp), domain, event_type))
+
+    intervals: list[Interval] = []
+    for device_events in devices.values():
+        current: tuple[str, datetime] | None = None
+        switches: list[tuple[datetime, str]] = []
+        for timestamp, domain, event_type in device_events:
+            resumed = False
+            if current is not None and (event_type == ACTIVE or current[0] == domain):
+                resumed = event_type == ACTIVE and current[0] == domain and timestamp - current[1] <= max_gap
+                intervals.append((current[1], min(timestamp, current[1] + max_gap), current[0]))
+                current = None
+            if event_type == ACTIVE:
+                current = (domain, timestamp)
+                if not resumed and window_start <= timestamp < window_end:
+                    switches.append((timestamp, domain))
+        if current is not None:
+            intervals.append((current[1], current[1] + max_gap, current[0]))
+        # События устройства упорядочены: местные даты переходов определяются одним проходом
+        for day, (_, domain) in zip(calendar.local_dates([timestamp for timestamp, _ in switches]), switches):
+            totals[(day, domain)].active_count += 1
+
+    # Интервалы одного устройства не пересекаются: распределять время нужно только между устройствами
+    if len(devices) > 1:
+        segments = attribute_overlaps(intervals, overlap)
+    else:
+        segments = [(begin, end, domain, 1.0) for begin, end, domain in intervals]
+    for begin, end, domain, share in segments:
+        _add_interval(totals, domain, begin, end, window_start, window_end, calendar, share)
+    return dict(totals)
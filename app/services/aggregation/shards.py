@@ -0,0 +1,207 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from redis.asyncio import Redis
+from redis.asyncio.lock import Lock
+
+logger = logging.getLogger(__name__)
+
+# Запись водяного знака только владельцем аренды: KEYS[1] - аренда, KEYS[2] - водяной знак
+_COMMIT_WATERMARK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('set', KEYS[2], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Способ разбиения пользователей по шардам (shard_of): при его смене водяные знаки перебалансируются,
+# как при изменении количества шардов
+_PARTITION = "range"
+
+
+class ShardLease:
+    """Класс аренды шарда: пока аренда удерживается, шард обрабатывает только её владелец."""
+
+    def __init__(self, coordinator: "ShardCoordinator", lock: Lock, shard: int, shards: int) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            coordinator: Координатор шардов.
+            lock: Блокировка Redis с TTL.
+            shard: Номер шарда.
+            shards: Количество шардов.
+        """
+        self._coordinator = coordinator
+        self._lock = lock
+        self.shard = shard
+        self.shards = shards
+
+    async def watermark(self) -> int:
+        """Метод получения водяного знака шарда.
+
+        Returns:
+            Идентификатор последнего обработанного события.
+        """
+        return await self._coordinator.get_watermark(self.shard, self.shards)
+
+    async def commit(self, watermark: int) -> bool:
+        """Метод записи водяного знака с продлением аренды.
+
+        Знак записывается атомарно и только если аренда всё ещё принадлежит этому владельцу:
+        после истечения TTL шард мог перейти к другому воркеру.
+
+        Args:
+            watermark: Идентификатор последнего обработанного события.
+
+        Returns:
+            True, если знак записан.
+        """
+        committed = await self._coordinator.commit_watermark(self._lock, self.shard, self.shards, watermark)
+        if committed:
+            await self._lock.reacquire()
+        return committed
+
+
+class ShardCoordinator:
+    """Класс координации шардов агрегации через Redis.
+
+    Для каждого шарда хранится водяной знак (идентификатор последнего обработанного события)
+    и аренда с TTL. Ключи шардов содержат их количество: при его изменении новые шарды получают
+    водяной знак, не больший знака любого прежнего шарда, и пересчитывают хвост событий заново.
+    """
+
+    def __init__(self, client: Redis, lease_ttl: float, prefix: str = "aggregation") -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            client: Асинхронный клиент Redis.
+            lease_ttl: Время жизни аренды шарда в секундах.
+            prefix: Префикс ключей.
+        """
+        self.client = client
+        self.lease_ttl = lease_ttl
+        self.prefix = prefix
+        self._commit_script = client.register_script(_COMMIT_WATERMARK_SCRIPT)
+
+    def _key(self, shards: int, shard: int, name: str) -> str:
+        """Метод построения ключа шарда.
+
+        Args:
+            shards: Количество шардов.
+            shard: Номер шарда.
+            name: Имя значения.
+
+        Returns:
+            Ключ Redis.
+        """
+        return f"{self.prefix}:{shards}:{shard}:{name}"
+
+    async def current_shards(self) -> int | None:
+        """Метод получения действующего количества шардов.
+
+        Returns:
+            Количество шардов или None, если топология ещё не задана.
+        """
+        value = await self.client.get(f"{self.prefix}:shards")
+        return int(value) if value is not None else None
+
+    async def _is_current(self, shards: int) -> bool:
+        """Метод проверки, что действующая топология совпадает с количеством шардов и способом разбиения.
+
+        Args:
+            shards: Количество шардов.
+
+        Returns:
+            True, если перебалансировка не нужна.
+        """
+        current, partition = await self.client.mget([f"{self.prefix}:shards", f"{self.prefix}:partition"])
+        return current is not None and int(current) == shards and partition == _PARTITION.encode()
+
+    async def get_watermark(self, shard: int, shards: int) -> int:
+        """Метод получения водяного знака шарда.
+
+        Args:
+            shard: Номер шарда.
+            shards: Количество шардов.
+
+        Returns:
+            Идентификатор последнего обработанного события, 0 - шард ещё не обрабатывался.
+        """
+        value = await self.client.get(self._key(shards, shard, "watermark"))
+        return int(value) if value is not None else 0
+
+    async def commit_watermark(self, lock: Lock, shard: int, shards: int, watermark: int) -> bool:
+        """Метод атомарной записи водяного знака владельцем аренды.
+
+        Args:
+            lock: Блокировка аренды шарда.
+            shard: Номер шарда.
+            shards: Количество шардов.
+            watermark: Идентификатор последнего обработанного события.
+
+        Returns:
+            True, если аренда принадлежит владельцу и знак записан.
+        """
+        token = lock.local.token
+        if token is None:
+            return False
+        keys = [lock.name, self._key(shards, shard, "watermark")]
+        return bool(await self._commit_script(keys=keys, args=[token, watermark]))
+
+    async def ensure_topology(self, shards: int) -> None:
+        """Метод применения количества шардов с перебалансировкой водяных знаков.
+
+        Новые шарды начинают с наименьшего водяного знака прежних шардов: все события до него
+        обработаны при любом разбиении, а повторный пересчёт более поздних событий идемпотентен.
+        Перебалансировка выполняется под общей блокировкой, ключи прежних шардов удаляются. Так же
+        перебалансируются шарды прежнего способа разбиения пользователей при том же количестве.
+
+        Args:
+            shards: Количество шардов.
+        """
+        if await self._is_current(shards):
+            return
+        async with self.client.lock(
+            f"{self.prefix}:rebalance", timeout=self.lease_ttl, blocking_timeout=self.lease_ttl
+        ):
+            if await self._is_current(shards):
+                return
+            previous = await self.current_shards()
+            floor = 0
+            if previous is not None:
+                values = await self.client.mget([self._key(previous, shard, "watermark") for shard in range(previous)])
+                floor = min(int(value) if value is not None else 0 for value in values)
+            async with self.client.pipeline(transaction=True) as pipe:
+                for shard in range(shards):
+                    pipe.set(self._key(shards, shard, "watermark"), floor)
+                pipe.set(f"{self.prefix}:shards", shards)
+                pipe.set(f"{self.prefix}:partition", _PARTITION)
+                if previous is not None and previous != shards:
+                    pipe.delete(*[self._key(previous, shard, "watermark") for shard in range(previous)])
+                await pipe.execute()
+            logger.info(f"Aggregation shards rebalanced: {previous} -> {shards}, watermark floor {floor}")
+
+    @asynccontextmanager
+    async def lease(self, shard: int, shards: int) -> AsyncIterator[ShardLease | None]:
+        """Метод захвата аренды шарда без ожидания.
+
+        Args:
+            shard: Номер шарда.
+            shards: Количество шардов.
+
+        Yields:
+            Аренда шарда или None, если шард обрабатывается другим воркером.
+        """
+        lock = self.client.lock(self._key(shards, shard, "lease"), timeout=self.lease_ttl)
+        if not await lock.acquire(blocking=False):
+            yield None
+            return
+        try:
+            yield ShardLease(self, lock, shard, shards)
+        finally:
+            try:
+                await lock.release()
+            except Exception as e:
+                logger.warning(f"Failed to release lease of shard {shard}/{shards}: {e}")
@@ -0,0 +1,249 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Sequence
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from ...common.metrics import observed_lru_cache
+
+UTC_ZONE = "UTC"
+# Наибольшее смещение местного времени от UTC по модулю (UTC+14): местный день лежит внутри
+# UTC-суток той же даты, расширенных на это смещение в обе стороны
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# Шаг поиска переходов: переходы зон не бывают чаще раза в сутки
+_PROBE_STEP = 24 * 3600
+
+
+def is_valid_zone(name: str) -> bool:
+    """Функция проверки имени часового пояса базы IANA.
+
+    Args:
+        name: Имя часового пояса, например 'Europe/Moscow'.
+
+    Returns:
+        True, если часовой пояс известен.
+    """
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+@observed_lru_cache("zone_transitions", maxsize=4096)
+def _year_transitions(zone: str, year: int) -> tuple[tuple[datetime, ...], tuple[timedelta, ...]]:
+    """Функция поиска переходов смещения часового пояса за год.
+
+    Смещение проверяется раз в сутки, момент перехода уточняется двоичным поиском до секунды.
+    Результат кэшируется: для зоны и года переходы вычисляются один раз на процесс.
+
+    Args:
+        zone: Имя часового пояса.
+        year: Год (по UTC).
+
+    Returns:
+        Моменты (UTC) начала действия смещений и сами смещения; первый момент - начало года.
+    """
+    info = ZoneInfo(zone)
+
+    def offset(seconds: int) -> timedelta:
+        return datetime.fromtimestamp(seconds, info).utcoffset()
+
+    start = int(datetime(year, 1, 1, tzinfo=timezone.utc).timestamp())
+    end = int(datetime(year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+    instants, offsets = [start], [offset(start)]
+    moment = start
+    while moment < end:
+        following = min(moment + _PROBE_STEP, end)
+        if offset(following) != offsets[-1]:
+            low, high = moment, following
+            while high - low > 1:
+                middle = (low + high) // 2
+                if offset(middle) == offsets[-1]:
+                    low = middle
+                else:
+                    high = middle
+            if high < end:
+                instants.append(high)
+                offsets.append(offset(high))
+        moment = following
+    return tuple(datetime.fromtimestamp(seconds, timezone.utc) for seconds in instants), tuple(offsets)
+
+
+@dataclass(frozen=True)
+class OffsetTable:
+    """Таблица смещений часового пояса: смещение ``offsets[i]`` действует с ``instants[i]``
+    до ``instants[i + 1]``; до первого момента действует первое смещение, после последнего - последнее.
+    """
+
+    instants: tuple[datetime, ...]
+    offsets: tuple[timedelta, ...]
+
+    def offset_at(self, moment: datetime) -> timedelta:
+        """Метод получения смещения, действующего в момент времени, двоичным поиском по таблице.
+
+        Args:
+            moment: Момент времени с часовым поясом.
+
+        Returns:
+            Смещение местного времени от UTC.
+        """
+        if len(self.offsets) == 1:
+            return self.offsets[0]
+        return self.offsets[max(bisect_right(self.instants, moment) - 1, 0)]
+
+    def local_date(self, moment: datetime) -> date:
+        """Метод получения местной даты момента времени.
+
+        Args:
+            moment: Момент времени в UTC.
+
+        Returns:
+            Дата по местному времени.
+        """
+        return (moment + self.offset_at(moment)).date()
+
+    def to_utc(self, wall: datetime) -> datetime:
+        """Метод перевода местного времени в момент UTC.
+
+        Неоднозначное время (перевод часов назад) переводится в первый из моментов. Несуществующее
+        время (перевод часов вперёд) переводится по смещению до перехода, то есть в момент после
+        перехода: для полуночи, попавшей в пропуск, это начало местного дня.
+
+        Args:
+            wall: Местное время без часового пояса.
+
+        Returns:
+            Момент времени в UTC.
+        """
+        naive = wall.replace(tzinfo=timezone.utc)
+        earliest, latest = naive - max(self.offsets), naive - min(self.offsets)
+        # Между крайними кандидатами не больше одного перехода: смещения до и после него
+        before, after = self.offset_at(earliest), self.offset_at(latest)
+        valid = [naive - offset for offset in (before, after) if self.offset_at(naive - offset) == offset]
+        return min(valid) if valid else naive - before
+
+
+@observed_lru_cache("zone_offsets", maxsize=1024)
+def offset_table(zone: str, first_year: int, last_year: int) -> OffsetTable:
+    """Функция построения таблицы смещений часового пояса за диапазон лет.
+
+    Args:
+        zone: Имя часового пояса.
+        first_year: Первый год (по UTC).
+        last_year: Последний год (по UTC), включительно.
+
+    Returns:
+        Таблица смещений; соседние записи с одинаковым смещением объединяются.
+    """
+    instants: list[datetime] = []
+    offsets: list[timedelta] = []
+    for year in range(first_year, last_year + 1):
+        for instant, offset in zip(*_year_transitions(zone, year)):
+            if not offsets or offsets[-1] != offset:
+                instants.append(instant)
+                offsets.append(offset)
+    return OffsetTable(tuple(instants), tuple(offsets))
+
+
+def local_date(zone: str, moment: datetime) -> date:
+    """Функция получения местной даты момента времени в часовом поясе.
+
+    Args:
+        zone: Имя часового пояса.
+        moment: Момент времени с часовым поясом.
+
+    Returns:
+        Дата по местному времени.
+    """
+    moment = moment.astimezone(timezone.utc)
+    return offset_table(zone, moment.year - 1, moment.year + 1).local_date(moment)
+
+
+@dataclass(frozen=True)
+class LocalCalendar:
+    """Календарь местных дней часового пояса на диапазоне дат.
+
+    Полночи дней диапазона заранее переведены в UTC по таблице смещений, поэтому разбиение
+    интервалов по местным суткам и определение местной даты события обходятся поиском по таблице
+    без ``astimezone`` на каждое событие, а для упорядоченных событий - одним проходом слиянием.
+    """
+
+    table: OffsetTable
+    first_day: date
+    midnights: tuple[datetime, ...]
+    dates: tuple[date, ...]
+
+    def local_date(self, moment: datetime) -> date:
+        """Метод получения местной даты момента времени.
+
+        Args:
+            moment: Момент времени в UTC.
+
+        Returns:
+            Дата по местному времени.
+        """
+        return self.table.local_date(moment)
+
+    def local_dates(self, moments: Sequence[datetime]) -> list[date]:
+        """Метод получения местных дат упорядоченных моментов времени.
+
+        Моменты сливаются с полуночами календаря одним проходом (аналог searchsorted по
+        отсортированному массиву): на событие приходится одно сравнение. Моменты вне календаря
+        переводятся по таблице смещений.
+
+        Args:
+            moments: Моменты времени в UTC в порядке возрастания.
+
+        Returns:
+            Даты по местному времени в порядке моментов.
+        """
+        result: list[date] = []
+        if not moments:
+            return result
+        midnights, dates, last = self.midnights, self.dates, len(self.dates) - 1
+        index = min(max(bisect_right(midnights, moments[0]) - 1, 0), last)
+        for moment in moments:
+            while index < last and midnights[index + 1] <= moment:
+                index += 1
+            if midnights[index] <= moment < midnights[index + 1]:
+                result.append(dates[index])
+            else:
+                result.append(self.table.local_date(moment))
+        return result
+
+    def day_start(self, day: date) -> datetime:
+        """Метод получения начала местного дня.
+
+        Args:
+            day: Местная дата.
+
+        Returns:
+            Момент (UTC) местной полуночи или перехода, с которого начинается день.
+        """
+        index = (day - self.first_day).days
+        if 0 <= index < len(self.midnights):
+            return self.midnights[index]
+        return self.table.to_utc(datetime.combine(day, time.min))
+
+
+@observed_lru_cache("zone_calendars", maxsize=1024)
+def local_calendar(zone: str, first_day: date, last_day: date) -> LocalCalendar:
+    """Функция построения календаря местных дней часового пояса.
+
+    Календарь кэшируется: пользователи одного часового пояса при пересчёте одного диапазона
+    используют один календарь.
+
+    Args:
+        zone: Имя часового пояса.
+        first_day: Первая местная дата.
+        last_day: Последняя местная дата, включительно.
+
+    Returns:
+        Календарь с полуночами дней от ``first_day`` до дня после ``last_day``.
+    """
+    table = offset_table(zone, first_day.year - 1, last_day.year + 1)
+    dates = tuple(first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 2))
+    midnights = tuple(table.to_utc(datetime.combine(day, time.min)) for day in dates)
+    return LocalCalendar(table=table, first_day=first_day, midnights=midnights, dates=dates[:-1])
@@ -0,0 +1,274 @@
+"""Формат блока событий пользователя за день (версия 2).
+
+Блок содержит события в порядке времени:
+
+    версия         1 байт
+    количество     varint
+    начало         varint, микросекунды от эпохи Unix до первого события (UTC)
+    словарь        varint количество доменов, далее для каждого: varint длина и UTF-8 байты
+    устройства     словарь устройств в том же формате (с версии 2)
+    время          varint на событие: микросекунды от предыдущего события
+    домены         номера доменов словаря, упакованные по ceil(log2(размер словаря)) бит
+    устройства     номера устройств: 0 - без устройства, i - i-е устройство словаря, упакованные
+                   по ceil(log2(размер словаря + 1)) бит; без устройств в словаре поле пустое (с версии 2)
+    типы           по биту на событие: 1 - active, 0 - inactive
+
+Varint - беззнаковый LEB128: 7 бит значения на байт, старший бит - продолжение. Поля битовой
+упаковки записываются от младших битов к старшим. Блоки версии 1 (без устройств) читаются
+с устройством None у всех событий.
+"""
+
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import Iterable, Iterator
+
+from ..aggregation.sessions import ACTIVE, INACTIVE, as_utc
+from .exceptions import EventBlocksServiceException, EventBlocksServiceMessages
+
+BLOCK_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_TYPE_BITS = {ACTIVE: 1, INACTIVE: 0}
+_BIT_TYPES = (INACTIVE, ACTIVE)
+
+Event = tuple[datetime, str, str, str | None]
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    """Функция записи беззнакового целого в формате varint.
+
+    Args:
+        buffer: Буфер записи.
+        value: Неотрицательное целое.
+    """
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Функция чтения беззнакового целого в формате varint.
+
+    Args:
+        data: Данные блока.
+        offset: Смещение начала значения.
+
+    Returns:
+        Значение и смещение следующего поля.
+
+    Raises:
+        IndexError: Если данные закончились раньше значения.
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _pack_bits(buffer: bytearray, values: Iterable[int], width: int) -> None:
+    """Функция упаковки значений фиксированной ширины в биты.
+
+    Args:
+        buffer: Буфер записи.
+        values: Значения меньше 2 ** width.
+        width: Ширина значения в битах.
+    """
+    accumulator = bits = 0
+    for value in values:
+        accumulator |= value << bits
+        bits += width
+        while bits >= 8:
+            buffer.append(accumulator & 0xFF)
+            accumulator >>= 8
+            bits -= 8
+    if bits:
+        buffer.append(accumulator)
+
+
+def _unpack_bits(data: bytes, offset: int, count: int, width: int) -> tuple[list[int], int]:
+    """Функция распаковки значений фиксированной ширины из битов.
+
+    Args:
+        data: Данные блока.
+        offset: Смещение начала упакованных значений.
+        count: Количество значений.
+        width: Ширина значения в битах.
+
+    Returns:
+        Значения и смещение следующего поля.
+
+    Raises:
+        EventBlocksServiceException: Если данные закончились раньше значений.
+    """
+    end = offset + (count * width + 7) // 8
+    if end > len(data):
+        raise EventBlocksServiceException(EventBlocksServiceMessages.CORRUPTED_BLOCK_ERROR)
+    mask = (1 << width) - 1
+    values = []
+    accumulator = bits = 0
+    for byte in data[offset:end]:
+        accumulator |= byte << bits
+        bits += 8
+        while bits >= width and len(values) < count:
+            values.append(accumulator & mask)
+            accumulator >>= width
+            bits -= width
+    return values, end
+
+
+def _write_dictionary(buffer: bytearray, values: Iterable[str]) -> None:
+    """Функция записи словаря строк.
+
+    Args:
+        buffer: Буфер записи.
+        values: Строки словаря в порядке номеров.
+    """
+    values = list(values)
+    _write_varint(buffer, len(values))
+    for value in values:
+        encoded = value.encode()
+        _write_varint(buffer, len(encoded))
+        buffer += encoded
+
+
+def _read_dictionary(data: bytes, offset: int) -> tuple[list[str], int]:
+    """Функция чтения словаря строк.
+
+    Args:
+        data: Данные блока.
+        offset: Смещение начала словаря.
+
+    Returns:
+        Строки словаря и смещение следующего поля.
+
+    Raises:
+        IndexError: Если данные закончились раньше словаря.
+        UnicodeDecodeError: Если строка словаря - не UTF-8.
+    """
+    size, offset = _read_varint(data, offset)
+    values = []
+    for _ in range(size):
+        length, offset = _read_varint(data, offset)
+        if offset + length > len(data):
+            raise IndexError(offset + length)
+        values.append(data[offset : offset + length].decode())
+        offset += length
+    return values, offset
+
+
+def encode_block(events: Iterable[Event]) -> bytes:
+    """Функция кодирования событий в блок.
+
+    События упорядочиваются по времени; события с одинаковым временем сохраняют исходный порядок.
+
+    Args:
+        events: События (время, домен, тип, устройство).
+
+    Returns:
+        Данные блока.
+
+    Raises:
+        EventBlocksServiceException: При неизвестном типе события.
+    """
+    events = sorted(
+        ((as_utc(timestamp), domain, event_type, device) for timestamp, domain, event_type, device in events),
+        key=itemgetter(0),
+    )
+    domains: dict[str, int] = {}
+    devices: dict[str, int] = {}
+    for _, domain, _, device in events:
+        domains.setdefault(domain, len(domains))
+        if device is not None:
+            devices.setdefault(device, len(devices) + 1)
+
+    buffer = bytearray((BLOCK_VERSION,))
+    _write_varint(buffer, len(events))
+    previous = events[0][0] if events else _EPOCH
+    _write_varint(buffer, (previous - _EPOCH) // _MICROSECOND)
+    _write_dictionary(buffer, domains)
+    _write_dictionary(buffer, devices)
+    for timestamp, _, _, _ in events:
+        _write_varint(buffer, (timestamp - previous) // _MICROSECOND)
+        previous = timestamp
+    _pack_bits(buffer, (domains[domain] for _, domain, _, _ in events), max(1, (len(domains) - 1).bit_length()))
+    if devices:
+        _pack_bits(buffer, (devices.get(device, 0) for _, _, _, device in events), len(devices).bit_length())
+    try:
+        _pack_bits(buffer, (_TYPE_BITS[event_type] for _, _, event_type, _ in events), 1)
+    except KeyError as e:
+        raise EventBlocksServiceException(
+            EventBlocksServiceMessages.UNKNOWN_EVENT_TYPE_ERROR.format(event_type=e.args[0])
+        ) from e
+    return bytes(buffer)
+
+
+def decode_block(data: bytes) -> list[Event]:
+    """Функция декодирования блока в события.
+
+    Args:
+        data: Данные блока.
+
+    Returns:
+        События (время UTC, домен, тип, устройство) в порядке времени.
+
+    Raises:
+        EventBlocksServiceException: При неподдерживаемой версии или повреждённом блоке.
+    """
+    version = data[0] if data else None
+    if version not in _READABLE_VERSIONS:
+        raise EventBlocksServiceException(EventBlocksServiceMessages.UNSUPPORTED_VERSION_ERROR.format(version=version))
+    try:
+        count, offset = _read_varint(data, 1)
+        start, offset = _read_varint(data, offset)
+        domains, offset = _read_dictionary(data, offset)
+        devices, offset = _read_dictionary(data, offset) if version >= 2 else ([], offset)
+        deltas = []
+        for _ in range(count):
+            delta, offset = _read_varint(data, offset)
+            deltas.append(delta)
+        indexes, offset = _unpack_bits(data, offset, count, max(1, (len(domains) - 1).bit_length()))
+        if devices:
+            device_indexes, offset = _unpack_bits(data, offset, count, len(devices).bit_length())
+        else:
+            device_indexes = [0] * count
+        types, offset = _unpack_bits(data, offset, count, 1)
+        names = [None, *devices]
+        return list(
+            _build_events(
+                start,
+                deltas,
+                [domains[index] for index in indexes],
+                [names[index] for index in device_indexes],
+                types,
+            )
+        )
+    except (IndexError, UnicodeDecodeError) as e:
+        raise EventBlocksServiceException(EventBlocksServiceMessages.CORRUPTED_BLOCK_ERROR) from e
+
+
+def _build_events(
+    start: int, deltas: list[int], domains: list[str], devices: list[str | None], types: list[int]
+) -> Iterator[Event]:
+    """Функция сборки событий из декодированных столбцов блока.
+
+    Args:
+        start: Микросекунды от эпохи Unix до первого события.
+        deltas: Микросекунды от предыдущего события.
+        domains: Домены событий.
+        devices: Устройства событий.
+        types: Биты типов событий.
+
+    Yields:
+        События (время UTC, домен, тип, устройство).
+    """
+    moment = start
+    for delta, domain, device, bit in zip(deltas, domains, devices, types):
+        moment += delta
+        yield _EPOCH + timedelta(microseconds=moment), domain, _BIT_TYPES[bit], device
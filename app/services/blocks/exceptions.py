@@ -0,0 +1,17 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class EventBlocksServiceException(FormException):
+    """Исключение сервиса блоков событий."""
+
+
+class EventBlocksServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    UNKNOWN_EVENT_TYPE_ERROR: ExceptionMessage = "Unknown event type '{event_type}' cannot be encoded into a block!"
+    UNSUPPORTED_VERSION_ERROR: ExceptionMessage = "Unsupported event block version {version}!"
+    CORRUPTED_BLOCK_ERROR: ExceptionMessage = "Event block is corrupted!"
+    LOAD_BLOCKS_ERROR: ExceptionMessage = "Failed to load event blocks of user {user_id}!"
+    COMPACT_ERROR: ExceptionMessage = "Failed to compact events of user {user_id}!"
+    FIND_USERS_ERROR: ExceptionMessage = "Failed to find users with events before {cutoff}!"
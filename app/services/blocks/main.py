@@ -0,0 +1,351 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.dialects import dialect_insert
+from ...db.models.tables import AttentionEvent, EventBlock
+from ..aggregation.sessions import as_utc, day_start
+from .codec import Event, decode_block, encode_block
+from .exceptions import EventBlocksServiceException, EventBlocksServiceMessages
+
+if TYPE_CHECKING:
+    from ..aggregation.main import AggregationService
+
+logger = logging.getLogger(__name__)
+
+# Количество идентификаторов в одном DELETE ... WHERE id IN (...)
+_DELETE_CHUNK = 1000
+
+
+def merge_events(blocks: list[Event], rows: list[Event]) -> list[Event]:
+    """Функция объединения событий блоков и строк attention_events в порядке времени.
+
+    Строки пришли после сжатия блока, поэтому при равном времени идут после событий блока.
+
+    Args:
+        blocks: События блоков в порядке времени.
+        rows: События строк в порядке времени.
+
+    Returns:
+        События в порядке времени.
+    """
+    if not blocks:
+        return rows
+    if not rows:
+        return blocks
+    return sorted(blocks + rows, key=lambda event: as_utc(event[0]))
+
+
+@dataclass(frozen=True)
+class CompactionBatch:
+    """Результат сжатия событий пакета пользователей."""
+
+    users: int
+    blocks: int
+    events: int
+    exhausted: bool
+
+
+class EventBlocksService:
+    """Класс сервиса блоков событий: сжатие закрытых дней пользователей и чтение блоков.
+
+    События пользователя за закрытый день (UTC) заменяются одной строкой event_blocks. События,
+    пришедшие за этот день позже, хранятся строками attention_events и при следующем сжатии
+    объединяются с блоком. Читатели событий объединяют блоки и строки (``merge_events``).
+    """
+
+    exception = EventBlocksServiceException
+    messages = EventBlocksServiceMessages
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            session: Сессия с базой данных.
+        """
+        self.session = session
+
+    async def load_events(self, user_id: UUID, start: datetime, end: datetime) -> list[Event]:
+        """Метод чтения событий пользователя из блоков за интервал времени.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            start: Начало интервала (включительно).
+            end: Конец интервала (не включительно).
+
+        Returns:
+            События (время UTC, домен, тип, устройство) в порядке времени.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения или повреждённом блоке.
+        """
+        start, end = as_utc(start), as_utc(end)
+        try:
+            result = await self.session.execute(
+                select(EventBlock.data)
+                .where(EventBlock.user_id == user_id, EventBlock.date >= start.date(), EventBlock.date <= end.date())
+                .order_by(EventBlock.date)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load event blocks of user {user_id}: {e}")
+            raise self.exception(self.messages.LOAD_BLOCKS_ERROR.format(user_id=user_id)) from e
+        return [event for data in result.scalars() for event in decode_block(data) if start <= event[0] < end]
+
+    async def load_range(
+        self, user_low: UUID | None, user_high: UUID | None, start: datetime, end: datetime
+    ) -> dict[UUID, list[Event]]:
+        """Метод чтения событий диапазона пользователей из блоков за интервал времени.
+
+        Args:
+            user_low: Нижняя граница идентификаторов пользователей (включительно), None - без границы.
+            user_high: Верхняя граница идентификаторов пользователей (не включительно), None - без границы.
+            start: Начало интервала (включительно).
+            end: Конец интервала (не включительно).
+
+        Returns:
+            События в порядке времени по пользователям.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения или повреждённом блоке.
+        """
+        start, end = as_utc(start), as_utc(end)
+        conditions = [EventBlock.date >= start.date(), EventBlock.date <= end.date()]
+        if user_low is not None:
+            conditions.append(EventBlock.user_id >= user_low)
+        if user_high is not None:
+            conditions.append(EventBlock.user_id < user_high)
+        try:
+            result = await self.session.execute(
+                select(EventBlock.user_id, EventBlock.data).where(*conditions).order_by(EventBlock.date)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load event blocks from {user_low} to {user_high}: {e}")
+            raise self.exception(self.messages.LOAD_BLOCKS_ERROR.format(user_id=f"{user_low}..{user_high}")) from e
+
+        events: dict[UUID, list[Event]] = defaultdict(list)
+        for user_id, data in result.tuples():
+            events[user_id].extend(event for event in decode_block(data) if start <= event[0] < end)
+        return dict(events)
+
+    async def load_latest(
+        self, user_id: UUID, last_day: date | None, limit: int, first_day: date | None = None
+    ) -> list[tuple[date, list[Event]]]:
+        """Метод чтения последних блоков пользователя, начиная с заданного дня и раньше.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            last_day: Последний читаемый день (включительно), None - без границы.
+            limit: Наибольшее количество блоков.
+            first_day: Первый читаемый день (включительно), None - без границы.
+
+        Returns:
+            Дни и события блоков от новых к старым; события дня - в порядке времени.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения или повреждённом блоке.
+        """
+        conditions = [EventBlock.user_id == user_id]
+        if last_day is not None:
+            conditions.append(EventBlock.date <= last_day)
+        if first_day is not None:
+            conditions.append(EventBlock.date >= first_day)
+        try:
+            result = await self.session.execute(
+                select(EventBlock.date, EventBlock.data)
+                .where(*conditions)
+                .order_by(EventBlock.date.desc())
+                .limit(limit)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load event blocks of user {user_id}: {e}")
+            raise self.exception(self.messages.LOAD_BLOCKS_ERROR.format(user_id=user_id)) from e
+        return [(day, decode_block(data)) for day, data in result.tuples()]
+
+    async def find_users(self, cutoff: datetime, limit: int) -> list[UUID]:
+        """Метод поиска пользователей со строками событий до границы закрытых дней.
+
+        Args:
+            cutoff: Начало первого незакрытого дня.
+            limit: Наибольшее количество пользователей.
+
+        Returns:
+            Идентификаторы пользователей.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения событий.
+        """
+        try:
+            result = await self.session.execute(
+                select(AttentionEvent.user_id).where(AttentionEvent.timestamp < cutoff).distinct().limit(limit)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to find users with events before {cutoff}: {e}")
+            raise self.exception(self.messages.FIND_USERS_ERROR.format(cutoff=cutoff)) from e
+        return list(result.scalars())
+
+    async def _next_day(self, user_id: UUID, after: datetime | None, cutoff: datetime) -> date | None:
+        """Метод поиска ближайшего дня со строками событий пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            after: Время, с которого ищутся строки, None - с первой строки.
+            cutoff: Начало первого незакрытого дня.
+
+        Returns:
+            День (UTC) первой строки, None - строк до ``cutoff`` нет.
+
+        Raises:
+            SQLAlchemyError: При ошибке чтения событий.
+        """
+        conditions = [AttentionEvent.user_id == user_id, AttentionEvent.timestamp < cutoff]
+        if after is not None:
+            conditions.append(AttentionEvent.timestamp >= after)
+        first = await self.session.scalar(select(func.min(AttentionEvent.timestamp)).where(*conditions))
+        return as_utc(first).date() if first is not None else None
+
+    async def _compact_day(self, user_id: UUID, day: date, cutoff: datetime) -> int:
+        """Метод сжатия строк событий пользователя за один день в блок дня.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            day: День (UTC).
+            cutoff: Начало первого незакрытого дня.
+
+        Returns:
+            Количество событий в записанном блоке.
+
+        Raises:
+            SQLAlchemyError: При ошибке чтения или записи.
+            EventBlocksServiceException: При повреждённом блоке дня.
+        """
+        end = min(day_start(day + timedelta(days=1)), cutoff)
+        result = await self.session.execute(
+            select(
+                AttentionEvent.id,
+                AttentionEvent.timestamp,
+                AttentionEvent.domain,
+                AttentionEvent.event_type,
+                AttentionEvent.device_id,
+            )
+            .where(
+                AttentionEvent.user_id == user_id,
+                AttentionEvent.timestamp >= day_start(day),
+                AttentionEvent.timestamp < end,
+            )
+            .order_by(AttentionEvent.timestamp, AttentionEvent.id)
+        )
+        ids: list[int] = []
+        events: list[Event] = []
+        for event_id, timestamp, domain, event_type, device_id in result.tuples():
+            ids.append(event_id)
+            events.append((as_utc(timestamp), domain, event_type, device_id))
+
+        existing = await self.session.scalar(
+            select(EventBlock.data).where(EventBlock.user_id == user_id, EventBlock.date == day)
+        )
+        if existing is not None:
+            events = merge_events(decode_block(existing), events)
+
+        statement = dialect_insert(self.session.bind.dialect.name, EventBlock).values(
+            user_id=user_id, date=day, event_count=len(events), data=encode_block(events)
+        )
+        await self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["user_id", "date"],
+                set_={"event_count": statement.excluded.event_count, "data": statement.excluded.data},
+            )
+        )
+        for offset in range(0, len(ids), _DELETE_CHUNK):
+            chunk = ids[offset : offset + _DELETE_CHUNK]
+            await self.session.execute(delete(AttentionEvent).where(AttentionEvent.id.in_(chunk)))
+        return len(events)
+
+    async def compact_user(self, user_id: UUID, cutoff: datetime, max_days: int) -> dict[date, int]:
+        """Метод сжатия строк событий пользователя за закрытые дни в блоки.
+
+        Дни сжимаются по одному, от ранних к поздним, и не больше ``max_days`` за вызов: первое
+        сжатие длинной истории не читает все её строки разом. Строки дня объединяются
+        с существующим блоком дня и удаляются по идентификаторам: строка, зафиксированная после
+        чтения, остаётся до следующего сжатия.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            cutoff: Начало первого незакрытого дня.
+            max_days: Наибольшее количество сжимаемых дней.
+
+        Returns:
+            Количество событий в записанных блоках по дням.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения или записи.
+        """
+        days: dict[date, int] = {}
+        try:
+            day = await self._next_day(user_id, None, cutoff)
+            while day is not None and len(days) < max_days:
+                days[day] = await self._compact_day(user_id, day, cutoff)
+                day = await self._next_day(user_id, day_start(day + timedelta(days=1)), cutoff)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to compact events of user {user_id}: {e}")
+            raise self.exception(self.messages.COMPACT_ERROR.format(user_id=user_id)) from e
+        return days
+
+    async def exec(
+        self,
+        close_after: timedelta,
+        batch_size: int,
+        summaries: "AggregationService | None" = None,
+        now: datetime | None = None,
+        max_days: int = 31,
+    ) -> CompactionBatch:
+        """Метод сжатия закрытых дней пакета пользователей в одной транзакции.
+
+        Сжатые пользователи больше не находятся поиском, поэтому следующий пакет начинается
+        без курсора; пользователь, у которого осталось больше ``max_days`` дней, находится снова.
+        Сводки сжатых дней пересчитываются в той же транзакции: событие, пришедшее незадолго
+        до сжатия, учитывается, даже если агрегация его ещё не видела.
+
+        Args:
+            close_after: Время от начала дня (UTC), после которого день закрыт.
+            batch_size: Наибольшее количество пользователей в пакете.
+            summaries: Сервис агрегации для пересчёта сводок сжатых дней, None - без пересчёта.
+            now: Текущее время, по умолчанию время вызова.
+            max_days: Наибольшее количество сжимаемых дней пользователя в пакете.
+
+        Returns:
+            Результат сжатия пакета.
+
+        Raises:
+            EventBlocksServiceException: При ошибке сжатия.
+            AggregationServiceException: При ошибке пересчёта сводок.
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = datetime.combine((now - close_after).date(), datetime.min.time(), tzinfo=timezone.utc)
+        blocks = events = 0
+        truncated = False
+        try:
+            users = await self.find_users(cutoff, batch_size)
+            for user_id in users:
+                days = await self.compact_user(user_id, cutoff, max_days)
+                blocks, events = blocks + len(days), events + sum(days.values())
+                truncated = truncated or len(days) >= max_days
+                if summaries is not None and days:
+                    # Дни блоков - сутки UTC, а сводки пересчитываются по местным дням пользователя
+                    last = day_start(max(days) + timedelta(days=1)) - timedelta.resolution
+                    await summaries.aggregate_period(user_id, day_start(min(days)), last, now)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        logger.info(f"Compacted {events} events of {len(users)} users into {blocks} blocks before {cutoff}")
+        return CompactionBatch(
+            users=len(users), blocks=blocks, events=events, exhausted=len(users) < batch_size and not truncated
+        )
@@ -0,0 +1,239 @@
+import base64
+import binascii
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.models.tables import AttentionEvent
+from ..aggregation.sessions import as_utc
+from ..blocks.codec import Event
+from ..blocks.exceptions import EventBlocksServiceException
+from ..blocks.main import EventBlocksService
+from .exceptions import (
+    EventsBrowseInvalidCursorException,
+    EventsBrowseServiceException,
+    EventsBrowseServiceMessages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Источник события в ключе страницы: при равном времени строка attention_events пришла после
+# сжатия блока и идёт после событий блока (как в merge_events)
+_BLOCK, _ROW = 0, 1
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Ключ порядка событий: время, источник и порядковый номер (id строки или номер события в блоке)
+PageKey = tuple[datetime, int, int]
+
+# Наибольшее количество блоков в одном запросе: блоки читаются по 1, 2, 4, ... до этого количества
+_MAX_BLOCKS_STEP = 16
+
+
+def encode_cursor(key: PageKey) -> str:
+    """Функция кодирования ключа последнего события страницы в непрозрачный курсор.
+
+    Args:
+        key: Ключ события.
+
+    Returns:
+        Курсор: base64url без выравнивания от 'микросекунды:источник:номер'.
+    """
+    timestamp, source, ordinal = key
+    micros = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{source}:{ordinal}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> PageKey:
+    """Функция декодирования курсора страницы событий.
+
+    Args:
+        cursor: Курсор, выданный ``encode_cursor``.
+
+    Returns:
+        Ключ последнего события предыдущей страницы.
+
+    Raises:
+        EventsBrowseInvalidCursorException: Если курсор повреждён.
+    """
+    try:
+        text = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, source, ordinal = (int(part) for part in text.split(":"))
+        if source not in (_BLOCK, _ROW) or ordinal < 0:
+            raise ValueError(text)
+        return _EPOCH + timedelta(microseconds=micros), source, ordinal
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError) as e:
+        raise EventsBrowseInvalidCursorException(EventsBrowseServiceMessages.INVALID_CURSOR_ERROR) from e
+
+
+@dataclass(frozen=True)
+class EventsPage:
+    """Страница событий пользователя от новых к старым."""
+
+    events: list[Event]
+    next_cursor: str | None
+
+
+class EventsBrowseService:
+    """Класс сервиса постраничного просмотра событий пользователя.
+
+    События упорядочены от новых к старым по ключу (время, источник, номер), страницы выбираются
+    по ключу последнего события предыдущей страницы (keyset), без OFFSET. Строки attention_events
+    читаются поиском по индексу (user_id, timestamp, id), а сжатые дни - блоками от новых к старым
+    небольшими порциями, пока не наберётся страница: стоимость страницы без фильтров не зависит
+    от глубины истории. Блоки старше последней строки полной страницы строк не читаются. С фильтрами
+    по домену и типу просматривается столько событий, сколько нужно, чтобы набрать страницу.
+    """
+
+    exception = EventsBrowseServiceException
+    messages = EventsBrowseServiceMessages
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            session: Сессия с базой данных.
+        """
+        self.session = session
+
+    async def _load_rows(
+        self, user_id: UUID, after: PageKey | None, limit: int, domain: str | None, event_type: str | None
+    ) -> list[tuple[PageKey, Event]]:
+        """Метод чтения строк attention_events пользователя после ключа.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            after: Ключ последнего события предыдущей страницы, None - с самого нового.
+            limit: Наибольшее количество строк.
+            domain: Домен событий, None - любой.
+            event_type: Тип событий, None - любой.
+
+        Returns:
+            Ключи и события от новых к старым.
+
+        Raises:
+            SQLAlchemyError: При ошибке чтения.
+        """
+        conditions = [AttentionEvent.user_id == user_id]
+        if after is not None:
+            timestamp, source, ordinal = after
+            if source == _ROW:
+                conditions.append(tuple_(AttentionEvent.timestamp, AttentionEvent.id) < tuple_(timestamp, ordinal))
+            else:
+                conditions.append(AttentionEvent.timestamp < timestamp)
+        if domain is not None:
+            conditions.append(AttentionEvent.domain == domain)
+        if event_type is not None:
+            conditions.append(AttentionEvent.event_type == event_type)
+        result = await self.session.execute(
+            select(
+                AttentionEvent.id,
+                AttentionEvent.timestamp,
+                AttentionEvent.domain,
+                AttentionEvent.event_type,
+                AttentionEvent.device_id,
+            )
+            .where(*conditions)
+            .order_by(AttentionEvent.timestamp.desc(), AttentionEvent.id.desc())
+            .limit(limit)
+        )
+        return [
+            ((as_utc(timestamp), _ROW, event_id), (as_utc(timestamp), event_domain, kind, device_id))
+            for event_id, timestamp, event_domain, kind, device_id in result.tuples()
+        ]
+
+    async def _load_blocks(
+        self,
+        user_id: UUID,
+        after: PageKey | None,
+        limit: int,
+        domain: str | None,
+        event_type: str | None,
+        floor: PageKey | None = None,
+    ) -> list[tuple[PageKey, Event]]:
+        """Метод чтения событий сжатых дней пользователя после ключа.
+
+        Блоки читаются от новых к старым порциями по 1, 2, 4, ... блоков (не больше ``_MAX_BLOCKS_STEP``)
+        и декодируются, пока не наберётся ``limit`` событий: без фильтров странице обычно хватает
+        одного-двух блоков. Блоки дней раньше ``floor`` не читаются.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            after: Ключ последнего события предыдущей страницы, None - с самого нового.
+            limit: Наибольшее количество событий.
+            domain: Домен событий, None - любой.
+            event_type: Тип событий, None - любой.
+            floor: Ключ, события старше которого не попадут на страницу, None - без границы.
+
+        Returns:
+            Ключи и события от новых к старым.
+
+        Raises:
+            EventBlocksServiceException: При ошибке чтения или повреждённом блоке.
+        """
+        blocks = EventBlocksService(self.session)
+        events: list[tuple[PageKey, Event]] = []
+        last_day = after[0].date() if after is not None else None
+        first_day = floor[0].date() if floor is not None else None
+        step = 1
+        while len(events) < limit:
+            days = await blocks.load_latest(user_id, last_day, step, first_day)
+            for _, day_events in days:
+                for ordinal in range(len(day_events) - 1, -1, -1):
+                    event = day_events[ordinal]
+                    key = (event[0], _BLOCK, ordinal)
+                    if after is not None and key >= after:
+                        continue
+                    if (domain is None or event[1] == domain) and (event_type is None or event[2] == event_type):
+                        events.append((key, event))
+            if len(days) < step:
+                break
+            last_day = days[-1][0] - timedelta(days=1)
+            step = min(step * 2, _MAX_BLOCKS_STEP)
+        return events[:limit]
+
+    async def exec(
+        self,
+        user_id: UUID,
+        cursor: str | None,
+        limit: int,
+        domain: str | None = None,
+        event_type: str | None = None,
+    ) -> EventsPage:
+        """Метод получения страницы событий пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            cursor: Курсор предыдущей страницы, None - первая страница.
+            limit: Количество событий на странице.
+            domain: Домен событий, None - любой.
+            event_type: Тип событий, None - любой.
+
+        Returns:
+            События от новых к старым и курсор следующей страницы (None - страница последняя).
+
+        Raises:
+            EventsBrowseInvalidCursorException: При повреждённом курсоре.
+            EventsBrowseServiceException: При ошибке чтения.
+        """
+        after = decode_cursor(cursor) if cursor is not None else None
+        try:
+            # Лишнее событие показывает, есть ли следующая страница
+            rows = await self._load_rows(user_id, after, limit + 1, domain, event_type)
+            # Полная страница строк: события блоков старше последней строки на страницу не попадут
+            floor = rows[-1][0] if len(rows) > limit else None
+            blocks = await self._load_blocks(user_id, after, limit + 1, domain, event_type, floor)
+        except (SQLAlchemyError, EventBlocksServiceException) as e:
+            logger.error(f"Failed to load events page of user {user_id}: {e}")
+            raise self.exception(self.messages.LOAD_PAGE_ERROR.format(user_id=user_id)) from e
+
+        page = list(islice(heapq.merge(rows, blocks, key=lambda item: item[0], reverse=True), limit + 1))
+        next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+        return EventsPage(events=[event for _, event in page[:limit]], next_cursor=next_cursor)
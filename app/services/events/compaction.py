@@ -0,0 +1,144 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from ...config import AGGREGATION_MAX_GAP, EVENTS_COMPACTION_ENABLED, EVENTS_COMPACTION_MERGE_GAP
+from ...schemas.events.send_events_request_schema import SendEventData
+from ..aggregation.sessions import ACTIVE, as_utc
+
+# Состояние вкладки до начала пачки неизвестно
+_UNKNOWN = object()
+
+
+@dataclass(frozen=True)
+class CompactedBatch:
+    """Пачка событий после сжатия.
+
+    Attributes:
+        events: Сохраняемые события в порядке времени.
+        dropped: Количество отброшенных событий по причинам: duplicate - точный повтор,
+            repeat - повторное active домена, noop - inactive, не закрывающее интервал,
+            flicker - inactive короткого ухода с домена.
+    """
+
+    events: list[SendEventData]
+    dropped: Counter[str] = field(default_factory=Counter)
+
+
+class CompactionPolicy:
+    """Класс сжатия пачки событий перед сохранением.
+
+    Отбрасываются события, не влияющие на итоги сессий (``sessionize``): точные повторы,
+    повторные active того же домена, если следующее сохраняемое событие пачки наступает
+    в пределах ``max_gap`` от начала интервала, и inactive домена, интервал которого не открыт.
+    Последнее событие пачки сохраняется: следующие события придут в другой пачке. С ``merge_gap``
+    больше нуля отбрасывается и inactive, за которым не позже чем через ``merge_gap`` следует active
+    того же домена: короткий уход с вкладки учитывается как пребывание на ней, итоги увеличиваются
+    не больше чем на ``merge_gap`` за уход.
+    """
+
+    def __init__(self, enabled: bool, max_gap: timedelta, merge_gap: timedelta) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            enabled: Сжатие включено.
+            max_gap: Наибольшая длительность интервала без событий, как при агрегации.
+            merge_gap: Наибольший объединяемый уход с домена, нулевой - без объединения.
+        """
+        self.enabled = enabled
+        self.max_gap = max_gap
+        self.merge_gap = merge_gap
+
+    def compact(self, events: list[SendEventData]) -> CompactedBatch:
+        """Метод сжатия пачки событий.
+
+        Args:
+            events: События пачки в порядке отправки.
+
+        Returns:
+            Сохраняемые события в порядке времени (события с одинаковым временем сохраняют
+            порядок отправки) и количество отброшенных.
+        """
+        if not self.enabled:
+            return CompactedBatch(events=list(events))
+        ordered = sorted(events, key=lambda event: as_utc(event.timestamp))
+        kept: list[SendEventData] = []
+        dropped: Counter[str] = Counter()
+        # Открытый домен (None - интервал закрыт), начало интервала и домены, заведомо не открытые
+        current, start, closed = _UNKNOWN, None, set()
+        # Повторное active, судьба которого решается по следующему сохраняемому событию
+        pending: SendEventData | None = None
+
+        for index, event in enumerate(ordered):
+            timestamp = as_utc(event.timestamp)
+            if event.event != ACTIVE:
+                if (current is _UNKNOWN and event.domain in closed) or (
+                    current is not _UNKNOWN and current != event.domain
+                ):
+                    dropped[self._reason(kept, pending, event, "noop")] += 1
+                    continue
+                following = ordered[index + 1] if index + 1 < len(ordered) else None
+                if (
+                    self.merge_gap
+                    and current == event.domain
+                    and following is not None
+                    and following.event == ACTIVE
+                    and following.domain == event.domain
+                    and as_utc(following.timestamp) - timestamp <= self.merge_gap
+                ):
+                    dropped["flicker"] += 1
+                    continue
+
+            if pending is not None:
+                pending_timestamp = as_utc(pending.timestamp)
+                if pending_timestamp == start:
+                    dropped["duplicate"] += 1
+                elif timestamp - start <= self.max_gap:
+                    dropped["repeat"] += 1
+                else:
+                    kept.append(pending)
+                    start = pending_timestamp
+                pending = None
+
+            if event.event != ACTIVE:
+                kept.append(event)
+                if current is _UNKNOWN:
+                    closed.add(event.domain)
+                else:
+                    current = None
+            elif current == event.domain and timestamp - start <= self.max_gap:
+                pending = event
+            else:
+                kept.append(event)
+                current, start = event.domain, timestamp
+
+        if pending is not None and as_utc(pending.timestamp) == start:
+            dropped["duplicate"] += 1
+        elif pending is not None:
+            kept.append(pending)
+        return CompactedBatch(events=kept, dropped=dropped)
+
+    @staticmethod
+    def _reason(kept: list[SendEventData], pending: SendEventData | None, event: SendEventData, reason: str) -> str:
+        """Метод уточнения причины отбрасывания события.
+
+        Args:
+            kept: Сохраняемые события.
+            pending: Повторное active, ожидающее решения.
+            event: Отбрасываемое событие.
+            reason: Причина по правилу сжатия.
+
+        Returns:
+            duplicate, если событие совпадает с предыдущим, иначе ``reason``.
+        """
+        previous = pending or (kept[-1] if kept else None)
+        if previous is not None and previous == event:
+            return "duplicate"
+        return reason
+
+
+compaction_policy = CompactionPolicy(
+    enabled=EVENTS_COMPACTION_ENABLED,
+    max_gap=timedelta(seconds=AGGREGATION_MAX_GAP),
+    merge_gap=timedelta(seconds=EVENTS_COMPACTION_MERGE_GAP),
+)
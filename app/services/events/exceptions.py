@@ -6,6 +6,10 @@ class EventsServiceException(FormException):
     """Базовое исключение приложения."""
 
 
+class EventsServiceUnavailableException(EventsServiceException):
+    """Исключение: база данных недоступна, события не сохранены."""
+
+
 class EventsServiceMessages(StringEnum):
     """Перечисление сообщений об ошибках."""
 
@@ -13,4 +17,20 @@ class EventsServiceMessages(StringEnum):
     ADD_EVENTS_ERROR: ExceptionMessage = "Failed to insert event into the events table!"
     DATA_INTEGRITY_ERROR: ExceptionMessage = "Data integrity issue when saving events!"
     DATA_SAVE_ERROR: ExceptionMessage = "Database error while saving events!"
+    DATABASE_UNAVAILABLE_ERROR: ExceptionMessage = "Database is unavailable, events were not saved!"
     UNEXPECTED_ERROR = "An unexpected error occurred while processing events!"
+
+
+class EventsBrowseServiceException(FormException):
+    """Исключение сервиса просмотра событий."""
+
+
+class EventsBrowseInvalidCursorException(EventsBrowseServiceException):
+    """Исключение: курсор страницы событий повреждён."""
+
+
+class EventsBrowseServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    INVALID_CURSOR_ERROR: ExceptionMessage = "Invalid events page cursor!"
+    LOAD_PAGE_ERROR: ExceptionMessage = "Failed to load events page of user {user_id}!"
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+
+from ...config import (
+    FLUSH_BATCH_MAX,
+    FLUSH_BATCH_MIN,
+    FLUSH_INTERVAL_MAX,
+    FLUSH_INTERVAL_MIN,
+    FLUSH_JITTER_MAX,
+    FLUSH_JITTER_MIN,
+)
+from ...schemas.events.send_events_request_schema import MAX_EVENTS_PER_REQUEST
+
+
+@dataclass(frozen=True)
+class FlushAdvice:
+    """Рекомендация клиенту по отправке следующей пачки событий.
+
+    Attributes:
+        interval: Интервал до следующей отправки в секундах.
+        max_batch: Рекомендуемый размер пачки.
+        jitter: Наибольшее случайное отклонение интервала в секундах.
+    """
+
+    interval: float
+    max_batch: int
+    jitter: float
+
+
+class FlushPolicy:
+    """Класс расчёта рекомендаций по отправке событий из нагрузки воркера.
+
+    Без нагрузки клиенты отправляют небольшие пачки часто, данные в отчётах свежие. С ростом
+    нагрузки интервал и пачки увеличиваются, а случайное отклонение расширяется: запросы клиентов,
+    синхронизированных общим событием (перезапуск браузеров, восстановление сети), распределяются
+    во времени, а их количество сокращается.
+    """
+
+    def __init__(
+        self,
+        interval: tuple[float, float],
+        batch: tuple[int, int],
+        jitter: tuple[float, float],
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            interval: Интервал отправки без нагрузки и при полной нагрузке, секунды.
+            batch: Размер пачки без нагрузки и при полной нагрузке.
+            jitter: Доля интервала для случайного отклонения без нагрузки и при полной нагрузке.
+        """
+        self.interval = interval
+        self.batch = (batch[0], min(batch[1], MAX_EVENTS_PER_REQUEST))
+        self.jitter = jitter
+
+    def advise(self, load: float) -> FlushAdvice:
+        """Метод расчёта рекомендации для нагрузки.
+
+        Args:
+            load: Нагрузка воркера в диапазоне [0, 1].
+
+        Returns:
+            Рекомендация по отправке.
+        """
+        load = min(max(load, 0.0), 1.0)
+        interval = _lerp(self.interval, load)
+        return FlushAdvice(
+            interval=round(interval, 3),
+            max_batch=round(_lerp(self.batch, load)),
+            jitter=round(interval * _lerp(self.jitter, load), 3),
+        )
+
+
+def _lerp(bounds: tuple[float, float], load: float) -> float:
+    """Функция линейной интерполяции между границами.
+
+    Args:
+        bounds: Значения без нагрузки и при полной нагрузке.
+        load: Нагрузка в диапазоне [0, 1].
+
+    Returns:
+        Значение для нагрузки.
+    """
+    return bounds[0] + (bounds[1] - bounds[0]) * load
+
+
+flush_policy = FlushPolicy(
+    interval=(FLUSH_INTERVAL_MIN, FLUSH_INTERVAL_MAX),
+    batch=(FLUSH_BATCH_MIN, FLUSH_BATCH_MAX),
+    jitter=(FLUSH_JITTER_MIN, FLUSH_JITTER_MAX),
+)
@@ -3,14 +3,20 @@ from abc import ABC, abstractmethod
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from .exceptions import EventsServiceException, EventsServiceMessages
+from .compaction import CompactionPolicy, compaction_policy
+from .exceptions import EventsServiceException, EventsServiceMessages, EventsServiceUnavailableException
+from ...common.metrics import observe_compaction, observe_ingest
 from ...db.models.tables import AttentionEvent, User
 from ...schemas.events.send_events_request_schema import SendEventsRequestSchema, SendEventData
 
 logger = logging.getLogger(__name__)
 
+# Ошибки соединения с базой данных: повтор той же пачки позже может быть успешным
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError, PoolTimeoutError, OSError)
+
 
 class EventsServiceBase(ABC):
     """Базовый класс сервиса событий."""
@@ -32,7 +38,21 @@ class EventsServiceBase(ABC):
 
 
 class EventsService(EventsServiceBase):
-    """Класс сервиса событий."""
+    """Класс сервиса событий.
+
+    Пачка сжимается перед сохранением (``CompactionPolicy``): события, не влияющие на итоги
+    агрегации, не записываются.
+    """
+
+    def __init__(self, session: AsyncSession, compaction: CompactionPolicy = compaction_policy) -> None:
+        """Инициализация класса.
+
+        Args:
+            session: Сессия с базой данных.
+            compaction: Правила сжатия пачки событий.
+        """
+        super().__init__(session)
+        self.compaction = compaction
 
     async def _ensure_user_exists(self, user_id: UUID) -> None:
         """Метод получение или создание пользователя в базе данных.
@@ -43,16 +63,19 @@ class EventsService(EventsServiceBase):
         try:
             user_insert = insert(User).values(id=user_id).on_conflict_do_nothing(index_elements=["id"])
             await self.session.execute(user_insert)
+        except UNAVAILABLE_ERRORS:
+            raise
         except Exception as e:
             logger.error(f"Failed to ensure user {user_id} exists: {e.__str__()}")
             raise self.exception(self.messages.GET_OR_CREATE_USER_ERROR.format(user_id=user_id)) from e
 
-    async def _insert_events(self, events: list[SendEventData], user_id: UUID) -> None:
+    async def _insert_events(self, events: list[SendEventData], user_id: UUID, device_id: str | None = None) -> None:
         """Метод добавления событий в базу данных.
 
         Args:
             events: Список событий.
             user_id: Идентификатор пользователя.
+            device_id: Идентификатор устройства.
         """
         try:
             events = [
@@ -61,6 +84,7 @@ class EventsService(EventsServiceBase):
                     domain=event.domain,
                     event_type=event.event,
                     timestamp=event.timestamp,
+                    device_id=device_id,
                 )
                 for event in events
             ]
@@ -77,22 +101,38 @@ class EventsService(EventsServiceBase):
             user_id: Идентификатор пользователоя.
         """
         try:
+            batch = self.compaction.compact(events.data)
             await self._ensure_user_exists(user_id)
-            await self._insert_events(events.data, user_id)
+            await self._insert_events(batch.events, user_id, events.device_id)
             await self.session.commit()
+            observe_ingest(len(events.data))
+            observe_compaction(batch.dropped)
             logger.info(f"Successfully processed {len(events.data)} events for user {user_id}")
         except IntegrityError as e:
+            observe_ingest(len(events.data), outcome="error")
             await self.session.rollback()
             logger.error(f"Integrity error while processing events for user {user_id}: {e}")
             raise self.exception(self.messages.DATA_INTEGRITY_ERROR) from e
+        except UNAVAILABLE_ERRORS as e:
+            observe_ingest(len(events.data), outcome="error")
+            try:
+                await self.session.rollback()
+            except SQLAlchemyError:
+                # Соединение уже потеряно: откатывать на сервере нечего
+                pass
+            logger.error(f"Database is unavailable while processing events for user {user_id}: {e}")
+            raise EventsServiceUnavailableException(self.messages.DATABASE_UNAVAILABLE_ERROR) from e
         except SQLAlchemyError as e:
+            observe_ingest(len(events.data), outcome="error")
             await self.session.rollback()
             logger.error(f"Database error while processing events for user {user_id}: {e}")
             raise self.exception(self.messages.DATA_SAVE_ERROR) from e
         except EventsServiceException:
+            observe_ingest(len(events.data), outcome="error")
             await self.session.rollback()
             raise
         except Exception as e:
+            observe_ingest(len(events.data), outcome="error")
             await self.session.rollback()
             logger.error(f"Unexpected error while processing events for user {user_id}: {e}")
             raise self.exception(self.messages.UNEXPECTED_ERROR) from e
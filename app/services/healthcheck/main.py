@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import cached_property
+from time import monotonic, perf_counter
+from typing import Any, Awaitable, Callable
+
+from ...common.common import StringEnum
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[dict[str, Any] | None]]
+
+
+class HealthStatus(StringEnum):
+    """Перечисление состояний готовности сервиса."""
+
+    OK = "ok"
+    DEGRADED = "degraded"
+    UNAVAILABLE = "unavailable"
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Результат одной проверки зависимости."""
+
+    name: str
+    healthy: bool
+    latency_ms: float
+    checked_at: datetime
+    error: str | None = None
+    details: dict[str, Any] = field(default_factory=dict)
+    degraded: bool = False
+
+
+@dataclass(frozen=True)
+class HealthReport:
+    """Отчёт о готовности сервиса, построенный по результатам последних проверок."""
+
+    status: HealthStatus
+    checks: dict[str, ProbeResult]
+    created_at: float
+
+    @cached_property
+    def payload(self) -> dict[str, Any]:
+        """Отчёт в сериализуемом виде, вычисляется один раз на отчёт.
+
+        Returns:
+            Словарь с состоянием и результатами проверок.
+        """
+        return {
+            "status": str(self.status),
+            "checks": {
+                name: {
+                    "healthy": result.healthy,
+                    "degraded": result.degraded,
+                    "latency_ms": round(result.latency_ms, 3),
+                    "checked_at": result.checked_at.isoformat(),
+                    "error": result.error,
+                    "details": result.details,
+                }
+                for name, result in self.checks.items()
+            },
+        }
+
+
+class HealthProber:
+    """Класс фоновой проверки зависимостей сервиса.
+
+    Проверки выполняются в фоновой задаче с заданным интервалом, результаты кэшируются вместе
+    с временем и длительностью проверки. Запросы готовности обслуживаются из памяти и не обращаются
+    к зависимостям. Результаты старше ``stale_after`` считаются недействительными.
+    """
+
+    def __init__(
+        self,
+        probes: dict[str, Probe],
+        interval: float = 5.0,
+        timeout: float = 2.0,
+        stale_after: float | None = None,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            probes: Проверки зависимостей по имени. Проверка возвращает детали или None и бросает
+                исключение при недоступности; ключ 'degraded' в деталях помечает деградацию.
+            interval: Интервал между проверками в секундах.
+            timeout: Таймаут одной проверки в секундах.
+            stale_after: Возраст результатов, после которого они недействительны, по умолчанию 3 интервала.
+        """
+        self._probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self._results: dict[str, ProbeResult] = {}
+        self._report: HealthReport | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run_probe(self, name: str, probe: Probe) -> ProbeResult:
+        """Метод выполнения одной проверки с таймаутом.
+
+        Args:
+            name: Имя проверки.
+            probe: Проверка.
+
+        Returns:
+            Результат проверки.
+        """
+        start = perf_counter()
+        try:
+            details = await asyncio.wait_for(probe(), timeout=self.timeout) or {}
+            degraded = bool(details.pop("degraded", False))
+            return ProbeResult(
+                name, True, (perf_counter() - start) * 1000, datetime.now(timezone.utc), None, details, degraded
+            )
+        except Exception as e:
+            error = "timeout" if isinstance(e, asyncio.TimeoutError) else f"{type(e).__name__}: {e}"
+            logger.warning(f"Health probe {name} failed: {error}")
+            return ProbeResult(name, False, (perf_counter() - start) * 1000, datetime.now(timezone.utc), error)
+
+    async def probe_once(self) -> HealthReport:
+        """Метод выполнения всех проверок и обновления кэшированного отчёта.
+
+        Returns:
+            Обновлённый отчёт.
+        """
+        results = await asyncio.gather(*(self._run_probe(name, probe) for name, probe in self._probes.items()))
+        self._results = {result.name: result for result in results}
+        self._report = self._build_report()
+        return self._report
+
+    def _build_report(self) -> HealthReport:
+        """Метод построения отчёта по кэшированным результатам.
+
+        Returns:
+            Отчёт о готовности.
+        """
+        checks = dict(self._results)
+        if not checks or not all(result.healthy for result in checks.values()):
+            status = HealthStatus.UNAVAILABLE
+        elif any(result.degraded for result in checks.values()):
+            status = HealthStatus.DEGRADED
+        else:
+            status = HealthStatus.OK
+        return HealthReport(status=status, checks=checks, created_at=monotonic())
+
+    def report(self) -> HealthReport:
+        """Метод получения отчёта о готовности из памяти.
+
+        Returns:
+            Последний отчёт; отчёт недоступности, если проверок ещё не было или они устарели.
+        """
+        report = self._report
+        if report is None or monotonic() - report.created_at > self.stale_after:
+            return HealthReport(status=HealthStatus.UNAVAILABLE, checks=dict(self._results), created_at=monotonic())
+        return report
+
+    async def _loop(self) -> None:
+        """Метод фонового цикла проверок."""
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"Health prober iteration failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Метод запуска фоновых проверок в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Метод остановки фоновых проверок."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
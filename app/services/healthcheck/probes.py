@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ...common.admission import AdmissionController
+from ...db.session.manager import Manager
+from .main import Probe
+
+
+def pool_details(engine: AsyncEngine, saturation_threshold: float) -> dict[str, Any]:
+    """Функция получения состояния пула соединений.
+
+    Args:
+        engine: Асинхронный engine SQLAlchemy.
+        saturation_threshold: Доля занятых соединений (0..1), начиная с которой пул считается насыщенным.
+
+    Returns:
+        Размер пула, занятые соединения, насыщенность и признак деградации.
+    """
+    pool = engine.sync_engine.pool
+    if not callable(getattr(pool, "size", None)):
+        return {}
+    size = pool.size()
+    capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity else 0.0
+    return {
+        "pool_size": size,
+        "pool_capacity": capacity,
+        "checked_out": checked_out,
+        "saturation": round(saturation, 3),
+        "degraded": saturation >= saturation_threshold,
+    }
+
+
+def database_probe(get_shards: Callable[[], dict[str, Manager]], saturation_threshold: float = 0.9) -> Probe:
+    """Функция построения проверки базы данных по всем шардам.
+
+    Запрос ``SELECT 1`` и состояние пула проверяются на каждом шарде одновременно: недоступность
+    любого шарда делает проверку неуспешной, насыщенность пула любого шарда - деградацией.
+
+    Args:
+        get_shards: Функция получения менеджеров шардов по именам, вызывается при каждой проверке.
+        saturation_threshold: Порог насыщенности пула для состояния деградации.
+
+    Returns:
+        Проверка базы данных.
+    """
+
+    async def check(manager: Manager) -> dict[str, Any]:
+        async with manager.get_session() as session:
+            await session.execute(text("SELECT 1"))
+        return pool_details(manager.get_engine(), saturation_threshold)
+
+    async def probe() -> dict[str, Any]:
+        shards = get_shards()
+        results = await asyncio.gather(*(check(manager) for manager in shards.values()), return_exceptions=True)
+        details = dict(zip(shards, results))
+        failed = {name: result for name, result in details.items() if isinstance(result, BaseException)}
+        if failed:
+            errors = ", ".join(f"{name} ({type(error).__name__}: {error})" for name, error in failed.items())
+            raise RuntimeError(f"Database shards unavailable: {errors}")
+        return {
+            "shards": details,
+            "degraded": any(result.get("degraded", False) for result in details.values()),
+        }
+
+    return probe
+
+
+def redis_probe(url: str, timeout: float = 2.0) -> Probe:
+    """Функция построения проверки Redis.
+
+    Args:
+        url: URL Redis.
+        timeout: Таймаут подключения и ответа в секундах.
+
+    Returns:
+        Проверка Redis.
+    """
+    client = None
+
+    async def probe() -> None:
+        nonlocal client
+        if client is None:
+            # Клиент и модуль redis создаются при первой проверке, а не при импорте приложения
+            from redis.asyncio import Redis
+
+            client = Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        await client.ping()
+
+    return probe
+
+
+def broker_probe(url: str, timeout: float = 2.0) -> Probe:
+    """Функция построения проверки брокера Celery через транспорт kombu.
+
+    Args:
+        url: URL брокера.
+        timeout: Таймаут подключения в секундах.
+
+    Returns:
+        Проверка брокера.
+    """
+
+    def _connect() -> None:
+        from kombu import Connection
+
+        with Connection(url, connect_timeout=timeout) as connection:
+            connection.ensure_connection(max_retries=1, timeout=timeout)
+
+    async def probe() -> None:
+        await asyncio.to_thread(_connect)
+
+    return probe
+
+
+def admission_probe(controller: AdmissionController) -> Probe:
+    """Функция построения проверки перегрузки воркера по контролю допуска.
+
+    Перегрузка не делает сервис недоступным: воркер отклоняет только новые запросы приёма событий,
+    поэтому проверка помечает деградацию.
+
+    Args:
+        controller: Контроллер допуска воркера.
+
+    Returns:
+        Проверка перегрузки.
+    """
+
+    async def probe() -> dict[str, Any]:
+        reason = controller.overload_reason()
+        return {
+            "in_flight": controller.in_flight,
+            "pool_wait_ms": round(controller.pool_wait * 1000, 3),
+            "overload": reason,
+            "degraded": reason is not None,
+        }
+
+    return probe
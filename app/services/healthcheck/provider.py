@@ -0,0 +1,16 @@
+from ...common.admission import admission_controller
+from ...config import HEALTHCHECK_INTERVAL, HEALTHCHECK_POOL_SATURATION, HEALTHCHECK_TIMEOUT, REDIS_URL
+from ...db.session.provider import get_shards
+from .main import HealthProber
+from .probes import admission_probe, broker_probe, database_probe, redis_probe
+
+prober = HealthProber(
+    probes={
+        "database": database_probe(get_shards, saturation_threshold=HEALTHCHECK_POOL_SATURATION),
+        "redis": redis_probe(REDIS_URL, timeout=HEALTHCHECK_TIMEOUT),
+        "broker": broker_probe(REDIS_URL, timeout=HEALTHCHECK_TIMEOUT),
+        "admission": admission_probe(admission_controller),
+    },
+    interval=HEALTHCHECK_INTERVAL,
+    timeout=HEALTHCHECK_TIMEOUT,
+)
@@ -0,0 +1,347 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
+from uuid import UUID
+
+from ...common.metrics import observe_live_connection, observe_live_update
+from ...common.responses import dumps
+from ...schemas.events.send_events_request_schema import SendEventData
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from redis.asyncio.client import PubSub
+
+logger = logging.getLogger(__name__)
+
+# Изменение использования домена: последнее событие, его время и количество событий
+Delta = dict[str, dict[str, str | int]]
+
+
+def build_delta(events: Iterable[SendEventData]) -> Delta:
+    """Функция построения компактного изменения по пачке событий.
+
+    Для каждого домена остаётся только последнее событие пачки: этого достаточно, чтобы показать,
+    на каком домене пользователь сейчас и с какого момента.
+
+    Args:
+        events: События пачки.
+
+    Returns:
+        Изменение по доменам.
+    """
+    delta: Delta = {}
+    for event in events:
+        merge_delta(
+            delta,
+            {event.domain: {"event": event.event, "timestamp": event.timestamp.isoformat(), "events": 1}},
+        )
+    return delta
+
+
+def merge_delta(pending: Delta, delta: Delta) -> None:
+    """Функция слияния изменения с ещё не отправленным.
+
+    Args:
+        pending: Неотправленное изменение, дополняется на месте.
+        delta: Новое изменение.
+    """
+    for domain, update in delta.items():
+        current = pending.get(domain)
+        if current is None:
+            pending[domain] = dict(update)
+            continue
+        events = current["events"] + update["events"]
+        if update["timestamp"] >= current["timestamp"]:
+            current.update(update)
+        current["events"] = events
+
+
+class Subscription:
+    """Класс подписки соединения на изменения пользователя.
+
+    Изменения, пришедшие между чтениями, сливаются в одно: подписка хранит не очередь, а одно
+    неотправленное изменение, поэтому медленный клиент не накапливает память, а простаивающее
+    соединение стоит словарь и событие asyncio.
+    """
+
+    __slots__ = ("user_id", "_pending", "_ready")
+
+    def __init__(self, user_id: UUID) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            user_id: Идентификатор пользователя.
+        """
+        self.user_id = user_id
+        self._pending: Delta = {}
+        self._ready = asyncio.Event()
+
+    def push(self, delta: Delta) -> None:
+        """Метод добавления изменения к неотправленному.
+
+        Args:
+            delta: Изменение.
+        """
+        merge_delta(self._pending, delta)
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Delta | None:
+        """Метод ожидания накопленного изменения.
+
+        Args:
+            timeout: Наибольшее время ожидания в секундах.
+
+        Returns:
+            Все изменения с прошлого чтения, слитые в одно, или None, если их не было за timeout.
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._ready.clear()
+        delta, self._pending = self._pending, {}
+        return delta
+
+
+async def event_stream(
+    broker: "LocalBroker", user_id: UUID, heartbeat: float, min_interval: float
+) -> AsyncIterator[bytes]:
+    """Функция потока Server-Sent Events с изменениями использования пользователя.
+
+    После отправки изменения поток ждёт ``min_interval``: изменения за это время сливаются в одно,
+    и клиент получает не больше одного обновления за интервал при любой частоте приёма событий.
+    Без изменений раз в ``heartbeat`` отправляется комментарий, чтобы прокси не закрывали соединение.
+
+    Args:
+        broker: Брокер изменений.
+        user_id: Идентификатор пользователя.
+        heartbeat: Интервал комментариев без изменений в секундах.
+        min_interval: Наименьший интервал между обновлениями в секундах.
+
+    Yields:
+        Сообщения Server-Sent Events.
+    """
+    async with broker.subscribe(user_id) as subscription:
+        yield f"retry: {round(heartbeat * 1000)}\n\n".encode()
+        while True:
+            delta = await subscription.next(heartbeat)
+            if delta is None:
+                yield b": ping\n\n"
+                continue
+            yield b"event: usage\ndata: " + dumps(delta) + b"\n\n"
+            observe_live_update()
+            await asyncio.sleep(min_interval)
+
+
+class LocalBroker:
+    """Класс брокера изменений в памяти процесса.
+
+    Подходит для запуска в один процесс: изменение, опубликованное воркером, получают только
+    подписчики этого же воркера.
+    """
+
+    def __init__(self, max_connections: int = 10_000) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            max_connections: Наибольшее количество подписок воркера.
+        """
+        self.max_connections = max_connections
+        self._subscribers: dict[UUID, set[Subscription]] = {}
+        self._connections = 0
+
+    @property
+    def connections(self) -> int:
+        """Количество подписок воркера."""
+        return self._connections
+
+    def available(self) -> bool:
+        """Метод проверки возможности новой подписки.
+
+        Returns:
+            True, если лимит подписок воркера не достигнут.
+        """
+        return self._connections < self.max_connections
+
+    def deliver(self, user_id: UUID, delta: Delta) -> None:
+        """Метод передачи изменения подписчикам пользователя в этом воркере.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            delta: Изменение.
+        """
+        for subscription in self._subscribers.get(user_id, ()):
+            subscription.push(delta)
+
+    async def publish(self, user_id: UUID, delta: Delta) -> None:
+        """Метод публикации изменения использования пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            delta: Изменение.
+        """
+        self.deliver(user_id, delta)
+
+    def has_subscribers(self, user_id: UUID) -> bool:
+        """Метод проверки наличия подписчиков пользователя в этом воркере.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            True, если у пользователя есть подписчики.
+        """
+        return user_id in self._subscribers
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: UUID) -> AsyncIterator[Subscription]:
+        """Метод подписки на изменения пользователя на время контекста.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Yields:
+            Подписка.
+        """
+        subscription = Subscription(user_id)
+        self._subscribers.setdefault(user_id, set()).add(subscription)
+        self._connections += 1
+        observe_live_connection(1)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers[user_id]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[user_id]
+            self._connections -= 1
+            observe_live_connection(-1)
+
+    async def close(self) -> None:
+        """Метод освобождения ресурсов брокера."""
+
+
+class RedisBroker(LocalBroker):
+    """Класс брокера изменений через Redis pub/sub для нескольких воркеров.
+
+    Изменения публикуются в канал пользователя. Воркер держит одно соединение pub/sub и подписывается
+    на канал пользователя, пока у того есть локальные подписчики, поэтому получает только нужные
+    ему изменения и не открывает соединение Redis на каждого клиента. При недоступности Redis
+    изменения теряются: живой просмотр не должен останавливать приём событий.
+    """
+
+    def __init__(self, client: "Redis", prefix: str = "live", max_connections: int = 10_000) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            client: Асинхронный клиент Redis.
+            prefix: Префикс каналов.
+            max_connections: Наибольшее количество подписок воркера.
+        """
+        super().__init__(max_connections)
+        self.client = client
+        self.prefix = prefix
+        self._pubsub: "PubSub | None" = None
+        self._listener: asyncio.Task | None = None
+        self._closing = False
+
+    def _channel(self, user_id: UUID) -> str:
+        """Метод получения канала пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            Имя канала.
+        """
+        return f"{self.prefix}:{user_id}"
+
+    async def publish(self, user_id: UUID, delta: Delta) -> None:
+        """Метод публикации изменения использования пользователя всем воркерам.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            delta: Изменение.
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            await self.client.publish(self._channel(user_id), dumps(delta))
+        except RedisError as e:
+            logger.warning(f"Failed to publish live update for {user_id}: {e}")
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: UUID) -> AsyncIterator[Subscription]:
+        """Метод подписки на изменения пользователя на время контекста.
+
+        Канал пользователя подписывается при первом локальном подписчике и отписывается после последнего.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Yields:
+            Подписка.
+        """
+        from redis.exceptions import RedisError
+
+        first = not self.has_subscribers(user_id)
+        async with super().subscribe(user_id) as subscription:
+            if first:
+                try:
+                    if self._pubsub is None:
+                        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    await self._pubsub.subscribe(self._channel(user_id))
+                    # Чтение запускается после подписки: до неё у pub/sub нет соединения
+                    self._ensure_listener()
+                except RedisError as e:
+                    logger.warning(f"Failed to subscribe to live updates for {user_id}: {e}")
+            try:
+                yield subscription
+            finally:
+                if len(self._subscribers[user_id]) == 1:
+                    try:
+                        await self._pubsub.unsubscribe(self._channel(user_id))
+                    except RedisError as e:
+                        logger.warning(f"Failed to unsubscribe from live updates for {user_id}: {e}")
+
+    def _ensure_listener(self) -> None:
+        """Метод запуска чтения сообщений pub/sub воркера, если оно ещё не запущено."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Метод чтения сообщений pub/sub и передачи их подписчикам воркера.
+
+        Чтение ограничено таймаутом, чтобы цикл проверял признак остановки: отмена задачи во время
+        ожидания сообщения клиентом Redis не всегда доходит до цикла. Ошибка чтения или разбора
+        сообщения записывается в лог и не останавливает цикл: иначе подписчики воркера перестали бы
+        получать изменения без признаков сбоя.
+        """
+        from redis.exceptions import RedisError
+
+        prefix_length = len(self.prefix) + 1
+        while not self._closing:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                self.deliver(UUID(channel[prefix_length:]), json.loads(message["data"]))
+            except RedisError as e:
+                logger.warning(f"Live updates subscription failed: {e}")
+                await asyncio.sleep(1.0)
+            except Exception:
+                logger.exception("Failed to handle live update message")
+
+    async def close(self) -> None:
+        """Метод остановки чтения сообщений и закрытия соединений Redis."""
+        self._closing = True
+        if self._listener is not None:
+            await self._listener
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        await self.client.aclose()
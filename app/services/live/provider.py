@@ -0,0 +1,33 @@
+from ...config import LIVE_MAX_CONNECTIONS, LIVE_REDIS, REDIS_URL
+from .main import LocalBroker, RedisBroker
+
+_broker: LocalBroker | None = None
+
+
+def get_live_broker() -> LocalBroker:
+    """Функция получения брокера изменений использования процесса.
+
+    Брокер и клиент Redis создаются при первом обращении: клиент привязывается к циклу событий воркера.
+
+    Returns:
+        Брокер изменений.
+    """
+    global _broker
+
+    if _broker is None:
+        if LIVE_REDIS:
+            from redis.asyncio import Redis
+
+            _broker = RedisBroker(Redis.from_url(REDIS_URL), max_connections=LIVE_MAX_CONNECTIONS)
+        else:
+            _broker = LocalBroker(max_connections=LIVE_MAX_CONNECTIONS)
+    return _broker
+
+
+async def close_live_broker() -> None:
+    """Функция остановки брокера изменений использования."""
+    global _broker
+
+    broker, _broker = _broker, None
+    if broker is not None:
+        await broker.close()
@@ -0,0 +1,239 @@
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Hashable
+
+from ...common.metrics import observe_rate_limit
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+LOCAL_TIER = "local"
+FLEET_TIER = "fleet"
+
+# Корзина хранится в хэше: tokens - остаток, ts - время обновления (мс), limited - прошлый запрос отклонён.
+# Время берётся из Redis (TIME), поэтому расхождение часов воркеров не влияет на пополнение.
+# KEYS[1] - ключ корзины; ARGV: скорость (токенов/с), ёмкость, стоимость, TTL ключа (мс)
+_TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rate = tonumber(ARGV[1]) / 1000
+local capacity = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'limited')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed, retry_after, newly_limited, limited = 0, 0, 0, 1
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed, limited = 1, 0
+else
+    retry_after = math.ceil((cost - tokens) / rate)
+    if state[3] ~= '1' then
+        newly_limited = 1
+    end
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now, 'limited', limited)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, retry_after, newly_limited}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Решение ограничителя по запросу.
+
+    Attributes:
+        allowed: Запрос разрешён.
+        retry_after: Через сколько секунд накопится стоимость запроса, 0 - запрос разрешён.
+        tier: Уровень, отклонивший запрос, None - запрос разрешён.
+        newly_limited: Предыдущий запрос ключа был разрешён: ключ только что попал под ограничение.
+    """
+
+    allowed: bool
+    retry_after: float = 0.0
+    tier: str | None = None
+    newly_limited: bool = False
+
+
+ALLOWED = RateLimitDecision(allowed=True)
+
+
+@dataclass
+class TokenBucket:
+    """Состояние корзины токенов ключа."""
+
+    tokens: float
+    updated: float
+    limited: bool = False
+
+
+class LocalTokenBucketLimiter:
+    """Класс ограничителя запросов корзиной токенов в памяти процесса.
+
+    Корзина ключа пополняется со скоростью ``rate`` токенов в секунду до ``capacity``. Метод acquire
+    не содержит точек переключения корутин, поэтому в цикле событий воркера выполняется атомарно
+    без блокировок. Количество корзин ограничено ``max_keys``: дольше всех не обращавшийся ключ
+    вытесняется, что для него равносильно полной корзине.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            rate: Скорость пополнения, токенов в секунду.
+            capacity: Ёмкость корзины (допустимый всплеск).
+            max_keys: Наибольшее количество хранимых корзин.
+            clock: Монотонные часы в секундах.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: dict[Hashable, TokenBucket] = {}
+
+    def __len__(self) -> int:
+        """Магический метод получения количества хранимых корзин.
+
+        Returns:
+            Количество корзин.
+        """
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> RateLimitDecision:
+        """Метод списания стоимости запроса из корзины ключа.
+
+        Args:
+            key: Ключ ограничения (идентификатор пользователя).
+            cost: Стоимость запроса; стоимость больше ёмкости списывается как полная корзина.
+
+        Returns:
+            Решение по запросу.
+        """
+        cost = min(cost, self.capacity)
+        now = self._clock()
+        # Повторная вставка переносит ключ в конец словаря: порядок ключей - порядок последних обращений
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            bucket = TokenBucket(tokens=self.capacity, updated=now)
+        else:
+            bucket.tokens = min(self.capacity, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        self._buckets[key] = bucket
+        if len(self._buckets) > self.max_keys:
+            del self._buckets[next(iter(self._buckets))]
+
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            bucket.limited = False
+            return ALLOWED
+        newly_limited, bucket.limited = not bucket.limited, True
+        return RateLimitDecision(
+            allowed=False,
+            retry_after=(cost - bucket.tokens) / self.rate,
+            tier=LOCAL_TIER,
+            newly_limited=newly_limited,
+        )
+
+
+class RedisTokenBucketLimiter:
+    """Класс ограничителя запросов корзиной токенов в Redis, общей для всех воркеров.
+
+    Пополнение и списание выполняются одним Lua-скриптом, атомарно относительно других воркеров.
+    Ключ корзины истекает, когда она заведомо полна.
+    """
+
+    def __init__(self, client: "Redis", rate: float, capacity: float, prefix: str = "ratelimit") -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            client: Асинхронный клиент Redis.
+            rate: Скорость пополнения, токенов в секунду.
+            capacity: Ёмкость корзины (допустимый всплеск).
+            prefix: Префикс ключей.
+        """
+        self.client = client
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+        self._ttl_ms = math.ceil(capacity / rate * 1000)
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: Hashable, cost: float = 1.0) -> RateLimitDecision:
+        """Метод списания стоимости запроса из общей корзины ключа.
+
+        Args:
+            key: Ключ ограничения (идентификатор пользователя).
+            cost: Стоимость запроса; стоимость больше ёмкости списывается как полная корзина.
+
+        Returns:
+            Решение по запросу.
+
+        Raises:
+            RedisError: При недоступности Redis.
+        """
+        cost = min(cost, self.capacity)
+        allowed, retry_after_ms, newly_limited = await self._script(
+            keys=[f"{self.prefix}:{key}"], args=[self.rate, self.capacity, cost, self._ttl_ms]
+        )
+        if allowed:
+            return ALLOWED
+        return RateLimitDecision(
+            allowed=False,
+            retry_after=retry_after_ms / 1000,
+            tier=FLEET_TIER,
+            newly_limited=bool(newly_limited),
+        )
+
+
+class RateLimiter:
+    """Класс двухуровневого ограничителя запросов.
+
+    Сначала проверяется корзина воркера: шумный пользователь отсекается без обращения к Redis.
+    Разрешённый ею запрос проверяется общей корзиной, ограничивающей пользователя по всем воркерам.
+    При недоступности Redis запрос разрешается: ограничитель не должен останавливать приём событий.
+    """
+
+    def __init__(self, local: LocalTokenBucketLimiter, fleet: RedisTokenBucketLimiter | None = None) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            local: Ограничитель воркера.
+            fleet: Общий ограничитель, None - только ограничение воркера.
+        """
+        self.local = local
+        self.fleet = fleet
+
+    async def acquire(self, key: Hashable, cost: float = 1.0) -> RateLimitDecision:
+        """Метод проверки запроса обоими уровнями ограничения.
+
+        Args:
+            key: Ключ ограничения (идентификатор пользователя).
+            cost: Стоимость запроса.
+
+        Returns:
+            Решение по запросу.
+        """
+        decision = self.local.acquire(key, cost)
+        if decision.allowed and self.fleet is not None:
+            from redis.exceptions import RedisError
+
+            try:
+                decision = await self.fleet.acquire(key, cost)
+            except RedisError as e:
+                logger.warning(f"Fleet rate limit check failed, request allowed: {e}")
+        if not decision.allowed:
+            observe_rate_limit(decision.tier, decision.newly_limited)
+            if decision.newly_limited:
+                logger.warning(f"Rate limit exceeded for {key} ({decision.tier})")
+        return decision
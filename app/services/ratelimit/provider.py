@@ -0,0 +1,45 @@
+from ...config import (
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_FLEET_BURST,
+    RATE_LIMIT_FLEET_RATE,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_REDIS,
+    REDIS_URL,
+)
+from .main import LocalTokenBucketLimiter, RateLimiter, RedisTokenBucketLimiter
+
+_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Функция получения ограничителя запросов процесса.
+
+    Ограничитель и клиент Redis создаются при первом обращении: клиент привязывается к циклу событий
+    воркера, а корзины воркера не наследуются от мастер-процесса.
+
+    Returns:
+        Ограничитель запросов.
+    """
+    global _limiter
+
+    if _limiter is None:
+        fleet = None
+        if RATE_LIMIT_REDIS:
+            from redis.asyncio import Redis
+
+            fleet = RedisTokenBucketLimiter(
+                Redis.from_url(REDIS_URL), rate=RATE_LIMIT_FLEET_RATE, capacity=RATE_LIMIT_FLEET_BURST
+            )
+        local = LocalTokenBucketLimiter(rate=RATE_LIMIT_RATE, capacity=RATE_LIMIT_BURST, max_keys=RATE_LIMIT_MAX_KEYS)
+        _limiter = RateLimiter(local, fleet)
+    return _limiter
+
+
+async def close_rate_limiter() -> None:
+    """Функция закрытия соединений общего ограничителя запросов."""
+    global _limiter
+
+    limiter, _limiter = _limiter, None
+    if limiter is not None and limiter.fleet is not None:
+        await limiter.fleet.client.aclose()
@@ -0,0 +1,14 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class ReshardingServiceException(FormException):
+    """Исключение сервиса переноса пользователей между шардами."""
+
+
+class ReshardingServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    FIND_USERS_ERROR: ExceptionMessage = "Failed to find users of shard {shard} after {cursor}!"
+    COPY_USERS_ERROR: ExceptionMessage = "Failed to copy {count} users from shard {source} to shard {target}!"
+    DELETE_USERS_ERROR: ExceptionMessage = "Failed to delete {count} moved users from shard {source}!"
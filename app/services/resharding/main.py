@@ -0,0 +1,311 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import case, delete, func, insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.dialects import dialect_insert
+from ...db.models.tables import AttentionEvent, DailyDomainSummary, EventBlock, User
+from ...db.session.manager import Manager
+from ...db.session.sharding import HashRing
+from ..aggregation.sessions import as_utc
+from .exceptions import ReshardingServiceException, ReshardingServiceMessages
+
+logger = logging.getLogger(__name__)
+
+_USER_COLUMNS = ("id", "email", "password", "created_at", "deleted_at", "time_zone", "summaries_time_zone")
+_SUMMARY_COLUMNS = ("user_id", "domain", "date", "total_seconds", "active_count", "generated_at")
+_BLOCK_COLUMNS = ("user_id", "date", "event_count", "data")
+
+
+@dataclass(frozen=True)
+class MigrationBatch:
+    """Результат обработки страницы пользователей шарда.
+
+    Attributes:
+        cursor: Идентификатор последнего просмотренного пользователя.
+        scanned: Количество просмотренных пользователей.
+        moved: Количество перенесённых пользователей по шардам назначения.
+        exhausted: Шард просмотрен до конца.
+    """
+
+    cursor: UUID | None
+    scanned: int
+    moved: dict[str, int]
+    exhausted: bool
+
+
+class ReshardingService:
+    """Класс сервиса переноса пользователей, принадлежащих по новой карте шардов другому шарду.
+
+    Пользователи шарда просматриваются страницами по первичному ключу. Данные пользователей страницы
+    копируются в шард назначения (пользователь, события, сводки) и только после фиксации копии
+    удаляются из исходного шарда. Повторный запуск после сбоя безопасен: пользователь записывается
+    через upsert, сводки вставляются без конфликтов, а уже скопированные события пропускаются.
+
+    Новая карта шардов должна применяться приложением до запуска переноса: тогда новые события
+    переносимых пользователей пишутся сразу в шард назначения, а исходный шард только отдаёт данные.
+    """
+
+    exception = ReshardingServiceException
+    messages = ReshardingServiceMessages
+
+    def __init__(self, source: str, shards: dict[str, Manager], ring: HashRing, chunk_size: int = 5000) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            source: Имя исходного шарда.
+            shards: Менеджеры всех шардов новой карты по именам.
+            ring: Кольцо новой карты шардов.
+            chunk_size: Количество событий пользователя, копируемых за один запрос.
+        """
+        self.source = source
+        self.shards = shards
+        self.ring = ring
+        self.chunk_size = chunk_size
+
+    async def find_misplaced(
+        self, cursor: UUID | None, batch_size: int
+    ) -> tuple[dict[str, list[UUID]], UUID | None, int]:
+        """Метод поиска пользователей страницы, принадлежащих другим шардам.
+
+        Args:
+            cursor: Идентификатор последнего просмотренного пользователя, None - с начала таблицы.
+            batch_size: Размер страницы пользователей.
+
+        Returns:
+            Пользователи по шардам назначения, курсор следующей страницы и количество просмотренных.
+
+        Raises:
+            ReshardingServiceException: При ошибке чтения пользователей.
+        """
+        query = select(User.id).order_by(User.id).limit(batch_size)
+        if cursor is not None:
+            query = query.where(User.id > cursor)
+        try:
+            async with self.shards[self.source].get_session() as session:
+                user_ids = list((await session.execute(query)).scalars())
+        except Exception as e:
+            logger.error(f"Failed to find users of shard {self.source} after {cursor}: {e}")
+            raise self.exception(self.messages.FIND_USERS_ERROR.format(shard=self.source, cursor=cursor)) from e
+
+        misplaced: defaultdict[str, list[UUID]] = defaultdict(list)
+        for user_id in user_ids:
+            target = self.ring.shard_for(user_id)
+            if target != self.source:
+                misplaced[target].append(user_id)
+        return dict(misplaced), user_ids[-1] if user_ids else None, len(user_ids)
+
+    async def _copy_events(self, source: AsyncSession, target: AsyncSession, user_id: UUID) -> int:
+        """Метод копирования событий пользователя частями по ``chunk_size`` в порядке (время, id).
+
+        Части выбираются по ключу последнего прочитанного события (keyset), уже скопированные события
+        ищутся в шарде назначения только в промежутке времени части: в памяти находится одна часть.
+
+        Args:
+            source: Сессия исходного шарда.
+            target: Сессия шарда назначения.
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            Количество скопированных событий.
+
+        Raises:
+            SQLAlchemyError: При ошибке чтения или записи.
+        """
+        columns = (
+            AttentionEvent.timestamp,
+            AttentionEvent.domain,
+            AttentionEvent.event_type,
+            AttentionEvent.device_id,
+        )
+        after: tuple[datetime, int] | None = None
+        copied = 0
+        while True:
+            query = (
+                select(AttentionEvent.id, *columns)
+                .where(AttentionEvent.user_id == user_id)
+                .order_by(AttentionEvent.timestamp, AttentionEvent.id)
+                .limit(self.chunk_size)
+            )
+            if after is not None:
+                query = query.where(tuple_(AttentionEvent.timestamp, AttentionEvent.id) > tuple_(*after))
+            chunk = (await source.execute(query)).all()
+            if not chunk:
+                return copied
+
+            existing = {
+                _event_key(*row)
+                for row in await target.execute(
+                    select(*columns).where(
+                        AttentionEvent.user_id == user_id,
+                        AttentionEvent.timestamp >= chunk[0].timestamp,
+                        AttentionEvent.timestamp <= chunk[-1].timestamp,
+                    )
+                )
+            }
+            rows = [
+                {
+                    "user_id": user_id,
+                    "timestamp": timestamp,
+                    "domain": domain,
+                    "event_type": event_type,
+                    "device_id": device_id,
+                }
+                for _, timestamp, domain, event_type, device_id in chunk
+                if _event_key(timestamp, domain, event_type, device_id) not in existing
+            ]
+            if rows:
+                await target.execute(insert(AttentionEvent), rows)
+            copied += len(rows)
+            if len(chunk) < self.chunk_size:
+                return copied
+            after = chunk[-1].timestamp, chunk[-1].id
+
+    async def copy(self, target: str, user_ids: list[UUID]) -> None:
+        """Метод копирования данных пользователей в шард назначения.
+
+        Строка пользователя могла появиться в шарде назначения раньше переноса: приём событий по новой
+        карте создаёт пользователя без учётных данных. Такая строка дополняется учётными данными
+        исходного шарда, а время создания берётся наиболее раннее.
+
+        Args:
+            target: Имя шарда назначения.
+            user_ids: Идентификаторы пользователей.
+
+        Raises:
+            ReshardingServiceException: При ошибке чтения или записи.
+        """
+        try:
+            async with (
+                self.shards[self.source].get_session() as source,
+                self.shards[target].get_session() as session,
+            ):
+                users = (await source.execute(select(User).where(User.id.in_(user_ids)))).scalars().all()
+                summaries = (
+                    (await source.execute(select(DailyDomainSummary).where(DailyDomainSummary.user_id.in_(user_ids))))
+                    .scalars()
+                    .all()
+                )
+                blocks = (
+                    (await source.execute(select(EventBlock).where(EventBlock.user_id.in_(user_ids)))).scalars().all()
+                )
+
+                dialect = session.bind.dialect.name
+                if users:
+                    statement = dialect_insert(dialect, User).values(
+                        [{column: getattr(user, column) for column in _USER_COLUMNS} for user in users]
+                    )
+                    await session.execute(
+                        statement.on_conflict_do_update(
+                            index_elements=["id"],
+                            set_={
+                                "email": func.coalesce(statement.excluded.email, User.email),
+                                "password": func.coalesce(statement.excluded.password, User.password),
+                                "deleted_at": func.coalesce(statement.excluded.deleted_at, User.deleted_at),
+                                # Часовой пояс в шарде назначения задан по новой карте, то есть позже
+                                "time_zone": func.coalesce(User.time_zone, statement.excluded.time_zone),
+                                "summaries_time_zone": func.coalesce(
+                                    User.summaries_time_zone, statement.excluded.summaries_time_zone
+                                ),
+                                "created_at": case(
+                                    (statement.excluded.created_at < User.created_at, statement.excluded.created_at),
+                                    else_=User.created_at,
+                                ),
+                            },
+                        )
+                    )
+                for user in users:
+                    await self._copy_events(source, session, user.id)
+                if blocks:
+                    await session.execute(
+                        dialect_insert(dialect, EventBlock)
+                        .values([{column: getattr(block, column) for column in _BLOCK_COLUMNS} for block in blocks])
+                        .on_conflict_do_nothing(index_elements=["user_id", "date"])
+                    )
+                if summaries:
+                    await session.execute(
+                        dialect_insert(dialect, DailyDomainSummary)
+                        .values(
+                            [
+                                {column: getattr(summary, column) for column in _SUMMARY_COLUMNS}
+                                for summary in summaries
+                            ]
+                        )
+                        .on_conflict_do_nothing(index_elements=["user_id", "domain", "date"])
+                    )
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to copy {len(user_ids)} users from shard {self.source} to shard {target}: {e}")
+            raise self.exception(
+                self.messages.COPY_USERS_ERROR.format(count=len(user_ids), source=self.source, target=target)
+            ) from e
+
+    async def delete(self, user_ids: list[UUID]) -> None:
+        """Метод удаления перенесённых пользователей из исходного шарда.
+
+        Args:
+            user_ids: Идентификаторы пользователей.
+
+        Raises:
+            ReshardingServiceException: При ошибке удаления.
+        """
+        try:
+            async with self.shards[self.source].get_session() as session:
+                await session.execute(delete(AttentionEvent).where(AttentionEvent.user_id.in_(user_ids)))
+                await session.execute(delete(EventBlock).where(EventBlock.user_id.in_(user_ids)))
+                await session.execute(delete(DailyDomainSummary).where(DailyDomainSummary.user_id.in_(user_ids)))
+                await session.execute(delete(User).where(User.id.in_(user_ids)))
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to delete {len(user_ids)} moved users from shard {self.source}: {e}")
+            raise self.exception(
+                self.messages.DELETE_USERS_ERROR.format(count=len(user_ids), source=self.source)
+            ) from e
+
+    async def exec(self, cursor: UUID | None, batch_size: int, dry_run: bool = False) -> MigrationBatch:
+        """Метод переноса пользователей одной страницы исходного шарда.
+
+        Args:
+            cursor: Идентификатор последнего просмотренного пользователя, None - с начала таблицы.
+            batch_size: Размер страницы пользователей.
+            dry_run: Только подсчитать переносимых пользователей, не изменяя данные.
+
+        Returns:
+            Результат обработки страницы с курсором следующей.
+
+        Raises:
+            ReshardingServiceException: При ошибке работы с базами данных.
+        """
+        misplaced, next_cursor, scanned = await self.find_misplaced(cursor, batch_size)
+        for target, user_ids in misplaced.items():
+            if dry_run:
+                continue
+            await self.copy(target, user_ids)
+            await self.delete(user_ids)
+            logger.info(f"Moved {len(user_ids)} users from shard {self.source} to shard {target}")
+        return MigrationBatch(
+            cursor=next_cursor if next_cursor is not None else cursor,
+            scanned=scanned,
+            moved={target: len(user_ids) for target, user_ids in misplaced.items()},
+            exhausted=scanned < batch_size,
+        )
+
+
+def _event_key(timestamp: datetime, domain: str, event_type: str, device_id: str | None) -> tuple:
+    """Функция получения естественного ключа события пользователя для пропуска уже скопированных.
+
+    Args:
+        timestamp: Время события.
+        domain: Домен.
+        event_type: Тип события.
+        device_id: Устройство.
+
+    Returns:
+        Время, домен, тип события и устройство.
+    """
+    return as_utc(timestamp), domain, event_type, device_id
@@ -0,0 +1,115 @@
+import logging
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+
+from celery import shared_task
+
+from ...config import (
+    AGGREGATION_BATCH_SIZE,
+    AGGREGATION_INTERVAL,
+    AGGREGATION_MAX_BATCHES,
+    AGGREGATION_MAX_GAP,
+    AGGREGATION_REWIND,
+    AGGREGATION_SHARDS,
+)
+from ...db.session.provider import get_shards, get_user_shard
+from ..aggregation.main import AggregationService, shard_of
+from ..aggregation.provider import close_coordinator, get_coordinator, reset_coordinator_after_fork
+from ..users.main import RECOMPUTE_USER_TASK, UserSettingsService
+from .runtime import runtime
+
+logger = logging.getLogger(__name__)
+
+runtime.register(close_coordinator, reset_coordinator_after_fork)
+
+
+@shared_task(name="app.services.scheduler.aggregation.dispatch_shards")
+async def dispatch_shards(shards: int = AGGREGATION_SHARDS) -> int:
+    """Задача beat: постановка задач агрегации по всем шардам всех баз данных.
+
+    При изменении количества шардов водяные знаки перебалансируются до постановки задач.
+
+    Args:
+        shards: Количество шардов агрегации в каждой базе данных.
+
+    Returns:
+        Количество поставленных задач.
+    """
+    databases = list(get_shards())
+    for database in databases:
+        await get_coordinator(database).ensure_topology(shards)
+        for shard in range(shards):
+            # Задача, не взятая до следующего запуска beat, устаревает: шард получит новую
+            aggregate_shard.apply_async(args=(shard, shards, database), expires=AGGREGATION_INTERVAL)
+    return shards * len(databases)
+
+
+@shared_task(name="app.services.scheduler.aggregation.aggregate_shard")
+async def aggregate_shard(shard: int, shards: int, database: str | None = None) -> dict[str, Any]:
+    """Задача агрегации событий пользователей шарда ``shard_of(user_id, shards) == shard`` в базе данных.
+
+    Шард обрабатывается под арендой: параллельная задача того же шарда пропускается. Пакеты событий
+    обрабатываются от водяного знака шарда, знак сдвигается после фиксации каждого пакета.
+
+    Args:
+        shard: Номер шарда.
+        shards: Количество шардов, для которого поставлена задача.
+        database: Имя шарда базы данных, None - первый шард (единственная база данных без шардирования).
+
+    Returns:
+        Итог обработки: состояние, количество пользователей, строк и водяной знак.
+    """
+    databases = get_shards()
+    database = database if database is not None else next(iter(databases))
+    coordinator = get_coordinator(database)
+    if await coordinator.current_shards() != shards:
+        logger.info(f"Shard {shard}/{shards} skipped: topology changed")
+        return {"status": "stale"}
+
+    async with coordinator.lease(shard, shards) as lease:
+        if lease is None:
+            return {"status": "busy"}
+
+        watermark = await lease.watermark()
+        users = rows = 0
+        for _ in range(AGGREGATION_MAX_BATCHES):
+            async with databases[database].get_session() as session:
+                service = AggregationService(session, max_gap=timedelta(seconds=AGGREGATION_MAX_GAP))
+                run = await service.exec(shard, shards, watermark, AGGREGATION_BATCH_SIZE, AGGREGATION_REWIND)
+            if not await lease.commit(run.watermark):
+                logger.warning(f"Shard {shard}/{shards} lease lost at watermark {watermark}")
+                return {"status": "lost", "users": users, "rows": rows, "watermark": watermark}
+            watermark, users, rows = run.watermark, users + run.users, rows + run.rows
+            if run.exhausted:
+                break
+
+    return {"status": "done", "users": users, "rows": rows, "watermark": watermark}
+
+
+@shared_task(name=RECOMPUTE_USER_TASK)
+async def recompute_user(user_id: str) -> dict[str, Any]:
+    """Задача пересчёта сводок пользователя за всю историю после смены часового пояса.
+
+    Пересчёт выполняется под арендой шарда агрегации пользователя: задача шарда не записывает
+    сводки пользователя одновременно с пересчётом. Если шард занят, задача ставит себя в очередь
+    заново через интервал агрегации.
+
+    Args:
+        user_id: Идентификатор пользователя.
+
+    Returns:
+        Итог обработки: состояние и количество пересчитанных строк сводки.
+    """
+    user = UUID(user_id)
+    database = get_user_shard(user)
+    coordinator = get_coordinator(database)
+    shards = await coordinator.current_shards() or AGGREGATION_SHARDS
+    async with coordinator.lease(shard_of(user, shards), shards) as lease:
+        if lease is None:
+            recompute_user.apply_async(args=(user_id,), countdown=AGGREGATION_INTERVAL)
+            return {"status": "busy"}
+        async with get_shards()[database].get_session() as session:
+            service = UserSettingsService(session, max_gap=timedelta(seconds=AGGREGATION_MAX_GAP))
+            rows = await service.recompute(user)
+    return {"status": "done", "rows": rows}
@@ -1,12 +1,171 @@
-from celery import Celery
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Any
+
+from ...config import (
+    AGGREGATION_INTERVAL,
+    CELERY_RESULT_EXPIRES,
+    CELERY_VISIBILITY_TIMEOUT,
+    EVENT_BLOCKS_INTERVAL,
+    ORPHAN_GC_INTERVAL,
+)
+
+if TYPE_CHECKING:
+    from celery import Celery, Task
+
+
+@dataclass(frozen=True)
+class QueueSpec:
+    """Описание очереди задач Celery.
+
+    Attributes:
+        name: Имя очереди.
+        tasks: Шаблоны имён задач (glob), направляемых в очередь.
+        prefetch_multiplier: Множитель предвыборки для воркеров, обслуживающих очередь.
+        acks_late: Подтверждение сообщения после выполнения задачи, а не до него.
+        compression: Сжатие сообщений очереди, None - без сжатия.
+    """
+
+    name: str
+    tasks: tuple[str, ...]
+    prefetch_multiplier: int
+    acks_late: bool = False
+    compression: str | None = None
+
+
+DEFAULT_QUEUE = "default"
+
+# Модули с задачами, импортируются воркером при запуске
+TASK_MODULES = ["app.services.scheduler.aggregation", "app.services.scheduler.maintenance"]
+
+QUEUES: tuple[QueueSpec, ...] = (
+    # Длинные идемпотентные задачи агрегации: без предвыборки, подтверждение после выполнения
+    QueueSpec(
+        "aggregation",
+        ("app.services.scheduler.aggregation.*",),
+        prefetch_multiplier=1,
+        acks_late=True,
+        compression="zlib",
+    ),
+    QueueSpec(
+        "maintenance",
+        ("app.services.scheduler.maintenance.*",),
+        prefetch_multiplier=1,
+        acks_late=True,
+    ),
+    QueueSpec(DEFAULT_QUEUE, (), prefetch_multiplier=4),
+)
+
+
+def find_queue(task_name: str, queues: tuple[QueueSpec, ...] = QUEUES) -> QueueSpec:
+    """Функция поиска очереди задачи по её имени.
+
+    Args:
+        task_name: Полное имя задачи.
+        queues: Очереди.
+
+    Returns:
+        Первая очередь с подходящим шаблоном, иначе очередь по умолчанию.
+    """
+    for queue in queues:
+        if any(fnmatchcase(task_name, pattern) for pattern in queue.tasks):
+            return queue
+    return next(queue for queue in queues if queue.name == DEFAULT_QUEUE)
+
+
+class QueueAnnotations:
+    """Класс аннотаций задач Celery параметрами их очереди (acks_late)."""
+
+    def __init__(self, queues: tuple[QueueSpec, ...]) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            queues: Очереди.
+        """
+        self._queues = queues
+
+    def annotate(self, task: "Task") -> dict[str, Any]:
+        """Метод получения атрибутов задачи.
+
+        Args:
+            task: Задача Celery.
+
+        Returns:
+            Атрибуты, устанавливаемые задаче.
+        """
+        return {"acks_late": find_queue(task.name, self._queues).acks_late}
 
 
 class CeleryConfigurator:
-    def __init__(self, url: str):
+    def __init__(self, url: str, queues: tuple[QueueSpec, ...] = QUEUES):
         self.redis_url = url
+        self.queues = queues
+
+    def exec(self) -> "Celery":
+        from celery import Celery
+
+        from .runtime import AsyncTask, QueuePrefetchStep, connect_worker_signals
 
-    def exec(self) -> Celery:
         redis_url = self.redis_url
-        app = Celery("scheduler", broker=redis_url, backend=redis_url, include=["app.services.scheduler"])
+        app = Celery(
+            "scheduler",
+            broker=redis_url,
+            backend=redis_url,
+            include=TASK_MODULES,
+            task_cls=AsyncTask,
+        )
+        app.conf.update(self._topology())
+        app.steps["worker"].add(QueuePrefetchStep)
+        connect_worker_signals()
 
         return app
+
+    def _topology(self) -> dict[str, Any]:
+        """Метод построения настроек очередей, маршрутизации и хранения результатов.
+
+        Returns:
+            Настройки Celery.
+        """
+        from kombu import Queue
+
+        routes = {}
+        for queue in self.queues:
+            options = {"queue": queue.name}
+            if queue.compression:
+                options["compression"] = queue.compression
+            routes.update({pattern: options for pattern in queue.tasks})
+
+        return {
+            "task_queues": [Queue(queue.name, routing_key=queue.name) for queue in self.queues],
+            "task_default_queue": DEFAULT_QUEUE,
+            "task_routes": routes,
+            "task_annotations": [QueueAnnotations(self.queues)],
+            # Задачи выполняются ради побочных эффектов, результаты хранятся только по запросу
+            # (ignore_result=False в декораторе задачи)
+            "task_ignore_result": True,
+            "result_expires": CELERY_RESULT_EXPIRES,
+            # При потере воркера задача с acks_late возвращается в очередь
+            "task_reject_on_worker_lost": True,
+            # Неподтверждённое сообщение Redis доставит повторно не раньше, чем через этот таймаут;
+            # он должен превышать время самой длинной задачи с acks_late
+            "broker_transport_options": {"visibility_timeout": CELERY_VISIBILITY_TIMEOUT},
+            # Множители предвыборки по очередям, применяются QueuePrefetchStep при запуске воркера
+            "worker_queue_prefetch": {queue.name: queue.prefetch_multiplier for queue in self.queues},
+            "beat_schedule": {
+                "aggregation-dispatch-shards": {
+                    "task": "app.services.scheduler.aggregation.dispatch_shards",
+                    "schedule": AGGREGATION_INTERVAL,
+                    "options": {"expires": AGGREGATION_INTERVAL},
+                },
+                "maintenance-purge-orphan-users": {
+                    "task": "app.services.scheduler.maintenance.purge_orphan_users",
+                    "schedule": ORPHAN_GC_INTERVAL,
+                    "options": {"expires": ORPHAN_GC_INTERVAL},
+                },
+                "maintenance-compact-event-blocks": {
+                    "task": "app.services.scheduler.maintenance.compact_event_blocks",
+                    "schedule": EVENT_BLOCKS_INTERVAL,
+                    "options": {"expires": EVENT_BLOCKS_INTERVAL},
+                },
+            },
+        }
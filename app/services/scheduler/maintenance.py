@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from celery import shared_task
+
+from ...config import (
+    AGGREGATION_MAX_GAP,
+    EVENT_BLOCKS_BATCH_SIZE,
+    EVENT_BLOCKS_CLOSE_AFTER,
+    EVENT_BLOCKS_ENABLED,
+    EVENT_BLOCKS_MAX_BATCHES,
+    EVENT_BLOCKS_MAX_DAYS,
+    ORPHAN_GC_BATCH_SIZE,
+    ORPHAN_GC_GRACE_DAYS,
+    ORPHAN_GC_MAX_BATCHES,
+    ORPHAN_GC_MAX_EVENTS,
+)
+from ...db.session.provider import get_shards
+from ..aggregation.main import AggregationService
+from ..blocks.main import EventBlocksService
+from ..users.main import OrphanUsersService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="app.services.scheduler.maintenance.purge_orphan_users")
+async def purge_orphan_users(cursor: str | None = None, shard: str | None = None) -> dict[str, Any]:
+    """Задача очистки брошенных анонимных пользователей.
+
+    Запуск без шарда (по расписанию) ставит задачу для каждого шарда базы данных. За один запуск
+    обрабатывается не больше ``ORPHAN_GC_MAX_BATCHES`` страниц шарда, каждая в своей транзакции:
+    блокировки не удерживаются долго. Если шард не просмотрен до конца, задача ставит себя
+    в очередь заново с курсором последней страницы.
+
+    Args:
+        cursor: Идентификатор последнего просмотренного пользователя, None - с начала таблицы.
+        shard: Имя шарда базы данных, None - все шарды.
+
+    Returns:
+        Итог запуска: количество просмотренных и удалённых пользователей, курсор продолжения.
+    """
+    shards = get_shards()
+    if shard is None:
+        for name in shards:
+            purge_orphan_users.apply_async(kwargs={"shard": name})
+        return {"shards": list(shards)}
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=ORPHAN_GC_GRACE_DAYS)
+    position = UUID(cursor) if cursor is not None else None
+    scanned = purged = 0
+    for _ in range(ORPHAN_GC_MAX_BATCHES):
+        async with shards[shard].get_session() as session:
+            batch = await OrphanUsersService(session).exec(
+                position, ORPHAN_GC_BATCH_SIZE, cutoff, ORPHAN_GC_MAX_EVENTS
+            )
+        position, scanned, purged = batch.cursor, scanned + batch.scanned, purged + batch.purged
+        if batch.exhausted:
+            logger.info(f"Orphan users purge of shard {shard} finished: scanned {scanned}, purged {purged}")
+            return {"shard": shard, "scanned": scanned, "purged": purged, "cursor": None}
+
+    purge_orphan_users.apply_async(kwargs={"cursor": str(position), "shard": shard})
+    logger.info(f"Orphan users purge of shard {shard} continues after {position}: scanned {scanned}, purged {purged}")
+    return {"shard": shard, "scanned": scanned, "purged": purged, "cursor": str(position)}
+
+
+@shared_task(name="app.services.scheduler.maintenance.compact_event_blocks")
+async def compact_event_blocks(shard: str | None = None) -> dict[str, Any]:
+    """Задача сжатия событий закрытых дней пользователей в блоки.
+
+    Выполняется только при EVENT_BLOCKS_ENABLED. Запуск без шарда (по расписанию) ставит задачу для
+    каждого шарда базы данных. За один запуск сжимается не больше ``EVENT_BLOCKS_MAX_BATCHES`` пакетов
+    пользователей, каждый в своей транзакции; если сжаты не все, задача ставит себя в очередь заново.
+
+    Args:
+        shard: Имя шарда базы данных, None - все шарды.
+
+    Returns:
+        Итог запуска: количество пользователей, блоков и сжатых событий.
+    """
+    if not EVENT_BLOCKS_ENABLED:
+        return {"enabled": False}
+    shards = get_shards()
+    if shard is None:
+        for name in shards:
+            compact_event_blocks.apply_async(kwargs={"shard": name})
+        return {"shards": list(shards)}
+
+    users = blocks = events = 0
+    for _ in range(EVENT_BLOCKS_MAX_BATCHES):
+        async with shards[shard].get_session() as session:
+            batch = await EventBlocksService(session).exec(
+                timedelta(seconds=EVENT_BLOCKS_CLOSE_AFTER),
+                EVENT_BLOCKS_BATCH_SIZE,
+                summaries=AggregationService(session, max_gap=timedelta(seconds=AGGREGATION_MAX_GAP)),
+                max_days=EVENT_BLOCKS_MAX_DAYS,
+            )
+        users, blocks, events = users + batch.users, blocks + batch.blocks, events + batch.events
+        if batch.exhausted:
+            logger.info(f"Event blocks compaction of shard {shard} finished: {events} events into {blocks} blocks")
+            return {"shard": shard, "users": users, "blocks": blocks, "events": events, "exhausted": True}
+
+    compact_event_blocks.apply_async(kwargs={"shard": shard})
+    logger.info(f"Event blocks compaction of shard {shard} continues: {events} events into {blocks} blocks")
+    return {"shard": shard, "users": users, "blocks": blocks, "events": events, "exhausted": False}
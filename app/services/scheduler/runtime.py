@@ -0,0 +1,188 @@
+import asyncio
+import functools
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, TypeVar
+
+from celery import Task, bootsteps
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+
+from ...db.session.manager import Manager
+from ...db.session.provider import dispose_manager, get_manager, reset_manager_after_fork
+from ...db.session.sharding import ShardedManager
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """Класс среды выполнения асинхронного кода в процессе воркера Celery.
+
+    Процесс использует один цикл событий на всё время жизни: engine и пул соединений менеджера
+    базы данных привязаны к нему и переиспользуются между задачами. Вызовы из нескольких потоков
+    (пул threads) выполняются по очереди.
+    """
+
+    def __init__(self) -> None:
+        """Магический метод инициализации класса."""
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._resources: list[tuple[Callable[[], Awaitable[None]], Callable[[], None]]] = []
+
+    def register(self, close: Callable[[], Awaitable[None]], reset_after_fork: Callable[[], None]) -> None:
+        """Метод регистрации ресурса процесса, привязанного к циклу событий (клиенты, пулы).
+
+        Args:
+            close: Закрытие ресурса при завершении процесса, выполняется в цикле событий.
+            reset_after_fork: Сброс унаследованного ресурса в дочернем процессе.
+        """
+        if (close, reset_after_fork) not in self._resources:
+            self._resources.append((close, reset_after_fork))
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Цикл событий процесса, создаётся при первом обращении.
+
+        Returns:
+            Цикл событий.
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop
+
+    def run(self, awaitable: Awaitable[T]) -> T:
+        """Метод выполнения корутины в цикле событий процесса.
+
+        Args:
+            awaitable: Корутина или другой awaitable-объект.
+
+        Returns:
+            Результат корутины.
+
+        Raises:
+            RuntimeError: При вызове из корутины, уже выполняющейся в цикле процесса.
+        """
+        with self._lock:
+            return self.loop.run_until_complete(awaitable)
+
+    def reset_after_fork(self) -> None:
+        """Метод сброса состояния, унаследованного дочерним процессом после fork.
+
+        Цикл событий родителя не закрывается (его файловые дескрипторы принадлежат родителю),
+        а отбрасывается вместе с менеджером базы данных.
+        """
+        self._loop = None
+        self._lock = threading.Lock()
+        for _, reset in self._resources:
+            reset()
+        reset_manager_after_fork()
+
+    def shutdown(self) -> None:
+        """Метод закрытия пула соединений и цикла событий процесса."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        with self._lock:
+            try:
+                for close, _ in self._resources:
+                    self._loop.run_until_complete(close())
+                self._loop.run_until_complete(dispose_manager())
+                self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            except Exception as e:
+                logger.warning(f"Worker runtime shutdown failed: {e}")
+            finally:
+                self._loop.close()
+                self._loop = None
+
+
+runtime = WorkerRuntime()
+
+
+def _sync_run(run: Callable[..., Awaitable[Any]]) -> Callable[..., Any]:
+    """Функция оборачивания асинхронного тела задачи в синхронный вызов через среду процесса.
+
+    Args:
+        run: Асинхронная функция.
+
+    Returns:
+        Синхронная функция с той же сигнатурой.
+    """
+
+    @functools.wraps(run)
+    def wrapper(*args, **kwargs):
+        return runtime.run(run(*args, **kwargs))
+
+    return wrapper
+
+
+class AsyncTask(Task):
+    """Базовый класс задач Celery с поддержкой асинхронного тела.
+
+    Асинхронное тело задачи (``async def``) выполняется в цикле событий процесса воркера,
+    без ``asyncio.run`` и нового пула соединений на каждый вызов. Синхронные задачи выполняются
+    как обычно.
+    """
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Магический метод подготовки подкласса: замена асинхронного run синхронной обёрткой."""
+        super().__init_subclass__(**kwargs)
+        run = cls.__dict__.get("run")
+        if isinstance(run, staticmethod) and inspect.iscoroutinefunction(run.__func__):
+            cls.run = staticmethod(_sync_run(run.__func__))
+        elif inspect.iscoroutinefunction(run):
+            cls.run = _sync_run(run)
+
+    @property
+    def manager(self) -> Manager | ShardedManager:
+        """Менеджер базы данных процесса воркера.
+
+        Returns:
+            Менеджер базы данных.
+        """
+        return get_manager()
+
+
+class QueuePrefetchStep(bootsteps.Step):
+    """Шаг запуска воркера: множитель предвыборки по обслуживаемым очередям.
+
+    Берётся наименьший множитель из настройки ``worker_queue_prefetch`` среди очередей, выбранных
+    через ``-Q``, чтобы длинные задачи не скапливались в буфере воркера. Шаг инициализируется до
+    создания потребителя; явно заданный ``--prefetch-multiplier`` (отличный от значения по умолчанию)
+    не переопределяется.
+    """
+
+    def __init__(self, worker, **kwargs) -> None:
+        """Магический метод инициализации шага.
+
+        Args:
+            worker: Воркер Celery.
+            **kwargs: Параметры запуска воркера.
+        """
+        super().__init__(worker, **kwargs)
+        conf = worker.app.conf
+        prefetch = conf.get("worker_queue_prefetch") or {}
+        selected = [prefetch[name] for name in worker.app.amqp.queues.consume_from if name in prefetch]
+        if selected and worker.prefetch_multiplier == conf.worker_prefetch_multiplier:
+            worker.prefetch_multiplier = min(selected)
+
+
+def _on_worker_process_init(**kwargs) -> None:
+    """Обработчик запуска дочернего процесса воркера."""
+    runtime.reset_after_fork()
+
+
+def _on_worker_shutdown(**kwargs) -> None:
+    """Обработчик завершения процесса воркера."""
+    runtime.shutdown()
+
+
+def connect_worker_signals() -> None:
+    """Функция подключения обработчиков жизненного цикла процессов воркера.
+
+    Дочерние процессы prefork сбрасывают унаследованное состояние при запуске; каждый процесс
+    закрывает пул соединений и цикл событий при завершении.
+    """
+    worker_process_init.connect(_on_worker_process_init, weak=False, dispatch_uid="runtime_process_init")
+    worker_process_shutdown.connect(_on_worker_shutdown, weak=False, dispatch_uid="runtime_process_shutdown")
+    worker_shutdown.connect(_on_worker_shutdown, weak=False, dispatch_uid="runtime_worker_shutdown")
@@ -0,0 +1,12 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class SketchesServiceException(FormException):
+    """Исключение сервиса вероятностных оценок."""
+
+
+class SketchesServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    QUERY_ERROR: ExceptionMessage = "Failed to query {sketch} sketches!"
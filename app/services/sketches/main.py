@@ -0,0 +1,435 @@
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta, timezone
+from typing import TYPE_CHECKING, Iterable
+from uuid import UUID
+
+from .exceptions import SketchesServiceException, SketchesServiceMessages
+from .structures import CountMinSketch, HeavyHitters, HyperLogLog, sketch_indexes
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+    from ...schemas.events.send_events_request_schema import SendEventData
+
+logger = logging.getLogger(__name__)
+
+# Событие перехода на домен: по количеству таких событий определяются самые посещаемые домены
+VISIT_EVENT = "active"
+
+# KEYS[1] - хэш счётчиков count-min sketch дня, KEYS[2] - отсортированное множество наиболее частых доменов дня.
+# ARGV: глубина, количество хранимых доменов, TTL ключей (мс), далее группы: домен, количество, номера счётчиков
+_COUNT_MIN_SCRIPT = """
+local depth = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local i = 4
+while i <= #ARGV do
+    local estimate = nil
+    for row = 0, depth - 1 do
+        local value = redis.call('HINCRBY', KEYS[1], row .. ':' .. ARGV[i + 2 + row], ARGV[i + 1])
+        if estimate == nil or value < estimate then
+            estimate = value
+        end
+    end
+    redis.call('ZADD', KEYS[2], estimate, ARGV[i])
+    i = i + 2 + depth
+end
+local size = redis.call('ZCARD', KEYS[2])
+if size > capacity then
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, size - capacity - 1)
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+redis.call('PEXPIRE', KEYS[2], ARGV[3])
+return size
+"""
+
+
+@dataclass
+class SketchBatch:
+    """Накопленные с прошлой выгрузки изменения оценок.
+
+    Attributes:
+        domain_users: Пользователи доменов по дням.
+        user_domains: Домены пользователей по дням.
+        visits: Количество переходов на домены по дням.
+    """
+
+    domain_users: defaultdict[tuple[date, str], set[str]] = field(default_factory=lambda: defaultdict(set))
+    user_domains: defaultdict[tuple[date, UUID], set[str]] = field(default_factory=lambda: defaultdict(set))
+    visits: Counter[tuple[date, str]] = field(default_factory=Counter)
+
+    def __len__(self) -> int:
+        """Магический метод получения количества накопленных ключей.
+
+        Returns:
+            Количество ключей всех оценок.
+        """
+        return len(self.domain_users) + len(self.user_domains) + len(self.visits)
+
+    def add(self, user_id: UUID, events: Iterable["SendEventData"]) -> None:
+        """Метод учёта пачки событий пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            events: События пачки.
+        """
+        user = str(user_id)
+        for event in events:
+            day = event.timestamp.astimezone(timezone.utc).date()
+            self.domain_users[(day, event.domain)].add(user)
+            self.user_domains[(day, user_id)].add(event.domain)
+            if event.event == VISIT_EVENT:
+                self.visits[(day, event.domain)] += 1
+
+
+class LocalSketchStore:
+    """Класс хранилища оценок в памяти процесса для запуска в один процесс.
+
+    Оценки хранятся по дням и удаляются после ``retention_days``. Память ограничена количеством
+    доменов и пользователей за период, умноженным на размер оценки, и не зависит от количества событий.
+    """
+
+    def __init__(
+        self,
+        top_capacity: int = 1000,
+        cms_width: int = 4096,
+        cms_depth: int = 4,
+        precision: int = 12,
+        user_precision: int = 8,
+        retention_days: int = 35,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            top_capacity: Количество хранимых наиболее посещаемых доменов за день.
+            cms_width: Количество счётчиков в строке count-min sketch.
+            cms_depth: Количество строк count-min sketch.
+            precision: Точность HyperLogLog пользователей домена.
+            user_precision: Точность HyperLogLog доменов пользователя: доменов за день немного.
+            retention_days: Количество хранимых дней.
+        """
+        self.top_capacity = top_capacity
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+        self.precision = precision
+        self.user_precision = user_precision
+        self.retention_days = retention_days
+        self._domain_users: dict[date, dict[str, HyperLogLog]] = {}
+        self._user_domains: dict[date, dict[UUID, HyperLogLog]] = {}
+        self._visits: dict[date, tuple[CountMinSketch, HeavyHitters]] = {}
+
+    async def apply(self, batch: SketchBatch) -> None:
+        """Метод применения накопленных изменений.
+
+        Args:
+            batch: Накопленные изменения.
+        """
+        for (day, domain), users in batch.domain_users.items():
+            sketch = self._domain_users.setdefault(day, {}).setdefault(domain, HyperLogLog(self.precision))
+            for user in users:
+                sketch.add(user)
+        for (day, user_id), domains in batch.user_domains.items():
+            sketch = self._user_domains.setdefault(day, {}).setdefault(user_id, HyperLogLog(self.user_precision))
+            for domain in domains:
+                sketch.add(domain)
+        for (day, domain), count in batch.visits.items():
+            if day not in self._visits:
+                self._visits[day] = (CountMinSketch(self.cms_width, self.cms_depth), HeavyHitters(self.top_capacity))
+            sketch, top = self._visits[day]
+            top.offer(domain, sketch.add(domain, count))
+        if batch.domain_users:
+            self._expire(max(day for day, _ in batch.domain_users))
+
+    def _expire(self, latest: date) -> None:
+        """Метод удаления оценок дней старше срока хранения.
+
+        Args:
+            latest: Последний день с изменениями.
+        """
+        oldest = latest - timedelta(days=self.retention_days)
+        for sketches in (self._domain_users, self._user_domains, self._visits):
+            for day in [day for day in sketches if day < oldest]:
+                del sketches[day]
+
+    async def distinct_users(self, domain: str, days: list[date]) -> int:
+        """Метод оценки количества различных пользователей домена за дни.
+
+        Args:
+            domain: Домен.
+            days: Дни.
+
+        Returns:
+            Оценка количества пользователей.
+        """
+        union = HyperLogLog(self.precision)
+        for day in days:
+            sketch = self._domain_users.get(day, {}).get(domain)
+            if sketch is not None:
+                union.merge(sketch)
+        return union.count()
+
+    async def distinct_domains(self, user_id: UUID, day: date) -> int:
+        """Метод оценки количества различных доменов пользователя за день.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            day: День.
+
+        Returns:
+            Оценка количества доменов.
+        """
+        sketch = self._user_domains.get(day, {}).get(user_id)
+        return sketch.count() if sketch is not None else 0
+
+    async def top_domains(self, days: list[date], limit: int) -> list[tuple[str, int]]:
+        """Метод получения наиболее посещаемых доменов за дни.
+
+        Args:
+            days: Дни.
+            limit: Количество доменов.
+
+        Returns:
+            Домены и оценки количества переходов по убыванию.
+        """
+        totals: Counter[str] = Counter()
+        for day in days:
+            if day in self._visits:
+                totals.update(dict(self._visits[day][1].top(self.top_capacity)))
+        return totals.most_common(limit)
+
+    async def close(self) -> None:
+        """Метод освобождения ресурсов хранилища."""
+
+
+class RedisSketchStore:
+    """Класс хранилища оценок в Redis, общего для всех воркеров.
+
+    Количества различных значений хранятся встроенным HyperLogLog Redis (не больше 12 КБ на ключ),
+    частоты доменов - count-min sketch в хэше дня, наиболее посещаемые домены - отсортированным
+    множеством дня ограниченного размера. Ключи истекают после срока хранения.
+    """
+
+    def __init__(
+        self,
+        client: "Redis",
+        top_capacity: int = 1000,
+        cms_width: int = 4096,
+        cms_depth: int = 4,
+        retention_days: int = 35,
+        prefix: str = "sketch",
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            client: Асинхронный клиент Redis.
+            top_capacity: Количество хранимых наиболее посещаемых доменов за день.
+            cms_width: Количество счётчиков в строке count-min sketch.
+            cms_depth: Количество строк count-min sketch.
+            retention_days: Количество хранимых дней.
+            prefix: Префикс ключей.
+        """
+        self.client = client
+        self.top_capacity = top_capacity
+        self.cms_width = cms_width
+        self.cms_depth = cms_depth
+        self.retention_days = retention_days
+        self.prefix = prefix
+        self._ttl_ms = (retention_days + 1) * 86_400_000
+        self._script = client.register_script(_COUNT_MIN_SCRIPT)
+
+    def _key(self, sketch: str, day: date, item: str | UUID | None = None) -> str:
+        """Метод получения ключа оценки.
+
+        Args:
+            sketch: Вид оценки.
+            day: День.
+            item: Домен или пользователь, None - оценка дня.
+
+        Returns:
+            Ключ Redis.
+        """
+        key = f"{self.prefix}:{sketch}:{day.isoformat()}"
+        return key if item is None else f"{key}:{item}"
+
+    async def apply(self, batch: SketchBatch) -> None:
+        """Метод применения накопленных изменений.
+
+        Args:
+            batch: Накопленные изменения.
+
+        Raises:
+            RedisError: При недоступности Redis.
+        """
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for (day, domain), users in batch.domain_users.items():
+                key = self._key("du", day, domain)
+                pipeline.pfadd(key, *users)
+                pipeline.pexpire(key, self._ttl_ms)
+            for (day, user_id), domains in batch.user_domains.items():
+                key = self._key("ud", day, user_id)
+                pipeline.pfadd(key, *domains)
+                pipeline.pexpire(key, self._ttl_ms)
+            await pipeline.execute()
+
+        by_day: defaultdict[date, list] = defaultdict(list)
+        for (day, domain), count in batch.visits.items():
+            by_day[day].extend((domain, count, *sketch_indexes(domain, self.cms_width, self.cms_depth)))
+        for day, args in by_day.items():
+            await self._script(
+                keys=[self._key("cms", day), self._key("top", day)],
+                args=[self.cms_depth, self.top_capacity, self._ttl_ms, *args],
+            )
+
+    async def _query(self, sketch: str, coro):
+        """Метод выполнения запроса к Redis с преобразованием ошибок.
+
+        Args:
+            sketch: Вид оценки для сообщения об ошибке.
+            coro: Запрос.
+
+        Returns:
+            Результат запроса.
+
+        Raises:
+            SketchesServiceException: При недоступности Redis.
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            return await coro
+        except RedisError as e:
+            logger.error(f"Failed to query {sketch} sketches: {e}")
+            raise SketchesServiceException(SketchesServiceMessages.QUERY_ERROR.format(sketch=sketch)) from e
+
+    async def distinct_users(self, domain: str, days: list[date]) -> int:
+        """Метод оценки количества различных пользователей домена за дни (объединение PFCOUNT).
+
+        Args:
+            domain: Домен.
+            days: Дни.
+
+        Returns:
+            Оценка количества пользователей.
+
+        Raises:
+            SketchesServiceException: При недоступности Redis.
+        """
+        return await self._query("domain users", self.client.pfcount(*(self._key("du", day, domain) for day in days)))
+
+    async def distinct_domains(self, user_id: UUID, day: date) -> int:
+        """Метод оценки количества различных доменов пользователя за день.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            day: День.
+
+        Returns:
+            Оценка количества доменов.
+
+        Raises:
+            SketchesServiceException: При недоступности Redis.
+        """
+        return await self._query("user domains", self.client.pfcount(self._key("ud", day, user_id)))
+
+    async def top_domains(self, days: list[date], limit: int) -> list[tuple[str, int]]:
+        """Метод получения наиболее посещаемых доменов за дни.
+
+        Args:
+            days: Дни.
+            limit: Количество доменов.
+
+        Returns:
+            Домены и оценки количества переходов по убыванию.
+
+        Raises:
+            SketchesServiceException: При недоступности Redis.
+        """
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for day in days:
+                pipeline.zrange(self._key("top", day), 0, -1, withscores=True)
+            results = await self._query("top domains", pipeline.execute())
+        totals: Counter[str] = Counter()
+        for result in results:
+            totals.update({domain.decode(): int(score) for domain, score in result})
+        return totals.most_common(limit)
+
+    async def close(self) -> None:
+        """Метод закрытия соединений Redis."""
+        await self.client.aclose()
+
+
+SketchStore = LocalSketchStore | RedisSketchStore
+
+
+class SketchRecorder:
+    """Класс учёта событий в вероятностных оценках при приёме.
+
+    Приём событий только дополняет накопленные изменения в памяти воркера; фоновая задача
+    применяет их к хранилищу раз в ``interval`` или сразу при накоплении ``max_pending`` ключей.
+    Если хранилище недоступно, изменения отбрасываются: оценки приблизительны, а память воркера
+    должна оставаться ограниченной.
+    """
+
+    def __init__(self, store: SketchStore, interval: float = 10.0, max_pending: int = 50_000) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            store: Хранилище оценок.
+            interval: Интервал применения изменений в секундах.
+            max_pending: Количество накопленных ключей, при котором изменения применяются сразу.
+        """
+        self.store = store
+        self.interval = interval
+        self.max_pending = max_pending
+        self._batch = SketchBatch()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def record(self, user_id: UUID, events: Iterable["SendEventData"]) -> None:
+        """Метод учёта пачки событий пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            events: События пачки.
+        """
+        self._batch.add(user_id, events)
+        if len(self._batch) >= self.max_pending:
+            self._full.set()
+
+    async def flush(self) -> None:
+        """Метод применения накопленных изменений к хранилищу."""
+        batch, self._batch = self._batch, SketchBatch()
+        self._full.clear()
+        if not len(batch):
+            return
+        try:
+            await self.store.apply(batch)
+        except Exception as e:
+            logger.error(f"Failed to apply {len(batch)} sketch updates: {e}")
+
+    async def _loop(self) -> None:
+        """Метод фонового цикла применения изменений."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    def start(self) -> None:
+        """Метод запуска фонового применения изменений в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Метод остановки фонового применения изменений с применением накопленных."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,57 @@
+from ...config import (
+    REDIS_URL,
+    SKETCH_CMS_DEPTH,
+    SKETCH_CMS_WIDTH,
+    SKETCH_FLUSH_INTERVAL,
+    SKETCH_HLL_PRECISION,
+    SKETCH_MAX_PENDING,
+    SKETCH_REDIS,
+    SKETCH_RETENTION_DAYS,
+    SKETCH_TOP_CAPACITY,
+)
+from .main import LocalSketchStore, RedisSketchStore, SketchRecorder
+
+_recorder: SketchRecorder | None = None
+
+
+def get_sketch_recorder() -> SketchRecorder:
+    """Функция получения учёта вероятностных оценок процесса.
+
+    Хранилище и клиент Redis создаются при первом обращении: клиент привязывается к циклу событий воркера.
+
+    Returns:
+        Учёт вероятностных оценок.
+    """
+    global _recorder
+
+    if _recorder is None:
+        if SKETCH_REDIS:
+            from redis.asyncio import Redis
+
+            store = RedisSketchStore(
+                Redis.from_url(REDIS_URL),
+                top_capacity=SKETCH_TOP_CAPACITY,
+                cms_width=SKETCH_CMS_WIDTH,
+                cms_depth=SKETCH_CMS_DEPTH,
+                retention_days=SKETCH_RETENTION_DAYS,
+            )
+        else:
+            store = LocalSketchStore(
+                top_capacity=SKETCH_TOP_CAPACITY,
+                cms_width=SKETCH_CMS_WIDTH,
+                cms_depth=SKETCH_CMS_DEPTH,
+                precision=SKETCH_HLL_PRECISION,
+                retention_days=SKETCH_RETENTION_DAYS,
+            )
+        _recorder = SketchRecorder(store, interval=SKETCH_FLUSH_INTERVAL, max_pending=SKETCH_MAX_PENDING)
+    return _recorder
+
+
+async def close_sketch_recorder() -> None:
+    """Функция остановки учёта вероятностных оценок с применением накопленных изменений."""
+    global _recorder
+
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        await recorder.stop()
+        await recorder.store.close()
@@ -0,0 +1,202 @@
+import heapq
+import math
+from array import array
+from hashlib import blake2b
+
+_MASK_64 = (1 << 64) - 1
+
+
+def hash64(value: str, seed: int = 0) -> int:
+    """Функция 64-битного хэша строки.
+
+    Args:
+        value: Строка.
+        seed: Номер независимой хэш-функции.
+
+    Returns:
+        Хэш в диапазоне [0, 2^64).
+    """
+    digest = blake2b(value.encode(), digest_size=8, salt=seed.to_bytes(8, "little")).digest()
+    return int.from_bytes(digest, "little")
+
+
+def sketch_indexes(key: str, width: int, depth: int) -> list[int]:
+    """Функция получения счётчиков значения в каждой строке count-min sketch.
+
+    Args:
+        key: Значение.
+        width: Количество счётчиков в строке.
+        depth: Количество строк.
+
+    Returns:
+        Номера счётчиков по строкам.
+    """
+    return [hash64(key, seed=row) % width for row in range(depth)]
+
+
+class HyperLogLog:
+    """Класс оценки количества различных значений (HyperLogLog).
+
+    Память - 2^precision байт независимо от количества значений; стандартная ошибка
+    примерно 1.04 / sqrt(2^precision). Оценки объединяются без потерь поэлементным максимумом.
+    """
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision: int = 12, registers: bytes | None = None) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            precision: Количество бит хэша на номер регистра (4..16).
+            registers: Регистры сохранённой оценки, None - пустая оценка.
+        """
+        self.precision = precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << precision)
+
+    def add(self, value: str) -> None:
+        """Метод учёта значения.
+
+        Args:
+            value: Значение.
+        """
+        hashed = hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = (hashed << self.precision) & _MASK_64
+        rank = 65 - self.precision if rest == 0 else 64 - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Метод объединения с другой оценкой той же точности.
+
+        Args:
+            other: Другая оценка.
+        """
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        """Метод оценки количества различных значений.
+
+        Returns:
+            Оценка количества.
+        """
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / math.fsum(2.0**-register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Поправка для малых количеств: подсчёт пустых регистров точнее
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+
+class CountMinSketch:
+    """Класс оценки частот значений (count-min sketch).
+
+    Оценка никогда не меньше точной частоты и превышает её не больше чем на e/width от суммы
+    всех частот с вероятностью 1 - e^-depth. Память - width × depth счётчиков.
+    """
+
+    __slots__ = ("width", "depth", "rows")
+
+    def __init__(self, width: int = 4096, depth: int = 4) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            width: Количество счётчиков в строке.
+            depth: Количество строк (независимых хэш-функций).
+        """
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Метод учёта значения.
+
+        Args:
+            key: Значение.
+            count: Количество повторений.
+
+        Returns:
+            Оценка частоты значения после учёта.
+        """
+        estimate = None
+        for row, index in zip(self.rows, sketch_indexes(key, self.width, self.depth)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        """Метод оценки частоты значения.
+
+        Args:
+            key: Значение.
+
+        Returns:
+            Оценка частоты.
+        """
+        return min(row[index] for row, index in zip(self.rows, sketch_indexes(key, self.width, self.depth)))
+
+
+class HeavyHitters:
+    """Класс наиболее частых значений по оценкам count-min sketch.
+
+    Хранит не больше ``capacity`` значений: минимальная куча по оценке частоты вытесняет
+    значение с наименьшей оценкой, когда новое значение его обгоняет.
+    """
+
+    __slots__ = ("capacity", "_estimates", "_heap")
+
+    def __init__(self, capacity: int = 1000) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            capacity: Наибольшее количество хранимых значений.
+        """
+        self.capacity = capacity
+        self._estimates: dict[str, int] = {}
+        self._heap: list[tuple[int, str]] = []
+
+    def offer(self, key: str, estimate: int) -> None:
+        """Метод учёта новой оценки частоты значения.
+
+        Args:
+            key: Значение.
+            estimate: Оценка частоты; оценки значения только растут.
+        """
+        if key in self._estimates:
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif len(self._estimates) < self.capacity:
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        elif estimate > self._minimum():
+            _, evicted = heapq.heappop(self._heap)
+            del self._estimates[evicted]
+            self._estimates[key] = estimate
+            heapq.heappush(self._heap, (estimate, key))
+        if len(self._heap) > 2 * self.capacity:
+            # Устаревшие записи кучи (прежние оценки значений) удаляются пересборкой
+            self._heap = [(value, key) for key, value in self._estimates.items()]
+            heapq.heapify(self._heap)
+
+    def _minimum(self) -> int:
+        """Метод получения наименьшей актуальной оценки в куче.
+
+        Returns:
+            Наименьшая оценка среди хранимых значений.
+        """
+        while self._heap[0][0] != self._estimates.get(self._heap[0][1]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def top(self, limit: int) -> list[tuple[str, int]]:
+        """Метод получения наиболее частых значений.
+
+        Args:
+            limit: Количество значений.
+
+        Returns:
+            Значения и оценки их частоты по убыванию.
+        """
+        return heapq.nlargest(limit, self._estimates.items(), key=lambda item: item[1])
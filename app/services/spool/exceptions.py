@@ -0,0 +1,22 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class SpoolServiceException(FormException):
+    """Исключение локальной очереди событий."""
+
+
+class SpoolLockedException(SpoolServiceException):
+    """Исключение: файл локальной очереди занят другим процессом."""
+
+
+class SpoolServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    OPEN_ERROR: ExceptionMessage = "Failed to open spool file {path}: {error}!"
+    LOCKED_ERROR: ExceptionMessage = "Spool file {path} is used by another process!"
+    INVALID_FILE_ERROR: ExceptionMessage = "File {path} is not a spool file of a supported version!"
+    FULL_ERROR: ExceptionMessage = "Spool file {path} is full!"
+    RECORD_TOO_LARGE_ERROR: ExceptionMessage = "Spool record of {size} bytes does not fit into spool file!"
+    SYNC_ERROR: ExceptionMessage = "Failed to sync spool file {path}: {error}!"
+    REPLAY_ERROR: ExceptionMessage = "Failed to replay {count} spooled batches!"
@@ -0,0 +1,263 @@
+import fcntl
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import NamedTuple
+
+from .exceptions import SpoolLockedException, SpoolServiceException, SpoolServiceMessages
+
+MAGIC = b"MWSPOOL\x00"
+VERSION = 2
+
+# Заголовок файла: сигнатура, версия, эпоха открытия, смещение и номер первой невоспроизведённой записи
+HEADER = struct.Struct("<8sIIQQ")
+# Заголовок записи: длина данных, CRC32 (длина, эпоха, номер и данные), эпоха и номер записи
+RECORD = struct.Struct("<IIIQ")
+# Поля заголовка записи, покрытые контрольной суммой
+_CHECKED = struct.Struct("<IIQ")
+# Длина записи-перехода: данные продолжаются с начала кольца
+WRAP = 0xFFFFFFFF
+
+
+class JournalPosition(NamedTuple):
+    """Позиция чтения журнала, возвращаемая ``read`` и принимаемая ``commit``.
+
+    Attributes:
+        offset: Смещение следующей записи.
+        sequence: Номер следующей записи.
+        size: Объём прочитанных записей в байтах, включая пропуски в конце кольца.
+    """
+
+    offset: int
+    sequence: int
+    size: int
+
+
+class SpoolJournal:
+    """Класс кольцевого журнала записей фиксированного размера, отображённого в память.
+
+    Записи дописываются за последней и читаются с первой невоспроизведённой; место в конце файла,
+    куда запись не помещается, пропускается, и запись продолжается с начала кольца. Место
+    освобождается при любом воспроизведении, а не только при полном. Каждая запись несёт сквозной
+    номер и эпоху открытия файла: целые записи прошлых кругов и записи, оставшиеся после аварии за
+    концом данных, не продолжают последовательность номеров и эпох и не читаются. Запись с неверной
+    контрольной суммой (оборванная при аварии) и все последующие считаются незаписанными. Файл
+    блокируется (flock) на всё время работы с ним: журнал принадлежит одному процессу.
+    """
+
+    exception = SpoolServiceException
+    messages = SpoolServiceMessages
+
+    def __init__(self, path: Path, capacity: int) -> None:
+        """Магический метод инициализации класса: открытие или создание файла журнала.
+
+        Args:
+            path: Путь к файлу журнала.
+            capacity: Размер нового файла в байтах; существующий файл сохраняет свой размер.
+
+        Raises:
+            SpoolLockedException: Если файл занят другим процессом.
+            SpoolServiceException: Если файл повреждён или не открывается.
+        """
+        self.path = path
+        try:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as e:
+            raise self.exception(self.messages.OPEN_ERROR.format(path=path, error=e)) from e
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError as e:
+            os.close(self._fd)
+            raise SpoolLockedException(self.messages.LOCKED_ERROR.format(path=path)) from e
+
+        try:
+            created = os.fstat(self._fd).st_size == 0
+            if created:
+                os.ftruncate(self._fd, max(capacity, HEADER.size + RECORD.size))
+            self.capacity = os.fstat(self._fd).st_size
+            self._mmap = mmap.mmap(self._fd, self.capacity)
+        except OSError as e:
+            os.close(self._fd)
+            raise self.exception(self.messages.OPEN_ERROR.format(path=path, error=e)) from e
+
+        if created:
+            # Номера начинаются с 1: нулевой заголовок пустого места не продолжает последовательность
+            HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, 0, HEADER.size, 1)
+        magic, version, epoch, head_offset, head_sequence = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or not HEADER.size <= head_offset <= self.capacity:
+            self.close()
+            raise self.exception(self.messages.INVALID_FILE_ERROR.format(path=path))
+        self.head = JournalPosition(head_offset, head_sequence, 0)
+        self.tail = self._scan(self.head, epoch)
+        # Записи этого открытия получают новую эпоху: записи прошлых открытий за концом данных не читаются
+        self.epoch = epoch + 1
+        self._write_header()
+
+    def __len__(self) -> int:
+        """Магический метод получения объёма невоспроизведённых записей.
+
+        Returns:
+            Объём записей в байтах, включая пропуски в конце кольца.
+        """
+        return self.tail.size
+
+    def _write_header(self) -> None:
+        """Метод записи заголовка файла с текущей эпохой и первой невоспроизведённой записью."""
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, self.epoch, self.head.offset, self.head.sequence)
+
+    def _record_at(self, offset: int, sequence: int, epochs: tuple[int, int]) -> tuple[int, bytes | None] | None:
+        """Метод чтения записи по смещению с проверкой номера, эпохи и контрольной суммы.
+
+        Args:
+            offset: Смещение заголовка записи.
+            sequence: Ожидаемый номер записи.
+            epochs: Наименьшая и наибольшая допустимые эпохи записи.
+
+        Returns:
+            Эпоха и данные записи (None у записи-перехода) или None, если записи нет или она оборвана.
+        """
+        if offset + RECORD.size > self.capacity:
+            return None
+        length, crc, epoch, number = RECORD.unpack_from(self._mmap, offset)
+        if number != sequence or not epochs[0] <= epoch <= epochs[1]:
+            return None
+        start = offset + RECORD.size
+        if length != WRAP and (not length or start + length > self.capacity):
+            return None
+        payload = b"" if length == WRAP else self._mmap[start : start + length]
+        if zlib.crc32(payload, zlib.crc32(_CHECKED.pack(length, epoch, number))) != crc:
+            return None
+        return epoch, None if length == WRAP else payload
+
+    def _next(
+        self, position: JournalPosition, epochs: tuple[int, int]
+    ) -> tuple[JournalPosition, bytes | None, int] | None:
+        """Метод перехода к записи, следующей за позицией, с переходом на начало кольца.
+
+        Args:
+            position: Позиция записи.
+            epochs: Наименьшая и наибольшая допустимые эпохи записи.
+
+        Returns:
+            Позиция после записи, данные записи (None у записи-перехода) и её эпоха; None - записи нет.
+        """
+        offset, size = position.offset, position.size
+        if offset + RECORD.size > self.capacity:
+            offset, size = HEADER.size, size + self.capacity - offset
+        record = self._record_at(offset, position.sequence, epochs)
+        if record is None:
+            return None
+        epoch, payload = record
+        if payload is None:
+            return JournalPosition(HEADER.size, position.sequence + 1, size + self.capacity - offset), payload, epoch
+        length = RECORD.size + len(payload)
+        return JournalPosition(offset + length, position.sequence + 1, size + length), payload, epoch
+
+    def _scan(self, position: JournalPosition, epoch: int) -> JournalPosition:
+        """Метод поиска конца целых записей.
+
+        Эпохи записей не убывают и не превышают эпоху файла: запись прошлого открытия после
+        записи текущего - остаток прежних данных.
+
+        Args:
+            position: Позиция первой невоспроизведённой записи.
+            epoch: Эпоха последнего открытия файла.
+
+        Returns:
+            Позиция, с которой дописывается следующая запись; ``size`` - объём невоспроизведённых записей.
+        """
+        lowest = 0
+        while (step := self._next(position, (lowest, epoch))) is not None:
+            position, _, lowest = step
+        return position
+
+    def _put(self, offset: int, sequence: int, length: int, payload: bytes) -> None:
+        """Метод записи заголовка и данных записи в текущей эпохе.
+
+        Args:
+            offset: Смещение записи.
+            sequence: Номер записи.
+            length: Длина данных или WRAP.
+            payload: Данные записи.
+        """
+        start = offset + RECORD.size
+        self._mmap[start : start + len(payload)] = payload
+        crc = zlib.crc32(payload, zlib.crc32(_CHECKED.pack(length, self.epoch, sequence)))
+        RECORD.pack_into(self._mmap, offset, length, crc, self.epoch, sequence)
+
+    def append(self, payload: bytes) -> None:
+        """Метод дописывания записи в журнал без сброса на диск.
+
+        Args:
+            payload: Данные записи.
+
+        Raises:
+            SpoolServiceException: Если запись не помещается в журнал.
+        """
+        size = RECORD.size + len(payload)
+        if size > self.capacity - HEADER.size:
+            raise self.exception(self.messages.RECORD_TOO_LARGE_ERROR.format(size=len(payload)))
+        offset, used, sequence = self.tail.offset, self.tail.size, self.tail.sequence
+        # Данные не переходили через конец кольца: свободно место до конца файла и до первой записи
+        wraps = offset > self.head.offset or not used
+        if wraps and offset + size > self.capacity:
+            # Запись не помещается до конца файла: остаток пропускается, запись идёт с начала кольца
+            if HEADER.size + size > self.head.offset and used:
+                raise self.exception(self.messages.FULL_ERROR.format(path=self.path))
+            if offset + RECORD.size <= self.capacity:
+                self._put(offset, sequence, WRAP, b"")
+                sequence += 1
+            used += self.capacity - offset
+            offset = HEADER.size
+        elif not wraps and offset + size > self.head.offset:
+            raise self.exception(self.messages.FULL_ERROR.format(path=self.path))
+        self._put(offset, sequence, len(payload), payload)
+        self.tail = JournalPosition(offset + size, sequence + 1, used + size)
+
+    def read(self, limit: int) -> tuple[list[bytes], JournalPosition]:
+        """Метод чтения невоспроизведённых записей без их удаления.
+
+        Args:
+            limit: Наибольшее количество записей.
+
+        Returns:
+            Данные записей и позиция, до которой записи прочитаны (аргумент ``commit``).
+        """
+        payloads = []
+        position = self.head
+        while position.sequence < self.tail.sequence and len(payloads) < limit:
+            position, payload, _ = self._next(position, (0, self.epoch))
+            if payload is not None:
+                payloads.append(payload)
+        return payloads, position
+
+    def commit(self, position: JournalPosition) -> None:
+        """Метод отметки записей до позиции воспроизведёнными и освобождения их места.
+
+        Если воспроизведены все записи, журнал продолжается с начала файла.
+
+        Args:
+            position: Позиция, возвращённая ``read``.
+        """
+        used = self.tail.size - position.size
+        if not used:
+            position = JournalPosition(HEADER.size, self.tail.sequence, 0)
+            self.tail = position
+        else:
+            self.tail = self.tail._replace(size=used)
+        self.head = position._replace(size=0)
+        self._write_header()
+
+    def sync(self) -> None:
+        """Метод сброса изменённых страниц журнала на диск (msync)."""
+        self._mmap.flush()
+
+    def close(self) -> None:
+        """Метод сброса журнала на диск и освобождения файла."""
+        if self._mmap.closed:
+            return
+        self._mmap.flush()
+        self._mmap.close()
+        os.close(self._fd)
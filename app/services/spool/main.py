@@ -0,0 +1,419 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable
+from uuid import UUID, uuid4
+
+import orjson
+from sqlalchemy import delete, insert
+
+from ...common.breaker import CircuitBreaker
+from ...common.metrics import observe_compaction, observe_spool, observe_spool_size
+from ...db.dialects import dialect_insert
+from ...db.models.tables import AttentionEvent, SpoolReplayedBatch, User
+from ...db.session.manager import ManagerInterface
+from ..events.compaction import CompactionPolicy, compaction_policy
+from .exceptions import SpoolLockedException, SpoolServiceException, SpoolServiceMessages
+from .journal import JournalPosition, SpoolJournal
+
+if TYPE_CHECKING:
+    from ...schemas.events.send_events_request_schema import SendEventData
+
+logger = logging.getLogger(__name__)
+
+SPOOL_FILE_PATTERN = "ingest-*.spool"
+# Срок хранения идентификаторов загруженных пачек: очереди завершившихся процессов воспроизводятся
+# живыми воркерами в течение интервала воспроизведения, повтор позже срока не ожидается
+REPLAYED_RETENTION = timedelta(days=7)
+
+
+def spool_path(directory: Path) -> Path:
+    """Функция получения пути к файлу локальной очереди процесса.
+
+    Имя содержит случайную часть: файл процесса с повторно выданным PID не совпадает
+    с файлом завершившегося процесса, который воспроизводится как брошенный.
+
+    Args:
+        directory: Каталог файлов локальной очереди.
+
+    Returns:
+        Путь к файлу.
+    """
+    return directory / SPOOL_FILE_PATTERN.replace("*", f"{os.getpid()}-{uuid4().hex[:8]}")
+
+
+@dataclass(frozen=True)
+class SpooledBatch:
+    """Пачка событий пользователя из локальной очереди.
+
+    Attributes:
+        batch_id: Идентификатор пачки, ключ повторной загрузки.
+        user_id: Идентификатор пользователя.
+        rows: Строки attention_events.
+    """
+
+    batch_id: UUID
+    user_id: UUID
+    rows: list[dict[str, Any]]
+
+
+def encode_batch(
+    user_id: UUID, events: Iterable["SendEventData"], device_id: str | None = None, batch_id: UUID | None = None
+) -> bytes:
+    """Функция кодирования пачки событий в запись локальной очереди.
+
+    Args:
+        user_id: Идентификатор пользователя.
+        events: Провалидированные события пачки.
+        device_id: Идентификатор устройства.
+        batch_id: Идентификатор пачки, по умолчанию новый.
+
+    Returns:
+        Данные записи.
+    """
+    return orjson.dumps(
+        {
+            "batch_id": str(batch_id or uuid4()),
+            "user_id": str(user_id),
+            "device_id": device_id,
+            "events": [[event.domain, event.event, event.timestamp.isoformat()] for event in events],
+        }
+    )
+
+
+def decode_batch(payload: bytes) -> SpooledBatch:
+    """Функция декодирования записи локальной очереди.
+
+    Args:
+        payload: Данные записи.
+
+    Returns:
+        Пачка событий.
+    """
+    data = orjson.loads(payload)
+    user_id = UUID(data["user_id"])
+    # Записи, сделанные до появления устройств, не содержат device_id
+    device_id = data.get("device_id")
+    return SpooledBatch(
+        batch_id=UUID(data["batch_id"]),
+        user_id=user_id,
+        rows=[
+            {
+                "user_id": user_id,
+                "domain": domain,
+                "event_type": event_type,
+                "timestamp": datetime.fromisoformat(timestamp),
+                "device_id": device_id,
+            }
+            for domain, event_type, timestamp in data["events"]
+        ],
+    )
+
+
+class IngestSpool:
+    """Класс локальной очереди пачек событий воркера.
+
+    Пачка подтверждается клиенту после сброса журнала на диск. Сброс выполняется в потоке
+    не чаще раза в ``sync_interval`` секунд и общий для всех пачек, записанных за это время
+    (групповая фиксация): при отказе базы данных один msync подтверждает сразу много запросов.
+    Пачка сжимается перед записью теми же правилами, что и при сохранении в базу данных
+    (``CompactionPolicy``): воспроизведённые события совпадают с сохранёнными напрямую.
+    """
+
+    exception = SpoolServiceException
+    messages = SpoolServiceMessages
+
+    def __init__(
+        self, journal: SpoolJournal, sync_interval: float, compaction: CompactionPolicy = compaction_policy
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            journal: Журнал записей.
+            sync_interval: Наибольшее ожидание общего сброса на диск, секунды.
+            compaction: Правила сжатия пачки событий.
+        """
+        self.journal = journal
+        self.sync_interval = sync_interval
+        self.compaction = compaction
+        self._sync: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        """Магический метод получения объёма невоспроизведённых записей.
+
+        Returns:
+            Объём записей в байтах.
+        """
+        return len(self.journal)
+
+    async def append(self, user_id: UUID, events: Iterable["SendEventData"], device_id: str | None = None) -> None:
+        """Метод записи пачки событий с ожиданием сброса на диск.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            events: Провалидированные события пачки.
+            device_id: Идентификатор устройства.
+
+        Raises:
+            SpoolServiceException: Если очередь заполнена или не сбрасывается на диск.
+        """
+        batch = self.compaction.compact(list(events))
+        try:
+            self.journal.append(encode_batch(user_id, batch.events, device_id))
+        except SpoolServiceException:
+            observe_spool("rejected")
+            raise
+        observe_spool("spooled")
+        observe_compaction(batch.dropped)
+        observe_spool_size(len(self.journal))
+        await self.sync()
+
+    async def sync(self) -> None:
+        """Метод ожидания ближайшего общего сброса журнала на диск.
+
+        Raises:
+            SpoolServiceException: При ошибке сброса.
+        """
+        if self._sync is None:
+            self._sync = asyncio.get_running_loop().create_task(self._sync_later())
+        # Отмена ожидающего запроса не отменяет сброс, который ждут другие запросы
+        await asyncio.shield(self._sync)
+
+    async def _sync_later(self) -> None:
+        """Метод общего сброса журнала на диск после накопления записей.
+
+        Raises:
+            SpoolServiceException: При ошибке сброса.
+        """
+        await asyncio.sleep(self.sync_interval)
+        # Записи, добавленные после этой точки, ждут следующего сброса
+        self._sync = None
+        try:
+            await asyncio.to_thread(self.journal.sync)
+        except OSError as e:
+            logger.error(f"Failed to sync spool file {self.journal.path}: {e}")
+            raise self.exception(self.messages.SYNC_ERROR.format(path=self.journal.path, error=e)) from e
+
+    def read(self, limit: int) -> tuple[list[SpooledBatch], JournalPosition]:
+        """Метод чтения невоспроизведённых пачек.
+
+        Args:
+            limit: Наибольшее количество пачек.
+
+        Returns:
+            Пачки и позиция, до которой они прочитаны.
+        """
+        payloads, position = self.journal.read(limit)
+        return [decode_batch(payload) for payload in payloads], position
+
+    async def commit(self, position: JournalPosition) -> None:
+        """Метод отметки пачек воспроизведёнными со сбросом на диск.
+
+        Args:
+            position: Позиция, возвращённая ``read``.
+
+        Raises:
+            SpoolServiceException: При ошибке сброса.
+        """
+        self.journal.commit(position)
+        observe_spool_size(len(self.journal))
+        await self.sync()
+
+    async def close(self) -> None:
+        """Метод завершения ожидающего сброса и закрытия журнала."""
+        if self._sync is not None:
+            try:
+                await self._sync
+            except SpoolServiceException:
+                pass
+        self.journal.close()
+
+
+class SpoolReplayer:
+    """Класс фонового воспроизведения локальных очередей в базу данных.
+
+    Пачки загружаются в базу данных крупными блоками: одна вставка пользователей и одна вставка
+    событий на шард. Смещение очереди сдвигается после фиксации транзакции, поэтому при аварии
+    между ними пачки читаются повторно; идентификаторы загруженных пачек вставляются в той же
+    транзакции (ON CONFLICT DO NOTHING), и события повторно прочитанной пачки не вставляются. Воспроизведение
+    согласуется с автоматом защиты базы данных: пока он разомкнут, выполняются только его пробные
+    попытки. Кроме очереди своего процесса воспроизводятся и удаляются очереди завершившихся
+    процессов: их файлы не заблокированы.
+    """
+
+    exception = SpoolServiceException
+    messages = SpoolServiceMessages
+
+    def __init__(
+        self,
+        spool: IngestSpool,
+        manager: ManagerInterface,
+        breaker: CircuitBreaker,
+        interval: float,
+        batch_size: int,
+    ) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            spool: Локальная очередь процесса.
+            manager: Менеджер базы данных.
+            breaker: Автомат защиты базы данных.
+            interval: Интервал проверки очередей, секунды.
+            batch_size: Количество пачек в одной загрузке.
+        """
+        self.spool = spool
+        self.manager = manager
+        self.breaker = breaker
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def _load(self, batches: list[SpooledBatch]) -> None:
+        """Метод загрузки пачек в базу данных.
+
+        Args:
+            batches: Пачки событий.
+
+        Raises:
+            SpoolServiceException: При ошибке загрузки.
+        """
+        shards: dict[int, list[SpooledBatch]] = defaultdict(list)
+        for batch in batches:
+            shards[id(self.manager.get_engine(user_id=batch.user_id))].append(batch)
+        now = datetime.now(timezone.utc)
+        try:
+            for group in shards.values():
+                async with self.manager.get_session(user_id=group[0].user_id) as session:
+                    dialect = session.bind.dialect.name
+                    await session.execute(
+                        delete(SpoolReplayedBatch).where(SpoolReplayedBatch.replayed_at < now - REPLAYED_RETENTION)
+                    )
+                    loaded = await session.scalars(
+                        dialect_insert(dialect, SpoolReplayedBatch)
+                        .values([{"id": batch.batch_id, "replayed_at": now} for batch in group])
+                        .on_conflict_do_nothing(index_elements=["id"])
+                        .returning(SpoolReplayedBatch.id)
+                    )
+                    fresh = set(loaded)
+                    if len(fresh) < len(group):
+                        logger.warning(f"Skipping {len(group) - len(fresh)} spooled batches loaded before")
+                    group = [batch for batch in group if batch.batch_id in fresh]
+                    rows = [row for batch in group for row in batch.rows]
+                    if rows:
+                        user_ids = dict.fromkeys(batch.user_id for batch in group)
+                        await session.execute(
+                            dialect_insert(dialect, User)
+                            .values([{"id": user_id} for user_id in user_ids])
+                            .on_conflict_do_nothing(index_elements=["id"])
+                        )
+                        await session.execute(insert(AttentionEvent), rows)
+                    await session.commit()
+        except Exception as e:
+            logger.error(f"Failed to replay {len(batches)} spooled batches: {e}")
+            raise self.exception(self.messages.REPLAY_ERROR.format(count=len(batches))) from e
+
+    async def drain(self, spool: IngestSpool) -> int:
+        """Метод воспроизведения всех пачек очереди.
+
+        Args:
+            spool: Локальная очередь.
+
+        Returns:
+            Количество воспроизведённых пачек.
+
+        Raises:
+            SpoolServiceException: При ошибке загрузки или сброса очереди.
+        """
+        replayed = 0
+        while True:
+            batches, position = spool.read(self.batch_size)
+            if not batches:
+                return replayed
+            await self._load(batches)
+            await spool.commit(position)
+            observe_spool("replayed", len(batches))
+            replayed += len(batches)
+
+    async def _drain_orphan(self, path: Path) -> int:
+        """Метод воспроизведения и удаления очереди завершившегося процесса.
+
+        Args:
+            path: Путь к файлу очереди.
+
+        Returns:
+            Количество воспроизведённых пачек, 0 - файл занят живым процессом.
+
+        Raises:
+            SpoolServiceException: При ошибке загрузки.
+        """
+        try:
+            journal = SpoolJournal(path, capacity=0)
+        except SpoolLockedException:
+            return 0
+        except SpoolServiceException as e:
+            logger.warning(f"Skipping spool file {path}: {e}")
+            return 0
+        orphan = IngestSpool(journal, sync_interval=0)
+        try:
+            replayed = await self.drain(orphan)
+            # Файл удаляется под блокировкой: другой процесс не откроет его повторно
+            path.unlink(missing_ok=True)
+        finally:
+            await orphan.close()
+        logger.info(f"Replayed {replayed} batches from orphan spool file {path}")
+        return replayed
+
+    async def replay(self) -> int:
+        """Метод воспроизведения очереди процесса и брошенных очередей.
+
+        Returns:
+            Количество воспроизведённых пачек.
+        """
+        own = self.spool.journal.path
+        orphans = [path for path in sorted(own.parent.glob(SPOOL_FILE_PATTERN)) if path != own]
+        if not len(self.spool) and not orphans:
+            return 0
+        if not self.breaker.allow():
+            return 0
+
+        replayed = 0
+        try:
+            replayed += await self.drain(self.spool)
+            for path in orphans:
+                replayed += await self._drain_orphan(path)
+        except SpoolServiceException as e:
+            self.breaker.record_failure()
+            logger.warning(f"Spool replay interrupted after {replayed} batches: {e}")
+            return replayed
+        self.breaker.record_success()
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled batches")
+        return replayed
+
+    def start(self) -> None:
+        """Метод запуска фонового воспроизведения в текущем цикле событий."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Метод остановки фонового воспроизведения."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        """Метод фонового цикла воспроизведения."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.replay()
+            except Exception as e:
+                logger.error(f"Spool replay failed: {e}")
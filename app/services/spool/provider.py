@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from ...common.breaker import database_breaker
+from ...config import SPOOL_DIR, SPOOL_MAX_BYTES, SPOOL_REPLAY_BATCH, SPOOL_REPLAY_INTERVAL, SPOOL_SYNC_INTERVAL
+from ...db.session.provider import get_manager
+from .journal import SpoolJournal
+from .main import IngestSpool, SpoolReplayer, spool_path
+
+_spool: IngestSpool | None = None
+_replayer: SpoolReplayer | None = None
+
+
+def get_ingest_spool() -> IngestSpool:
+    """Функция получения локальной очереди событий процесса.
+
+    Файл очереди создаётся при первом обращении: у каждого воркера свой файл.
+
+    Returns:
+        Локальная очередь событий.
+
+    Raises:
+        SpoolServiceException: Если файл очереди не создаётся.
+    """
+    global _spool
+
+    if _spool is None:
+        directory = Path(SPOOL_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        _spool = IngestSpool(SpoolJournal(spool_path(directory), SPOOL_MAX_BYTES), sync_interval=SPOOL_SYNC_INTERVAL)
+    return _spool
+
+
+def get_spool_replayer() -> SpoolReplayer:
+    """Функция получения воспроизведения локальных очередей процесса.
+
+    Returns:
+        Воспроизведение локальных очередей.
+    """
+    global _replayer
+
+    if _replayer is None:
+        _replayer = SpoolReplayer(
+            get_ingest_spool(),
+            get_manager(),
+            database_breaker,
+            interval=SPOOL_REPLAY_INTERVAL,
+            batch_size=SPOOL_REPLAY_BATCH,
+        )
+    return _replayer
+
+
+async def close_spool() -> None:
+    """Функция остановки воспроизведения и закрытия локальной очереди.
+
+    Невоспроизведённые пачки остаются в файле и воспроизводятся другим воркером или после перезапуска.
+    """
+    global _spool, _replayer
+
+    replayer, _replayer = _replayer, None
+    if replayer is not None:
+        await replayer.stop()
+    spool, _spool = _spool, None
+    if spool is not None:
+        await spool.close()
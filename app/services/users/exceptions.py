@@ -0,0 +1,25 @@
+from ...common.common import FormException, StringEnum
+from ...db.types import ExceptionMessage
+
+
+class OrphanUsersServiceException(FormException):
+    """Исключение сервиса очистки анонимных пользователей."""
+
+
+class OrphanUsersServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    FIND_CANDIDATES_ERROR: ExceptionMessage = "Failed to find orphan users after {cursor}!"
+    PURGE_ERROR: ExceptionMessage = "Failed to purge {count} orphan users!"
+
+
+class UserSettingsServiceException(FormException):
+    """Исключение сервиса настроек пользователя."""
+
+
+class UserSettingsServiceMessages(StringEnum):
+    """Перечисление сообщений об ошибках."""
+
+    INVALID_TIME_ZONE_ERROR: ExceptionMessage = "Unknown time zone {time_zone}!"
+    UPDATE_SETTINGS_ERROR: ExceptionMessage = "Failed to update settings of user {user_id}!"
+    RECOMPUTE_SUMMARIES_ERROR: ExceptionMessage = "Failed to recompute summaries of user {user_id}!"
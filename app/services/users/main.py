@@ -0,0 +1,354 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...db.dialects import dialect_insert
+from ...db.models.tables import AttentionEvent, DailyDomainSummary, EventBlock, User
+from ..aggregation.main import AggregationService
+from ..aggregation.sessions import as_utc, day_start
+from ..aggregation.timezones import UTC_ZONE, is_valid_zone
+from .exceptions import (
+    OrphanUsersServiceException,
+    OrphanUsersServiceMessages,
+    UserSettingsServiceException,
+    UserSettingsServiceMessages,
+)
+
+logger = logging.getLogger(__name__)
+
+# Задача пересчёта сводок пользователя (app.services.scheduler.aggregation.recompute_user)
+RECOMPUTE_USER_TASK = "app.services.scheduler.aggregation.recompute_user"
+
+
+@dataclass(frozen=True)
+class PurgeBatch:
+    """Результат обработки страницы пользователей."""
+
+    cursor: UUID | None
+    scanned: int
+    purged: int
+    exhausted: bool
+
+
+class OrphanUsersService:
+    """Класс сервиса очистки брошенных анонимных пользователей.
+
+    Анонимный пользователь (без email и пароля) считается брошенным, если он создан и последний
+    раз присылал события раньше ``cutoff`` и у него не больше ``max_events`` событий: клиент, не
+    сохранивший выданный идентификатор, оставляет такие записи на каждый запрос. Пользователи
+    просматриваются страницами по первичному ключу (keyset), без OFFSET.
+    """
+
+    exception = OrphanUsersServiceException
+    messages = OrphanUsersServiceMessages
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            session: Сессия с базой данных.
+        """
+        self.session = session
+
+    async def find_orphans(
+        self, cursor: UUID | None, batch_size: int, cutoff: datetime, max_events: int
+    ) -> tuple[list[UUID], UUID | None, int]:
+        """Метод поиска брошенных пользователей на странице после курсора.
+
+        Args:
+            cursor: Идентификатор последнего просмотренного пользователя, None - с начала таблицы.
+            batch_size: Размер страницы пользователей.
+            cutoff: Время, раньше которого пользователь создан и присылал события последний раз.
+            max_events: Наибольшее количество событий брошенного пользователя.
+
+        Returns:
+            Брошенные пользователи страницы, курсор следующей страницы и количество просмотренных пользователей.
+
+        Raises:
+            OrphanUsersServiceException: При ошибке чтения пользователей.
+        """
+        conditions = [User.email.is_(None), User.password.is_(None), User.created_at < cutoff]
+        if cursor is not None:
+            conditions.append(User.id > cursor)
+        page = select(User.id).where(*conditions).order_by(User.id).limit(batch_size).subquery()
+        try:
+            result = await self.session.execute(
+                select(page.c.id, func.count(AttentionEvent.id), func.max(AttentionEvent.timestamp))
+                .select_from(page)
+                .outerjoin(AttentionEvent, AttentionEvent.user_id == page.c.id)
+                .group_by(page.c.id)
+                .order_by(page.c.id)
+            )
+            rows = result.all()
+            blocks = await self.session.execute(
+                select(EventBlock.user_id, func.sum(EventBlock.event_count), func.max(EventBlock.date))
+                .where(EventBlock.user_id.in_([row[0] for row in rows]))
+                .group_by(EventBlock.user_id)
+            )
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to find orphan users after {cursor}: {e}")
+            raise self.exception(self.messages.FIND_CANDIDATES_ERROR.format(cursor=cursor)) from e
+
+        # Время событий сжатого дня не читается из блока: последним считается конец дня
+        compacted = {
+            user_id: (events, day_start(last_day + timedelta(days=1))) for user_id, events, last_day in blocks.tuples()
+        }
+        orphans = []
+        for user_id, events, last_event in rows:
+            block_events, block_end = compacted.get(user_id, (0, None))
+            last = max((as_utc(moment) for moment in (last_event, block_end) if moment is not None), default=None)
+            if events + block_events <= max_events and (last is None or last < as_utc(cutoff)):
+                orphans.append(user_id)
+        return orphans, rows[-1][0] if rows else None, len(rows)
+
+    async def purge(self, user_ids: list[UUID], cutoff: datetime, max_events: int) -> int:
+        """Метод удаления брошенных пользователей вместе с их событиями, блоками событий и сводками.
+
+        Между поиском и удалением пользователь мог зарегистрироваться или прислать события, поэтому
+        условие брошенного пользователя проверяется повторно в запросе, блокирующем строки users
+        до конца транзакции: вставка события проверяет внешний ключ и ждёт снятия блокировки.
+
+        Args:
+            user_ids: Идентификаторы найденных брошенных пользователей.
+            cutoff: Время, раньше которого пользователь создан и присылал события последний раз.
+            max_events: Наибольшее количество событий брошенного пользователя.
+
+        Returns:
+            Количество удалённых пользователей.
+
+        Raises:
+            OrphanUsersServiceException: При ошибке удаления.
+        """
+        if not user_ids:
+            return 0
+        cutoff = as_utc(cutoff)
+        events = select(func.count(AttentionEvent.id)).where(AttentionEvent.user_id == User.id).scalar_subquery()
+        block_events = (
+            select(func.coalesce(func.sum(EventBlock.event_count), 0))
+            .where(EventBlock.user_id == User.id)
+            .scalar_subquery()
+        )
+        recent_events = select(AttentionEvent.id).where(
+            AttentionEvent.user_id == User.id, AttentionEvent.timestamp >= cutoff
+        )
+        # Последним событием сжатого дня считается конец дня, как в find_orphans
+        recent_blocks = select(EventBlock.user_id).where(
+            EventBlock.user_id == User.id, EventBlock.date >= (cutoff - timedelta.resolution).date()
+        )
+        orphans = (
+            select(User.id)
+            .where(
+                User.id.in_(user_ids),
+                User.email.is_(None),
+                User.password.is_(None),
+                User.created_at < cutoff,
+                ~recent_events.exists(),
+                ~recent_blocks.exists(),
+                events + block_events <= max_events,
+            )
+            .with_for_update()
+        )
+        try:
+            purged = list(await self.session.scalars(orphans))
+            if purged:
+                await self.session.execute(delete(AttentionEvent).where(AttentionEvent.user_id.in_(purged)))
+                await self.session.execute(delete(EventBlock).where(EventBlock.user_id.in_(purged)))
+                await self.session.execute(delete(DailyDomainSummary).where(DailyDomainSummary.user_id.in_(purged)))
+                await self.session.execute(delete(User).where(User.id.in_(purged)))
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to purge {len(user_ids)} orphan users: {e}")
+            raise self.exception(self.messages.PURGE_ERROR.format(count=len(user_ids))) from e
+        return len(purged)
+
+    async def exec(self, cursor: UUID | None, batch_size: int, cutoff: datetime, max_events: int) -> PurgeBatch:
+        """Метод очистки брошенных пользователей одной страницы.
+
+        Args:
+            cursor: Идентификатор последнего просмотренного пользователя, None - с начала таблицы.
+            batch_size: Размер страницы пользователей.
+            cutoff: Время, раньше которого пользователь создан и присылал события последний раз.
+            max_events: Наибольшее количество событий брошенного пользователя.
+
+        Returns:
+            Результат обработки страницы с курсором следующей.
+
+        Raises:
+            OrphanUsersServiceException: При ошибке работы с базой данных.
+        """
+        try:
+            orphans, next_cursor, scanned = await self.find_orphans(cursor, batch_size, cutoff, max_events)
+            purged = await self.purge(orphans, cutoff, max_events)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        logger.info(f"Orphan users page after {cursor}: scanned {scanned}, purged {purged}")
+        return PurgeBatch(
+            cursor=next_cursor if next_cursor is not None else cursor,
+            scanned=scanned,
+            purged=purged,
+            exhausted=scanned < batch_size,
+        )
+
+
+class UserSettingsService:
+    """Класс сервиса настроек пользователя.
+
+    Смена часового пояса сохраняется сразу, а сводки пересчитываются отдельной задачей под арендой
+    шарда агрегации (``recompute``): пересчёт всей истории не выполняется в запросе и не пересекается
+    с агрегацией шарда. Прежние сводки удаляются в транзакции пересчёта: сводки с границами дней
+    разных часовых поясов не смешиваются. Часовой пояс построенных сводок (``summaries_time_zone``)
+    меняется только в транзакции пересчёта: пока он отличается от ``time_zone``, пересчёт не выполнен
+    и ставится в очередь при каждом сохранении настроек, в том числе с прежним часовым поясом.
+    """
+
+    exception = UserSettingsServiceException
+    messages = UserSettingsServiceMessages
+
+    def __init__(self, session: AsyncSession, max_gap: timedelta) -> None:
+        """Магический метод инициализации класса.
+
+        Args:
+            session: Сессия с базой данных.
+            max_gap: Наибольшая длительность интервала без событий для пересчёта сводок.
+        """
+        self.session = session
+        self.max_gap = max_gap
+
+    async def _event_span(self, user_id: UUID) -> tuple[datetime, datetime] | None:
+        """Метод получения промежутка времени всех событий пользователя, включая сжатые дни.
+
+        Args:
+            user_id: Идентификатор пользователя.
+
+        Returns:
+            Время первого и последнего события, None - событий нет.
+
+        Raises:
+            SQLAlchemyError: При ошибке чтения событий.
+        """
+        first, last = (
+            await self.session.execute(
+                select(func.min(AttentionEvent.timestamp), func.max(AttentionEvent.timestamp)).where(
+                    AttentionEvent.user_id == user_id
+                )
+            )
+        ).one()
+        first_day, last_day = (
+            await self.session.execute(
+                select(func.min(EventBlock.date), func.max(EventBlock.date)).where(EventBlock.user_id == user_id)
+            )
+        ).one()
+        # Время событий сжатого дня не читается из блока: промежуток покрывает день целиком
+        moments = [as_utc(moment) for moment in (first, last) if moment is not None]
+        if first_day is not None:
+            moments += [day_start(first_day), day_start(last_day + timedelta(days=1)) - timedelta.resolution]
+        return (min(moments), max(moments)) if moments else None
+
+    async def exec(self, user_id: UUID, time_zone: str) -> bool:
+        """Метод установки часового пояса пользователя.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            time_zone: Часовой пояс IANA.
+
+        Returns:
+            True, если сводки построены в другом часовом поясе и их нужно пересчитать.
+
+        Raises:
+            UserSettingsServiceException: При неизвестном часовом поясе или ошибке работы с базой данных.
+        """
+        if not is_valid_zone(time_zone):
+            raise self.exception(self.messages.INVALID_TIME_ZONE_ERROR.format(time_zone=time_zone))
+
+        try:
+            try:
+                summaries_zone = await self.session.scalar(select(User.summaries_time_zone).where(User.id == user_id))
+                statement = dialect_insert(self.session.bind.dialect.name, User).values(
+                    id=user_id, time_zone=time_zone
+                )
+                await self.session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["id"], set_={"time_zone": statement.excluded.time_zone}
+                    )
+                )
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to update settings of user {user_id}: {e}")
+                raise self.exception(self.messages.UPDATE_SETTINGS_ERROR.format(user_id=user_id)) from e
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        logger.info(f"User {user_id} time zone set to {time_zone}")
+        return (summaries_zone or UTC_ZONE) != time_zone
+
+    async def recompute(self, user_id: UUID, now: datetime | None = None) -> int:
+        """Метод пересчёта сводок пользователя за всю историю в его текущем часовом поясе.
+
+        Args:
+            user_id: Идентификатор пользователя.
+            now: Текущее время, по умолчанию время вызова.
+
+        Returns:
+            Количество пересчитанных строк сводки.
+
+        Raises:
+            UserSettingsServiceException: При ошибке чтения событий или удаления сводок.
+            AggregationServiceException: При ошибке пересчёта сводок.
+        """
+        now = now or datetime.now(timezone.utc)
+        rows = 0
+        try:
+            try:
+                time_zone = await self.session.scalar(select(User.time_zone).where(User.id == user_id)) or UTC_ZONE
+                span = await self._event_span(user_id)
+                await self.session.execute(delete(DailyDomainSummary).where(DailyDomainSummary.user_id == user_id))
+                # Отметка пересчёта фиксируется вместе со сводками: при сбое пересчёт остаётся ожидаемым
+                await self.session.execute(
+                    update(User).where(User.id == user_id).values(summaries_time_zone=time_zone)
+                )
+            except SQLAlchemyError as e:
+                logger.error(f"Failed to recompute summaries of user {user_id}: {e}")
+                raise self.exception(self.messages.RECOMPUTE_SUMMARIES_ERROR.format(user_id=user_id)) from e
+
+            if span is not None:
+                rows = await AggregationService(self.session, self.max_gap).aggregate_period(
+                    user_id, *span, now, time_zone
+                )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        logger.info(f"User {user_id} summaries recomputed: {rows} rows")
+        return rows
+
+
+async def queue_summaries_recompute(user_id: UUID) -> bool:
+    """Функция постановки задачи пересчёта сводок пользователя в очередь Celery.
+
+    Celery загружается при первом вызове: импорт веб-приложения его не требует.
+
+    Args:
+        user_id: Идентификатор пользователя.
+
+    Returns:
+        True, если задача поставлена; при недоступности брокера ошибка записывается в лог, а пересчёт
+        остаётся ожидаемым и ставится в очередь при следующем сохранении настроек.
+    """
+    from ...celery import celery
+
+    try:
+        await asyncio.to_thread(celery.send_task, RECOMPUTE_USER_TASK, args=(str(user_id),))
+    except Exception as e:
+        logger.error(f"Failed to queue summaries recompute of user {user_id}: {e}")
+        return False
+    return True
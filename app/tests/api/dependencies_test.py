@@ -1,11 +1,15 @@
 import asyncio
+import logging
+import os
+import tempfile
 from unittest import TestCase
-from unittest.mock import patch, AsyncMock
+from unittest.mock import patch, AsyncMock, MagicMock
 from uuid import uuid4, uuid3, uuid5, uuid1, NAMESPACE_DNS
-from fastapi import HTTPException
+from fastapi import HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.v1.dependencies import get_user_id_from_header, get_db_session
+from app.api.v1.dependencies import get_ingest_db_session, get_user_id_from_header, get_db_session
+from app.db.session.manager import Manager
 
 
 class TestGetUserIdFromHeader(TestCase):
@@ -15,6 +19,18 @@ class TestGetUserIdFromHeader(TestCase):
         self.assertIsInstance(result, uuid4().__class__)
         self.assertEqual(result.version, 4)
 
+    def test_missing_header_issues_user_id(self):
+        """Сгенерированный UUID4 возвращается клиенту в заголовке ответа X-User-ID."""
+        response = Response()
+        result = get_user_id_from_header(None, response)
+        self.assertEqual(response.headers["X-User-ID"], str(result))
+
+    def test_present_header_is_not_echoed(self):
+        """Переданный идентификатор не записывается в заголовки ответа."""
+        response = Response()
+        get_user_id_from_header(str(uuid4()), response)
+        self.assertNotIn("X-User-ID", response.headers)
+
     def test_valid_uuid4_returns_same_uuid(self):
         """Валидный UUID4 должен быть успешно распознан и возвращён как есть."""
         user_id = str(uuid4())
@@ -78,7 +94,7 @@ class TestGetDbSession(TestCase):
         """Вспомогательный метод для запуска асинхронного кода."""
         return asyncio.run(coro)
 
-    @patch("app.api.v1.dependencies.manager")
+    @patch("app.api.v1.dependencies.get_manager")
     def test_valid_session_returned(self, mock_manager_class):
         """Успешное получение сессии из менеджера."""
         mock_session = AsyncMock(spec=AsyncSession)
@@ -87,7 +103,7 @@ class TestGetDbSession(TestCase):
         mock_session_context.__aenter__ = AsyncMock(return_value=mock_session)
         mock_session_context.__aexit__ = AsyncMock(return_value=None)
 
-        mock_manager_class.get_session.return_value = mock_session_context
+        mock_manager_class.return_value.get_session.return_value = mock_session_context
 
         async def test_coro():
             gen = get_db_session()
@@ -100,10 +116,10 @@ class TestGetDbSession(TestCase):
 
         self._run_async(test_coro())
 
-    @patch("app.api.v1.dependencies.manager")
+    @patch("app.api.v1.dependencies.get_manager")
     def test_manager_exception_raises_http_500(self, mock_manager):
         """Исключение при вызове manager.get_session() вызывает HTTP 500."""
-        mock_manager.get_session.side_effect = Exception("Failed to create session factory")
+        mock_manager.return_value.get_session.side_effect = Exception("Failed to create session factory")
 
         async def test_coro():
             with self.assertLogs("app.api.v1.dependencies", level="WARNING") as log:
@@ -116,12 +132,12 @@ class TestGetDbSession(TestCase):
 
         self._run_async(test_coro())
 
-    @patch("app.api.v1.dependencies.manager")
+    @patch("app.api.v1.dependencies.get_manager")
     def test_get_session_exception_raises_http_500(self, mock_manager_class):
         """Исключение при входе в контекстный менеджер вызывает HTTP 500."""
         mock_session_context = AsyncMock()
         mock_session_context.__aenter__ = AsyncMock(side_effect=Exception("Connection failed"))
-        mock_manager_class.get_session.return_value = mock_session_context
+        mock_manager_class.return_value.get_session.return_value = mock_session_context
 
         async def test_coro():
             with self.assertLogs("app.api.v1.dependencies", level="WARNING") as log:
@@ -134,14 +150,14 @@ class TestGetDbSession(TestCase):
 
         self._run_async(test_coro())
 
-    @patch("app.api.v1.dependencies.manager")
+    @patch("app.api.v1.dependencies.get_manager")
     def test_session_is_yielded_only_once(self, mock_manager_class):
         """Генератор должен выдавать ровно одну сессию."""
         mock_session = AsyncMock(spec=AsyncSession)
         mock_session_context = AsyncMock()
         mock_session_context.__aenter__ = AsyncMock(return_value=mock_session)
         mock_session_context.__aexit__ = AsyncMock()
-        mock_manager_class.get_session.return_value = mock_session_context
+        mock_manager_class.return_value.get_session.return_value = mock_session_context
 
         async def test_coro():
             gen = get_db_session()
@@ -158,3 +174,77 @@ class TestGetDbSession(TestCase):
         gen = get_db_session()
         self.assertTrue(hasattr(gen, "__aiter__"))
         self.assertTrue(hasattr(gen, "__anext__"))
+
+    @patch("app.api.v1.dependencies.admission_controller")
+    @patch("app.api.v1.dependencies.get_manager")
+    def test_pool_wait_observed(self, mock_manager, mock_controller):
+        """Соединение берётся сразу, время ожидания передаётся контролю допуска."""
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_manager.return_value.get_session.return_value.__aenter__.return_value = mock_session
+
+        async def test_coro():
+            gen = get_db_session()
+            await gen.__anext__()
+            await gen.aclose()
+
+        self._run_async(test_coro())
+
+        mock_session.connection.assert_awaited_once()
+        mock_controller.observe_pool_wait.assert_called_once()
+
+
+class TestGetIngestDbSession(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    @patch("app.api.v1.dependencies.database_breaker")
+    @patch("app.api.v1.dependencies.get_manager")
+    def test_open_breaker_skips_database(self, mock_manager, mock_breaker):
+        """Пока автомат защиты разомкнут, соединение не запрашивается, сессии нет."""
+        mock_breaker.allow.return_value = False
+
+        async def test_coro():
+            return await get_ingest_db_session(uuid4(), MagicMock()).__anext__()
+
+        self.assertIsNone(self._run_async(test_coro()))
+        mock_manager.assert_not_called()
+
+    @patch("app.api.v1.dependencies.database_breaker")
+    @patch("app.api.v1.dependencies.get_manager")
+    def test_unavailable_database_yields_none(self, mock_manager, mock_breaker):
+        """Ошибка соединения с локальной очередью - сессии нет, ошибка учитывается автоматом защиты."""
+        mock_breaker.allow.return_value = True
+        mock_session = AsyncMock(spec=AsyncSession)
+        mock_session.connection.side_effect = ConnectionRefusedError("database is down")
+        mock_manager.return_value.get_session.return_value.__aenter__.return_value = mock_session
+
+        async def test_coro():
+            gen = get_ingest_db_session(uuid4(), MagicMock())
+            session = await gen.__anext__()
+            with self.assertRaises(StopAsyncIteration):
+                await gen.__anext__()
+            return session
+
+        self.assertIsNone(self._run_async(test_coro()))
+        mock_breaker.record_failure.assert_called_once()
+
+    def test_handler_exception_is_not_wrapped(self):
+        """Исключение обработчика после получения сессии пробрасывается без обёртки менеджера."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        manager = Manager(
+            logger=logging.getLogger(__name__), database_url=f"sqlite+aiosqlite:///{os.path.join(tmp.name, 't.db')}"
+        )
+
+        async def test_coro():
+            gen = get_ingest_db_session(uuid4(), MagicMock())
+            session = await gen.__anext__()
+            self.assertIsInstance(session, AsyncSession)
+            with self.assertRaises(HTTPException) as cm:
+                await gen.athrow(HTTPException(status_code=503))
+            await manager.get_engine().dispose()
+            return cm.exception.status_code
+
+        with patch("app.api.v1.dependencies.get_manager", return_value=manager):
+            self.assertEqual(self._run_async(test_coro()), 503)
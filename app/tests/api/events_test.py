@@ -0,0 +1,233 @@
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.dependencies import (
+    get_ingest_db_session,
+    get_ingest_spool,
+    get_live_broker,
+    get_rate_limiter,
+    get_required_user_db_session,
+    get_sketch_recorder,
+)
+from app.main import app
+from app.services.events.browse import EventsPage
+from app.services.events.exceptions import (
+    EventsBrowseInvalidCursorException,
+    EventsBrowseServiceMessages,
+    EventsServiceException,
+    EventsServiceMessages,
+    EventsServiceUnavailableException,
+)
+from app.services.ratelimit.main import LocalTokenBucketLimiter, RateLimiter
+from app.services.spool.exceptions import SpoolServiceException, SpoolServiceMessages
+
+PAYLOAD = {
+    "data": [
+        {"event": "active", "domain": "example.com", "timestamp": "2025-04-05T10:00:00Z"},
+        {"event": "inactive", "domain": "example.com", "timestamp": "2025-04-05T10:05:00Z"},
+    ]
+}
+
+
+class TestSendEvents(TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(LocalTokenBucketLimiter(rate=0.5, capacity=3))
+
+        self.session = MagicMock()
+
+        async def session():
+            yield self.session
+
+        app.dependency_overrides[get_rate_limiter] = lambda: self.limiter
+        app.dependency_overrides[get_ingest_db_session] = session
+        self.spool = None
+        app.dependency_overrides[get_ingest_spool] = lambda: self.spool
+        self.broker = AsyncMock()
+        app.dependency_overrides[get_live_broker] = lambda: self.broker
+        self.sketches = MagicMock()
+        app.dependency_overrides[get_sketch_recorder] = lambda: self.sketches
+        self.addCleanup(app.dependency_overrides.clear)
+        patcher = patch("app.api.v1.endpoints.events.EventsService")
+        self.service = patcher.start()
+        self.service.return_value.exec = AsyncMock()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def _send(self, user_id):
+        """Вспомогательный метод отправки пачки событий."""
+        return self.client.post("/api/v1/events", json=PAYLOAD, headers={"X-User-ID": str(user_id)})
+
+    def test_events_accepted(self):
+        """Пачка событий передаётся сервису событий."""
+        user_id = uuid4()
+
+        response = self._send(user_id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["accepted"], 2)
+        self.assertEqual(set(response.json()["flush"]), {"next_flush_in", "max_batch_size", "jitter"})
+        self.assertEqual(self.service.return_value.exec.await_args.args[1], user_id)
+        published_user, delta = self.broker.publish.await_args.args
+        self.assertEqual(published_user, user_id)
+        self.assertEqual(delta["example.com"]["event"], "inactive")
+        self.assertEqual(self.sketches.record.call_args.args[0], user_id)
+
+    def test_anonymous_user_gets_issued_id(self):
+        """Анонимный клиент получает идентификатор, под которым сохранены его события."""
+        response = self.client.post("/api/v1/events", json=PAYLOAD)
+
+        self.assertEqual(response.status_code, 200)
+        issued = response.headers["X-User-ID"]
+        self.assertEqual(str(self.service.return_value.exec.await_args.args[1]), issued)
+
+    def test_rate_limited_user_gets_429(self):
+        """Превышение лимита событий - HTTP 429 с Retry-After, другие пользователи не затронуты."""
+        noisy = uuid4()
+        self.assertEqual(self._send(noisy).status_code, 200)
+
+        response = self._send(noisy)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "2")
+        self.assertEqual(response.json()["detail"]["code"], "RATE_LIMITED")
+        self.assertEqual(self.service.return_value.exec.await_count, 1)
+        self.assertEqual(self._send(uuid4()).status_code, 200)
+
+    def test_service_error_is_500(self):
+        """Ошибка сохранения событий - HTTP 500."""
+        self.service.return_value.exec.side_effect = EventsServiceException(EventsServiceMessages.DATA_SAVE_ERROR)
+
+        response = self._send(uuid4())
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()["detail"]["code"], "DATABASE_ERROR")
+
+    @patch("app.api.v1.endpoints.events.admission_controller")
+    def test_flush_advice_follows_load(self, mock_controller):
+        """Рекомендация по отправке рассчитывается по нагрузке воркера."""
+        mock_controller.load.return_value = 1.0
+
+        flush = self._send(uuid4()).json()["flush"]
+
+        self.assertEqual(flush, {"next_flush_in": 120.0, "max_batch_size": 100, "jitter": 60.0})
+
+    def test_unavailable_database_without_spool_is_500(self):
+        """Без локальной очереди недоступность базы данных - HTTP 500."""
+        self.service.return_value.exec.side_effect = EventsServiceUnavailableException(
+            EventsServiceMessages.DATABASE_UNAVAILABLE_ERROR
+        )
+
+        response = self._send(uuid4())
+
+        self.assertEqual(response.status_code, 500)
+
+    @patch("app.api.v1.endpoints.events.database_breaker")
+    def test_unavailable_database_spools_events(self, mock_breaker):
+        """При недоступности базы данных пачка записывается в локальную очередь, ответ - HTTP 202."""
+        self.spool = AsyncMock()
+        self.service.return_value.exec.side_effect = EventsServiceUnavailableException(
+            EventsServiceMessages.DATABASE_UNAVAILABLE_ERROR
+        )
+        user_id = uuid4()
+
+        response = self._send(user_id)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["accepted"], 2)
+        self.assertEqual(response.json()["flush"]["next_flush_in"], 120.0)
+        spooled_user, spooled_events, _ = self.spool.append.await_args.args
+        self.assertEqual(spooled_user, user_id)
+        self.assertEqual(len(spooled_events), 2)
+        mock_breaker.record_failure.assert_called_once()
+        self.assertEqual(self.broker.publish.await_args.args[0], user_id)
+
+    def test_no_session_spools_without_database(self):
+        """Без сессии (автомат защиты разомкнут) база данных не используется."""
+        self.spool = AsyncMock()
+        self.session = None
+
+        response = self._send(uuid4())
+
+        self.assertEqual(response.status_code, 202)
+        self.service.return_value.exec.assert_not_awaited()
+        self.spool.append.assert_awaited_once()
+
+    def test_full_spool_is_503(self):
+        """Заполненная локальная очередь - HTTP 503 с Retry-After."""
+        self.spool = AsyncMock()
+        self.spool.append.side_effect = SpoolServiceException(SpoolServiceMessages.FULL_ERROR.format(path="spool"))
+        self.session = None
+
+        response = self._send(uuid4())
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.broker.publish.assert_not_awaited()
+
+
+class TestListEvents(TestCase):
+    def setUp(self):
+        async def session():
+            yield MagicMock()
+
+        app.dependency_overrides[get_required_user_db_session] = session
+        self.addCleanup(app.dependency_overrides.clear)
+        patcher = patch("app.api.v1.endpoints.events.EventsBrowseService")
+        self.service = patcher.start()
+        self.service.return_value.exec = AsyncMock(
+            return_value=EventsPage(
+                events=[(datetime(2025, 4, 5, 10, tzinfo=timezone.utc), "example.com", "active", "laptop")],
+                next_cursor="next",
+            )
+        )
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+        self.user_id = uuid4()
+
+    def _list(self, **params):
+        """Вспомогательный метод запроса страницы событий."""
+        return self.client.get("/api/v1/events", params=params, headers={"X-User-ID": str(self.user_id)})
+
+    def test_page_returned(self):
+        """Страница событий и курсор следующей страницы возвращаются клиенту, фильтры передаются сервису."""
+        response = self._list(cursor="prev", limit=10, domain=" Example.COM ", event="active")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "events": [
+                    {
+                        "event": "active",
+                        "domain": "example.com",
+                        "timestamp": "2025-04-05T10:00:00Z",
+                        "device_id": "laptop",
+                    }
+                ],
+                "next_cursor": "next",
+            },
+        )
+        self.service.return_value.exec.assert_awaited_once_with(
+            self.user_id, "prev", 10, domain="example.com", event_type="active"
+        )
+
+    def test_invalid_parameters_rejected(self):
+        """Размер страницы вне диапазона и неизвестный тип события отклоняются валидацией."""
+        self.assertEqual(self._list(limit=0).status_code, 422)
+        self.assertEqual(self._list(limit=100000).status_code, 422)
+        self.assertEqual(self._list(event="bogus").status_code, 422)
+        self.service.return_value.exec.assert_not_awaited()
+
+    def test_invalid_cursor_is_400(self):
+        """Повреждённый курсор - HTTP 400."""
+        self.service.return_value.exec.side_effect = EventsBrowseInvalidCursorException(
+            EventsBrowseServiceMessages.INVALID_CURSOR_ERROR
+        )
+
+        response = self._list(cursor="broken")
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from time import monotonic
+from unittest import TestCase
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.healthcheck.main import HealthReport, HealthStatus, ProbeResult
+
+
+class TestReadiness(TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def _report(self, status: HealthStatus, healthy: bool = True) -> HealthReport:
+        """Вспомогательный метод построения отчёта."""
+        result = ProbeResult("database", healthy, 1.5, datetime.now(timezone.utc))
+        return HealthReport(status=status, checks={"database": result}, created_at=monotonic())
+
+    def test_liveness_does_not_depend_on_probes(self):
+        """Проверка работоспособности отвечает 200 независимо от зависимостей."""
+        response = self.client.get("/api/v1/healthcheck")
+        self.assertEqual(response.status_code, 200)
+
+    @patch("app.api.v1.endpoints.healthcheck.prober")
+    def test_readiness_ok(self, mock_prober):
+        """Готовность отдаётся из кэшированного отчёта."""
+        mock_prober.report.return_value = self._report(HealthStatus.OK)
+
+        response = self.client.get("/api/v1/healthcheck/readiness")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "ok")
+        self.assertTrue(response.json()["checks"]["database"]["healthy"])
+
+    @patch("app.api.v1.endpoints.healthcheck.prober")
+    def test_readiness_degraded_is_200(self, mock_prober):
+        """Деградация не выводит сервис из балансировки."""
+        mock_prober.report.return_value = self._report(HealthStatus.DEGRADED)
+
+        response = self.client.get("/api/v1/healthcheck/readiness")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "degraded")
+
+    @patch("app.api.v1.endpoints.healthcheck.prober")
+    def test_readiness_unavailable_is_503(self, mock_prober):
+        """Недоступность зависимостей - HTTP 503."""
+        mock_prober.report.return_value = self._report(HealthStatus.UNAVAILABLE, healthy=False)
+
+        response = self.client.get("/api/v1/healthcheck/readiness")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unavailable")
@@ -0,0 +1,30 @@
+from unittest import TestCase
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.dependencies import get_live_broker
+from app.main import app
+from app.services.live.main import LocalBroker
+
+
+class TestStreamUsage(TestCase):
+    def setUp(self):
+        self.addCleanup(app.dependency_overrides.clear)
+        self.client = TestClient(app)
+
+    def test_missing_user_id_is_rejected(self):
+        """Поток без X-User-ID не открывается: анонимный идентификатор для чтения не создаётся."""
+        response = self.client.get("/api/v1/live")
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_connection_limit_gives_503(self):
+        """При достижении лимита потоков воркера - HTTP 503 с Retry-After."""
+        app.dependency_overrides[get_live_broker] = lambda: LocalBroker(max_connections=0)
+
+        response = self.client.get("/api/v1/live", headers={"X-User-ID": str(uuid4())})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response.headers)
+        self.assertEqual(response.json()["detail"]["code"], "SERVICE_UNAVAILABLE")
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.dependencies import get_sketch_recorder
+from app.main import app
+from app.schemas.events.send_events_request_schema import SendEventData
+from app.services.sketches.exceptions import SketchesServiceException
+from app.services.sketches.main import LocalSketchStore, SketchRecorder
+
+
+class TestStats(TestCase):
+    def setUp(self):
+        self.recorder = SketchRecorder(LocalSketchStore(top_capacity=10, cms_width=256))
+        app.dependency_overrides[get_sketch_recorder] = lambda: self.recorder
+        self.addCleanup(app.dependency_overrides.clear)
+        self.client = TestClient(app)
+        self.user_id = uuid4()
+        now = datetime.now(timezone.utc)
+        self.recorder.record(
+            self.user_id,
+            [SendEventData(event="active", domain=domain, timestamp=now) for domain in ("a.com", "a.com", "b.com")],
+        )
+        asyncio.run(self.recorder.flush())
+
+    def test_top_domains(self):
+        """Наиболее посещаемые домены за период по убыванию оценки переходов."""
+        response = self.client.get("/api/v1/stats/domains/top", params={"days": 1, "limit": 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["domains"], [{"domain": "a.com", "visits": 2}])
+
+    def test_domain_users(self):
+        """Количество различных пользователей домена."""
+        response = self.client.get("/api/v1/stats/domains/A.com/users")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()["domain"], response.json()["users"]), ("a.com", 1))
+
+    def test_user_domains(self):
+        """Количество различных доменов пользователя за сегодня."""
+        response = self.client.get("/api/v1/stats/users/me/domains", headers={"X-User-ID": str(self.user_id)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["domains"], 2)
+
+    def test_store_error_is_503(self):
+        """Недоступность хранилища оценок - HTTP 503."""
+        self.recorder.store = AsyncMock()
+        self.recorder.store.top_domains.side_effect = SketchesServiceException("Failed to query top domains sketches!")
+
+        response = self.client.get("/api/v1/stats/domains/top")
+
+        self.assertEqual(response.status_code, 503)
+
+    def test_disabled_sketches_are_503(self):
+        """При отключённых оценках запросы отклоняются."""
+        app.dependency_overrides[get_sketch_recorder] = lambda: None
+
+        response = self.client.get("/api/v1/stats/domains/top")
+
+        self.assertEqual(response.status_code, 503)
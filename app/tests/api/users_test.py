@@ -0,0 +1,76 @@
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from app.api.v1.dependencies import get_required_user_db_session
+from app.main import app
+from app.services.users.exceptions import UserSettingsServiceException, UserSettingsServiceMessages
+
+
+class TestUpdateSettings(TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+
+        async def session():
+            yield self.session
+
+        app.dependency_overrides[get_required_user_db_session] = session
+        self.addCleanup(app.dependency_overrides.clear)
+        patcher = patch("app.api.v1.endpoints.users.UserSettingsService")
+        self.service = patcher.start()
+        self.service.return_value.exec = AsyncMock(return_value=True)
+        self.addCleanup(patcher.stop)
+        queue = patch("app.api.v1.endpoints.users.queue_summaries_recompute", AsyncMock(return_value=True))
+        self.queue = queue.start()
+        self.addCleanup(queue.stop)
+        self.client = TestClient(app)
+
+    def _put(self, time_zone: str, **headers):
+        """Вспомогательный метод изменения часового пояса."""
+        return self.client.put("/api/v1/users/me/settings", json={"time_zone": time_zone}, headers=headers)
+
+    def test_time_zone_saved(self):
+        """Часовой пояс передаётся сервису, пересчёт сводок ставится в очередь."""
+        user_id = uuid4()
+
+        response = self._put("Europe/Moscow", **{"X-User-ID": str(user_id)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"time_zone": "Europe/Moscow", "recompute_queued": True})
+        self.assertEqual(self.service.return_value.exec.await_args.args, (user_id, "Europe/Moscow"))
+        self.queue.assert_awaited_once_with(user_id)
+
+    def test_unchanged_time_zone_not_queued(self):
+        """Без смены часового пояса пересчёт не ставится в очередь."""
+        self.service.return_value.exec.return_value = False
+
+        response = self._put("Europe/Moscow", **{"X-User-ID": str(uuid4())})
+
+        self.assertEqual(response.json(), {"time_zone": "Europe/Moscow", "recompute_queued": False})
+        self.queue.assert_not_awaited()
+
+    def test_unknown_time_zone_rejected(self):
+        """Неизвестный часовой пояс отклоняется валидацией запроса."""
+        response = self._put("Mars/Olympus", **{"X-User-ID": str(uuid4())})
+
+        self.assertEqual(response.status_code, 422)
+        self.service.return_value.exec.assert_not_awaited()
+
+    def test_user_id_required(self):
+        """Без X-User-ID настройки не изменяются."""
+        response = self._put("Europe/Moscow")
+
+        self.assertEqual(response.status_code, 422)
+        self.service.return_value.exec.assert_not_awaited()
+
+    def test_service_error_is_500(self):
+        """Ошибка сохранения настроек - HTTP 500."""
+        self.service.return_value.exec.side_effect = UserSettingsServiceException(
+            UserSettingsServiceMessages.UPDATE_SETTINGS_ERROR.format(user_id="x")
+        )
+
+        response = self._put("Europe/Moscow", **{"X-User-ID": str(uuid4())})
+
+        self.assertEqual(response.status_code, 500)
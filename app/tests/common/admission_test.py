@@ -0,0 +1,121 @@
+import asyncio
+from unittest import TestCase
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.common.admission import IN_FLIGHT, POOL_WAIT, AdmissionController, AdmissionMiddleware
+from app.services.healthcheck.probes import admission_probe
+
+
+class FakeClock:
+    """Управляемые часы для тестов."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _build_app(controller: AdmissionController) -> FastAPI:
+    """Вспомогательная функция сборки приложения с контролем допуска и тестовыми маршрутами."""
+    test_app = FastAPI()
+    test_app.add_middleware(AdmissionMiddleware, controller=controller, exempt_paths=("/health",), retry_after=7)
+
+    @test_app.post("/ingest")
+    async def ingest():
+        return PlainTextResponse(str(controller.in_flight))
+
+    @test_app.get("/health")
+    async def health():
+        return PlainTextResponse("ok")
+
+    @test_app.post("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return test_app
+
+
+class TestAdmissionController(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = AdmissionController(
+            max_in_flight=2, pool_wait_threshold=0.5, half_life=5.0, alpha=0.5, clock=self.clock
+        )
+
+    def test_in_flight_limit(self):
+        """Достижение предела запросов в обработке - перегрузка."""
+        self.assertIsNone(self.controller.overload_reason())
+        self.controller.in_flight = 2
+        self.assertEqual(self.controller.overload_reason(), IN_FLIGHT)
+
+    def test_pool_wait_smoothed_and_decays(self):
+        """Одиночный медленный замер сглаживается, длительное ожидание затухает без новых замеров."""
+        self.controller.observe_pool_wait(0.8)
+        self.assertIsNone(self.controller.overload_reason())
+
+        self.controller.observe_pool_wait(1.2)
+        self.assertEqual(self.controller.pool_wait, 0.8)
+        self.assertEqual(self.controller.overload_reason(), POOL_WAIT)
+
+        self.clock.now = 5.0
+        self.assertEqual(self.controller.pool_wait, 0.4)
+        self.assertIsNone(self.controller.overload_reason())
+
+    def test_load_combines_signals(self):
+        """Нагрузка - наибольший из сигналов, отклонённые запросы затухают со временем."""
+        self.assertEqual(self.controller.load(), 0.0)
+        self.controller.in_flight = 1
+        self.assertEqual(self.controller.load(), 0.5)
+
+        for shed in (True, True, True, False):
+            self.controller.record(shed)
+        self.assertEqual(self.controller.shed_fraction, 0.75)
+        self.assertEqual(self.controller.load(), 0.75)
+
+        self.clock.now = 50.0
+        self.controller.record(shed=False)
+        self.assertLess(self.controller.shed_fraction, 0.01)
+        self.assertEqual(self.controller.load(), 0.5)
+
+
+class TestAdmissionMiddleware(TestCase):
+    def setUp(self):
+        self.controller = AdmissionController(max_in_flight=1, pool_wait_threshold=0.5)
+        self.client = TestClient(_build_app(self.controller), raise_server_exceptions=False)
+
+    def test_admitted_request_counted_in_flight(self):
+        """Допущенный запрос учитывается в обработке до завершения, в том числе при ошибке."""
+        response = self.client.post("/ingest")
+        self.assertEqual((response.status_code, response.text), (200, "1"))
+        self.assertEqual(self.client.post("/boom").status_code, 500)
+        self.assertEqual(self.controller.in_flight, 0)
+
+    def test_overloaded_worker_sheds_with_retry_after(self):
+        """Перегруженный воркер сразу отвечает 503 с Retry-After."""
+        self.controller.observe_pool_wait(10.0)
+
+        response = self.client.post("/ingest")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "7")
+        self.assertEqual(response.json()["detail"]["code"], "SERVICE_UNAVAILABLE")
+        self.assertEqual(self.controller.shed_fraction, 1.0)
+
+    def test_exempt_paths_always_pass(self):
+        """Проверки готовности обрабатываются и при перегрузке."""
+        self.controller.in_flight = 5
+        self.assertEqual(self.client.get("/health").status_code, 200)
+
+    def test_probe_reports_degraded(self):
+        """Проверка контроля допуска помечает перегрузку как деградацию."""
+        probe = admission_probe(self.controller)
+        self.assertFalse(asyncio.run(probe())["degraded"])
+
+        self.controller.in_flight = 1
+        details = asyncio.run(probe())
+        self.assertTrue(details["degraded"])
+        self.assertEqual(details["overload"], IN_FLIGHT)
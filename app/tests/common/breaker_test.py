@@ -0,0 +1,53 @@
+from unittest import TestCase
+
+from app.common.breaker import CircuitBreaker
+
+
+class FakeClock:
+    """Управляемые часы для тестов."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker("database", failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        """Автомат размыкается после порога ошибок подряд; успех сбрасывает счётчик."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_single_probe_per_reset_timeout(self):
+        """В разомкнутом состоянии раз в reset_timeout пропускается одна пробная попытка."""
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.clock.now = 10
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.clock.now = 15
+        self.breaker.record_failure()
+        self.clock.now = 24
+        self.assertFalse(self.breaker.allow())
+
+        self.clock.now = 25
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
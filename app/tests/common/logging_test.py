@@ -1,10 +1,13 @@
+import json
 import logging
+import queue
 import sys
+import threading
 from io import StringIO
 from unittest import TestCase, mock
 from unittest.mock import patch, MagicMock
 
-from app.common.logging import setup_logging
+from app.common.logging import DroppingQueueHandler, setup_logging, stop_queue_listener
 
 
 class TestLogging(TestCase):
@@ -13,6 +16,7 @@ class TestLogging(TestCase):
         logging.getLogger().setLevel(logging.NOTSET)
 
     def tearDown(self):
+        stop_queue_listener()
         logging.getLogger().handlers.clear()
 
     @patch("app.common.logging.logging.getLogger")
@@ -106,3 +110,54 @@ class TestLogging(TestCase):
                 force=True,
                 datefmt="%Y-%m-%d",
             )
+
+    def test_queue_mode_writes_from_background_thread(self):
+        """В режиме очереди сообщения форматируются и пишутся в фоновом потоке."""
+        log_buffer = StringIO()
+        formatting_threads = []
+
+        class Payload:
+            def __str__(self):
+                formatting_threads.append(threading.current_thread())
+                return "payload"
+
+        with patch.object(sys, "stdout", log_buffer):
+            logger = setup_logging(use_queue=True)
+            logger.info("Queued %s", Payload())
+            stop_queue_listener()
+
+        self.assertEqual(log_buffer.getvalue().strip(), "[INFO][app.common.logging]:Queued payload")
+        self.assertEqual(len(formatting_threads), 1)
+        self.assertIsNot(formatting_threads[0], threading.current_thread())
+
+    def test_json_format(self):
+        """JSON-формат содержит уровень, логгер, сообщение и поля из extra."""
+        log_buffer = StringIO()
+        with patch.object(sys, "stdout", log_buffer):
+            logger = setup_logging(json_format=True, use_queue=True)
+            logger.warning("User %s", "42", extra={"route": "/api/v1/healthcheck"})
+            stop_queue_listener()
+
+        payload = json.loads(log_buffer.getvalue())
+        self.assertEqual(payload["level"], "WARNING")
+        self.assertEqual(payload["logger"], "app.common.logging")
+        self.assertEqual(payload["message"], "User 42")
+        self.assertEqual(payload["route"], "/api/v1/healthcheck")
+        self.assertIn("timestamp", payload)
+
+    def test_full_queue_drops_and_counts(self):
+        """При переполнении очереди записи отбрасываются без блокировки и учитываются."""
+        on_drop = MagicMock()
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2), on_drop)
+        logger = logging.getLogger("app.tests.dropping")
+        logger.addHandler(handler)
+        logger.propagate = False
+        try:
+            for i in range(5):
+                logger.warning("Message %d", i)
+        finally:
+            logger.removeHandler(handler)
+
+        self.assertEqual(handler.queue.qsize(), 2)
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(on_drop.call_count, 3)
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import TestCase
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.common.metrics import (
+    instrument_pool,
+    observe_cache,
+    observe_dropped_log_record,
+    observe_ingest,
+    observed_lru_cache,
+)
+from app.main import app
+
+_RECORD_SCRIPT = """
+from app.common.metrics import observe_request
+observe_request("GET", "/api/v1/healthcheck", 200, 0.01)
+"""
+
+_RENDER_SCRIPT = """
+import sys
+from app.common.metrics import render_metrics
+content, _ = render_metrics()
+sys.stdout.write(content.decode())
+"""
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.client = TestClient(app)
+
+    def _sample(self, name: str, labels: dict | None = None) -> float:
+        """Вспомогательный метод получения значения метрики из реестра процесса."""
+        return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+    def test_metrics_endpoint_exposes_request_histogram_by_route(self):
+        """Запрос учитывается по шаблону маршрута и статусу, метрики отдаются в формате Prometheus."""
+        labels = {"method": "GET", "route": "/api/v1/healthcheck", "status": "200"}
+        before = self._sample("http_requests_total", labels)
+
+        self.client.get("/api/v1/healthcheck")
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("http_request_duration_seconds_bucket", response.text)
+        self.assertEqual(self._sample("http_requests_total", labels), before + 1)
+        self.assertEqual(self._sample("http_request_duration_seconds_count", labels), before + 1)
+
+    def test_unmatched_route_uses_single_label(self):
+        """Несуществующие пути не порождают отдельных меток."""
+        labels = {"method": "GET", "route": "__unmatched__", "status": "404"}
+        before = self._sample("http_requests_total", labels)
+
+        self.client.get("/non-existent-path/1")
+        self.client.get("/non-existent-path/2")
+
+        self.assertEqual(self._sample("http_requests_total", labels), before + 2)
+
+    def test_ingest_and_cache_counters(self):
+        """Учёт принятых событий, обращений к кэшу и отброшенных записей лога."""
+        events_before = self._sample("ingest_events_total")
+        errors_before = self._sample("ingest_batches_total", {"outcome": "error"})
+        hits_before = self._sample("cache_requests_total", {"cache": "test", "result": "hit"})
+
+        observe_ingest(5)
+        observe_ingest(3, outcome="error")
+        observe_cache("test", hit=True)
+        dropped_before = self._sample("log_records_dropped_total")
+        observe_dropped_log_record()
+
+        self.assertEqual(self._sample("log_records_dropped_total"), dropped_before + 1)
+        self.assertEqual(self._sample("ingest_events_total"), events_before + 5)
+        self.assertEqual(self._sample("ingest_batches_total", {"outcome": "error"}), errors_before + 1)
+        self.assertEqual(self._sample("cache_requests_total", {"cache": "test", "result": "hit"}), hits_before + 1)
+
+    def test_observed_lru_cache_counts_hits_and_misses(self):
+        """Кэш функции учитывает промахи и попадания по именам кэшей."""
+
+        @observed_lru_cache("test_lru", maxsize=8)
+        def square(value: int) -> int:
+            return value * value
+
+        labels = {"cache": "test_lru"}
+        hits_before = self._sample("cache_requests_total", {**labels, "result": "hit"})
+        misses_before = self._sample("cache_requests_total", {**labels, "result": "miss"})
+
+        self.assertEqual([square(2), square(2), square(3), square(2)], [4, 4, 9, 4])
+
+        self.assertEqual(self._sample("cache_requests_total", {**labels, "result": "hit"}), hits_before + 2)
+        self.assertEqual(self._sample("cache_requests_total", {**labels, "result": "miss"}), misses_before + 2)
+        self.assertEqual(square.cache_info().hits, 2)
+
+    def test_pool_size_not_inflated_by_recreated_engines(self):
+        """Размер пула вычисляется по действующим engine: закрытый engine перестаёт учитываться."""
+        before = self._sample("db_pool_size")
+        for _ in range(3):
+            engine = create_async_engine("sqlite+aiosqlite://", poolclass=AsyncAdaptedQueuePool, pool_size=4)
+            instrument_pool(engine)
+            self.assertEqual(self._sample("db_pool_size"), before + 4)
+            asyncio.run(engine.dispose())
+
+        self.assertEqual(self._sample("db_pool_size"), before)
+
+    def test_multiprocess_aggregation(self):
+        """Метрики нескольких процессов агрегируются через PROMETHEUS_MULTIPROC_DIR."""
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", _RECORD_SCRIPT], env=env, check=True)
+            result = subprocess.run(
+                [sys.executable, "-c", _RENDER_SCRIPT], env=env, check=True, capture_output=True, text=True
+            )
+
+        self.assertIn('http_requests_total{method="GET",route="/api/v1/healthcheck",status="200"} 2.0', result.stdout)
@@ -1,32 +1,55 @@
+import logging
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.testclient import TestClient
+
+from app.common.middleware import RequestLoggingMiddleware
 from app.main import app
 
 
+def _build_app(**kwargs) -> FastAPI:
+    """Вспомогательная функция сборки приложения с middleware и тестовыми маршрутами."""
+    test_app = FastAPI()
+    test_app.add_middleware(RequestLoggingMiddleware, **kwargs)
+
+    @test_app.get("/ok")
+    async def ok():
+        return PlainTextResponse("ok")
+
+    @test_app.get("/fail")
+    async def fail():
+        return PlainTextResponse("fail", status_code=503)
+
+    @test_app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    return test_app
+
+
 class TestMiddleware(TestCase):
     def setUp(self):
         self.client = TestClient(app)
 
     @patch("app.common.middleware.logger")
     def test_middleware_logs_successful_request(self, mock_logger: MagicMock):
-        response = self.client.get("/api/v1/healthcheck")
+        response = self.client.get("/api/v1/healthcheck?verbose=1")
 
         assert response.status_code == 200
 
-        # Проверяем, что logger.info вызывался дважды:
-        # 1. При входе в запрос
-        # 2. При успешном ответе
-        assert mock_logger.info.call_count == 2
-
-        request_log = mock_logger.info.call_args_list[0][0][0]
-        response_log = mock_logger.info.call_args_list[1][0][0]
+        # Одна строка лога на запрос, форматирование отложено до записи
+        assert mock_logger.log.call_count == 1
+        level, log_format, status_code, method, url, duration = mock_logger.log.call_args[0]
 
-        assert "Request: GET http://testserver/api/v1/healthcheck" in request_log
-        assert "Response: 200" in response_log
-        assert "Method: GET" in response_log
-        assert "Duration:" in response_log
+        assert level == logging.INFO
+        assert "Response: %d" in log_format
+        assert status_code == 200
+        assert method == "GET"
+        assert url == "http://testserver/api/v1/healthcheck?verbose=1"
+        assert duration >= 0
 
     @patch("app.common.middleware.logger")
     def test_middleware_logs_error_request(self, mock_logger: MagicMock):
@@ -34,14 +57,48 @@ class TestMiddleware(TestCase):
 
         assert response.status_code == 404
 
-        assert mock_logger.info.call_count == 2  # вход + выход
+        assert mock_logger.log.call_count == 1
         assert mock_logger.error.call_count == 0  # исключения не было
 
-        request_log = mock_logger.info.call_args_list[0][0][0]
-        response_log = mock_logger.info.call_args_list[1][0][0]
+        _, _, status_code, method, url, _ = mock_logger.log.call_args[0]
+        assert status_code == 404
+        assert method == "GET"
+        assert url == "http://testserver/non-existent-path"
+
+    @patch("app.common.middleware.logger")
+    def test_successful_requests_are_sampled(self, mock_logger: MagicMock):
+        """При нулевой доле выборки успешные запросы не логируются, а ошибки логируются."""
+        client = TestClient(_build_app(sample_rate=0.0))
+
+        client.get("/ok")
+        mock_logger.log.assert_not_called()
+
+        client.get("/missing")
+        client.get("/fail")
+        levels = [call[0][0] for call in mock_logger.log.call_args_list]
+        assert levels == [logging.INFO, logging.ERROR]
+
+    @patch("app.common.middleware.logger")
+    def test_slow_requests_always_logged(self, mock_logger: MagicMock):
+        """Медленные запросы логируются с уровнем WARNING независимо от выборки."""
+        client = TestClient(_build_app(sample_rate=0.0, slow_request_threshold=0.0))
+
+        client.get("/ok")
+
+        assert mock_logger.log.call_count == 1
+        assert mock_logger.log.call_args[0][0] == logging.WARNING
+
+    @patch("app.common.middleware.logger")
+    def test_exception_logged_and_reraised(self, mock_logger: MagicMock):
+        """Исключение обработчика логируется как ошибка и пробрасывается дальше."""
+        client = TestClient(_build_app())
+
+        with self.assertRaises(RuntimeError):
+            client.get("/boom")
 
-        assert "Request: GET http://testserver/non-existent-path" in request_log
-        assert "Response: 404" in response_log
-        assert "Method: GET" in response_log
-        assert "URL: http://testserver/non-existent-path" in response_log
-        assert "Duration:" in response_log
+        assert mock_logger.error.call_count == 1
+        log_format, error, method, url, _ = mock_logger.error.call_args[0]
+        assert "Error: %s" in log_format
+        assert str(error) == "boom"
+        assert method == "GET"
+        assert url == "http://testserver/boom"
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import sys
+from io import StringIO
+from unittest import TestCase
+from unittest.mock import patch
+
+from fastapi import FastAPI
+
+from app.common import logging as app_logging
+from app.common.logging import setup_logging, stop_queue_listener
+from app.common.middleware import RequestLoggingMiddleware
+from app.common.preload import after_fork, warm_up
+from app.db.session import provider
+
+
+class TestWarmUp(TestCase):
+    def test_builds_schema_and_middleware_stack(self):
+        """Прогрев строит схему OpenAPI и стек middleware и загружает схемы запросов."""
+        application = FastAPI()
+        application.add_middleware(RequestLoggingMiddleware)
+
+        @application.get("/ping")
+        async def ping():
+            return {"status": "ok"}
+
+        with patch("app.common.preload.DATABASE_URL", "sqlite+aiosqlite:///:memory:"):
+            warm_up(application)
+
+        self.assertIsNotNone(application.openapi_schema)
+        self.assertIsNotNone(application.middleware_stack)
+        self.assertIn("app.schemas.events.send_events_request_schema", sys.modules)
+        self.assertIn("aiosqlite", sys.modules)
+        self.assertIsNone(provider._manager)
+
+    def test_invalid_database_url_is_skipped(self):
+        """Некорректный URL базы данных не прерывает прогрев."""
+        with patch("app.common.preload.DATABASE_URL", "unknown://"):
+            with self.assertLogs("app.common.preload", level="WARNING"):
+                warm_up(FastAPI())
+
+
+class TestAfterFork(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        logging.getLogger().handlers.clear()
+
+    def tearDown(self):
+        stop_queue_listener()
+        logging.getLogger().handlers.clear()
+        self._run_async(provider.dispose_manager())
+
+    @patch("app.db.session.provider.DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    def test_inherited_manager_is_dropped(self):
+        """Унаследованный менеджер отбрасывается, пул заменяется без закрытия соединений."""
+        manager = provider.get_manager()
+        pool = manager.get_engine().sync_engine.pool
+
+        after_fork()
+
+        self.assertIsNone(provider._manager)
+        self.assertIsNot(manager.get_engine().sync_engine.pool, pool)
+        self.assertIsNot(provider.get_manager(), manager)
+
+    def test_queue_listener_restarted(self):
+        """Поток записи логов перезапускается с новой очередью, записи продолжают доставляться."""
+        log_buffer = StringIO()
+        with patch.object(sys, "stdout", log_buffer):
+            logger = setup_logging(use_queue=True)
+            listener, log_queue = app_logging._listener, app_logging._queue_handler.queue
+
+            after_fork()
+            self.assertIsNot(app_logging._listener, listener)
+            self.assertIsNot(app_logging._queue_handler.queue, log_queue)
+            logger.info("After fork")
+            stop_queue_listener()
+
+        self.assertEqual(log_buffer.getvalue().strip(), "[INFO][app.common.logging]:After fork")
@@ -0,0 +1,98 @@
+import json
+from datetime import date, datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+from uuid import uuid4
+
+from fastapi import FastAPI, HTTPException
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.common.responses import (
+    FastJSONResponse,
+    dumps,
+    http_exception_handler,
+    prevalidated_response,
+    validation_exception_handler,
+)
+from app.main import app
+
+
+class _Row(BaseModel):
+    domain: str
+    total_seconds: int
+
+
+class TestDumps(TestCase):
+    def setUp(self):
+        self.user_id = uuid4()
+        self.content = {
+            "user_id": self.user_id,
+            "date": date(2025, 4, 5),
+            "generated_at": datetime(2025, 4, 5, 10, 0, tzinfo=timezone.utc),
+            "rows": [_Row(domain="example.com", total_seconds=60)],
+            "domain": "пример.рф",
+        }
+        self.expected = {
+            "user_id": str(self.user_id),
+            "date": "2025-04-05",
+            "generated_at": "2025-04-05T10:00:00+00:00",
+            "rows": [{"domain": "example.com", "total_seconds": 60}],
+            "domain": "пример.рф",
+        }
+
+    def test_orjson_serialization(self):
+        """UUID, даты и модели Pydantic сериализуются через orjson."""
+        self.assertEqual(json.loads(dumps(self.content)), self.expected)
+
+    def test_stdlib_fallback(self):
+        """Без orjson используется стандартный json с тем же результатом."""
+        with patch("app.common.responses.orjson", None):
+            self.assertEqual(json.loads(dumps(self.content)), self.expected)
+
+
+class TestFastJSONResponse(TestCase):
+    def test_default_response_class(self):
+        """Ответы приложения сериализуются через FastJSONResponse."""
+        self.assertIs(app.router.default_response_class, FastJSONResponse)
+
+    def test_errors_use_fast_response(self):
+        """Ошибки HTTP и валидации отдаются через FastJSONResponse в прежнем формате."""
+        test_app = FastAPI(default_response_class=FastJSONResponse)
+        test_app.add_exception_handler(HTTPException, http_exception_handler)
+        test_app.add_exception_handler(RequestValidationError, validation_exception_handler)
+
+        @test_app.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            raise HTTPException(status_code=404, detail="Not found", headers={"X-Reason": "missing"})
+
+        client = TestClient(test_app)
+        with patch("app.common.responses.dumps", wraps=dumps) as mock_dumps:
+            response = client.get("/items/1")
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json(), {"detail": "Not found"})
+            self.assertEqual(response.headers["X-Reason"], "missing")
+
+            response = client.get("/items/abc")
+            self.assertEqual(response.status_code, 422)
+            self.assertEqual(response.json()["detail"][0]["loc"], ["path", "item_id"])
+        self.assertEqual(mock_dumps.call_count, 2)
+
+        response = TestClient(app).get("/non-existent-path")
+        self.assertEqual(response.json(), {"detail": "Not Found"})
+
+    def test_prevalidated_response_skips_response_model(self):
+        """Предварительно проверенные данные не проходят повторную валидацию response_model."""
+        test_app = FastAPI(default_response_class=FastJSONResponse)
+
+        @test_app.get("/report", response_model=list[_Row])
+        async def report():
+            return prevalidated_response([_Row(domain="example.com", total_seconds=60)], headers={"X-Rows": "1"})
+
+        with patch.object(_Row, "model_validate", side_effect=AssertionError("re-validated")):
+            response = TestClient(test_app).get("/report")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"domain": "example.com", "total_seconds": 60}])
+        self.assertEqual(response.headers["X-Rows"], "1")
@@ -0,0 +1,132 @@
+import asyncio
+from logging import Logger
+from unittest import TestCase
+from unittest.mock import Mock
+
+from sqlalchemy import text
+
+from app.db.session.instrumentation import OVERFLOW_FINGERPRINT, QueryInstrumentation, normalize_statement
+from app.db.session.manager import Manager
+
+
+class TestNormalizeStatement(TestCase):
+    """Тесты для функции normalize_statement."""
+
+    def test_literals_and_placeholders_replaced(self):
+        """Литералы и плейсхолдеры разных драйверов заменяются на '?'."""
+        statement = "SELECT * FROM users WHERE id = %(id)s AND name = 'it''s' AND age > 42 AND x = $1 AND y = :p_1"
+        self.assertEqual(
+            normalize_statement(statement),
+            "SELECT * FROM users WHERE id = ? AND name = ? AND age > ? AND x = ? AND y = ?",
+        )
+
+    def test_postgresql_cast_is_kept(self):
+        """Приведение типа '::UUID' не принимается за именованный параметр."""
+        self.assertEqual(normalize_statement("SELECT %(id)s::UUID"), "SELECT ?::UUID")
+
+    def test_in_list_and_values_collapsed(self):
+        """Списки IN и многострочные VALUES схлопываются в один элемент."""
+        self.assertEqual(normalize_statement("SELECT a FROM t WHERE a IN (1, 2, 3)"), "SELECT a FROM t WHERE a IN (?)")
+        self.assertEqual(
+            normalize_statement("INSERT INTO t (a, b) VALUES (?, ?), (?, ?),\n (?, ?)"),
+            "INSERT INTO t (a, b) VALUES (?)",
+        )
+
+
+class TestQueryInstrumentation(TestCase):
+    """Тесты для класса QueryInstrumentation."""
+
+    def setUp(self):
+        self.logger = Mock(spec=Logger)
+
+    def _run_queries(self, instrumentation: QueryInstrumentation) -> None:
+        """Вспомогательный метод выполнения запросов на реальной in-memory SQLite."""
+        manager = Manager(
+            logger=self.logger, database_url="sqlite+aiosqlite:///:memory:", instrumentation=instrumentation
+        )
+
+        async def _queries():
+            async with manager.get_session() as session:
+                await session.execute(text("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT)"))
+                for name in ("a", "b", "c"):
+                    await session.execute(text("INSERT INTO test (name) VALUES (:name)"), {"name": name})
+                await session.execute(text("SELECT name FROM test WHERE id = 1"))
+                await session.execute(text("SELECT name FROM test WHERE id = 2"))
+                await session.commit()
+            await manager.get_engine().dispose()
+
+        asyncio.run(_queries())
+
+    def test_statements_grouped_by_fingerprint(self):
+        """Запросы с разными параметрами учитываются под одним отпечатком."""
+        instrumentation = QueryInstrumentation(logger=self.logger)
+        self._run_queries(instrumentation)
+
+        stats = instrumentation.snapshot()
+        insert = stats["INSERT INTO test (name) VALUES (?)"]
+        select = stats["SELECT name FROM test WHERE id = ?"]
+        self.assertEqual(insert.count, 3)
+        self.assertEqual(insert.rows, 3)
+        self.assertEqual(select.count, 2)
+        self.assertEqual(sum(insert.bucket_counts), insert.count)
+        self.assertGreater(insert.total_seconds, 0)
+
+    def test_fingerprint_cache_observed(self):
+        """Обращения к кэшу отпечатков передаются наблюдателю: повтор текста запроса - попадание."""
+        observer = Mock()
+        instrumentation = QueryInstrumentation(logger=self.logger, cache_observer=observer)
+        self._run_queries(instrumentation)
+
+        hits = [call.args[0] for call in observer.call_args_list]
+        self.assertEqual(hits.count(True), 2)
+        self.assertEqual(len(hits) - hits.count(True), len(instrumentation._fingerprints))
+
+    def test_zero_sample_rate_records_nothing(self):
+        """При нулевой доле выборки гистограмма не заполняется."""
+        instrumentation = QueryInstrumentation(logger=self.logger, sample_rate=0.0)
+        self._run_queries(instrumentation)
+
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_slow_queries_logged(self):
+        """Запросы длительнее порога попадают в журнал медленных запросов."""
+        instrumentation = QueryInstrumentation(logger=self.logger, sample_rate=0.0, slow_query_threshold=0.0)
+        self._run_queries(instrumentation)
+
+        slow = instrumentation.slow_queries()
+        self.assertTrue(any(query.fingerprint == "SELECT name FROM test WHERE id = ?" for query in slow))
+        self.logger.warning.assert_called()
+
+    def test_fingerprint_limit_uses_overflow_bucket(self):
+        """Отпечатки сверх лимита учитываются под общим отпечатком."""
+        instrumentation = QueryInstrumentation(logger=self.logger, max_fingerprints=1)
+        instrumentation.record("SELECT 1", 0.01)
+        instrumentation.record("SELECT 2", 0.02)
+
+        self.assertEqual(set(instrumentation.snapshot()), {"SELECT 1", OVERFLOW_FINGERPRINT})
+
+    def test_histogram_buckets(self):
+        """Длительность попадает в корзину по верхней границе, переполнение - в последнюю."""
+        instrumentation = QueryInstrumentation(logger=self.logger, buckets=(0.1, 1.0))
+        instrumentation.record("q", 0.05)
+        instrumentation.record("q", 0.1)
+        instrumentation.record("q", 0.5)
+        instrumentation.record("q", 5.0)
+
+        self.assertEqual(instrumentation.snapshot()["q"].bucket_counts, [2, 1, 1])
+
+    def test_detach_stops_recording(self):
+        """После detach запросы не учитываются."""
+        instrumentation = QueryInstrumentation(logger=self.logger)
+        manager = Manager(
+            logger=self.logger, database_url="sqlite+aiosqlite:///:memory:", instrumentation=instrumentation
+        )
+        instrumentation.detach()
+
+        async def _query():
+            async with manager.get_session() as session:
+                await session.execute(text("SELECT 1"))
+            await manager.get_engine().dispose()
+
+        asyncio.run(_query())
+        self.assertEqual(instrumentation.snapshot(), {})
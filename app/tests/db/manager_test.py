@@ -1,6 +1,6 @@
 import asyncio
 from unittest import TestCase, mock
-from unittest.mock import patch, Mock
+from unittest.mock import patch, Mock, AsyncMock
 from urllib.parse import urlparse
 from logging import Logger
 
@@ -158,7 +158,7 @@ class TestManager(TestCase):
         mock_create_engine.return_value = mock_engine
 
         mock_session = Mock()
-        mock_session.close = Mock(side_effect=lambda: None)
+        mock_session.close = AsyncMock(return_value=None)
 
         mock_session_factory = Mock()
         mock_session_factory.return_value = mock_session
@@ -199,8 +199,8 @@ class TestManager(TestCase):
         mock_create_engine.return_value = mock_engine
 
         mock_session = Mock()
-        mock_session.rollback = Mock()
-        mock_session.close = Mock()
+        mock_session.rollback = AsyncMock()
+        mock_session.close = AsyncMock()
 
         mock_session_factory = Mock(return_value=mock_session)
         mock_sessionmaker.return_value = mock_session_factory
@@ -231,8 +231,8 @@ class TestManager(TestCase):
         mock_create_engine.return_value = mock_engine
 
         mock_session = Mock()
-        mock_session.rollback = Mock(side_effect=Exception("Rollback crashed"))
-        mock_session.close = Mock()
+        mock_session.rollback = AsyncMock(side_effect=Exception("Rollback crashed"))
+        mock_session.close = AsyncMock()
 
         mock_session_factory = Mock(return_value=mock_session)
         mock_sessionmaker.return_value = mock_session_factory
@@ -265,7 +265,7 @@ class TestManager(TestCase):
         mock_create_engine.return_value = mock_engine
 
         mock_session = Mock()
-        mock_session.close = Mock(side_effect=OSError("Close failed"))
+        mock_session.close = AsyncMock(side_effect=OSError("Close failed"))
 
         mock_session_factory = Mock(return_value=mock_session)
         mock_sessionmaker.return_value = mock_session_factory
@@ -0,0 +1,63 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from app.db.exceptions import DatabaseManagerException
+from app.db.session import provider
+from app.db.session.sharding import DEFAULT_SHARD, ShardedManager
+
+
+class TestManagerProvider(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def tearDown(self):
+        self._run_async(provider.dispose_manager())
+
+    @patch("app.db.session.provider.DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    def test_manager_created_once(self):
+        """Менеджер создаётся при первом обращении и переиспользуется."""
+        self._run_async(provider.dispose_manager())
+        self.assertIsNone(provider._manager)
+
+        manager = provider.get_manager()
+        self.assertIs(provider.get_manager(), manager)
+
+    @patch("app.db.session.provider.DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    def test_dispose_resets_manager(self):
+        """После закрытия пула создаётся новый менеджер."""
+        manager = provider.get_manager()
+        self._run_async(provider.dispose_manager())
+
+        self.assertIsNone(provider._manager)
+        self.assertIsNot(provider.get_manager(), manager)
+
+    @patch("app.db.session.provider.DATABASE_URL", "")
+    def test_invalid_config_fails_on_first_use(self):
+        """Некорректная конфигурация приводит к ошибке при обращении, а не при импорте."""
+        self._run_async(provider.dispose_manager())
+
+        with self.assertRaises(DatabaseManagerException):
+            provider.get_manager()
+        self.assertIsNone(provider._manager)
+
+    @patch(
+        "app.db.session.provider.DATABASE_SHARDS",
+        "s0=sqlite+aiosqlite:///:memory:,s1=sqlite+aiosqlite:///:memory:",
+    )
+    def test_shard_map_creates_sharded_manager(self):
+        """При заданной карте шардов создаётся менеджер шардов, а задачи обхода получают все шарды."""
+        self._run_async(provider.dispose_manager())
+
+        manager = provider.get_manager()
+
+        self.assertIsInstance(manager, ShardedManager)
+        self.assertEqual(list(provider.get_shards()), ["s0", "s1"])
+
+    @patch("app.db.session.provider.DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    def test_single_database_is_default_shard(self):
+        """Без карты шардов единственная база данных - шард по умолчанию."""
+        self._run_async(provider.dispose_manager())
+
+        self.assertEqual(provider.get_shards(), {DEFAULT_SHARD: provider.get_manager()})
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select
+
+from app.db.exceptions import DatabaseManagerException
+from app.db.models.base import Base
+from app.db.models.tables import User
+from app.db.session.sharding import HashRing, ShardedManager, fan_out, parse_shard_map
+
+
+class TestShardMap(TestCase):
+    def test_parse(self):
+        """Карта шардов разбирается в порядке объявления, пустая строка - без шардирования."""
+        shards = parse_shard_map(" s0=sqlite+aiosqlite:///a.db, s1=sqlite+aiosqlite:///b.db ")
+
+        self.assertEqual(list(shards), ["s0", "s1"])
+        self.assertEqual(shards["s1"], "sqlite+aiosqlite:///b.db")
+        self.assertEqual(parse_shard_map(""), {})
+
+    def test_invalid_pairs_rejected(self):
+        """Пара без имени или URL и повторяющееся имя - ошибка конфигурации."""
+        for value in ("sqlite+aiosqlite:///a.db", "s0=", "=url", "s0=a,s0=b"):
+            with self.subTest(value=value), self.assertRaises(DatabaseManagerException):
+                parse_shard_map(value)
+
+
+class TestHashRing(TestCase):
+    def setUp(self):
+        self.users = [UUID(int=index * 7919 + 1) for index in range(3000)]
+
+    def test_balanced_and_stable(self):
+        """Пользователи распределяются примерно поровну, шард пользователя не зависит от порядка шардов."""
+        ring = HashRing(["s0", "s1", "s2"])
+        counts = {shard: 0 for shard in ring.shards}
+        for user_id in self.users:
+            counts[ring.shard_for(user_id)] += 1
+
+        for count in counts.values():
+            self.assertAlmostEqual(count, 1000, delta=250)
+        reordered = HashRing(["s2", "s0", "s1"])
+        self.assertTrue(all(ring.shard_for(user) == reordered.shard_for(user) for user in self.users))
+
+    def test_adding_shard_moves_only_to_new_shard(self):
+        """При добавлении шарда пользователи переезжают только на новый шард, примерно 1/N."""
+        old, new = HashRing(["s0", "s1", "s2"]), HashRing(["s0", "s1", "s2", "s3"])
+
+        moved = [user for user in self.users if old.shard_for(user) != new.shard_for(user)]
+
+        self.assertTrue(all(new.shard_for(user) == "s3" for user in moved))
+        self.assertAlmostEqual(len(moved), 750, delta=250)
+
+    def test_empty_ring_rejected(self):
+        """Кольцо без шардов не создаётся."""
+        with self.assertRaises(DatabaseManagerException):
+            HashRing([])
+
+
+class TestShardedManager(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        shards = {
+            f"s{index}": f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, f's{index}.db')}" for index in range(3)
+        }
+        self.manager = ShardedManager(logger=logging.getLogger(__name__), shards=shards)
+
+        async def create(_, manager):
+            async with manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        self._run_async(fan_out(self.manager.shards, create))
+
+    def tearDown(self):
+        async def dispose(_, manager):
+            await manager.get_engine().dispose()
+
+        self._run_async(fan_out(self.manager.shards, dispose))
+        self.tmp.cleanup()
+
+    def test_user_session_routes_to_shard(self):
+        """Сессия пользователя открывается в шарде, выбранном кольцом, и только в нём видны его данные."""
+        users = [uuid4() for _ in range(30)]
+
+        async def run():
+            for user_id in users:
+                async with self.manager.get_session(user_id=user_id) as session:
+                    session.add(User(id=user_id, created_at=datetime.now(timezone.utc)))
+                    await session.commit()
+
+            async def count(_, manager):
+                async with manager.get_session() as session:
+                    return set((await session.execute(select(User.id))).scalars())
+
+            return await fan_out(self.manager.shards, count)
+
+        stored = self._run_async(run())
+        for shard, user_ids in stored.items():
+            self.assertEqual(user_ids, {user for user in users if self.manager.ring.shard_for(user) == shard})
+        self.assertEqual(sum(map(len, stored.values())), len(users))
+
+    def test_session_without_user_uses_default_shard(self):
+        """Сессия без пользователя открывается в первом шарде карты."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                return await session.scalar(select(func.count(User.id)))
+
+        self.assertEqual(self._run_async(run()), 0)
+        self.assertIs(self.manager.get_engine(), self.manager.shards["s0"].get_engine())
+
+    def test_fan_out_raises_shard_error(self):
+        """Ошибка задачи на одном шарде передаётся вызывающему после завершения остальных."""
+        finished = []
+
+        async def job(name, _):
+            if name == "s1":
+                raise RuntimeError("s1 is down")
+            await asyncio.sleep(0.01)
+            finished.append(name)
+
+        with self.assertRaises(RuntimeError):
+            self._run_async(fan_out(self.manager.shards, job, concurrency=2))
+        self.assertEqual(sorted(finished), ["s0", "s2"])
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from sqlalchemy import create_engine, inspect, text
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent
+from app.db.upgrade import upgrade_schema
+
+
+class TestUpgradeSchema(TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_adds_missing_columns_and_indexes(self):
+        """Существующие таблицы прежней схемы дополняются столбцами и индексами моделей, повтор ничего не меняет."""
+        with self.engine.begin() as connection:
+            Base.metadata.create_all(connection)
+            # Таблицы до добавления устройства, часового пояса и индекса keyset-страниц
+            connection.execute(text("DROP INDEX ix_attention_events_user_timestamp_id"))
+            connection.execute(text("ALTER TABLE attention_events DROP COLUMN device_id"))
+            connection.execute(text("ALTER TABLE users DROP COLUMN time_zone"))
+            connection.execute(
+                text("CREATE INDEX ix_attention_events_user_timestamp ON attention_events (user_id, timestamp)")
+            )
+
+            changes = upgrade_schema(connection, Base.metadata)
+
+            self.assertEqual(
+                set(changes),
+                {
+                    "column users.time_zone",
+                    "column attention_events.device_id",
+                    "drop index ix_attention_events_user_timestamp",
+                    "index ix_attention_events_user_timestamp_id",
+                },
+            )
+            inspector = inspect(connection)
+            self.assertIn(
+                "device_id", {column["name"] for column in inspector.get_columns(AttentionEvent.__tablename__)}
+            )
+            self.assertEqual(
+                {index["name"] for index in inspector.get_indexes(AttentionEvent.__tablename__)},
+                {"ix_attention_events_user_timestamp_id"},
+            )
+            self.assertEqual(upgrade_schema(connection, Base.metadata), [])
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+# Бюджет времени импорта app.main в секундах; переопределяется для медленных CI-машин
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "1.5"))
+
+# Модули, которые не должны загружаться при импорте веб-приложения
+DEFERRED_MODULES = ("celery", "kombu", "redis")
+
+
+def _run_python(code: str, **env) -> subprocess.CompletedProcess:
+    """Вспомогательная функция запуска кода в отдельном интерпретаторе."""
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env},
+    )
+
+
+class TestImportTime(TestCase):
+    def test_app_import_within_budget(self):
+        """Импорт app.main укладывается в бюджет времени."""
+        result = _run_python("import app.main")
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        line = next(line for line in reversed(result.stderr.splitlines()) if line.endswith("| app.main"))
+        cumulative = int(line.split("|")[1]) / 1e6
+        self.assertLess(cumulative, IMPORT_TIME_BUDGET)
+
+    def test_app_import_does_not_create_manager(self):
+        """Импорт приложения не создаёт менеджер базы данных и не загружает отложенные модули."""
+        code = (
+            "import sys, app.main, app.celery\n"
+            "from app.db.session import provider\n"
+            "assert provider._manager is None, 'manager created at import'\n"
+            f"loaded = [name for name in {DEFERRED_MODULES!r} if name in sys.modules]\n"
+            "assert not loaded, loaded\n"
+        )
+        result = _run_python(code)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_app_import_without_database_config(self):
+        """Импорт приложения не требует корректной конфигурации базы данных."""
+        result = _run_python("import app.main, app.api.v1.dependencies", DATABASE_URL="")
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+from uuid import UUID, uuid4
+
+from sqlalchemy import select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, User
+from app.db.session.manager import Manager
+from app.services.aggregation.backfill import Checkpoint, Progress, WorkUnit, plan_units, run_backfill
+from app.services.aggregation.exceptions import AggregationServiceException
+
+NOW = datetime(2025, 4, 10, tzinfo=timezone.utc)
+GAP = timedelta(minutes=30)
+
+
+class TestPlanUnits(TestCase):
+    def test_units_cover_users_and_days(self):
+        """Единицы покрывают все дни и всё пространство UUID без пересечений."""
+        units = plan_units(date(2025, 4, 1), date(2025, 4, 10), user_ranges=3, days_per_unit=4)
+
+        self.assertEqual(len(units), 9)
+        self.assertEqual(
+            sorted({(unit.first_day, unit.last_day) for unit in units}),
+            [
+                (date(2025, 4, 1), date(2025, 4, 4)),
+                (date(2025, 4, 5), date(2025, 4, 8)),
+                (date(2025, 4, 9), date(2025, 4, 10)),
+            ],
+        )
+        bounds = [unit.user_bounds() for unit in units[:3]]
+        self.assertIsNone(bounds[0][0])
+        self.assertEqual([high for _, high in bounds[:-1]], [low for low, _ in bounds[1:]])
+        self.assertIsNone(bounds[-1][1])
+
+    def test_empty_range(self):
+        """Пустой диапазон дней вызывает исключение."""
+        with self.assertRaises(AggregationServiceException):
+            plan_units(date(2025, 4, 2), date(2025, 4, 1), user_ranges=1, days_per_unit=1)
+
+
+class TestCheckpointAndProgress(TestCase):
+    def test_checkpoint_roundtrip(self):
+        """Контрольная точка возвращает записанные ключи."""
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = Checkpoint(Path(tmp) / "backfill.checkpoint")
+            self.assertEqual(checkpoint.load(), set())
+            checkpoint.mark("0/2:2025-04-01:2025-04-07")
+            checkpoint.mark("1/2:2025-04-01:2025-04-07")
+            self.assertEqual(checkpoint.load(), {"0/2:2025-04-01:2025-04-07", "1/2:2025-04-01:2025-04-07"})
+
+    def test_eta_uses_current_run_rate(self):
+        """Оценка времени учитывает только единицы, завершённые в этом запуске."""
+        with patch("app.services.aggregation.backfill.time.monotonic", return_value=0.0):
+            progress = Progress(total=10, completed=5)
+        self.assertIsNone(progress.eta())
+
+        progress.advance(users=3, rows=7)
+        with patch("app.services.aggregation.backfill.time.monotonic", return_value=10.0):
+            self.assertEqual(progress.eta(), 40.0)
+            self.assertIn("6/10 units (60.0%), 3 users, 7 rows, ETA 0:00:40", str(progress))
+
+
+class TestRunBackfill(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.database_url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.checkpoint = Checkpoint(Path(self.tmp.name) / "backfill.checkpoint")
+        self.users = [uuid4() for _ in range(6)]
+
+        async def create():
+            manager = Manager(logger=logging.getLogger(__name__), database_url=self.database_url)
+            async with manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with manager.get_session() as session:
+                for index, user_id in enumerate(self.users):
+                    session.add(User(id=user_id, created_at=NOW))
+                    start = datetime(2025, 4, 1 + index, 12, tzinfo=timezone.utc)
+                    session.add_all(
+                        [
+                            AttentionEvent(user_id=user_id, domain="a.com", event_type="active", timestamp=start),
+                            AttentionEvent(
+                                user_id=user_id,
+                                domain="a.com",
+                                event_type="inactive",
+                                timestamp=start + timedelta(minutes=index + 1),
+                            ),
+                        ]
+                    )
+                await session.commit()
+            await manager.get_engine().dispose()
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _summaries(self) -> dict:
+        """Вспомогательный метод чтения сводок пользователь -> (дата, секунды)."""
+
+        async def read():
+            manager = Manager(logger=logging.getLogger(__name__), database_url=self.database_url)
+            async with manager.get_session() as session:
+                rows = (await session.execute(select(DailyDomainSummary))).scalars().all()
+            await manager.get_engine().dispose()
+            return {row.user_id: (row.date, row.total_seconds) for row in rows}
+
+        return self._run_async(read())
+
+    def _backfill(self, units: list[WorkUnit]) -> Progress:
+        """Вспомогательный метод запуска пересчёта на двух процессах."""
+        return run_backfill(self.database_url, units, self.checkpoint, workers=2, max_gap=GAP, now=NOW, batch_rows=2)
+
+    def test_backfill_and_resume(self):
+        """Пересчёт на пуле процессов пишет все сводки, повторный запуск пропускает завершённые единицы."""
+        units = plan_units(date(2025, 4, 1), date(2025, 4, 9), user_ranges=3, days_per_unit=3)
+        skipped = units[0]
+        self.checkpoint.mark(skipped.key)
+
+        progress = self._backfill(units)
+
+        self.assertEqual((progress.completed, progress.total), (9, 9))
+        low, high = skipped.user_bounds()
+        expected = {
+            user_id: (date(2025, 4, 1 + index), (index + 1) * 60)
+            for index, user_id in enumerate(self.users)
+            if not (index < 3 and (low is None or low <= user_id) and (high is None or user_id < high))
+        }
+        self.assertEqual(self._summaries(), expected)
+        self.assertEqual(self.checkpoint.load(), {unit.key for unit in units})
+
+        resumed = self._backfill(units)
+        self.assertEqual((resumed.completed, resumed.rows), (9, 0))
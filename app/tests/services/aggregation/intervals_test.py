@@ -0,0 +1,124 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from app.services.aggregation.intervals import OverlapRule, attribute_overlaps, union_intervals
+
+START = datetime(2025, 4, 5, 10, tzinfo=timezone.utc)
+
+
+def _at(seconds: int) -> datetime:
+    """Вспомогательная функция получения времени через заданное число секунд от START."""
+    return START + timedelta(seconds=seconds)
+
+
+def _length(intervals) -> float:
+    """Вспомогательная функция суммарной длины интервалов в секундах."""
+    return sum((interval[1] - interval[0]).total_seconds() for interval in intervals)
+
+
+def _attributed(segments) -> dict[str, float]:
+    """Вспомогательная функция времени доменов по отрезкам в секундах."""
+    totals: dict[str, float] = defaultdict(float)
+    for begin, end, domain, share in segments:
+        totals[domain] += (end - begin).total_seconds() * share
+    return dict(totals)
+
+
+intervals_strategy = st.lists(
+    st.tuples(st.integers(0, 3600), st.integers(0, 1800), st.sampled_from(("a.com", "b.com", "c.com"))).map(
+        lambda item: (_at(item[0]), _at(item[0] + item[1]), item[2])
+    ),
+    max_size=40,
+)
+rules = st.sampled_from(tuple(OverlapRule))
+
+
+class TestUnionIntervals(TestCase):
+    def test_overlapping_and_touching_merged(self):
+        """Пересекающиеся и соприкасающиеся интервалы объединяются, пустые пропускаются."""
+        intervals = [(_at(10), _at(20)), (_at(0), _at(5)), (_at(15), _at(30)), (_at(30), _at(40)), (_at(50), _at(50))]
+
+        self.assertEqual(union_intervals(intervals), [(_at(0), _at(5)), (_at(10), _at(40))])
+
+    @settings(max_examples=300, deadline=None)
+    @given(intervals_strategy)
+    def test_union_is_disjoint_and_covers_inputs(self, intervals):
+        """Объединение упорядочено, не пересекается и покрывает каждую секунду каждого интервала."""
+        union = union_intervals((begin, end) for begin, end, _ in intervals)
+
+        for previous, following in zip(union, union[1:]):
+            self.assertLess(previous[1], following[0])
+        for begin, end, _ in intervals:
+            if begin < end:
+                self.assertTrue(any(low <= begin and end <= high for low, high in union))
+        self.assertLessEqual(_length(union), _length(interval for interval in intervals if interval[0] < interval[1]))
+
+
+class TestAttributeOverlaps(TestCase):
+    def test_latest_interval_wins(self):
+        """LATEST: время пересечения принадлежит домену интервала, открытого последним."""
+        intervals = [(_at(0), _at(60), "a.com"), (_at(20), _at(40), "b.com")]
+
+        self.assertEqual(_attributed(attribute_overlaps(intervals, OverlapRule.LATEST)), {"a.com": 40, "b.com": 20})
+
+    def test_split_shares_overlap(self):
+        """SPLIT: время пересечения делится поровну между доменами."""
+        intervals = [(_at(0), _at(60), "a.com"), (_at(20), _at(40), "b.com")]
+
+        self.assertEqual(_attributed(attribute_overlaps(intervals, OverlapRule.SPLIT)), {"a.com": 50, "b.com": 10})
+
+    def test_same_domain_counted_once(self):
+        """Пересечение интервалов одного домена учитывается один раз при любом правиле."""
+        intervals = [(_at(0), _at(60), "a.com"), (_at(30), _at(90), "a.com")]
+
+        for rule in OverlapRule:
+            self.assertEqual(_attributed(attribute_overlaps(intervals, rule)), {"a.com": 90})
+
+    @settings(max_examples=300, deadline=None)
+    @given(intervals_strategy, rules)
+    def test_total_equals_union_length(self, intervals, rule):
+        """Время всех доменов вместе равно длине объединения интервалов."""
+        union = union_intervals((begin, end) for begin, end, _ in intervals)
+
+        self.assertAlmostEqual(
+            sum(_attributed(attribute_overlaps(intervals, rule)).values()), _length(union), places=6
+        )
+
+    @settings(max_examples=300, deadline=None)
+    @given(intervals_strategy, rules)
+    def test_domain_bounded_by_own_union(self, intervals, rule):
+        """Время домена не больше объединения его интервалов: пересечения не считаются дважды."""
+        attributed = _attributed(attribute_overlaps(intervals, rule))
+
+        for domain, seconds in attributed.items():
+            own = union_intervals((begin, end) for begin, end, name in intervals if name == domain)
+            self.assertLessEqual(seconds, _length(own) + 1e-6)
+
+    @settings(max_examples=300, deadline=None)
+    @given(intervals_strategy, rules)
+    def test_segments_are_disjoint_in_time(self, intervals, rule):
+        """Отрезки упорядочены по времени, а отрезки с полной долей не пересекаются с другими."""
+        segments = attribute_overlaps(intervals, rule)
+
+        for previous, following in zip(segments, segments[1:]):
+            self.assertLessEqual(previous[0], following[0])
+            if rule == OverlapRule.LATEST:
+                self.assertLessEqual(previous[1], following[0])
+
+    @settings(max_examples=300, deadline=None)
+    @given(st.lists(st.tuples(st.integers(1, 600), st.integers(0, 600), st.sampled_from(("a.com", "b.com")))), rules)
+    def test_disjoint_intervals_unchanged(self, gaps, rule):
+        """Без пересечений время каждого домена равно сумме его интервалов."""
+        intervals, moment = [], 0
+        for length, gap, domain in gaps:
+            intervals.append((_at(moment), _at(moment + length), domain))
+            moment += length + gap
+        expected: dict[str, float] = defaultdict(float)
+        for begin, end, domain in intervals:
+            expected[domain] += (end - begin).total_seconds()
+
+        self.assertEqual(_attributed(attribute_overlaps(intervals, rule)), dict(expected))
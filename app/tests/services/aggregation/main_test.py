@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+from uuid import UUID, uuid4
+
+from sqlalchemy import select, update
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, User
+from app.db.session.manager import Manager
+from app.services.aggregation.exceptions import AggregationServiceException
+from app.services.aggregation.main import AggregationService, shard_of, user_bounds
+
+NOW = datetime(2025, 4, 7, tzinfo=timezone.utc)
+GAP = timedelta(minutes=30)
+
+
+def _user_in_shard(shard: int, shards: int) -> UUID:
+    """Вспомогательная функция подбора пользователя заданного шарда."""
+    while True:
+        user_id = uuid4()
+        if shard_of(user_id, shards) == shard:
+            return user_id
+
+
+class TestAggregationService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.manager = Manager(logger=logging.getLogger(__name__), database_url=url)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self._run_async(self.manager.get_engine().dispose())
+        self.tmp.cleanup()
+
+    def _add_events(self, user_id: UUID, events: list[tuple[datetime, str, str]]) -> None:
+        """Вспомогательный метод добавления пользователя и его событий."""
+
+        async def add():
+            async with self.manager.get_session() as session:
+                if await session.get(User, user_id) is None:
+                    session.add(User(id=user_id, created_at=NOW))
+                session.add_all(
+                    AttentionEvent(user_id=user_id, timestamp=timestamp, domain=domain, event_type=event_type)
+                    for timestamp, domain, event_type in events
+                )
+                await session.commit()
+
+        self._run_async(add())
+
+    def _exec(self, shard: int, shards: int, watermark: int = 0, batch_size: int = 1000, rewind: int = 0):
+        """Вспомогательный метод обработки шарда."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                return await service.exec(shard, shards, watermark, batch_size, rewind=rewind, now=NOW)
+
+        return self._run_async(run())
+
+    def _summaries(self) -> dict:
+        """Вспомогательный метод чтения сводок (пользователь, домен, дата) -> (секунды, переходы)."""
+
+        async def read():
+            async with self.manager.get_session() as session:
+                rows = (await session.execute(select(DailyDomainSummary))).scalars()
+                return {(r.user_id, r.domain, r.date): (r.total_seconds, r.active_count) for r in rows}
+
+        return self._run_async(read())
+
+    def test_shard_processes_only_own_users(self):
+        """Шард пересчитывает сводки только своих пользователей и сдвигает водяной знак."""
+        own, other = _user_in_shard(0, 2), _user_in_shard(1, 2)
+        for user_id in (own, other):
+            self._add_events(
+                user_id,
+                [
+                    (datetime(2025, 4, 5, 10, tzinfo=timezone.utc), "a.com", "active"),
+                    (datetime(2025, 4, 5, 10, 10, tzinfo=timezone.utc), "a.com", "inactive"),
+                ],
+            )
+
+        run = self._exec(0, 2)
+
+        # Водяной знак - последнее событие шарда: события чужого шарда в пакет не попадают
+        self.assertEqual((run.watermark, run.users, run.rows, run.exhausted), (2, 1, 1, True))
+        self.assertEqual(self._summaries(), {(own, "a.com", date(2025, 4, 5)): (600, 1)})
+
+        run = self._exec(1, 2)
+        self.assertEqual((run.watermark, run.users, run.rows), (4, 1, 1))
+
+    def test_batches_and_recompute_are_idempotent(self):
+        """Пакетная обработка и повторный пересчёт дают те же сводки."""
+        user_id = _user_in_shard(0, 1)
+        self._add_events(
+            user_id,
+            [
+                (datetime(2025, 4, 5, 23, 50, tzinfo=timezone.utc), "a.com", "active"),
+                (datetime(2025, 4, 6, 0, 10, tzinfo=timezone.utc), "b.com", "active"),
+                (datetime(2025, 4, 6, 0, 20, tzinfo=timezone.utc), "b.com", "inactive"),
+            ],
+        )
+
+        first = self._exec(0, 1, batch_size=2)
+        second = self._exec(0, 1, watermark=first.watermark, batch_size=2)
+        self.assertEqual((first.watermark, first.exhausted, second.watermark, second.exhausted), (2, False, 3, True))
+        expected = {
+            (user_id, "a.com", date(2025, 4, 5)): (600, 1),
+            (user_id, "a.com", date(2025, 4, 6)): (600, 0),
+            (user_id, "b.com", date(2025, 4, 6)): (600, 1),
+        }
+        self.assertEqual(self._summaries(), expected)
+
+        self._exec(0, 1, watermark=0)
+        self.assertEqual(self._summaries(), expected)
+
+    def test_late_event_updates_existing_day(self):
+        """Позднее событие за прошедший день обновляет его сводку."""
+        user_id = _user_in_shard(0, 1)
+        self._add_events(user_id, [(datetime(2025, 4, 5, 10, tzinfo=timezone.utc), "a.com", "active")])
+        run = self._exec(0, 1)
+        self._add_events(user_id, [(datetime(2025, 4, 5, 10, 5, tzinfo=timezone.utc), "a.com", "inactive")])
+
+        self._exec(0, 1, watermark=run.watermark)
+
+        self.assertEqual(self._summaries(), {(user_id, "a.com", date(2025, 4, 5)): (300, 1)})
+
+    def test_shard_of_matches_bounds(self):
+        """Шард пользователя - диапазон, границы которого проверяются в запросе."""
+        for shards in (1, 3, 8):
+            for user_id in [uuid4() for _ in range(500)] + [UUID(int=0), UUID(int=(1 << 128) - 1)]:
+                low, high = user_bounds(shard_of(user_id, shards), shards)
+                self.assertTrue((low is None or low <= user_id) and (high is None or user_id < high))
+            for shard in range(1, shards):
+                low, _ = user_bounds(shard, shards)
+                self.assertEqual(shard_of(low, shards), shard)
+                self.assertEqual(shard_of(UUID(int=low.int - 1), shards), shard - 1)
+
+    def test_no_new_events(self):
+        """Без новых событий водяной знак не меняется."""
+        run = self._exec(0, 1, watermark=10)
+        self.assertEqual((run.watermark, run.users, run.exhausted), (10, 0, True))
+
+    def test_invalid_shard(self):
+        """Номер шарда вне диапазона вызывает исключение."""
+        service = AggregationService(session=None, max_gap=GAP)
+        with self.assertRaises(AggregationServiceException):
+            self._run_async(service.exec(2, 2, watermark=0, batch_size=10))
+
+    def test_recompute_range_replaces_summaries(self):
+        """Пересчёт диапазона заменяет сводки диапазона и не трогает пользователей вне его."""
+        inside = UUID("0fffffff-ffff-4fff-bfff-ffffffffffff")
+        outside = UUID("ffffffff-ffff-4fff-bfff-ffffffffffff")
+        events = [
+            (datetime(2025, 4, 5, 10, tzinfo=timezone.utc), "a.com", "active"),
+            (datetime(2025, 4, 5, 10, 10, tzinfo=timezone.utc), "a.com", "inactive"),
+        ]
+        self._add_events(inside, events)
+        self._add_events(outside, events)
+
+        async def add_stale():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                await service.save_summaries(
+                    [
+                        {"user_id": user_id, "domain": "stale.com", "date": date(2025, 4, 5)}
+                        | {"total_seconds": 1, "active_count": 1, "generated_at": NOW}
+                        for user_id in (inside, outside)
+                    ]
+                )
+                await session.commit()
+
+        async def recompute():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                return await service.recompute_range(
+                    None,
+                    UUID("8fffffff-ffff-4fff-bfff-ffffffffffff"),
+                    date(2025, 4, 1),
+                    date(2025, 4, 6),
+                    NOW,
+                    batch_rows=1,
+                )
+
+        self._run_async(add_stale())
+        self.assertEqual(self._run_async(recompute()), (1, 1))
+
+        self.assertEqual(
+            self._summaries(),
+            {
+                (inside, "a.com", date(2025, 4, 5)): (600, 1),
+                (outside, "stale.com", date(2025, 4, 5)): (1, 1),
+            },
+        )
+
+    def test_days_follow_user_time_zone(self):
+        """Сводки пользователя с часовым поясом ведутся по местным дням при обработке и полном пересчёте."""
+        user_id = UUID("0aaaaaaa-aaaa-4aaa-baaa-aaaaaaaaaaaa")
+        # 20:00 UTC 5 апреля - 05:00 6 апреля в Токио (UTC+9)
+        self._add_events(
+            user_id,
+            [
+                (datetime(2025, 4, 5, 20, tzinfo=timezone.utc), "a.com", "active"),
+                (datetime(2025, 4, 5, 20, 10, tzinfo=timezone.utc), "a.com", "inactive"),
+            ],
+        )
+
+        async def set_zone():
+            async with self.manager.get_session() as session:
+                await session.execute(update(User).where(User.id == user_id).values(time_zone="Asia/Tokyo"))
+                await session.commit()
+
+        async def recompute():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                return await service.recompute_range(None, None, date(2025, 4, 6), date(2025, 4, 6), NOW, 10)
+
+        self._run_async(set_zone())
+        self._exec(0, 1)
+        expected = {(user_id, "a.com", date(2025, 4, 6)): (600, 1)}
+        self.assertEqual(self._summaries(), expected)
+
+        self.assertEqual(self._run_async(recompute()), (1, 1))
+        self.assertEqual(self._summaries(), expected)
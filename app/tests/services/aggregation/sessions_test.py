@@ -0,0 +1,141 @@
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+
+from app.services.aggregation.intervals import OverlapRule
+from app.services.aggregation.sessions import sessionize
+from app.services.aggregation.timezones import local_calendar
+
+GAP = timedelta(minutes=30)
+WINDOW = (datetime(2025, 4, 5, tzinfo=timezone.utc), datetime(2025, 4, 7, tzinfo=timezone.utc))
+
+
+def _at(day: int, hour: int, minute: int = 0) -> datetime:
+    """Вспомогательная функция построения времени UTC в апреле 2025."""
+    return datetime(2025, 4, day, hour, minute, tzinfo=timezone.utc)
+
+
+def _totals(events, window=WINDOW, gap=GAP) -> dict:
+    """Вспомогательная функция сведения итогов событий одного устройства в словарь (дата, домен) -> (секунды, переходы)."""
+    events = [(*event, None) for event in events]
+    return {key: (value.seconds, value.active_count) for key, value in sessionize(events, *window, gap).items()}
+
+
+class TestSessionize(TestCase):
+    def test_active_inactive_interval(self):
+        """Интервал от active до inactive того же домена."""
+        events = [(_at(5, 10), "a.com", "active"), (_at(5, 10, 20), "a.com", "inactive")]
+        self.assertEqual(_totals(events), {(date(2025, 4, 5), "a.com"): (1200, 1)})
+
+    def test_switch_closes_previous_domain(self):
+        """Переход на другой домен закрывает интервал предыдущего."""
+        events = [
+            (_at(5, 10), "a.com", "active"),
+            (_at(5, 10, 5), "b.com", "active"),
+            (_at(5, 10, 15), "b.com", "inactive"),
+        ]
+        self.assertEqual(
+            _totals(events),
+            {(date(2025, 4, 5), "a.com"): (300, 1), (date(2025, 4, 5), "b.com"): (600, 1)},
+        )
+
+    def test_inactive_of_other_domain_ignored(self):
+        """Событие inactive другого домена не закрывает текущий интервал."""
+        events = [
+            (_at(5, 10), "a.com", "active"),
+            (_at(5, 10, 5), "b.com", "inactive"),
+            (_at(5, 10, 10), "a.com", "inactive"),
+        ]
+        self.assertEqual(_totals(events), {(date(2025, 4, 5), "a.com"): (600, 1)})
+
+    def test_interval_capped_by_max_gap(self):
+        """Интервал без закрывающего события ограничен max_gap."""
+        events = [(_at(5, 10), "a.com", "active"), (_at(5, 12), "b.com", "active")]
+        totals = _totals(events)
+        self.assertEqual(totals[(date(2025, 4, 5), "a.com")], (GAP.total_seconds(), 1))
+        self.assertEqual(totals[(date(2025, 4, 5), "b.com")], (GAP.total_seconds(), 1))
+
+    def test_repeated_active_continues_interval(self):
+        """Повторное active открытого домена в пределах max_gap продолжает интервал без нового перехода."""
+        events = [
+            (_at(5, 10), "a.com", "active"),
+            (_at(5, 10, 20), "a.com", "active"),
+            (_at(5, 10, 40), "a.com", "inactive"),
+            (_at(5, 12), "a.com", "active"),
+            (_at(5, 12, 50), "a.com", "active"),
+        ]
+        self.assertEqual(_totals(events), {(date(2025, 4, 5), "a.com"): (2400 + 1800 + 1800, 3)})
+
+    def test_interval_split_at_midnight(self):
+        """Интервал через полночь UTC делится между днями."""
+        events = [(_at(5, 23, 50), "a.com", "active"), (_at(6, 0, 10), "a.com", "inactive")]
+        self.assertEqual(
+            _totals(events),
+            {(date(2025, 4, 5), "a.com"): (600, 1), (date(2025, 4, 6), "a.com"): (600, 0)},
+        )
+
+    def test_window_clipping(self):
+        """Учитывается только время внутри окна, переходы до окна не считаются."""
+        events = [(_at(4, 23, 50), "a.com", "active"), (_at(5, 0, 10), "a.com", "inactive")]
+        self.assertEqual(_totals(events), {(date(2025, 4, 5), "a.com"): (600, 0)})
+
+    def test_naive_timestamps_are_utc(self):
+        """Время без часового пояса считается временем UTC."""
+        events = [(datetime(2025, 4, 5, 10), "a.com", "active"), (datetime(2025, 4, 5, 10, 1), "a.com", "inactive")]
+        self.assertEqual(_totals(events), {(date(2025, 4, 5), "a.com"): (60, 1)})
+
+    def test_no_events(self):
+        """Без событий итогов нет."""
+        self.assertEqual(_totals([]), {})
+
+    def test_devices_sessionized_separately(self):
+        """Событие одного устройства не закрывает интервал другого, общее время учитывается один раз."""
+        events = [
+            (_at(5, 10), "a.com", "active", "laptop"),
+            (_at(5, 10, 5), "a.com", "active", "desktop"),
+            (_at(5, 10, 10), "a.com", "inactive", "desktop"),
+            (_at(5, 10, 20), "a.com", "inactive", "laptop"),
+        ]
+        totals = sessionize(events, *WINDOW, GAP)
+        self.assertEqual(totals[(date(2025, 4, 5), "a.com")].seconds, 1200)
+        self.assertEqual(totals[(date(2025, 4, 5), "a.com")].active_count, 2)
+
+    def test_device_overlap_attribution(self):
+        """Пересечение интервалов разных доменов распределяется по правилу, сумма - длина объединения."""
+        events = [
+            (_at(5, 10), "a.com", "active", "laptop"),
+            (_at(5, 10, 10), "b.com", "active", "desktop"),
+            (_at(5, 10, 20), "b.com", "inactive", "desktop"),
+            (_at(5, 10, 30), "a.com", "inactive", "laptop"),
+        ]
+        latest = sessionize(events, *WINDOW, GAP, OverlapRule.LATEST)
+        split = sessionize(events, *WINDOW, GAP, OverlapRule.SPLIT)
+        day = date(2025, 4, 5)
+        self.assertEqual((latest[(day, "a.com")].seconds, latest[(day, "b.com")].seconds), (1200, 600))
+        self.assertEqual((split[(day, "a.com")].seconds, split[(day, "b.com")].seconds), (1500, 300))
+
+    def test_local_midnight_splits_days(self):
+        """С календарём часового пояса интервал делится в местную полночь, а переход - в местный день."""
+        # Полночь 6 апреля в Москве (UTC+3) - 21:00 UTC 5 апреля
+        events = [(_at(5, 20, 50), "a.com", "active", None), (_at(5, 21, 10), "a.com", "inactive", None)]
+        calendar = local_calendar("Europe/Moscow", date(2025, 4, 5), date(2025, 4, 6))
+        window = (calendar.day_start(date(2025, 4, 5)), calendar.day_start(date(2025, 4, 7)))
+
+        totals = sessionize(events, *window, GAP, calendar=calendar)
+
+        self.assertEqual(
+            {key: (value.seconds, value.active_count) for key, value in totals.items()},
+            {(date(2025, 4, 5), "a.com"): (600, 1), (date(2025, 4, 6), "a.com"): (600, 0)},
+        )
+
+    def test_dst_day_has_23_hours(self):
+        """В день перевода часов вперёд местные сутки короче: время дня не превышает 23 часов."""
+        calendar = local_calendar("America/New_York", date(2025, 3, 9), date(2025, 3, 9))
+        start, end = calendar.day_start(date(2025, 3, 9)), calendar.day_start(date(2025, 3, 10))
+        # Продление каждые 20 минут с начала местных суток до их конца
+        events = [(start + timedelta(minutes=20 * step), "a.com", "active", None) for step in range(72)]
+        events.append((end, "a.com", "inactive", None))
+
+        totals = sessionize(events, start, end, GAP, calendar=calendar)
+
+        self.assertEqual(totals[(date(2025, 3, 9), "a.com")].seconds, 23 * 3600)
+        self.assertEqual(totals[(date(2025, 3, 9), "a.com")].active_count, 1)
@@ -0,0 +1,104 @@
+import asyncio
+from collections import Counter
+from unittest import TestCase
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.services.aggregation.main import shard_of
+from app.services.aggregation.shards import ShardCoordinator
+
+
+class TestShardCoordinator(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def _coordinator(self) -> ShardCoordinator:
+        """Вспомогательный метод создания координатора с собственным клиентом общего Redis."""
+        return ShardCoordinator(FakeAsyncRedis(server=self.server), lease_ttl=30)
+
+    def setUp(self):
+        self.server = FakeServer()
+
+    def test_lease_is_exclusive(self):
+        """Аренду шарда удерживает один владелец, после освобождения её можно взять снова."""
+
+        async def run():
+            first, second = self._coordinator(), self._coordinator()
+            async with first.lease(0, 4) as lease:
+                self.assertIsNotNone(lease)
+                async with second.lease(0, 4) as busy:
+                    self.assertIsNone(busy)
+                async with second.lease(1, 4) as other:
+                    self.assertIsNotNone(other)
+            async with second.lease(0, 4) as lease:
+                self.assertIsNotNone(lease)
+
+        self._run_async(run())
+
+    def test_watermark_committed_only_by_owner(self):
+        """Водяной знак записывает только действующий владелец аренды."""
+
+        async def run():
+            coordinator = self._coordinator()
+            with self.assertLogs("app.services.aggregation.shards", level="WARNING"):
+                await commit_after_loss(coordinator)
+            self.assertEqual(await coordinator.get_watermark(0, 2), 42)
+
+        async def commit_after_loss(coordinator: ShardCoordinator):
+            async with coordinator.lease(0, 2) as lease:
+                self.assertTrue(await lease.commit(42))
+                self.assertEqual(await lease.watermark(), 42)
+                # Аренда истекла и перешла к другому воркеру
+                await coordinator.client.delete("aggregation:2:0:lease")
+                async with self._coordinator().lease(0, 2) as stolen:
+                    self.assertIsNotNone(stolen)
+                    self.assertFalse(await lease.commit(100))
+
+        self._run_async(run())
+
+    def test_rebalance_starts_from_lowest_watermark(self):
+        """При изменении количества шардов новые шарды начинают с наименьшего прежнего знака."""
+
+        async def run():
+            coordinator = self._coordinator()
+            await coordinator.ensure_topology(2)
+            self.assertEqual(await coordinator.current_shards(), 2)
+            for shard, watermark in ((0, 70), (1, 50)):
+                async with coordinator.lease(shard, 2) as lease:
+                    await lease.commit(watermark)
+
+            await coordinator.ensure_topology(3)
+
+            self.assertEqual(await coordinator.current_shards(), 3)
+            self.assertEqual([await coordinator.get_watermark(shard, 3) for shard in range(3)], [50, 50, 50])
+            self.assertIsNone(await coordinator.client.get("aggregation:2:0:watermark"))
+
+            await coordinator.ensure_topology(3)
+            self.assertEqual(await coordinator.get_watermark(0, 3), 50)
+
+        self._run_async(run())
+
+    def test_partition_change_rebalances(self):
+        """Смена способа разбиения пользователей при том же количестве шардов перебалансирует знаки."""
+
+        async def run():
+            coordinator = self._coordinator()
+            # Топология, записанная до разбиения по диапазонам
+            await coordinator.client.mset(
+                {"aggregation:shards": 2, "aggregation:2:0:watermark": 70, "aggregation:2:1:watermark": 50}
+            )
+
+            await coordinator.ensure_topology(2)
+
+            self.assertEqual(await coordinator.current_shards(), 2)
+            self.assertEqual([await coordinator.get_watermark(shard, 2) for shard in range(2)], [50, 50])
+
+        self._run_async(run())
+
+    def test_shards_are_balanced(self):
+        """Пользователи распределяются по шардам равномерно."""
+        counts = Counter(shard_of(uuid4(), 8) for _ in range(8000))
+        self.assertEqual(set(counts), set(range(8)))
+        self.assertLess(max(counts.values()) / min(counts.values()), 1.3)
@@ -0,0 +1,75 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+from zoneinfo import ZoneInfo
+
+from app.services.aggregation.timezones import is_valid_zone, local_calendar, local_date, offset_table
+
+ZONES = ("UTC", "Europe/Moscow", "America/New_York", "Australia/Lord_Howe", "Asia/Kolkata", "Pacific/Apia")
+
+
+class TestLocalCalendar(TestCase):
+    def test_midnights_match_zoneinfo(self):
+        """Начало каждого местного дня - первый момент, местная дата которого равна дню."""
+        for zone in ZONES:
+            calendar = local_calendar(zone, date(2011, 1, 1), date(2012, 12, 31))
+            info = ZoneInfo(zone)
+            for offset in range(365 * 2):
+                day = date(2011, 1, 1) + timedelta(days=offset)
+                start, end = calendar.day_start(day), calendar.day_start(day + timedelta(days=1))
+                if start == end:
+                    # Pacific/Apia пропустила 30 декабря 2011 года
+                    self.assertEqual((zone, day), ("Pacific/Apia", date(2011, 12, 30)))
+                    continue
+                self.assertEqual(start.astimezone(info).date(), day, (zone, day))
+                self.assertLess((start - timedelta(seconds=1)).astimezone(info).date(), day, (zone, day))
+
+    def test_local_date_matches_zoneinfo(self):
+        """Местная дата по таблице смещений совпадает с astimezone для произвольных моментов."""
+        rng = random.Random(0)
+        start = datetime(2010, 1, 1, tzinfo=timezone.utc)
+        for zone in ZONES:
+            info = ZoneInfo(zone)
+            for _ in range(2000):
+                moment = start + timedelta(seconds=rng.randint(0, 15 * 365 * 86400))
+                self.assertEqual(local_date(zone, moment), moment.astimezone(info).date(), (zone, moment))
+
+    def test_local_dates_of_sorted_moments(self):
+        """Проход слиянием по упорядоченным моментам совпадает с astimezone, в том числе вне календаря."""
+        rng = random.Random(1)
+        start = datetime(2011, 12, 1, tzinfo=timezone.utc)
+        for zone in ZONES:
+            calendar = local_calendar(zone, date(2011, 12, 10), date(2012, 1, 20))
+            moments = sorted(start + timedelta(seconds=rng.randint(0, 80 * 86400)) for _ in range(3000))
+            expected = [moment.astimezone(ZoneInfo(zone)).date() for moment in moments]
+            self.assertEqual(calendar.local_dates(moments), expected, zone)
+        self.assertEqual(calendar.local_dates([]), [])
+
+    def test_dst_days_have_local_length(self):
+        """Дни перевода часов длятся 23 и 25 часов."""
+        calendar = local_calendar("America/New_York", date(2025, 3, 9), date(2025, 11, 2))
+
+        def length(day: date) -> timedelta:
+            return calendar.day_start(day + timedelta(days=1)) - calendar.day_start(day)
+
+        self.assertEqual(length(date(2025, 3, 9)), timedelta(hours=23))
+        self.assertEqual(length(date(2025, 11, 2)), timedelta(hours=25))
+        self.assertEqual(length(date(2025, 6, 1)), timedelta(hours=24))
+
+    def test_midnight_in_dst_gap_starts_at_transition(self):
+        """Если полночь попадает в перевод часов вперёд, день начинается в момент перехода."""
+        # America/Havana переводит часы в 00:00 местного времени
+        calendar = local_calendar("America/Havana", date(2025, 3, 9), date(2025, 3, 9))
+
+        self.assertEqual(calendar.day_start(date(2025, 3, 9)), datetime(2025, 3, 9, 5, tzinfo=timezone.utc))
+
+    def test_offset_table_contains_only_transitions(self):
+        """Таблица смещений хранит только переходы: у зоны без перехода часов одно смещение."""
+        self.assertEqual(len(offset_table("Europe/Moscow", 2020, 2025).offsets), 1)
+        self.assertEqual(len(offset_table("Europe/Berlin", 2025, 2025).offsets), 3)
+
+    def test_is_valid_zone(self):
+        """Проверяются имена базы IANA."""
+        self.assertTrue(is_valid_zone("Europe/Moscow"))
+        self.assertFalse(is_valid_zone("Mars/Olympus"))
+        self.assertFalse(is_valid_zone("../etc/passwd"))
@@ -0,0 +1,82 @@
+import random
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from app.services.blocks.codec import decode_block, encode_block
+from app.services.blocks.exceptions import EventBlocksServiceException
+
+START = datetime(2025, 4, 5, 8, tzinfo=timezone.utc)
+
+
+def _heavy_day(events: int, domains: int = 40, seed: int = 0) -> list[tuple[datetime, str, str, str | None]]:
+    """Вспомогательная функция построения дня активного пользователя."""
+    rng = random.Random(seed)
+    moment = START
+    day = []
+    for _ in range(events):
+        moment += timedelta(seconds=rng.randint(0, 30), microseconds=rng.randint(0, 999) * 1000)
+        day.append(
+            (
+                moment,
+                f"site{rng.randrange(domains)}.example.com",
+                rng.choice(("active", "inactive")),
+                rng.choice(("laptop", "desktop", None)),
+            )
+        )
+    return day
+
+
+class TestBlockCodec(TestCase):
+    def test_round_trip_is_lossless(self):
+        """Блок восстанавливает время с точностью до микросекунды, домены, типы и устройства событий."""
+        events = _heavy_day(2000)
+
+        self.assertEqual(decode_block(encode_block(events)), events)
+
+    def test_events_are_ordered_stably(self):
+        """События упорядочиваются по времени, при равном времени сохраняется исходный порядок."""
+        events = [
+            (START + timedelta(seconds=5), "b.com", "inactive", None),
+            (START, "a.com", "active", None),
+            (START + timedelta(seconds=5), "c.com", "active", None),
+        ]
+
+        decoded = decode_block(encode_block(events))
+
+        self.assertEqual([domain for _, domain, _, _ in decoded], ["a.com", "b.com", "c.com"])
+
+    def test_naive_time_is_utc(self):
+        """Время без часового пояса считается временем UTC."""
+        decoded = decode_block(encode_block([(START.replace(tzinfo=None), "a.com", "active", None)]))
+
+        self.assertEqual(decoded[0][0], START)
+
+    def test_block_is_compact(self):
+        """Событие активного дня занимает в блоке меньше 8 байт (строка attention_events - порядка 100)."""
+        events = _heavy_day(5000)
+
+        self.assertLess(len(encode_block(events)) / len(events), 8)
+
+    def test_empty_and_single_domain_blocks(self):
+        """Пустой блок и блок с одним доменом кодируются и декодируются."""
+        single = [(START + timedelta(minutes=minute), "a.com", "active", None) for minute in range(3)]
+
+        self.assertEqual(decode_block(encode_block([])), [])
+        self.assertEqual(decode_block(encode_block(single)), single)
+
+    def test_version_1_block_has_no_devices(self):
+        """Блок версии 1 (без словаря устройств) читается с устройством None."""
+        data = b"\x01\x01\x00\x01\x05a.com\x00\x00\x01"
+
+        self.assertEqual(decode_block(data), [(datetime(1970, 1, 1, tzinfo=timezone.utc), "a.com", "active", None)])
+
+    def test_invalid_blocks_rejected(self):
+        """Неизвестный тип события, чужая версия и обрезанный блок - исключение сервиса."""
+        data = encode_block(_heavy_day(100))
+
+        with self.assertRaises(EventBlocksServiceException):
+            encode_block([(START, "a.com", "focus", None)])
+        with self.assertRaises(EventBlocksServiceException):
+            decode_block(b"\x03" + data[1:])
+        with self.assertRaises(EventBlocksServiceException):
+            decode_block(data[: len(data) // 2])
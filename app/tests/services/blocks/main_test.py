@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, EventBlock, User
+from app.db.session.manager import Manager
+from app.services.aggregation.main import AggregationService
+from app.services.blocks.main import EventBlocksService
+from app.services.users.main import OrphanUsersService
+
+NOW = datetime(2025, 4, 7, 12, tzinfo=timezone.utc)
+CLOSE_AFTER = timedelta(days=2)
+GAP = timedelta(minutes=30)
+
+# Идентификаторы с буквами: SQLite сравнивает строки из одних цифр как числа
+USER = UUID("0a000000-0000-4000-8000-00000000000a")
+OTHER = UUID("1b000000-0000-4000-8000-00000000000b")
+
+
+def _day(day: int, hour: int, minute: int = 0) -> datetime:
+    """Вспомогательная функция получения времени события апреля 2025 года."""
+    return datetime(2025, 4, day, hour, minute, tzinfo=timezone.utc)
+
+
+EVENTS = [
+    (_day(3, 10), "a.com", "active", None),
+    (_day(3, 10, 10), "b.com", "active", None),
+    (_day(3, 10, 20), "b.com", "inactive", None),
+    (_day(3, 23, 50), "a.com", "active", None),
+    (_day(4, 0, 10), "a.com", "inactive", None),
+    (_day(4, 9), "c.com", "active", None),
+    (_day(7, 9), "a.com", "active", None),
+]
+
+
+class TestEventBlocksService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.manager = Manager(logger=logging.getLogger(__name__), database_url=url)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self._run_async(self.manager.get_engine().dispose())
+        self.tmp.cleanup()
+
+    def _add_events(self, user_id: UUID, events: list[tuple[datetime, str, str, str | None]]) -> None:
+        """Вспомогательный метод добавления пользователя и его событий."""
+
+        async def add():
+            async with self.manager.get_session() as session:
+                if await session.get(User, user_id) is None:
+                    session.add(User(id=user_id, created_at=_day(1, 0)))
+                session.add_all(
+                    AttentionEvent(
+                        user_id=user_id, timestamp=timestamp, domain=domain, event_type=event_type, device_id=device_id
+                    )
+                    for timestamp, domain, event_type, device_id in events
+                )
+                await session.commit()
+
+        self._run_async(add())
+
+    def _compact(self, summaries: bool = False, batch_size: int = 100, max_days: int = 31):
+        """Вспомогательный метод сжатия одного пакета пользователей."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                aggregation = AggregationService(session, max_gap=GAP) if summaries else None
+                service = EventBlocksService(session)
+                return await service.exec(CLOSE_AFTER, batch_size, summaries=aggregation, now=NOW, max_days=max_days)
+
+        return self._run_async(run())
+
+    def _count(self, model) -> int:
+        """Вспомогательный метод подсчёта строк таблицы."""
+
+        async def count():
+            async with self.manager.get_session() as session:
+                return await session.scalar(select(func.count()).select_from(model))
+
+        return self._run_async(count())
+
+    def _summaries(self) -> set[tuple]:
+        """Вспомогательный метод чтения сводок без времени генерации."""
+
+        async def load():
+            async with self.manager.get_session() as session:
+                result = await session.execute(
+                    select(
+                        DailyDomainSummary.user_id,
+                        DailyDomainSummary.domain,
+                        DailyDomainSummary.date,
+                        DailyDomainSummary.total_seconds,
+                        DailyDomainSummary.active_count,
+                    )
+                )
+                return set(result.tuples())
+
+        return self._run_async(load())
+
+    def _aggregate(self, user_id: UUID) -> None:
+        """Вспомогательный метод пересчёта сводок пользователя за апрель."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                await service.aggregate_user(user_id, date(2025, 4, 1), date(2025, 4, 7), NOW)
+                await session.commit()
+
+        self._run_async(run())
+
+    def _recompute(self) -> tuple[int, int]:
+        """Вспомогательный метод полного пересчёта сводок за апрель."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                service = AggregationService(session, max_gap=GAP)
+                return await service.recompute_range(None, None, date(2025, 4, 1), date(2025, 4, 7), NOW, 100)
+
+        return self._run_async(run())
+
+    def test_closed_days_move_into_blocks(self):
+        """Тест сжатия закрытых дней: строки заменяются блоками, открытые дни остаются строками."""
+        self._add_events(USER, EVENTS)
+
+        batch = self._compact()
+
+        self.assertEqual((batch.users, batch.blocks, batch.events, batch.exhausted), (1, 2, 6, True))
+        self.assertEqual(self._count(EventBlock), 2)
+        self.assertEqual(self._count(AttentionEvent), 1)
+
+        async def load():
+            async with self.manager.get_session() as session:
+                return await EventBlocksService(session).load_events(USER, _day(3, 0), _day(8, 0))
+
+        self.assertEqual(self._run_async(load()), EVENTS[:-1])
+        self.assertEqual(self._compact().users, 0)
+
+    def test_long_history_compacted_over_batches(self):
+        """Тест сжатия не больше max_days дней пользователя за пакет: пакеты продолжаются до последнего дня."""
+        self._add_events(USER, EVENTS)
+
+        first = self._compact(batch_size=100, max_days=1)
+
+        self.assertEqual((first.users, first.blocks, first.events, first.exhausted), (1, 1, 4, False))
+        self.assertEqual(self._count(AttentionEvent), 3)
+
+        second = self._compact(batch_size=100, max_days=1)
+
+        self.assertEqual((second.users, second.blocks, second.events, second.exhausted), (1, 1, 2, False))
+        self.assertEqual(self._compact(batch_size=100, max_days=1).users, 0)
+        self.assertEqual(self._count(EventBlock), 2)
+        self.assertEqual(self._count(AttentionEvent), 1)
+
+    def test_late_event_merges_into_existing_block(self):
+        """Тест объединения события, пришедшего после сжатия, с блоком его дня."""
+        self._add_events(USER, EVENTS)
+        self._compact()
+        self._add_events(USER, [(_day(3, 12), "d.com", "active", None)])
+
+        batch = self._compact()
+
+        self.assertEqual((batch.blocks, batch.events), (1, 5))
+        self.assertEqual(self._count(EventBlock), 2)
+
+        async def load():
+            async with self.manager.get_session() as session:
+                return await EventBlocksService(session).load_events(USER, _day(3, 0), _day(4, 0))
+
+        self.assertEqual(
+            [domain for _, domain, _, _ in self._run_async(load())], ["a.com", "b.com", "b.com", "d.com", "a.com"]
+        )
+
+    def test_summaries_survive_compaction(self):
+        """Тест совпадения сводок по строкам и по блокам при пересчёте пользователя и диапазона."""
+        self._add_events(USER, EVENTS)
+        self._add_events(OTHER, [(_day(2, 8), "a.com", "active", None), (_day(2, 8, 5), "b.com", "active", None)])
+        self._aggregate(USER)
+        self._aggregate(OTHER)
+        expected = self._summaries()
+
+        self._compact()
+        self._aggregate(USER)
+        self._aggregate(OTHER)
+        self.assertEqual(self._summaries(), expected)
+
+        # OTHER остался только в блоках: пересчёт диапазона не должен его потерять
+        self.assertEqual(self._recompute(), (2, len(expected)))
+        self.assertEqual(self._summaries(), expected)
+
+    def test_compaction_recomputes_summaries_of_compacted_days(self):
+        """Тест пересчёта сводок сжатых дней в транзакции сжатия."""
+        self._add_events(USER, EVENTS)
+        self._aggregate(USER)
+        self._add_events(USER, [(_day(3, 12), "d.com", "active", None)])
+
+        self._compact(summaries=True)
+
+        domains = {(domain, day) for _, domain, day, _, _ in self._summaries()}
+        self.assertIn(("d.com", date(2025, 4, 3)), domains)
+
+    def test_orphan_collection_counts_block_events(self):
+        """Тест учёта событий блоков при поиске и удалении брошенных анонимных пользователей."""
+        self._add_events(USER, EVENTS[:-1])
+        self._add_events(OTHER, [(_day(2, 8), "a.com", "active", None)])
+        self._compact()
+
+        async def run():
+            async with self.manager.get_session() as session:
+                service = OrphanUsersService(session)
+                orphans, _, _ = await service.find_orphans(None, 10, cutoff=_day(6, 0), max_events=2)
+                self.assertEqual(await service.purge(orphans, cutoff=_day(6, 0), max_events=2), len(orphans))
+                await session.commit()
+                return orphans
+
+        self.assertEqual(self._run_async(run()), [OTHER])
+        self.assertEqual(self._count(EventBlock), 2)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+from uuid import UUID
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, EventBlock, User
+from app.db.session.manager import Manager
+from app.services.blocks.codec import encode_block
+from app.services.blocks.main import EventBlocksService
+from app.services.events.browse import EventsBrowseService, decode_cursor, encode_cursor
+from app.services.events.exceptions import EventsBrowseInvalidCursorException
+
+# Идентификаторы с буквами: SQLite сравнивает строки из одних цифр как числа
+USER = UUID("0a000000-0000-4000-8000-00000000000a")
+OTHER = UUID("1b000000-0000-4000-8000-00000000000b")
+
+
+def _day(day: int, hour: int, minute: int = 0) -> datetime:
+    """Вспомогательная функция получения времени события апреля 2025 года."""
+    return datetime(2025, 4, day, hour, minute, tzinfo=timezone.utc)
+
+
+# Сжатые дни: 3 и 4 апреля
+BLOCKS = {
+    date(2025, 4, 3): [
+        (_day(3, 10), "a.com", "active", None),
+        (_day(3, 10, 10), "b.com", "active", "laptop"),
+        (_day(3, 10, 10), "b.com", "inactive", "laptop"),
+    ],
+    date(2025, 4, 4): [(_day(4, 9), "c.com", "active", None)],
+}
+# Строки: позднее событие сжатого дня с тем же временем, что и в блоке, и события открытых дней
+ROWS = [
+    (_day(3, 10, 10), "a.com", "inactive", None),
+    (_day(5, 8), "a.com", "active", None),
+    (_day(5, 8), "b.com", "active", "laptop"),
+    (_day(6, 12), "c.com", "inactive", None),
+    (_day(6, 13), "a.com", "active", None),
+]
+
+
+class TestEventsBrowseService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.manager = Manager(logger=logging.getLogger(__name__), database_url=url)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with self.manager.get_session() as session:
+                session.add_all([User(id=USER, created_at=_day(1, 0)), User(id=OTHER, created_at=_day(1, 0))])
+                await session.flush()
+                session.add_all(
+                    EventBlock(user_id=USER, date=day, event_count=len(events), data=encode_block(events))
+                    for day, events in BLOCKS.items()
+                )
+                session.add_all(
+                    AttentionEvent(
+                        user_id=user_id, timestamp=timestamp, domain=domain, event_type=kind, device_id=device
+                    )
+                    for user_id in (USER, OTHER)
+                    for timestamp, domain, kind, device in ROWS
+                )
+                await session.commit()
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self._run_async(self.manager.get_engine().dispose())
+        self.tmp.cleanup()
+
+    def _page(self, cursor: str | None, limit: int, **filters):
+        """Вспомогательный метод получения страницы событий пользователя."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                return await EventsBrowseService(session).exec(USER, cursor, limit, **filters)
+
+        return self._run_async(run())
+
+    def _all_pages(self, limit: int, **filters) -> tuple[list, int]:
+        """Вспомогательный метод обхода всех страниц по курсорам."""
+        events, pages, cursor = [], 0, None
+        while True:
+            page = self._page(cursor, limit, **filters)
+            events.extend(page.events)
+            pages += 1
+            self.assertLessEqual(len(page.events), limit)
+            if page.next_cursor is None:
+                return events, pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_rows_and_blocks_newest_first(self):
+        """Страницы содержат строки и события блоков от новых к старым без пропусков и повторов."""
+        expected = sorted(
+            [(event, 0, index) for events in BLOCKS.values() for index, event in enumerate(events)]
+            + [(event, 1, index) for index, event in enumerate(ROWS)],
+            key=lambda item: (item[0][0], item[1], item[2]),
+            reverse=True,
+        )
+
+        for limit in (1, 2, 3, 9, 50):
+            events, pages = self._all_pages(limit)
+            self.assertEqual(events, [event for event, _, _ in expected], limit)
+            self.assertEqual(pages, max(-(-len(expected) // limit), 1))
+
+    def test_blocks_loaded_incrementally(self):
+        """Блоки читаются небольшими порциями до заполнения страницы, а не страницей блоков целиком."""
+        calls = []
+        load_latest = EventBlocksService.load_latest
+
+        async def counted(service, user_id, last_day, limit, first_day=None):
+            days = await load_latest(service, user_id, last_day, limit, first_day)
+            calls.append((limit, first_day, len(days)))
+            return days
+
+        async def add_blocks():
+            async with self.manager.get_session() as session:
+                session.add_all(
+                    EventBlock(
+                        user_id=USER,
+                        date=date(2025, 3, day),
+                        event_count=2,
+                        data=encode_block([(_day(3, 9), "a.com", "active", None)] * 2),
+                    )
+                    for day in range(1, 31)
+                )
+                await session.commit()
+
+        self._run_async(add_blocks())
+        with patch.object(EventBlocksService, "load_latest", counted):
+            # Строк не хватает на страницу: из 32 блоков читаются порции 1, 2, 4 блока
+            page = self._page(self._page(None, 5).next_cursor, 5)
+            self.assertEqual(len(page.events), 5)
+            self.assertEqual([limit for limit, _, _ in calls], [1, 2, 1, 2, 4])
+
+            # Полная страница строк: блоки дней раньше последней строки не читаются
+            calls.clear()
+            self._page(None, 2)
+            self.assertEqual(calls, [(1, date(2025, 4, 5), 0)])
+
+    def test_filters(self):
+        """Фильтры по домену и типу применяются к строкам и событиям блоков."""
+        events, _ = self._all_pages(2, domain="a.com", event_type="active")
+
+        self.assertEqual([event[0] for event in events], [_day(6, 13), _day(5, 8), _day(3, 10)])
+
+    def test_last_page_has_no_cursor(self):
+        """Страница, на которой закончились события, не содержит курсора."""
+        page = self._page(None, 100)
+
+        self.assertEqual(len(page.events), len(ROWS) + sum(len(events) for events in BLOCKS.values()))
+        self.assertIsNone(page.next_cursor)
+
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        """Курсор восстанавливает ключ, а повреждённый курсор вызывает исключение."""
+        key = (_day(5, 8, 0), 1, 42)
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+
+        for cursor in ("not a cursor", encode_cursor(key)[:-3], "MTox", "LTE6Mzo0Mg"):
+            with self.assertRaises(EventsBrowseInvalidCursorException):
+                decode_cursor(cursor)
+
+    def test_brin_index_only_in_postgresql(self):
+        """В PostgreSQL индекс страниц покрывающий, а BRIN по времени в SQLite не создаётся."""
+        statements = {
+            index.name: str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+            for index in AttentionEvent.__table__.indexes
+        }
+
+        async def sqlite_indexes():
+            async with self.manager.get_engine().connect() as connection:
+                return await connection.run_sync(
+                    lambda sync: {index["name"] for index in inspect(sync).get_indexes("attention_events")}
+                )
+
+        self.assertIn(
+            "(user_id, timestamp, id) INCLUDE (domain, event_type, device_id)",
+            statements["ix_attention_events_user_timestamp_id"],
+        )
+        self.assertIn("USING brin (timestamp)", statements["ix_attention_events_timestamp_brin"])
+        self.assertEqual(self._run_async(sqlite_indexes()), {"ix_attention_events_user_timestamp_id"})
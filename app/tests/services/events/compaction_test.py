@@ -0,0 +1,119 @@
+import random
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from app.schemas.events.send_events_request_schema import SendEventData
+from app.services.aggregation.sessions import sessionize
+from app.services.events.compaction import CompactionPolicy
+
+GAP = timedelta(minutes=30)
+START = datetime(2025, 4, 5, 10, tzinfo=timezone.utc)
+
+
+def _event(minute: float, domain: str, event_type: str = "active") -> SendEventData:
+    """Вспомогательная функция построения события через заданное число минут от START."""
+    return SendEventData(event=event_type, domain=domain, timestamp=START + timedelta(minutes=minute))
+
+
+def _rows(events: list[SendEventData]) -> list[tuple]:
+    """Вспомогательная функция приведения событий к виду (время, домен, тип, устройство)."""
+    return [(event.timestamp, event.domain, event.event, None) for event in events]
+
+
+def _totals(events: list[tuple]) -> dict:
+    """Вспомогательная функция сведения итогов в словарь (дата, домен) -> (секунды, переходы)."""
+    window = (START - timedelta(days=1), START + timedelta(days=1))
+    return {key: (value.seconds, value.active_count) for key, value in sessionize(events, *window, GAP).items()}
+
+
+class TestCompactionPolicy(TestCase):
+    def setUp(self):
+        self.policy = CompactionPolicy(enabled=True, max_gap=GAP, merge_gap=timedelta(0))
+
+    def test_repeated_active_dropped(self):
+        """Повторные active домена внутри max_gap отбрасываются, последнее событие пачки сохраняется."""
+        events = [_event(0, "a.com"), _event(1, "a.com"), _event(2, "a.com"), _event(3, "a.com"), _event(4, "b.com")]
+
+        batch = self.policy.compact(events)
+
+        self.assertEqual(batch.events, [events[0], events[4]])
+        self.assertEqual(batch.dropped, {"repeat": 3})
+
+    def test_repeated_active_kept_as_heartbeat(self):
+        """Повторное active сохраняется, если без него интервал оборвался бы по max_gap."""
+        events = [_event(0, "a.com"), _event(20, "a.com"), _event(40, "a.com", "inactive")]
+
+        batch = self.policy.compact(events)
+
+        self.assertEqual(batch.events, events)
+        self.assertEqual(_totals(_rows(batch.events)), _totals(_rows(events)))
+
+    def test_duplicates_and_noop_inactive_dropped(self):
+        """Точные повторы и inactive закрытого или чужого домена отбрасываются."""
+        events = [
+            _event(0, "a.com"),
+            _event(0, "a.com"),
+            _event(1, "b.com", "inactive"),
+            _event(2, "a.com", "inactive"),
+            _event(2, "a.com", "inactive"),
+        ]
+
+        batch = self.policy.compact(events)
+
+        self.assertEqual(batch.events, [events[0], events[3]])
+        self.assertEqual(batch.dropped, {"duplicate": 2, "noop": 1})
+
+    def test_unknown_state_keeps_first_inactive(self):
+        """Первое inactive пачки сохраняется: интервал мог открыться в предыдущей пачке."""
+        events = [_event(0, "a.com", "inactive"), _event(1, "a.com", "inactive"), _event(2, "b.com", "inactive")]
+
+        batch = self.policy.compact(events)
+
+        self.assertEqual(batch.events, [events[0], events[2]])
+
+    def test_batch_sorted_by_time(self):
+        """События упорядочиваются по времени до сжатия."""
+        events = [_event(5, "a.com", "inactive"), _event(0, "a.com")]
+
+        self.assertEqual(self.policy.compact(events).events, [events[1], events[0]])
+
+    def test_flicker_merged_only_with_merge_gap(self):
+        """Короткий уход с домена объединяется только при ненулевом merge_gap."""
+        events = [_event(0, "a.com"), _event(5, "a.com", "inactive"), _event(5.05, "a.com"), _event(10, "b.com")]
+        merging = CompactionPolicy(enabled=True, max_gap=GAP, merge_gap=timedelta(seconds=5))
+
+        self.assertEqual(self.policy.compact(events).events, events)
+        batch = merging.compact(events)
+        self.assertEqual(batch.events, [events[0], events[3]])
+        self.assertEqual(batch.dropped, {"flicker": 1, "repeat": 1})
+
+    def test_disabled_policy_keeps_batch(self):
+        """Выключенное сжатие сохраняет пачку без изменений."""
+        events = [_event(0, "a.com"), _event(0, "a.com")]
+        policy = CompactionPolicy(enabled=False, max_gap=GAP, merge_gap=timedelta(0))
+
+        self.assertEqual(policy.compact(events).events, events)
+
+    def test_totals_unchanged_for_random_batches(self):
+        """Итоги агрегации совпадают для исходных и сжатых пачек между произвольными соседними пачками."""
+        rng = random.Random(0)
+
+        def batch(offset: float) -> list[SendEventData]:
+            return [
+                _event(
+                    offset + rng.choice((0, rng.randint(0, 50))),
+                    rng.choice(("a.com", "b.com", "c.com")),
+                    rng.choice(("active", "active", "inactive")),
+                )
+                for _ in range(rng.randint(1, 12))
+            ]
+
+        for _ in range(500):
+            before, current, after = (sorted(batch(offset), key=lambda e: e.timestamp) for offset in (0, 60, 120))
+            compacted = self.policy.compact(current).events
+
+            self.assertLessEqual(len(compacted), len(current))
+            self.assertEqual(
+                _totals(_rows(before + compacted + after)),
+                _totals(_rows(before + current + after)),
+            )
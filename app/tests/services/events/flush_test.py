@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from app.services.events.flush import FlushAdvice, FlushPolicy
+
+
+class TestFlushPolicy(TestCase):
+    def setUp(self):
+        self.policy = FlushPolicy(interval=(10.0, 120.0), batch=(20, 500), jitter=(0.1, 0.5))
+
+    def test_idle_service_advises_small_frequent_batches(self):
+        """Без нагрузки - короткий интервал, малые пачки и узкое отклонение."""
+        self.assertEqual(self.policy.advise(0.0), FlushAdvice(interval=10.0, max_batch=20, jitter=1.0))
+
+    def test_hot_service_spreads_and_enlarges_batches(self):
+        """При полной нагрузке интервал и отклонение растут, пачка ограничена схемой запроса."""
+        self.assertEqual(self.policy.advise(1.0), FlushAdvice(interval=120.0, max_batch=100, jitter=60.0))
+
+    def test_load_is_interpolated_and_clamped(self):
+        """Промежуточная нагрузка интерполируется, нагрузка вне [0, 1] ограничивается."""
+        self.assertEqual(self.policy.advise(0.5), FlushAdvice(interval=65.0, max_batch=60, jitter=19.5))
+        self.assertEqual(self.policy.advise(3.0), self.policy.advise(1.0))
+        self.assertEqual(self.policy.advise(-1.0), self.policy.advise(0.0))
@@ -20,6 +20,8 @@ class TestEventsService(TestCase):
         self.logger = Mock()
         self.database_url = "sqlite+aiosqlite:///:memory:"
         self.session = AsyncMock()
+        # add_all у AsyncSession синхронный: вызов AsyncMock вернул бы неожидаемую корутину
+        self.session.add_all = Mock()
         self.user_id: UUID = uuid4()
         self.valid_event_data = SendEventData(event="active", domain="example.com", timestamp="2025-04-05T10:00:00Z")
         self.valid_payload = SendEventsRequestSchema(data=[self.valid_event_data])
@@ -130,6 +132,16 @@ class TestEventsService(TestCase):
         self.assertEqual(event.domain, "example.com")
         self.assertEqual(event.event_type, "active")
 
+    @patch("app.services.events.main.observe_compaction")
+    def test_exec_compacts_batch(self, mock_observe):
+        """Перед сохранением пачка сжимается, отброшенные события учитываются в метриках."""
+        payload = SendEventsRequestSchema(data=[self.valid_event_data] * 3)
+
+        self._run_async(EventsService(self.session).exec(payload, self.user_id))
+
+        self.assertEqual(len(self.session.add_all.call_args[0][0]), 1)
+        mock_observe.assert_called_once_with({"duplicate": 2})
+
     def test_events_service_real_db_flow(self):
         """Полный цикл: создание пользователя, сохранение событий, проверка в БД."""
         manager = Manager(logger=self.logger, database_url=self.database_url)
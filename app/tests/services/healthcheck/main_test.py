@@ -0,0 +1,145 @@
+import asyncio
+import os
+import tempfile
+from logging import Logger
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from app.db.session.manager import Manager
+from app.services.healthcheck.main import HealthProber, HealthStatus
+from app.services.healthcheck.probes import database_probe
+
+
+class TestHealthProber(TestCase):
+    """Тесты для HealthProber."""
+
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def test_report_unavailable_before_first_probe(self):
+        """До первой проверки сервис не готов."""
+        prober = HealthProber(probes={})
+        self.assertEqual(prober.report().status, HealthStatus.UNAVAILABLE)
+
+    def test_all_probes_healthy(self):
+        """Все проверки успешны - состояние ok, результаты содержат латентность и время."""
+
+        async def ok():
+            return {"version": "16"}
+
+        prober = HealthProber(probes={"database": ok, "redis": ok})
+        self._run_async(prober.probe_once())
+
+        report = prober.report()
+        self.assertEqual(report.status, HealthStatus.OK)
+        self.assertEqual(set(report.checks), {"database", "redis"})
+        self.assertTrue(report.checks["database"].healthy)
+        self.assertEqual(report.payload["checks"]["database"]["details"], {"version": "16"})
+        self.assertGreaterEqual(report.payload["checks"]["redis"]["latency_ms"], 0)
+
+    def test_failed_and_timed_out_probes(self):
+        """Ошибка или таймаут проверки делают сервис недоступным."""
+
+        async def failing():
+            raise ConnectionError("refused")
+
+        async def hanging():
+            await asyncio.sleep(10)
+
+        prober = HealthProber(probes={"redis": failing, "broker": hanging}, timeout=0.01)
+        with patch("app.services.healthcheck.main.logger"):
+            self._run_async(prober.probe_once())
+
+        report = prober.report()
+        self.assertEqual(report.status, HealthStatus.UNAVAILABLE)
+        self.assertEqual(report.checks["redis"].error, "ConnectionError: refused")
+        self.assertEqual(report.checks["broker"].error, "timeout")
+
+    def test_degraded_probe(self):
+        """Проверка с признаком деградации переводит сервис в состояние degraded."""
+
+        async def saturated():
+            return {"saturation": 1.0, "degraded": True}
+
+        prober = HealthProber(probes={"database": saturated})
+        self._run_async(prober.probe_once())
+
+        report = prober.report()
+        self.assertEqual(report.status, HealthStatus.DEGRADED)
+        self.assertNotIn("degraded", report.checks["database"].details)
+
+    def test_stale_results_are_unavailable(self):
+        """Устаревшие результаты не считаются подтверждением готовности."""
+
+        async def ok():
+            return None
+
+        prober = HealthProber(probes={"database": ok}, stale_after=0.0)
+        self._run_async(prober.probe_once())
+
+        self.assertEqual(prober.report().status, HealthStatus.UNAVAILABLE)
+
+    def test_background_loop_updates_report(self):
+        """Фоновая задача выполняет проверки без участия запросов."""
+        calls = []
+
+        async def ok():
+            calls.append(1)
+
+        async def _test():
+            prober = HealthProber(probes={"database": ok}, interval=0.01)
+            prober.start()
+            await asyncio.sleep(0.05)
+            await prober.stop()
+            return prober.report()
+
+        report = self._run_async(_test())
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(report.status, HealthStatus.OK)
+
+    def test_database_probe_reports_pool_state(self):
+        """Проверка базы данных выполняет запрос на каждом шарде и возвращает состояние их пулов."""
+        with tempfile.TemporaryDirectory() as directory:
+            shards = {
+                name: Manager(
+                    logger=Mock(spec=Logger), database_url=f"sqlite+aiosqlite:///{os.path.join(directory, name)}.db"
+                )
+                for name in ("a", "b")
+            }
+
+            async def _test():
+                details = await database_probe(lambda: shards)()
+                for manager in shards.values():
+                    await manager.get_engine().dispose()
+                return details
+
+            details = self._run_async(_test())
+
+        self.assertEqual(set(details["shards"]), {"a", "b"})
+        self.assertEqual(details["shards"]["b"]["checked_out"], 0)
+        self.assertEqual(details["shards"]["b"]["saturation"], 0.0)
+        self.assertFalse(details["degraded"])
+
+    def test_database_probe_fails_on_any_shard(self):
+        """Недоступность одного шарда делает проверку базы данных неуспешной."""
+        with tempfile.TemporaryDirectory() as directory:
+            healthy = Manager(
+                logger=Mock(spec=Logger), database_url=f"sqlite+aiosqlite:///{os.path.join(directory, 'a.db')}"
+            )
+            broken = Manager(
+                logger=Mock(spec=Logger),
+                database_url=f"sqlite+aiosqlite:///{os.path.join(directory, 'missing', 'b.db')}",
+            )
+            prober = HealthProber(probes={"database": database_probe(lambda: {"a": healthy, "b": broken})})
+
+            async def _test():
+                report = await prober.probe_once()
+                await healthy.get_engine().dispose()
+                return report
+
+            report = self._run_async(_test())
+
+        self.assertEqual(report.status, HealthStatus.UNAVAILABLE)
+        self.assertIn("b (", report.checks["database"].error)
+        self.assertNotIn("a (", report.checks["database"].error)
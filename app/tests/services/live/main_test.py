@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest import TestCase
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.schemas.events.send_events_request_schema import SendEventData
+from app.services.live.main import LocalBroker, RedisBroker, build_delta, event_stream, merge_delta
+
+
+def _event(event: str, domain: str, minute: int) -> SendEventData:
+    """Вспомогательная функция создания события."""
+    return SendEventData(event=event, domain=domain, timestamp=datetime(2025, 4, 5, 10, minute, tzinfo=timezone.utc))
+
+
+class TestDelta(TestCase):
+    def test_build_delta_keeps_last_event(self):
+        """По каждому домену остаётся последнее событие пачки и количество событий."""
+        delta = build_delta(
+            [_event("active", "a.com", 5), _event("inactive", "a.com", 1), _event("active", "b.com", 2)]
+        )
+
+        self.assertEqual(delta["a.com"], {"event": "active", "timestamp": "2025-04-05T10:05:00+00:00", "events": 2})
+        self.assertEqual(delta["b.com"]["events"], 1)
+
+    def test_merge_delta_accumulates(self):
+        """Слияние оставляет более позднее событие и суммирует количество."""
+        pending = build_delta([_event("active", "a.com", 1)])
+
+        merge_delta(pending, build_delta([_event("inactive", "a.com", 3), _event("active", "b.com", 2)]))
+
+        self.assertEqual(pending["a.com"]["event"], "inactive")
+        self.assertEqual(pending["a.com"]["events"], 2)
+        self.assertEqual(set(pending), {"a.com", "b.com"})
+
+
+class TestLocalBroker(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def test_updates_coalesce_between_reads(self):
+        """Изменения между чтениями подписки сливаются в одно, подписчики других пользователей их не получают."""
+
+        async def run():
+            broker = LocalBroker()
+            user_id = uuid4()
+            async with broker.subscribe(user_id) as subscription, broker.subscribe(uuid4()) as other:
+                await broker.publish(user_id, build_delta([_event("active", "a.com", 1)]))
+                await broker.publish(user_id, build_delta([_event("active", "a.com", 2)]))
+                return await subscription.next(timeout=0.1), await other.next(timeout=0.01), broker.connections
+
+        delta, other, connections = self._run_async(run())
+        self.assertEqual(delta["a.com"]["events"], 2)
+        self.assertIsNone(other)
+        self.assertEqual(connections, 2)
+
+    def test_unsubscribe_releases_user(self):
+        """После выхода последнего подписчика пользователь не хранится в брокере."""
+
+        async def run():
+            broker = LocalBroker(max_connections=1)
+            user_id = uuid4()
+            async with broker.subscribe(user_id):
+                available = broker.available()
+            return available, broker.available(), broker.has_subscribers(user_id)
+
+        self.assertEqual(self._run_async(run()), (False, True, False))
+
+    def test_event_stream_caps_rate(self):
+        """Поток отправляет объединённые изменения не чаще интервала и комментарии без изменений."""
+
+        async def run():
+            broker = LocalBroker()
+            user_id = uuid4()
+            stream = event_stream(broker, user_id, heartbeat=0.05, min_interval=0.1)
+            messages = [await anext(stream)]
+            await broker.publish(user_id, build_delta([_event("active", "a.com", 1)]))
+            messages.append(await anext(stream))
+            for minute in range(2, 5):
+                await broker.publish(user_id, build_delta([_event("active", "a.com", minute)]))
+            messages.append(await anext(stream))
+            messages.append(await anext(stream))
+            await stream.aclose()
+            return messages, broker.connections
+
+        messages, connections = self._run_async(run())
+        self.assertEqual(messages[0], b"retry: 50\n\n")
+        self.assertTrue(messages[1].startswith(b"event: usage\ndata: "))
+        self.assertIn(b'"events":3', messages[2])
+        self.assertEqual(messages[3], b": ping\n\n")
+        self.assertEqual(connections, 0)
+
+
+class TestRedisBroker(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def test_update_reaches_other_worker(self):
+        """Изменение, принятое одним воркером, получает подписчик другого воркера."""
+
+        async def run():
+            server = FakeServer()
+            publisher = RedisBroker(FakeAsyncRedis(server=server))
+            subscriber = RedisBroker(FakeAsyncRedis(server=server))
+            user_id = uuid4()
+            try:
+                async with subscriber.subscribe(user_id) as subscription:
+                    await publisher.publish(user_id, build_delta([_event("active", "a.com", 1)]))
+                    return await subscription.next(timeout=2)
+            finally:
+                await publisher.close()
+                await subscriber.close()
+
+        delta = self._run_async(run())
+        self.assertEqual(delta["a.com"]["event"], "active")
+
+    def test_listener_starts_after_slow_subscribe(self):
+        """Чтение запускается после подписки и переживает сообщение, которое не удалось разобрать."""
+
+        async def run():
+            server = FakeServer()
+            publisher = RedisBroker(FakeAsyncRedis(server=server))
+            subscriber = RedisBroker(FakeAsyncRedis(server=server))
+            pubsub = subscriber.client.pubsub(ignore_subscribe_messages=True)
+            connect = pubsub.subscribe
+
+            async def slow_subscribe(*channels):
+                # Установка соединения pub/sub занимает время
+                await asyncio.sleep(0.1)
+                await connect(*channels)
+
+            pubsub.subscribe = slow_subscribe
+            subscriber._pubsub = pubsub
+            user_id = uuid4()
+            try:
+                async with subscriber.subscribe(user_id) as subscription:
+                    await publisher.client.publish(f"live:{user_id}", b"not json")
+                    await publisher.publish(user_id, build_delta([_event("active", "a.com", 1)]))
+                    delta = await subscription.next(timeout=3)
+                    self.assertFalse(subscriber._listener.done())
+                    return delta
+            finally:
+                await publisher.close()
+                await subscriber.close()
+
+        delta = self._run_async(run())
+        self.assertEqual(delta["a.com"]["event"], "active")
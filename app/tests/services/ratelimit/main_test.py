@@ -0,0 +1,133 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from app.services.ratelimit.main import (
+    FLEET_TIER,
+    LOCAL_TIER,
+    LocalTokenBucketLimiter,
+    RateLimiter,
+    RedisTokenBucketLimiter,
+)
+
+
+class FakeClock:
+    """Управляемые часы для тестов."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLocalTokenBucketLimiter(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = LocalTokenBucketLimiter(rate=2.0, capacity=4.0, clock=self.clock)
+
+    def test_burst_then_refill(self):
+        """Всплеск ограничен ёмкостью, после паузы корзина пополняется со скоростью rate."""
+        key = uuid4()
+        self.assertTrue(all(self.limiter.acquire(key).allowed for _ in range(4)))
+
+        decision = self.limiter.acquire(key)
+        self.assertFalse(decision.allowed)
+        self.assertEqual((decision.tier, decision.retry_after), (LOCAL_TIER, 0.5))
+
+        self.clock.now = 0.5
+        self.assertTrue(self.limiter.acquire(key).allowed)
+        self.assertFalse(self.limiter.acquire(key).allowed)
+
+    def test_keys_are_isolated(self):
+        """Исчерпание корзины одного пользователя не влияет на других."""
+        noisy, quiet = uuid4(), uuid4()
+        self.limiter.acquire(noisy, cost=4)
+        self.assertFalse(self.limiter.acquire(noisy).allowed)
+        self.assertTrue(self.limiter.acquire(quiet).allowed)
+
+    def test_newly_limited_only_on_transition(self):
+        """Попадание под ограничение отмечается только для первого отклонённого запроса."""
+        key = uuid4()
+        self.limiter.acquire(key, cost=4)
+        self.assertTrue(self.limiter.acquire(key).newly_limited)
+        self.assertFalse(self.limiter.acquire(key).newly_limited)
+
+        self.clock.now = 10.0
+        self.assertTrue(self.limiter.acquire(key, cost=4).allowed)
+        self.assertTrue(self.limiter.acquire(key).newly_limited)
+
+    def test_cost_above_capacity_is_clamped(self):
+        """Стоимость больше ёмкости списывается как полная корзина и не блокирует ключ навсегда."""
+        key = uuid4()
+        self.assertTrue(self.limiter.acquire(key, cost=10).allowed)
+        self.assertEqual(self.limiter.acquire(key, cost=10).retry_after, 2.0)
+
+    def test_least_recent_key_evicted(self):
+        """При превышении max_keys вытесняется дольше всех не обращавшийся ключ."""
+        limiter = LocalTokenBucketLimiter(rate=1.0, capacity=1.0, max_keys=2, clock=self.clock)
+        first, second, third = uuid4(), uuid4(), uuid4()
+        limiter.acquire(first)
+        limiter.acquire(second)
+        limiter.acquire(first)
+        limiter.acquire(third)
+
+        self.assertEqual(len(limiter), 2)
+        self.assertTrue(limiter.acquire(second).allowed)
+        self.assertFalse(limiter.acquire(third).allowed)
+
+
+class TestRedisTokenBucketLimiter(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def test_fleet_bucket_shared_between_limiters(self):
+        """Корзина в Redis общая для ограничителей разных воркеров."""
+
+        async def run():
+            client = FakeAsyncRedis()
+            workers = [RedisTokenBucketLimiter(client, rate=0.001, capacity=3) for _ in range(2)]
+            key = uuid4()
+            decisions = [await workers[i % 2].acquire(key) for i in range(5)]
+            ttl = await client.pttl(f"ratelimit:{key}")
+            return decisions, ttl
+
+        decisions, ttl = self._run_async(run())
+
+        self.assertEqual([decision.allowed for decision in decisions], [True, True, True, False, False])
+        self.assertEqual([decision.newly_limited for decision in decisions[3:]], [True, False])
+        self.assertEqual(decisions[3].tier, FLEET_TIER)
+        self.assertGreater(decisions[3].retry_after, 900)
+        self.assertGreater(ttl, 0)
+
+
+class TestRateLimiter(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    @patch("app.services.ratelimit.main.observe_rate_limit")
+    def test_local_rejection_skips_fleet(self, mock_observe):
+        """Запрос, отклонённый воркером, не обращается к Redis."""
+        fleet = Mock(acquire=AsyncMock())
+        limiter = RateLimiter(LocalTokenBucketLimiter(rate=1.0, capacity=1.0), fleet)
+        key = uuid4()
+
+        self.assertTrue(self._run_async(limiter.acquire(key)).allowed)
+        self.assertFalse(self._run_async(limiter.acquire(key)).allowed)
+
+        fleet.acquire.assert_awaited_once()
+        mock_observe.assert_called_once_with(LOCAL_TIER, True)
+
+    def test_fleet_failure_allows_request(self):
+        """Недоступность Redis не останавливает приём событий."""
+        fleet = Mock(acquire=AsyncMock(side_effect=ConnectionError("down")))
+        limiter = RateLimiter(LocalTokenBucketLimiter(rate=1.0, capacity=1.0), fleet)
+
+        with self.assertLogs("app.services.ratelimit.main", level="WARNING"):
+            self.assertTrue(self._run_async(limiter.acquire(uuid4())).allowed)
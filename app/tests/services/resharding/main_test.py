@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+from uuid import uuid4
+
+from sqlalchemy import func, select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, User
+from app.db.session.sharding import HashRing, ShardedManager, fan_out
+from app.services.resharding.main import ReshardingService
+
+NOW = datetime(2025, 4, 5, 10, tzinfo=timezone.utc)
+
+
+class TestReshardingService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        urls = {
+            f"s{index}": f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, f's{index}.db')}" for index in range(3)
+        }
+        self.old = ShardedManager(
+            logger=logging.getLogger(__name__), shards={name: urls[name] for name in ("s0", "s1")}
+        )
+        self.new = ShardedManager(logger=logging.getLogger(__name__), shards=urls)
+        self.users = [uuid4() for _ in range(40)]
+
+        async def create(_, manager):
+            async with manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        async def populate():
+            await fan_out(self.new.shards, create)
+            for user_id in self.users:
+                async with self.old.get_session(user_id=user_id) as session:
+                    session.add(User(id=user_id, created_at=NOW))
+                    await session.flush()
+                    session.add_all(
+                        AttentionEvent(
+                            user_id=user_id,
+                            domain="a.com",
+                            event_type="active",
+                            timestamp=NOW + timedelta(minutes=minute),
+                        )
+                        for minute in range(3)
+                    )
+                    session.add(
+                        DailyDomainSummary(
+                            user_id=user_id,
+                            domain="a.com",
+                            date=date(2025, 4, 5),
+                            total_seconds=120,
+                            active_count=3,
+                            generated_at=NOW,
+                        )
+                    )
+                    await session.commit()
+
+        self._run_async(populate())
+
+    def tearDown(self):
+        async def dispose(_, manager):
+            await manager.get_engine().dispose()
+
+        self._run_async(fan_out(self.old.shards, dispose))
+        self._run_async(fan_out(self.new.shards, dispose))
+        self.tmp.cleanup()
+
+    def _migrate(self, source: str, batch_size: int = 7) -> dict[str, int]:
+        """Вспомогательный метод переноса пользователей шарда до исчерпания."""
+
+        async def run():
+            service = ReshardingService(source, self.new.shards, self.new.ring)
+            cursor, moved = None, {}
+            while True:
+                batch = await service.exec(cursor, batch_size)
+                cursor = batch.cursor
+                for target, count in batch.moved.items():
+                    moved[target] = moved.get(target, 0) + count
+                if batch.exhausted:
+                    return moved
+
+        return self._run_async(run())
+
+    def _placement(self) -> dict[str, tuple[set, int, int]]:
+        """Вспомогательный метод получения пользователей, количества событий и сводок по шардам."""
+
+        async def read(_, manager):
+            async with manager.get_session() as session:
+                return (
+                    set((await session.execute(select(User.id))).scalars()),
+                    await session.scalar(select(func.count(AttentionEvent.id))),
+                    await session.scalar(select(func.count(DailyDomainSummary.id))),
+                )
+
+        return self._run_async(fan_out(self.new.shards, read))
+
+    def test_users_move_to_new_owner(self):
+        """После переноса каждый пользователь со всеми данными хранится только в шарде новой карты."""
+        moved = {}
+        for source in ("s0", "s1"):
+            for target, count in self._migrate(source).items():
+                moved[target] = moved.get(target, 0) + count
+
+        placement = self._placement()
+        self.assertEqual(set(moved), {"s2"})
+        for shard, (users, events, summaries) in placement.items():
+            self.assertEqual(users, {user for user in self.users if self.new.ring.shard_for(user) == shard})
+            self.assertEqual((events, summaries), (3 * len(users), len(users)))
+
+    def test_repeated_copy_does_not_duplicate(self):
+        """Повторное копирование после сбоя до удаления из источника не дублирует события и сводки."""
+        ring = HashRing(["s0", "s1", "s2"])
+        moving = [
+            user for user in self.users if self.old.ring.shard_for(user) == "s0" and ring.shard_for(user) == "s2"
+        ]
+        service = ReshardingService("s0", self.new.shards, self.new.ring)
+
+        self._run_async(service.copy("s2", moving))
+        self._migrate("s0")
+
+        _, events, summaries = self._placement()["s2"]
+        self.assertEqual((events, summaries), (3 * len(moving), len(moving)))
+
+    def test_copy_fills_bare_user_row(self):
+        """Строка пользователя, созданная приёмом событий в шарде назначения, получает учётные данные источника."""
+        ring = HashRing(["s0", "s1", "s2"])
+        user_id = next(
+            user for user in self.users if self.old.ring.shard_for(user) == "s0" and ring.shard_for(user) == "s2"
+        )
+
+        async def run():
+            async with self.old.get_session(user_id=user_id) as session:
+                user = await session.get(User, user_id)
+                user.email, user.password, user.time_zone = "user@example.com", "hash", "Europe/Moscow"
+                await session.commit()
+            async with self.new.shards["s2"].get_session() as session:
+                # Приём событий по новой карте до переноса: пользователь без учётных данных и новое событие
+                session.add(User(id=user_id, created_at=NOW + timedelta(days=1)))
+                await session.flush()
+                session.add(
+                    AttentionEvent(
+                        user_id=user_id, domain="b.com", event_type="active", timestamp=NOW + timedelta(days=1)
+                    )
+                )
+                await session.commit()
+
+            # Части по два события: три события источника копируются двумя запросами
+            await ReshardingService("s0", self.new.shards, self.new.ring, chunk_size=2).copy("s2", [user_id])
+
+            async with self.new.shards["s2"].get_session() as session:
+                user = await session.get(User, user_id)
+                events = await session.scalar(
+                    select(func.count(AttentionEvent.id)).where(AttentionEvent.user_id == user_id)
+                )
+                return user.email, user.password, user.time_zone, user.created_at.replace(tzinfo=timezone.utc), events
+
+        self.assertEqual(self._run_async(run()), ("user@example.com", "hash", "Europe/Moscow", NOW, 4))
+
+    def test_dry_run_changes_nothing(self):
+        """Пробный запуск только подсчитывает переносимых пользователей."""
+        before = self._placement()
+
+        async def run():
+            return await ReshardingService("s0", self.new.shards, self.new.ring).exec(None, 100, dry_run=True)
+
+        batch = self._run_async(run())
+        self.assertTrue(batch.exhausted)
+        self.assertEqual(self._placement(), before)
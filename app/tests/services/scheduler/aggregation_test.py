@@ -0,0 +1,114 @@
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+from uuid import uuid4
+
+from fakeredis import FakeAsyncRedis
+from sqlalchemy import func, select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, User
+from app.db.session import provider
+from app.services.aggregation.main import shard_of
+from app.services.aggregation.shards import ShardCoordinator
+from app.services.scheduler.aggregation import aggregate_shard, dispatch_shards, recompute_user
+from app.services.scheduler.main import CeleryConfigurator
+from app.services.scheduler.runtime import runtime
+
+
+class TestAggregationTasks(TestCase):
+    def setUp(self):
+        self.app = CeleryConfigurator(url="memory://").exec()
+        self.app.conf.result_backend = "cache+memory://"
+        self.tmp = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.coordinator = ShardCoordinator(FakeAsyncRedis(), lease_ttl=30)
+        patches = [
+            patch("app.db.session.provider.DATABASE_URL", database_url),
+            patch("app.services.scheduler.aggregation.get_coordinator", return_value=self.coordinator),
+        ]
+        for item in patches:
+            item.start()
+            self.addCleanup(item.stop)
+        runtime.run(self._create_schema())
+
+    def tearDown(self):
+        runtime.shutdown()
+        self.tmp.cleanup()
+
+    async def _create_schema(self):
+        """Вспомогательный метод создания таблиц и событий одного пользователя."""
+        async with provider.get_manager().get_engine().begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        user_id = self.user_id = uuid4()
+        async with provider.get_manager().get_session() as session:
+            session.add(User(id=user_id, created_at=datetime.now(timezone.utc)))
+            session.add_all(
+                [
+                    AttentionEvent(
+                        user_id=user_id,
+                        domain="a.com",
+                        event_type="active",
+                        timestamp=datetime(2025, 4, 5, 10, tzinfo=timezone.utc),
+                    ),
+                    AttentionEvent(
+                        user_id=user_id,
+                        domain="a.com",
+                        event_type="inactive",
+                        timestamp=datetime(2025, 4, 5, 10, 10, tzinfo=timezone.utc),
+                    ),
+                ]
+            )
+            await session.commit()
+
+    async def _summaries_count(self) -> int:
+        """Вспомогательный метод подсчёта строк сводки."""
+        async with provider.get_manager().get_session() as session:
+            return (await session.execute(select(func.count()).select_from(DailyDomainSummary))).scalar()
+
+    def test_dispatch_emits_task_per_shard(self):
+        """Задача beat ставит по задаче на каждый шард и фиксирует топологию."""
+        with patch.object(aggregate_shard, "apply_async") as apply_async:
+            self.assertEqual(dispatch_shards.apply(args=(4,)).result, 4)
+
+        self.assertEqual(
+            [call.kwargs["args"] for call in apply_async.call_args_list], [(i, 4, "default") for i in range(4)]
+        )
+        self.assertEqual(runtime.run(self.coordinator.current_shards()), 4)
+
+    def test_shard_aggregates_and_commits_watermark(self):
+        """Шард агрегирует новые события и сдвигает водяной знак."""
+        runtime.run(self.coordinator.ensure_topology(1))
+
+        result = aggregate_shard.apply(args=(0, 1)).result
+
+        self.assertEqual(result, {"status": "done", "users": 1, "rows": 1, "watermark": 2})
+        self.assertEqual(runtime.run(self.coordinator.get_watermark(0, 1)), 2)
+        self.assertEqual(runtime.run(self._summaries_count()), 1)
+
+    def test_stale_and_busy_shards_skipped(self):
+        """Задача устаревшей топологии и задача занятого шарда пропускаются."""
+        runtime.run(self.coordinator.ensure_topology(2))
+        self.assertEqual(aggregate_shard.apply(args=(0, 1)).result, {"status": "stale"})
+
+        lock = self.coordinator.client.lock("aggregation:2:0:lease", timeout=30)
+        self.assertTrue(runtime.run(lock.acquire(blocking=False)))
+        self.assertEqual(aggregate_shard.apply(args=(0, 2)).result, {"status": "busy"})
+
+    def test_recompute_user_runs_under_shard_lease(self):
+        """Пересчёт сводок пользователя выполняется под арендой шарда, занятый шард откладывает задачу."""
+        runtime.run(self.coordinator.ensure_topology(2))
+        shard = shard_of(self.user_id, 2)
+        lock = self.coordinator.client.lock(f"aggregation:2:{shard}:lease", timeout=30)
+        self.assertTrue(runtime.run(lock.acquire(blocking=False)))
+
+        with patch.object(recompute_user, "apply_async") as apply_async:
+            self.assertEqual(recompute_user.apply(args=(str(self.user_id),)).result, {"status": "busy"})
+        self.assertEqual(apply_async.call_args.kwargs["args"], (str(self.user_id),))
+        self.assertEqual(runtime.run(self._summaries_count()), 0)
+
+        runtime.run(lock.release())
+        self.assertEqual(recompute_user.apply(args=(str(self.user_id),)).result, {"status": "done", "rows": 1})
+        self.assertEqual(runtime.run(self._summaries_count()), 1)
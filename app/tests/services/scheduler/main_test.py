@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from celery.app.trace import reset_worker_optimizations
+from celery.result import _set_task_join_will_block
+
+from app.services.scheduler.main import DEFAULT_QUEUE, CeleryConfigurator, find_queue
+
+
+class TestCeleryConfigurator(TestCase):
+    def setUp(self):
+        self.configurator = CeleryConfigurator(url="memory://")
+        self.app = self.configurator.exec()
+
+    def tearDown(self):
+        # Создание воркера переводит процесс в режим воркера, как и в celery.contrib.testing
+        reset_worker_optimizations(self.app)
+        _set_task_join_will_block(False)
+
+    def _route(self, task_name: str) -> dict:
+        """Вспомогательный метод получения маршрута задачи."""
+        return self.app.amqp.router.route({}, task_name)
+
+    def test_tasks_routed_by_name(self):
+        """Задачи направляются в очереди по шаблонам имён, остальные - в очередь по умолчанию."""
+        self.assertEqual(self._route("app.services.scheduler.aggregation.run")["queue"].name, "aggregation")
+        self.assertEqual(self._route("app.services.scheduler.maintenance.cleanup")["queue"].name, "maintenance")
+        self.assertEqual(self._route("app.other.task")["queue"].name, DEFAULT_QUEUE)
+
+    def test_compression_per_queue(self):
+        """Сообщения очередей с большими нагрузками сжимаются."""
+        self.assertEqual(self._route("app.services.scheduler.aggregation.run")["compression"], "zlib")
+        self.assertNotIn("compression", self._route("app.services.scheduler.maintenance.cleanup"))
+
+    def test_task_attributes_from_queue(self):
+        """acks_late берётся из очереди задачи, результаты по умолчанию не хранятся."""
+
+        @self.app.task(name="app.services.scheduler.aggregation.run")
+        def aggregate():
+            return None
+
+        @self.app.task(name="app.other.task")
+        def other():
+            return None
+
+        @self.app.task(name="app.services.scheduler.maintenance.report", ignore_result=False)
+        def report():
+            return None
+
+        self.assertTrue(aggregate.acks_late)
+        self.assertFalse(other.acks_late)
+        self.assertTrue(aggregate.ignore_result)
+        self.assertFalse(report.ignore_result)
+        self.assertTrue(self.app.conf.task_reject_on_worker_lost)
+
+    def _worker(self, **kwargs):
+        """Вспомогательный метод создания воркера без запуска."""
+        self.app.conf.result_backend = "cache+memory://"
+        return self.app.WorkController(pool_cls="solo", hostname="test@localhost", **kwargs)
+
+    def test_prefetch_from_selected_queues(self):
+        """Множитель предвыборки воркера - наименьший среди обслуживаемых очередей."""
+        default = find_queue("app.other.task")
+
+        self.assertEqual(
+            self._worker(queues=[DEFAULT_QUEUE]).consumer.prefetch_multiplier, default.prefetch_multiplier
+        )
+        self.assertEqual(self._worker(queues=[DEFAULT_QUEUE, "aggregation"]).consumer.prefetch_multiplier, 1)
+
+    def test_explicit_prefetch_not_overridden(self):
+        """Явно заданный --prefetch-multiplier не переопределяется."""
+        worker = self._worker(queues=[DEFAULT_QUEUE], prefetch_multiplier=2)
+
+        self.assertEqual(worker.consumer.prefetch_multiplier, 2)
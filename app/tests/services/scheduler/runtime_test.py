@@ -0,0 +1,93 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from app.db.session import provider
+from app.services.scheduler.main import CeleryConfigurator
+from app.services.scheduler.runtime import AsyncTask, runtime
+
+
+@patch("app.db.session.provider.DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+class TestAsyncTask(TestCase):
+    def setUp(self):
+        self.app = CeleryConfigurator(url="memory://").exec()
+        self.app.conf.result_backend = "cache+memory://"
+
+    def tearDown(self):
+        runtime.shutdown()
+
+    def test_celery_app_uses_async_task(self):
+        """Приложение Celery использует AsyncTask как базовый класс задач."""
+
+        @self.app.task
+        def noop():
+            return None
+
+        self.assertIsInstance(noop, AsyncTask)
+
+    def test_async_body_reuses_loop_and_manager(self):
+        """Асинхронные задачи выполняются в одном цикле событий с одним менеджером."""
+
+        @self.app.task(bind=True)
+        async def select_one(self):
+            async with self.manager.get_session() as session:
+                value = (await session.execute(text("SELECT 1"))).scalar()
+            return id(asyncio.get_running_loop()), id(self.manager), value
+
+        first = select_one.apply().get()
+        second = select_one.apply().get()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first[2], 1)
+
+    def test_request_context_available_in_async_body(self):
+        """Контекст запроса задачи доступен в асинхронном теле."""
+
+        @self.app.task(bind=True)
+        async def task_id(self):
+            await asyncio.sleep(0)
+            return self.request.id
+
+        self.assertEqual(task_id.apply(task_id="task-42").get(), "task-42")
+
+    def test_sync_body_unchanged(self):
+        """Синхронные задачи выполняются без цикла событий."""
+
+        @self.app.task
+        def add(x, y):
+            return x + y
+
+        self.assertEqual(add.apply(args=(2, 3)).get(), 5)
+        self.assertIsNone(runtime._loop)
+
+    def test_shutdown_disposes_manager_and_loop(self):
+        """Завершение процесса закрывает пул соединений и цикл событий."""
+
+        @self.app.task
+        async def touch():
+            provider.get_manager()
+
+        touch.apply()
+        loop = runtime.loop
+        runtime.shutdown()
+
+        self.assertTrue(loop.is_closed())
+        self.assertIsNone(provider._manager)
+        self.assertIsNone(runtime._loop)
+
+    def test_reset_after_fork_drops_inherited_state(self):
+        """После fork унаследованные цикл событий и менеджер отбрасываются."""
+
+        @self.app.task
+        async def touch():
+            return id(provider.get_manager())
+
+        manager_id = touch.apply().get()
+        loop = runtime.loop
+        runtime.reset_after_fork()
+
+        self.assertIsNot(runtime.loop, loop)
+        self.assertNotEqual(touch.apply().get(), manager_id)
+        loop.close()
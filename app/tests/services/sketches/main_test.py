@@ -0,0 +1,109 @@
+import asyncio
+from datetime import date, datetime, timezone
+from unittest import TestCase
+from unittest.mock import AsyncMock
+from uuid import UUID, uuid4
+
+from fakeredis import FakeAsyncRedis
+
+from app.schemas.events.send_events_request_schema import SendEventData
+from app.services.sketches.main import LocalSketchStore, RedisSketchStore, SketchRecorder
+
+DAY = date(2025, 4, 5)
+
+
+def _events(*domains: str, day: int = 5) -> list[SendEventData]:
+    """Вспомогательная функция создания переходов на домены."""
+    timestamp = datetime(2025, 4, day, 10, tzinfo=timezone.utc)
+    return [SendEventData(event="active", domain=domain, timestamp=timestamp) for domain in domains]
+
+
+class SketchStoreTestMixin:
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def _store(self):
+        """Вспомогательный метод создания хранилища."""
+        raise NotImplementedError
+
+    def test_queries(self):
+        """Оценки пользователей доменов, доменов пользователя и самых посещаемых доменов."""
+        users = [UUID(f"{index:08x}-0000-4000-8000-00000000000a") for index in range(5)]
+
+        async def run():
+            store = self._store()
+            recorder = SketchRecorder(store, max_pending=1_000_000)
+            for index, user_id in enumerate(users):
+                recorder.record(user_id, _events("a.com", "a.com", *(["b.com"] * index)))
+            recorder.record(users[0], _events("a.com", "c.com", day=6))
+            await recorder.flush()
+            result = (
+                await store.distinct_users("a.com", [DAY, date(2025, 4, 6)]),
+                await store.distinct_users("b.com", [DAY]),
+                await store.distinct_domains(users[4], DAY),
+                await store.distinct_domains(users[4], date(2025, 4, 6)),
+                await store.top_domains([DAY, date(2025, 4, 6)], 2),
+            )
+            await store.close()
+            return result
+
+        self.assertEqual(self._run_async(run()), (5, 4, 2, 0, [("a.com", 11), ("b.com", 10)]))
+
+
+class TestLocalSketchStore(SketchStoreTestMixin, TestCase):
+    def _store(self):
+        return LocalSketchStore(top_capacity=10, cms_width=512, precision=10)
+
+    def test_old_days_expire(self):
+        """Оценки дней старше срока хранения удаляются."""
+
+        async def run():
+            store = LocalSketchStore(retention_days=2)
+            recorder = SketchRecorder(store)
+            recorder.record(uuid4(), _events("a.com", day=1))
+            await recorder.flush()
+            recorder.record(uuid4(), _events("a.com", day=5))
+            await recorder.flush()
+            return await store.distinct_users("a.com", [date(2025, 4, 1)])
+
+        self.assertEqual(self._run_async(run()), 0)
+
+
+class TestRedisSketchStore(SketchStoreTestMixin, TestCase):
+    def _store(self):
+        return RedisSketchStore(FakeAsyncRedis(), top_capacity=10, cms_width=512)
+
+
+class TestSketchRecorder(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def test_failed_flush_drops_updates(self):
+        """Изменения, которые не удалось применить, отбрасываются: память воркера ограничена."""
+        store = AsyncMock()
+        store.apply.side_effect = ConnectionError("down")
+        recorder = SketchRecorder(store)
+
+        async def run():
+            recorder.record(uuid4(), _events("a.com"))
+            await recorder.flush()
+            await recorder.flush()
+
+        self._run_async(run())
+        self.assertEqual(store.apply.await_count, 1)
+
+    def test_full_batch_flushes_early(self):
+        """При накоплении max_pending ключей изменения применяются до истечения интервала."""
+        store = AsyncMock()
+
+        async def run():
+            recorder = SketchRecorder(store, interval=60, max_pending=3)
+            recorder.start()
+            recorder.record(uuid4(), _events("a.com", "b.com"))
+            await asyncio.sleep(0.05)
+            await recorder.stop()
+
+        self._run_async(run())
+        self.assertEqual(store.apply.await_count, 1)
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from app.services.sketches.structures import CountMinSketch, HeavyHitters, HyperLogLog
+
+
+class TestHyperLogLog(TestCase):
+    def test_count_within_error(self):
+        """Оценка количества различных значений укладывается в несколько стандартных ошибок."""
+        sketch = HyperLogLog(precision=12)
+        for value in range(20_000):
+            sketch.add(f"user-{value}")
+            sketch.add(f"user-{value}")
+
+        self.assertAlmostEqual(sketch.count(), 20_000, delta=20_000 * 0.05)
+
+    def test_small_counts_are_exact(self):
+        """Малые количества оцениваются подсчётом пустых регистров практически точно."""
+        sketch = HyperLogLog(precision=8)
+        for domain in ("a.com", "b.com", "c.com", "a.com"):
+            sketch.add(domain)
+
+        self.assertEqual(sketch.count(), 3)
+
+    def test_merge_is_union(self):
+        """Объединение оценок оценивает объединение множеств."""
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(3000):
+            first.add(str(value))
+        for value in range(2000, 5000):
+            second.add(str(value))
+
+        first.merge(second)
+
+        self.assertAlmostEqual(first.count(), 5000, delta=250)
+
+
+class TestCountMinSketch(TestCase):
+    def test_estimate_never_underestimates(self):
+        """Оценка частоты не меньше точной, а точная для редких коллизий."""
+        sketch = CountMinSketch(width=256, depth=4)
+        counts = {f"domain-{index}.com": index + 1 for index in range(500)}
+        for key, count in counts.items():
+            sketch.add(key, count)
+
+        for key, count in counts.items():
+            self.assertGreaterEqual(sketch.estimate(key), count)
+        self.assertEqual(CountMinSketch().add("a.com", 3), 3)
+
+
+class TestHeavyHitters(TestCase):
+    def test_keeps_most_frequent(self):
+        """Хранятся только наиболее частые значения, вытесняется значение с наименьшей оценкой."""
+        top = HeavyHitters(capacity=2)
+        top.offer("a.com", 5)
+        top.offer("b.com", 1)
+        top.offer("c.com", 3)
+        top.offer("b.com", 2)
+        top.offer("a.com", 6)
+
+        self.assertEqual(top.top(5), [("a.com", 6), ("c.com", 3)])
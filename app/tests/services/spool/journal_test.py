@@ -0,0 +1,137 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from app.services.spool.exceptions import SpoolLockedException, SpoolServiceException
+from app.services.spool.journal import HEADER, RECORD, SpoolJournal
+
+
+class TestSpoolJournal(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = Path(self.tmp.name) / "ingest.spool"
+
+    def _open(self, capacity=4096):
+        """Вспомогательный метод открытия журнала с закрытием после теста."""
+        journal = SpoolJournal(self.path, capacity)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_records_survive_reopen(self):
+        """Записи и смещение воспроизведения сохраняются в файле."""
+        journal = self._open()
+        for payload in (b"first", b"second", b"third"):
+            journal.append(payload)
+        payloads, position = journal.read(limit=1)
+        journal.commit(position)
+        journal.close()
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.read(limit=10)[0], [b"second", b"third"])
+        self.assertEqual(len(reopened), len(journal))
+
+    def test_torn_record_is_discarded(self):
+        """Запись с неверной контрольной суммой и последующие не читаются и перезаписываются."""
+        journal = self._open()
+        journal.append(b"intact")
+        torn_at = journal.tail.offset
+        journal.append(b"torn")
+        journal.append(b"after")
+        journal.close()
+        with open(self.path, "r+b") as file:
+            file.seek(torn_at + RECORD.size)
+            file.write(b"x")
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.read(limit=10)[0], [b"intact"])
+        reopened.append(b"new")
+        self.assertEqual(reopened.read(limit=10)[0], [b"intact", b"new"])
+
+    def test_drained_journal_restarts_from_beginning(self):
+        """Полностью воспроизведённый журнал начинается с начала файла."""
+        journal = self._open(capacity=HEADER.size + 64)
+        journal.append(b"a" * 20)
+        with self.assertRaises(SpoolServiceException):
+            journal.append(b"b" * 30)
+
+        journal.commit(journal.read(limit=10)[1])
+
+        self.assertEqual(len(journal), 0)
+        journal.append(b"b" * 30)
+        self.assertEqual(journal.read(limit=10)[0], [b"b" * 30])
+
+    def test_partial_drain_frees_space(self):
+        """Место воспроизведённых записей используется снова без полного опустошения журнала."""
+        record = RECORD.size + 20
+        # Остаток в конце кольца меньше заголовка записи и с записью-переходом
+        for gap in (10, RECORD.size + 5):
+            with self.subTest(gap=gap):
+                self.path.unlink(missing_ok=True)
+                journal = SpoolJournal(self.path, HEADER.size + 4 * record + gap)
+                for i in range(4):
+                    journal.append(bytes([i]) * 20)
+                with self.assertRaises(SpoolServiceException):
+                    journal.append(b"x" * 20)
+
+                # Постоянный поток: на каждую воспроизведённую запись приходит новая
+                expected = [bytes([i]) * 20 for i in range(4)]
+                for i in range(4, 20):
+                    payloads, position = journal.read(limit=1)
+                    self.assertEqual(payloads, [expected.pop(0)])
+                    journal.commit(position)
+                    journal.append(bytes([i]) * 20)
+                    expected.append(bytes([i]) * 20)
+                journal.close()
+
+                reopened = SpoolJournal(self.path, 0)
+                self.assertEqual(reopened.read(limit=10)[0], expected)
+                reopened.close()
+
+    def test_stale_records_after_reset_are_not_replayed(self):
+        """Целые записи прошлого круга за концом данных не читаются после опустошения журнала."""
+        journal = self._open()
+        for payload in (b"old-1", b"old-2", b"old-3"):
+            journal.append(payload)
+        journal.commit(journal.read(limit=10)[1])
+        journal.append(b"new")
+        journal.close()
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.read(limit=10)[0], [b"new"])
+
+    def test_records_of_previous_open_after_torn_record_are_not_replayed(self):
+        """Запись прошлого открытия за перезаписанной оборванной записью не читается."""
+        journal = self._open()
+        journal.append(b"intact")
+        torn_at = journal.tail.offset
+        journal.append(b"torn")
+        journal.append(b"kept")
+        journal.close()
+        with open(self.path, "r+b") as file:
+            file.seek(torn_at + RECORD.size)
+            file.write(b"x")
+
+        reopened = self._open()
+        # Новая запись той же длины встаёт на место оборванной: следующая за ней старая запись не читается
+        reopened.append(b"new!")
+
+        self.assertEqual(reopened.read(limit=10)[0], [b"intact", b"new!"])
+
+    def test_file_is_locked_by_owner(self):
+        """Файл открытого журнала не открывается другим владельцем."""
+        self._open()
+
+        with self.assertRaises(SpoolLockedException):
+            SpoolJournal(self.path, 4096)
+
+    def test_foreign_file_is_rejected(self):
+        """Файл без сигнатуры журнала не открывается."""
+        self.path.write_bytes(os.urandom(128))
+
+        with self.assertRaises(SpoolServiceException):
+            SpoolJournal(self.path, 4096)
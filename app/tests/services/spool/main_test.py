@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.common.breaker import CircuitBreaker
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, User
+from app.db.session.manager import Manager
+from app.schemas.events.send_events_request_schema import SendEventData
+from app.services.events.compaction import CompactionPolicy
+from app.services.spool.journal import SpoolJournal
+from app.services.spool.main import IngestSpool, SpoolReplayer, decode_batch, encode_batch, spool_path
+
+USER_ID = UUID("f47ac10b-58cc-4372-a567-0e02b2c3d479")
+OTHER_USER_ID = UUID("9b2e4c1a-7d3f-4e8b-a1c2-d4e5f6a7b8c9")
+EVENTS = [
+    SendEventData(event="active", domain="a.com", timestamp=datetime(2025, 4, 5, 10, tzinfo=timezone.utc)),
+    SendEventData(event="inactive", domain="a.com", timestamp=datetime(2025, 4, 5, 10, 5, tzinfo=timezone.utc)),
+]
+
+
+class TestIngestSpool(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.journal = SpoolJournal(spool_path(Path(self.tmp.name)), 1 << 16)
+        self.spool = IngestSpool(self.journal, sync_interval=0.01)
+        self.addCleanup(self.journal.close)
+
+    def test_batch_round_trip(self):
+        """Пачка восстанавливается из записи со всеми полями событий."""
+        batch_id = UUID("0c7e4a2b-3f1d-4b8e-9a6c-5d2e1f0a9b8c")
+        batch = decode_batch(encode_batch(USER_ID, EVENTS, "laptop", batch_id))
+
+        self.assertEqual(batch.batch_id, batch_id)
+        self.assertEqual(batch.user_id, USER_ID)
+        self.assertEqual(
+            batch.rows[1],
+            {
+                "user_id": USER_ID,
+                "domain": "a.com",
+                "event_type": "inactive",
+                "timestamp": EVENTS[1].timestamp,
+                "device_id": "laptop",
+            },
+        )
+
+    def test_concurrent_appends_share_sync(self):
+        """Пачки, записанные за интервал сброса, подтверждаются одним сбросом на диск."""
+
+        async def scenario():
+            with patch.object(self.journal, "sync", wraps=self.journal.sync) as sync:
+                await asyncio.gather(*(self.spool.append(USER_ID, EVENTS) for _ in range(20)))
+                return sync.call_count
+
+        self.assertEqual(self._run_async(scenario()), 1)
+        batches, _ = self.spool.read(limit=100)
+        self.assertEqual(len(batches), 20)
+
+    def test_batch_compacted_before_spooling(self):
+        """Пачка сжимается теми же правилами, что и при сохранении в базу данных."""
+        repeated = EVENTS[:1] + [
+            SendEventData(event="active", domain="a.com", timestamp=datetime(2025, 4, 5, 10, 1, tzinfo=timezone.utc))
+        ]
+        policy = CompactionPolicy(enabled=True, max_gap=timedelta(minutes=30), merge_gap=timedelta(0))
+        spool = IngestSpool(self.journal, sync_interval=0.01, compaction=policy)
+
+        self._run_async(spool.append(USER_ID, repeated + EVENTS[1:]))
+
+        batches, _ = spool.read(limit=10)
+        self.assertEqual([row["event_type"] for row in batches[0].rows], ["active", "inactive"])
+
+
+class TestSpoolReplayer(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = Path(self.tmp.name)
+        self.manager = Manager(
+            logger=logging.getLogger(__name__),
+            database_url=f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}",
+        )
+        self.breaker = CircuitBreaker("database", failure_threshold=1, reset_timeout=60)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+        self._run_async(create())
+
+    def _replayer(self, spool):
+        """Вспомогательный метод создания воспроизведения очереди."""
+        return SpoolReplayer(spool, self.manager, self.breaker, interval=1, batch_size=2)
+
+    def _count(self, model):
+        """Вспомогательный метод подсчёта строк таблицы."""
+
+        async def count():
+            async with self.manager.get_session() as session:
+                return await session.scalar(select(func.count()).select_from(model))
+
+        return self._run_async(count())
+
+    def test_replay_loads_batches_and_empties_spool(self):
+        """Воспроизведение загружает все пачки блоками и очищает очередь."""
+
+        async def scenario():
+            spool = IngestSpool(SpoolJournal(spool_path(self.directory), 1 << 16), sync_interval=0)
+            for user_id in (USER_ID, OTHER_USER_ID, USER_ID):
+                await spool.append(user_id, EVENTS)
+            replayed = await self._replayer(spool).replay()
+            remaining = len(spool)
+            await spool.close()
+            return replayed, remaining
+
+        self.assertEqual(self._run_async(scenario()), (3, 0))
+        self.assertEqual(self._count(User), 2)
+        self.assertEqual(self._count(AttentionEvent), 6)
+
+    def test_batch_loaded_again_after_crash_is_skipped(self):
+        """Пачка, прочитанная повторно после аварии до сдвига очереди, не дублирует события."""
+
+        async def scenario():
+            spool = IngestSpool(SpoolJournal(spool_path(self.directory), 1 << 16), sync_interval=0)
+            await spool.append(USER_ID, EVENTS)
+            replayer = self._replayer(spool)
+            # Загрузка зафиксирована, а смещение очереди не сдвинуто
+            await replayer._load(spool.read(limit=10)[0])
+            replayed = await replayer.replay()
+            remaining = len(spool)
+            await spool.close()
+            return replayed, remaining
+
+        self.assertEqual(self._run_async(scenario()), (1, 0))
+        self.assertEqual(self._count(AttentionEvent), 2)
+
+    def test_failed_replay_keeps_batches_and_opens_breaker(self):
+        """Ошибка загрузки не удаляет пачки и размыкает автомат защиты."""
+        failing = MagicMock(wraps=self.manager)
+        failing.get_session.side_effect = ConnectionRefusedError("database is down")
+
+        async def scenario():
+            spool = IngestSpool(SpoolJournal(spool_path(self.directory), 1 << 16), sync_interval=0)
+            await spool.append(USER_ID, EVENTS)
+            replayer = SpoolReplayer(spool, failing, self.breaker, interval=1, batch_size=2)
+            replayed = await replayer.replay()
+            skipped = await replayer.replay()
+            remaining = len(spool)
+            await spool.close()
+            return replayed, skipped, remaining
+
+        replayed, skipped, remaining = self._run_async(scenario())
+
+        self.assertEqual((replayed, skipped), (0, 0))
+        self.assertGreater(remaining, 0)
+        self.assertTrue(self.breaker.is_open)
+        failing.get_session.assert_called_once()
+
+    def test_orphan_spool_is_replayed_and_removed(self):
+        """Очередь завершившегося процесса воспроизводится и удаляется, занятая - пропускается."""
+
+        async def scenario():
+            orphan = IngestSpool(SpoolJournal(self.directory / "ingest-1-dead.spool", 1 << 16), sync_interval=0)
+            await orphan.append(OTHER_USER_ID, EVENTS)
+            await orphan.close()
+            busy = IngestSpool(SpoolJournal(self.directory / "ingest-2-live.spool", 1 << 16), sync_interval=0)
+            await busy.append(OTHER_USER_ID, EVENTS)
+            own = IngestSpool(SpoolJournal(spool_path(self.directory), 1 << 16), sync_interval=0)
+            await own.append(USER_ID, EVENTS)
+            replayed = await self._replayer(own).replay()
+            await own.close()
+            await busy.close()
+            return replayed
+
+        self.assertEqual(self._run_async(scenario()), 2)
+        self.assertFalse((self.directory / "ingest-1-dead.spool").exists())
+        self.assertTrue((self.directory / "ingest-2-live.spool").exists())
+        self.assertEqual(self._count(AttentionEvent), 4)
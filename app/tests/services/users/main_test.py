@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+from unittest import TestCase
+from uuid import UUID
+
+from sqlalchemy import func, select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, DailyDomainSummary, User
+from app.db.session.manager import Manager
+from app.services.aggregation.main import AggregationService
+from app.services.users.exceptions import UserSettingsServiceException
+from app.services.users.main import OrphanUsersService, UserSettingsService
+
+NOW = datetime(2025, 4, 7, tzinfo=timezone.utc)
+CUTOFF = NOW - timedelta(days=30)
+OLD = CUTOFF - timedelta(days=10)
+
+# Идентификаторы с буквами: SQLite сравнивает строки из одних цифр как числа
+ORPHAN = UUID("0a000000-0000-4000-8000-00000000000a")
+OLD_ACTIVE = UUID("1b000000-0000-4000-8000-00000000000b")
+REGISTERED = UUID("2c000000-0000-4000-8000-00000000000c")
+RECENT = UUID("3d000000-0000-4000-8000-00000000000d")
+BUSY = UUID("4e000000-0000-4000-8000-00000000000e")
+FRESH = UUID("5f000000-0000-4000-8000-00000000000f")
+
+
+class TestOrphanUsersService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.manager = Manager(logger=logging.getLogger(__name__), database_url=url)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with self.manager.get_session() as session:
+                session.add_all(
+                    [
+                        User(id=ORPHAN, created_at=OLD),
+                        User(id=OLD_ACTIVE, created_at=OLD),
+                        User(id=REGISTERED, email="user@example.com", password="hash", created_at=OLD),
+                        User(id=RECENT, created_at=OLD),
+                        User(id=BUSY, created_at=OLD),
+                        User(id=FRESH, created_at=NOW),
+                    ]
+                )
+                await session.flush()
+                session.add_all(
+                    [
+                        self._event(ORPHAN, OLD),
+                        self._event(OLD_ACTIVE, OLD),
+                        self._event(OLD_ACTIVE, OLD + timedelta(minutes=5)),
+                        self._event(RECENT, NOW),
+                        *(self._event(BUSY, OLD + timedelta(minutes=minute)) for minute in range(3)),
+                    ]
+                )
+                session.add(
+                    DailyDomainSummary(
+                        user_id=ORPHAN,
+                        domain="a.com",
+                        date=date(2025, 2, 26),
+                        total_seconds=60,
+                        active_count=1,
+                        generated_at=OLD,
+                    )
+                )
+                await session.commit()
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self._run_async(self.manager.get_engine().dispose())
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _event(user_id: UUID, timestamp: datetime) -> AttentionEvent:
+        """Вспомогательный метод создания события пользователя."""
+        return AttentionEvent(user_id=user_id, timestamp=timestamp, domain="a.com", event_type="active")
+
+    def _exec(self, cursor: UUID | None, batch_size: int):
+        """Вспомогательный метод очистки страницы пользователей."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                return await OrphanUsersService(session).exec(cursor, batch_size, CUTOFF, max_events=2)
+
+        return self._run_async(run())
+
+    def _remaining(self) -> tuple[set[UUID], int, int]:
+        """Вспомогательный метод получения оставшихся пользователей, событий и сводок."""
+
+        async def read():
+            async with self.manager.get_session() as session:
+                users = set((await session.execute(select(User.id))).scalars())
+                events = await session.scalar(select(func.count(AttentionEvent.id)))
+                summaries = await session.scalar(select(func.count(DailyDomainSummary.id)))
+                return users, events, summaries
+
+        return self._run_async(read())
+
+    def test_purges_only_orphans(self):
+        """Удаляются старые анонимные пользователи с малым числом событий вместе с событиями и сводками."""
+        batch = self._exec(None, batch_size=100)
+
+        users, events, summaries = self._remaining()
+        self.assertEqual(batch.purged, 2)
+        self.assertEqual(batch.scanned, 4)
+        self.assertTrue(batch.exhausted)
+        self.assertEqual(users, {REGISTERED, RECENT, BUSY, FRESH})
+        self.assertEqual(events, 4)
+        self.assertEqual(summaries, 0)
+
+    def test_keyset_pages(self):
+        """Страницы просматриваются по курсору до исчерпания таблицы."""
+        first = self._exec(None, batch_size=2)
+        self.assertEqual((first.cursor, first.purged, first.exhausted), (OLD_ACTIVE, 2, False))
+
+        second = self._exec(first.cursor, batch_size=2)
+        self.assertEqual((second.cursor, second.purged, second.exhausted), (BUSY, 0, False))
+
+        last = self._exec(second.cursor, batch_size=2)
+        self.assertEqual((last.cursor, last.scanned, last.exhausted), (BUSY, 0, True))
+
+    def test_purge_rechecks_activity(self):
+        """Пользователь, зарегистрировавшийся или приславший события после поиска, не удаляется."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                service = OrphanUsersService(session)
+                orphans, _, _ = await service.find_orphans(None, 100, CUTOFF, max_events=2)
+                self.assertEqual(orphans, [ORPHAN, OLD_ACTIVE])
+                session.add_all([self._event(ORPHAN, NOW), self._event(OLD_ACTIVE, OLD + timedelta(minutes=9))])
+                await session.flush()
+                purged = await service.purge(orphans, CUTOFF, max_events=2)
+                await session.commit()
+                return purged
+
+        self.assertEqual(self._run_async(run()), 0)
+        self.assertEqual(self._remaining()[0], {ORPHAN, OLD_ACTIVE, REGISTERED, RECENT, BUSY, FRESH})
+
+
+class TestUserSettingsService(TestCase):
+    def _run_async(self, coro):
+        """Вспомогательный метод для запуска асинхронного кода."""
+        return asyncio.run(coro)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{os.path.join(self.tmp.name, 'test.db')}"
+        self.manager = Manager(logger=logging.getLogger(__name__), database_url=url)
+
+        async def create():
+            async with self.manager.get_engine().begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with self.manager.get_session() as session:
+                session.add(User(id=ORPHAN, created_at=OLD))
+                await session.flush()
+                # 22:00 UTC 5 апреля - 01:00 6 апреля в Москве (UTC+3)
+                session.add_all(
+                    AttentionEvent(user_id=ORPHAN, timestamp=timestamp, domain="a.com", event_type=event_type)
+                    for timestamp, event_type in (
+                        (datetime(2025, 4, 5, 22, tzinfo=timezone.utc), "active"),
+                        (datetime(2025, 4, 5, 22, 10, tzinfo=timezone.utc), "inactive"),
+                    )
+                )
+                await session.flush()
+                await AggregationService(session, max_gap=timedelta(minutes=30)).aggregate_user(
+                    ORPHAN, date(2025, 4, 5), date(2025, 4, 5), NOW
+                )
+                await session.commit()
+
+        self._run_async(create())
+
+    def tearDown(self):
+        self._run_async(self.manager.get_engine().dispose())
+        self.tmp.cleanup()
+
+    def _exec(self, time_zone: str) -> bool:
+        """Вспомогательный метод установки часового пояса пользователя."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                return await UserSettingsService(session, max_gap=timedelta(minutes=30)).exec(ORPHAN, time_zone)
+
+        return self._run_async(run())
+
+    def _recompute(self) -> int:
+        """Вспомогательный метод пересчёта сводок пользователя."""
+
+        async def run():
+            async with self.manager.get_session() as session:
+                return await UserSettingsService(session, max_gap=timedelta(minutes=30)).recompute(ORPHAN, now=NOW)
+
+        return self._run_async(run())
+
+    def _state(self) -> tuple[str | None, dict]:
+        """Вспомогательный метод чтения часового пояса и сводок (домен, дата) -> секунды."""
+
+        async def read():
+            async with self.manager.get_session() as session:
+                time_zone = await session.scalar(select(User.time_zone).where(User.id == ORPHAN))
+                rows = (await session.execute(select(DailyDomainSummary))).scalars()
+                return time_zone, {(row.domain, row.date): row.total_seconds for row in rows}
+
+        return self._run_async(read())
+
+    def test_time_zone_saved_without_recompute(self):
+        """Смена часового пояса сохраняется сразу, сводки до пересчёта не меняются."""
+        self.assertTrue(self._exec("Europe/Moscow"))
+
+        self.assertEqual(self._state(), ("Europe/Moscow", {("a.com", date(2025, 4, 5)): 600}))
+
+    def test_recompute_moves_summaries_to_local_days(self):
+        """Пересчёт переносит сводки на местные дни, прежние строки удаляются."""
+        self._exec("Europe/Moscow")
+
+        self.assertEqual(self._recompute(), 1)
+
+        self.assertEqual(self._state(), ("Europe/Moscow", {("a.com", date(2025, 4, 6)): 600}))
+
+    def test_pending_recompute_requested_again(self):
+        """Пока сводки не пересчитаны, повторная установка того же часового пояса снова требует пересчёта."""
+        self.assertTrue(self._exec("Europe/Moscow"))
+
+        self.assertTrue(self._exec("Europe/Moscow"))
+
+    def test_same_time_zone_not_recomputed(self):
+        """После пересчёта установка того же часового пояса не требует пересчёта."""
+        self.assertTrue(self._exec("Europe/Moscow"))
+        self._recompute()
+
+        self.assertFalse(self._exec("Europe/Moscow"))
+
+    def test_utc_not_recomputed(self):
+        """Сводки без часового пояса построены в UTC: установка UTC не требует пересчёта."""
+        self.assertFalse(self._exec("UTC"))
+
+    def test_unknown_time_zone(self):
+        """Неизвестный часовой пояс вызывает исключение до обращения к базе данных."""
+        service = UserSettingsService(session=None, max_gap=timedelta(minutes=30))
+        with self.assertRaises(UserSettingsServiceException):
+            self._run_async(service.exec(ORPHAN, "Mars/Olympus"))
@@ -0,0 +1,66 @@
+"""Бенчмарк выполнения асинхронных задач Celery.
+
+Сравнивает:
+  - naive: ``asyncio.run`` и новый ``Manager`` (engine, пул соединений) на каждый вызов задачи;
+  - runtime: ``AsyncTask`` - один цикл событий и один менеджер на процесс воркера.
+Задачи выполняются в текущем процессе через ``apply()``, каждая делает один запрос к SQLite.
+
+Запуск:
+    python -m benchmarks.celery_tasks --tasks 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from app.db.session.manager import Manager
+from app.services.scheduler.main import CeleryConfigurator
+from app.services.scheduler.runtime import runtime
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=2000, help="Количество вызовов на вариант")
+    args = parser.parse_args()
+
+    database_url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    celery = CeleryConfigurator(url="memory://").exec()
+    celery.conf.result_backend = "cache+memory://"
+
+    @celery.task
+    def naive():
+        async def body():
+            manager = Manager(logger=logging.getLogger("benchmarks"), database_url=database_url)
+            try:
+                async with manager.get_session() as session:
+                    return (await session.execute(text("SELECT 1"))).scalar()
+            finally:
+                await manager.get_engine().dispose()
+
+        return asyncio.run(body())
+
+    @celery.task(bind=True)
+    async def pooled(self):
+        async with self.manager.get_session() as session:
+            return (await session.execute(text("SELECT 1"))).scalar()
+
+    with patch("app.db.session.provider.DATABASE_URL", database_url):
+        print(f"{'variant':<10}{'tasks/s':>12}{'us/task':>12}")
+        for name, task in (("naive", naive), ("runtime", pooled)):
+            task.apply()
+            start = time.perf_counter()
+            for _ in range(args.tasks):
+                task.apply()
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10}{args.tasks / elapsed:>12.0f}{elapsed / args.tasks * 1e6:>12.1f}")
+        runtime.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import time
+
+from starlette.types import ASGIApp
+
+
+async def run_requests(asgi_app: ASGIApp, path: str, requests: int, method: str = "GET") -> float:
+    """Функция прогона запросов напрямую через ASGI приложение, без HTTP-клиента.
+
+    Args:
+        asgi_app: ASGI приложение.
+        path: Путь запроса.
+        requests: Количество замеряемых запросов (перед замером выполняется прогрев).
+        method: HTTP-метод.
+
+    Returns:
+        Среднее время обработки запроса в микросекундах.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        return None
+
+    for _ in range(max(min(requests // 10, 1000), 1)):
+        await asgi_app(dict(scope), receive, send)
+
+    start = time.perf_counter_ns()
+    for _ in range(requests):
+        await asgi_app(dict(scope), receive, send)
+    return (time.perf_counter_ns() - start) / requests / 1000
@@ -0,0 +1,102 @@
+"""Бенчмарк блоков событий закрытых дней.
+
+День пользователя - события (время, домен, тип) с интервалами в секунды-минуты по небольшому
+набору доменов, как их присылает расширение. Замеряются:
+  - кодирование и декодирование блока, мкс на событие;
+  - размер блока, байт на событие.
+
+Для сравнения выводится оценка размера строки attention_events в PostgreSQL: заголовок кортежа
+и указатель строки, bigint id, uuid user_id, timestamptz, домен и тип в varlena, а также записи
+индексов по id и (user_id, timestamp). Это расчётная оценка, а не замер базы данных.
+
+Запуск:
+    python -m benchmarks.event_blocks --events 5000 --domains 40 --repeat 20
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.services.blocks.codec import decode_block, encode_block
+
+# Заголовок кортежа 23 байта с выравниванием до 24 и указатель строки 4 байта
+_TUPLE_OVERHEAD = 24 + 4
+# Запись B-tree: заголовок 8 байт, ключ с выравниванием и указатель 4 байта
+_ID_INDEX_ENTRY = 8 + 8 + 4
+_USER_TIME_INDEX_ENTRY = 8 + 16 + 8 + 4
+
+
+def build_day(events: int, domains: int) -> list[tuple[datetime, str, str, str | None]]:
+    """Функция построения событий одного дня пользователя.
+
+    Args:
+        events: Количество событий.
+        domains: Количество различных доменов.
+
+    Returns:
+        События (время, домен, тип, устройство) в порядке времени.
+    """
+    names = [f"site{i}.example.com" for i in range(domains)]
+    moment = datetime(2025, 4, 5, tzinfo=timezone.utc)
+    day = []
+    for _ in range(events):
+        moment += timedelta(milliseconds=random.randint(200, 15000))
+        day.append((moment, random.choice(names), random.choice(("active", "inactive")), None))
+    return day
+
+
+def estimate_row_size(day: list[tuple[datetime, str, str, str | None]]) -> float:
+    """Функция оценки среднего размера строки attention_events вместе с индексами.
+
+    Args:
+        day: События дня.
+
+    Returns:
+        Оценка в байтах на событие.
+    """
+    payload = sum(8 + 16 + 8 + 1 + len(domain.encode()) + 1 + len(event_type) for _, domain, event_type, _ in day)
+    return payload / len(day) + _TUPLE_OVERHEAD + _ID_INDEX_ENTRY + _USER_TIME_INDEX_ENTRY
+
+
+def time_call(function, repeat: int) -> float:
+    """Функция замера среднего времени вызова.
+
+    Args:
+        function: Функция без аргументов.
+        repeat: Количество вызовов.
+
+    Returns:
+        Среднее время вызова в микросекундах.
+    """
+    function()
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter_ns() - start) / repeat / 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000, help="Количество событий за день")
+    parser.add_argument("--domains", type=int, default=40, help="Количество различных доменов")
+    parser.add_argument("--repeat", type=int, default=20, help="Количество повторов замера")
+    args = parser.parse_args()
+
+    random.seed(0)
+    day = build_day(args.events, args.domains)
+    block = encode_block(day)
+    assert decode_block(block) == day
+
+    encode = time_call(lambda: encode_block(day), args.repeat)
+    decode = time_call(lambda: decode_block(block), args.repeat)
+    print(f"events: {args.events}, domains: {args.domains}, block: {len(block) / 1024:.1f} KiB")
+    print(f"{'metric':<36}{'value':>12}")
+    print(f"{'encode, us/event':<36}{encode / args.events:>12.2f}")
+    print(f"{'decode, us/event':<36}{decode / args.events:>12.2f}")
+    print(f"{'block, bytes/event':<36}{len(block) / args.events:>12.2f}")
+    print(f"{'row + indexes (estimate), bytes/event':<36}{estimate_row_size(day):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Бенчмарк постраничного просмотра событий пользователя: keyset против OFFSET.
+
+В SQLite создаются два пользователя с короткой и длинной историей событий в строках
+attention_events и пользователь, длинная история которого сжата в дневные блоки. Для каждого
+замеряется среднее время получения страницы:
+  - keyset - EventsBrowseService по курсору: первая страница и страница в глубине истории;
+  - offset - тот же запрос с ORDER BY ... OFFSET до той же глубины (только для строк).
+Время keyset-страницы не должно зависеть ни от длины истории, ни от глубины страницы, ни от того,
+хранится ли история строками или блоками.
+
+Запуск:
+    python -m benchmarks.event_pages --small 1000 --large 200000 --limit 100 --repeat 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import insert, select
+
+from app.db.models.base import Base
+from app.db.models.tables import AttentionEvent, EventBlock, User
+from app.db.session.manager import Manager
+from app.services.blocks.codec import encode_block
+from app.services.events.browse import EventsBrowseService, encode_cursor
+
+# Идентификаторы с буквами: SQLite сравнивает строки из одних цифр как числа
+SMALL = UUID("0a000000-0000-4000-8000-00000000000a")
+LARGE = UUID("1b000000-0000-4000-8000-00000000000b")
+BLOCKS = UUID("2c000000-0000-4000-8000-00000000000c")
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Событие раз в 30 секунд: 2880 событий в сутки
+STEP = timedelta(seconds=30)
+PER_DAY = timedelta(days=1) // STEP
+
+
+def _event(index: int) -> tuple[datetime, str, str, None]:
+    """Функция получения события истории по его номеру."""
+    return START + STEP * index, f"site{index % 40}.example.com", ("active", "inactive")[index % 2], None
+
+
+async def populate(manager: Manager, user_id: UUID, events: int) -> None:
+    """Функция заполнения истории событий пользователя.
+
+    Args:
+        manager: Менеджер базы данных.
+        user_id: Идентификатор пользователя.
+        events: Количество событий.
+    """
+    async with manager.get_session() as session:
+        await session.execute(insert(User).values(id=user_id, created_at=START))
+        for offset in range(0, events, 10_000):
+            await session.execute(
+                insert(AttentionEvent),
+                [
+                    dict(zip(("timestamp", "domain", "event_type"), _event(index)[:3]), user_id=user_id)
+                    for index in range(offset, min(offset + 10_000, events))
+                ],
+            )
+        await session.commit()
+
+
+async def populate_blocks(manager: Manager, user_id: UUID, events: int) -> None:
+    """Функция заполнения истории событий пользователя, сжатой в дневные блоки.
+
+    Args:
+        manager: Менеджер базы данных.
+        user_id: Идентификатор пользователя.
+        events: Количество событий.
+    """
+    async with manager.get_session() as session:
+        await session.execute(insert(User).values(id=user_id, created_at=START))
+        for first in range(0, events, PER_DAY):
+            day_events = [_event(index) for index in range(first, min(first + PER_DAY, events))]
+            await session.execute(
+                insert(EventBlock).values(
+                    user_id=user_id,
+                    date=day_events[0][0].date(),
+                    event_count=len(day_events),
+                    data=encode_block(day_events),
+                )
+            )
+        await session.commit()
+
+
+async def measure(
+    manager: Manager, user_id: UUID, events: int, depth: int, limit: int, repeat: int, blocks: bool
+) -> dict[str, float]:
+    """Функция замера времени страниц пользователя.
+
+    Args:
+        manager: Менеджер базы данных.
+        user_id: Идентификатор пользователя.
+        events: Количество событий пользователя.
+        depth: Количество событий новее страницы в глубине истории.
+        limit: Размер страницы.
+        repeat: Количество повторов замера.
+        blocks: История сжата в блоки.
+
+    Returns:
+        Среднее время страницы в миллисекундах по вариантам.
+    """
+    async with manager.get_session() as session:
+        service = EventsBrowseService(session)
+        ordered = select(AttentionEvent.id, AttentionEvent.timestamp).where(AttentionEvent.user_id == user_id)
+        ordered = ordered.order_by(AttentionEvent.timestamp.desc(), AttentionEvent.id.desc())
+        if blocks:
+            # Ключ события блока: время, источник 0 и номер события в блоке дня
+            index = events - depth
+            cursor = encode_cursor((_event(index)[0], 0, index % PER_DAY))
+        else:
+            event_id, timestamp = (await session.execute(ordered.offset(depth - 1).limit(1))).one()
+            cursor = encode_cursor((timestamp.replace(tzinfo=timezone.utc), 1, event_id))
+
+        async def timed(call) -> float:
+            await call()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await call()
+            return (time.perf_counter() - start) / repeat * 1e3
+
+        timings = {
+            "keyset first": await timed(lambda: service.exec(user_id, None, limit)),
+            "keyset deep": await timed(lambda: service.exec(user_id, cursor, limit)),
+        }
+        if not blocks:
+            timings["offset deep"] = await timed(lambda: session.execute(ordered.offset(depth).limit(limit)))
+        return timings
+
+
+async def run(args: argparse.Namespace) -> None:
+    manager = Manager(
+        logger=logging.getLogger("benchmarks"),
+        database_url=f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}",
+    )
+    async with manager.get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    await populate(manager, SMALL, args.small)
+    await populate(manager, LARGE, args.large)
+    await populate_blocks(manager, BLOCKS, args.large)
+
+    print(f"{'user':<10}{'events':>10}{'depth':>10}{'keyset first':>14}{'keyset deep':>14}{'offset deep':>14}")
+    for name, user_id, events, blocks in (
+        ("small", SMALL, args.small, False),
+        ("large", LARGE, args.large, False),
+        ("blocks", BLOCKS, args.large, True),
+    ):
+        depth = int(events * 0.9)
+        timings = await measure(manager, user_id, events, depth, args.limit, args.repeat, blocks)
+        print(
+            f"{name:<10}{events:>10}{depth:>10}"
+            + "".join(
+                f"{timings[key]:>12.2f}ms" if key in timings else f"{'-':>14}"
+                for key in ("keyset first", "keyset deep", "offset deep")
+            )
+        )
+    await manager.get_engine().dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--small", type=int, default=1000, help="События пользователя с короткой историей")
+    parser.add_argument("--large", type=int, default=200_000, help="События пользователя с длинной историей")
+    parser.add_argument("--limit", type=int, default=100, help="Размер страницы")
+    parser.add_argument("--repeat", type=int, default=50, help="Количество повторов замера")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Бенчмарк времени импорта приложения.
+
+Запускает отдельный интерпретатор с ``-X importtime`` и выводит:
+  - общее время импорта модуля (медиана по нескольким запускам);
+  - модули приложения с наибольшим накопленным временем;
+  - сторонние пакеты верхнего уровня с наибольшим собственным временем.
+
+Запуск:
+    python -m benchmarks.import_time --module app.main --repeat 5 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+_IMPORT_TIME_PREFIX = "import time:"
+
+
+@dataclass(frozen=True)
+class ImportRecord:
+    """Строка вывода ``-X importtime``."""
+
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_import_times(output: str) -> list[ImportRecord]:
+    """Функция разбора вывода ``-X importtime``.
+
+    Args:
+        output: Поток ошибок интерпретатора.
+
+    Returns:
+        Записи об импортированных модулях в порядке завершения импорта.
+    """
+    records = []
+    for line in output.splitlines():
+        if not line.startswith(_IMPORT_TIME_PREFIX):
+            continue
+        self_us, cumulative_us, name = line[len(_IMPORT_TIME_PREFIX) :].split("|")
+        if not self_us.strip().isdigit():
+            continue  # заголовок таблицы
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(ImportRecord(name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def measure_import(module: str, env: dict[str, str] | None = None) -> list[ImportRecord]:
+    """Функция замера импорта модуля в отдельном интерпретаторе.
+
+    Args:
+        module: Имя модуля.
+        env: Переменные окружения интерпретатора, по умолчанию текущие.
+
+    Returns:
+        Записи об импортированных модулях.
+
+    Raises:
+        RuntimeError: Если импорт завершился ошибкой.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env if env is not None else os.environ.copy(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+    return parse_import_times(result.stderr)
+
+
+def total_import_time(records: list[ImportRecord], module: str) -> int:
+    """Функция получения накопленного времени импорта модуля.
+
+    Args:
+        records: Записи об импортированных модулях.
+        module: Имя модуля.
+
+    Returns:
+        Накопленное время импорта в микросекундах.
+    """
+    return max(record.cumulative_us for record in records if record.name == module)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Импортируемый модуль")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество запусков")
+    parser.add_argument("--top", type=int, default=15, help="Количество строк в таблицах")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    totals = [total_import_time(records, args.module) for records in runs]
+    records = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    package = args.module.split(".")[0]
+
+    print(f"import {args.module}: median {statistics.median(totals) / 1000:.1f} ms, min {min(totals) / 1000:.1f} ms")
+
+    own = sorted((r for r in records if r.name.split(".")[0] == package), key=lambda r: -r.cumulative_us)
+    print(f"\n{'application module':<60}{'self ms':>10}{'cumul ms':>10}")
+    for record in own[: args.top]:
+        print(f"{record.name:<60}{record.self_us / 1000:>10.1f}{record.cumulative_us / 1000:>10.1f}")
+
+    by_package: dict[str, int] = defaultdict(int)
+    for record in records:
+        top_level = record.name.split(".")[0]
+        if top_level != package:
+            by_package[top_level] += record.self_us
+    print(f"\n{'third-party package':<60}{'self ms':>10}")
+    for name, self_us in sorted(by_package.items(), key=lambda item: -item[1])[: args.top]:
+        print(f"{name:<60}{self_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
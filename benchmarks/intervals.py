@@ -0,0 +1,81 @@
+"""Бенчмарк объединения интервалов пребывания нескольких устройств.
+
+Интервалы строятся по устройствам: у каждого устройства они идут подряд без пересечений,
+а устройства работают одновременно. Замеряются:
+  - union_intervals - длина объединения;
+  - attribute_overlaps с правилами latest и split - распределение времени по доменам;
+а также доля времени, которую посчитала бы сумма интервалов по устройствам сверх объединения.
+
+Запуск:
+    python -m benchmarks.intervals --intervals 1000000 --devices 3 --domains 40
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.services.aggregation.intervals import Interval, OverlapRule, attribute_overlaps, union_intervals
+
+
+def build_intervals(intervals: int, devices: int, domains: int) -> list[Interval]:
+    """Функция построения интервалов пребывания устройств одного пользователя.
+
+    Args:
+        intervals: Общее количество интервалов.
+        devices: Количество устройств.
+        domains: Количество различных доменов.
+
+    Returns:
+        Интервалы всех устройств.
+    """
+    names = [f"site{i}.example.com" for i in range(domains)]
+    start = datetime(2025, 4, 5, tzinfo=timezone.utc)
+    result = []
+    for _ in range(devices):
+        moment = start + timedelta(seconds=random.randint(0, 600))
+        for _ in range(intervals // devices):
+            length = timedelta(seconds=random.randint(5, 900))
+            result.append((moment, moment + length, random.choice(names)))
+            moment += length + timedelta(seconds=random.randint(0, 300))
+    return result
+
+
+def time_call(function) -> tuple[float, object]:
+    """Функция замера времени одного вызова.
+
+    Args:
+        function: Функция без аргументов.
+
+    Returns:
+        Время вызова в секундах и результат.
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--intervals", type=int, default=1_000_000, help="Количество интервалов")
+    parser.add_argument("--devices", type=int, default=3, help="Количество устройств")
+    parser.add_argument("--domains", type=int, default=40, help="Количество различных доменов")
+    args = parser.parse_args()
+
+    random.seed(0)
+    intervals = build_intervals(args.intervals, args.devices, args.domains)
+    summed = sum((end - begin).total_seconds() for begin, end, _ in intervals)
+
+    elapsed, union = time_call(lambda: union_intervals((begin, end) for begin, end, _ in intervals))
+    covered = sum((end - begin).total_seconds() for begin, end in union)
+    print(f"intervals: {len(intervals)}, devices: {args.devices}, domains: {args.domains}")
+    print(f"per-device sum over union: {summed / covered - 1:.1%}")
+    print(f"{'function':<28}{'seconds':>10}{'us/interval':>14}")
+    print(f"{'union_intervals':<28}{elapsed:>10.2f}{elapsed / len(intervals) * 1e6:>14.2f}")
+    for rule in OverlapRule:
+        elapsed, _ = time_call(lambda rule=rule: attribute_overlaps(intervals, rule))
+        print(f"{'attribute_overlaps ' + rule:<28}{elapsed:>10.2f}{elapsed / len(intervals) * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Бенчмарк накладных расходов middleware логирования запросов.
+
+Сравнивает прежний вариант на ``BaseHTTPMiddleware`` (``app.middleware("http")``) с чистым ASGI
+``RequestLoggingMiddleware`` при полной и выборочной записи в лог. Запросы подаются напрямую в ASGI
+приложение, без HTTP-клиента, чтобы измерялась только стоимость стека middleware.
+
+Запуск:
+    python -m benchmarks.middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from app.common.metrics import UNMATCHED_ROUTE, observe_request
+from app.common.middleware import RequestLoggingMiddleware
+from benchmarks.common import run_requests
+
+logger = logging.getLogger("benchmarks.middleware")
+
+_LEGACY_LOG_FORMAT = "Method: {method} | URL: {url} | Duration: {duration:.5f}s"
+
+
+async def legacy_log_requests_middleware(request: Request, call_next):
+    """Прежняя реализация middleware на BaseHTTPMiddleware, используется как базовая линия."""
+    logger.info(f"Request: {request.method} {request.url}")
+    start_time = time.perf_counter()
+    response = await call_next(request)
+    process_time = time.perf_counter() - start_time
+    route = getattr(request.scope.get("route"), "path", UNMATCHED_ROUTE)
+    observe_request(request.method, route, response.status_code, process_time)
+    log_message = _LEGACY_LOG_FORMAT.format(method=request.method, url=request.url, duration=process_time)
+    logger.info(f"Response: {response.status_code} | {log_message}")
+    return response
+
+
+def build_app(variant: str) -> FastAPI:
+    """Функция сборки приложения с выбранным вариантом middleware.
+
+    Args:
+        variant: 'none', 'legacy', 'asgi' или 'asgi-sampled'.
+
+    Returns:
+        Приложение FastAPI.
+    """
+    bench_app = FastAPI()
+    if variant == "legacy":
+        bench_app.middleware("http")(legacy_log_requests_middleware)
+    elif variant == "asgi":
+        bench_app.add_middleware(RequestLoggingMiddleware, sample_rate=1.0)
+    elif variant == "asgi-sampled":
+        bench_app.add_middleware(RequestLoggingMiddleware, sample_rate=0.01)
+
+    @bench_app.get("/api/v1/healthcheck")
+    async def healthcheck():
+        return PlainTextResponse("ok")
+
+    return bench_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Количество запросов на вариант")
+    args = parser.parse_args()
+
+    # Записи создаются и форматируются, но никуда не выводятся
+    for name in ("app.common.middleware", "benchmarks.middleware"):
+        bench_logger = logging.getLogger(name)
+        bench_logger.setLevel(logging.INFO)
+        bench_logger.propagate = False
+        bench_logger.addHandler(logging.StreamHandler(open("/dev/null", "w")))
+
+    results = {}
+    for variant in ("none", "legacy", "asgi", "asgi-sampled"):
+        results[variant] = asyncio.run(run_requests(build_app(variant), "/api/v1/healthcheck", args.requests))
+
+    baseline = results["none"]
+    print(f"{'variant':<14}{'us/request':>12}{'overhead us':>14}")
+    for variant, per_request in results.items():
+        print(f"{variant:<14}{per_request:>12.2f}{per_request - baseline:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
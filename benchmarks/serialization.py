@@ -0,0 +1,133 @@
+"""Бенчмарк сериализации отчётных ответов.
+
+Отчёт - список строк дневной сводки по доменам (как ``DailyDomainSummary``). Сравниваются:
+  - default: JSONResponse FastAPI, валидация через response_model;
+  - fast: FastJSONResponse, валидация через response_model;
+  - prevalidated: FastJSONResponse без повторной валидации (prevalidated_response);
+а также чистая сериализация: json.dumps(jsonable_encoder(...)) против dumps().
+
+Запуск:
+    python -m benchmarks.serialization --rows 5000 --requests 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.common.responses import FastJSONResponse, dumps, prevalidated_response
+from benchmarks.common import run_requests
+
+_DOMAINS = [f"{name}.{zone}" for name in ("youtube", "reddit", "github", "news", "mail", "docs") for zone in "abcdef"]
+
+
+class ReportRow(BaseModel):
+    user_id: UUID
+    domain: str
+    date: date
+    total_seconds: int
+    active_count: int
+    generated_at: datetime
+
+
+def build_report(rows: int) -> list[ReportRow]:
+    """Функция построения отчёта заданного размера.
+
+    Args:
+        rows: Количество строк.
+
+    Returns:
+        Строки отчёта.
+    """
+    user_id = uuid4()
+    today = date(2025, 4, 5)
+    now = datetime(2025, 4, 6, 3, 0, tzinfo=timezone.utc)
+    return [
+        ReportRow(
+            user_id=user_id,
+            domain=f"{i}.{random.choice(_DOMAINS)}",
+            date=today - timedelta(days=i // len(_DOMAINS)),
+            total_seconds=random.randint(1, 36000),
+            active_count=random.randint(1, 500),
+            generated_at=now,
+        )
+        for i in range(rows)
+    ]
+
+
+def build_app(report: list[ReportRow]) -> FastAPI:
+    """Функция сборки приложения с вариантами отчётного эндпоинта.
+
+    Args:
+        report: Отчёт.
+
+    Returns:
+        Приложение FastAPI.
+    """
+    bench_app = FastAPI()
+    raw_report = [row.model_dump() for row in report]
+
+    @bench_app.get("/default", response_model=list[ReportRow], response_class=JSONResponse)
+    async def default():
+        return raw_report
+
+    @bench_app.get("/fast", response_model=list[ReportRow], response_class=FastJSONResponse)
+    async def fast():
+        return raw_report
+
+    @bench_app.get("/prevalidated", response_model=list[ReportRow])
+    async def prevalidated():
+        return prevalidated_response(report)
+
+    return bench_app
+
+
+def time_call(function, repeat: int) -> float:
+    """Функция замера среднего времени вызова.
+
+    Args:
+        function: Функция без аргументов.
+        repeat: Количество вызовов.
+
+    Returns:
+        Среднее время вызова в миллисекундах.
+    """
+    function()
+    start = time.perf_counter_ns()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter_ns() - start) / repeat / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Количество строк в отчёте")
+    parser.add_argument("--requests", type=int, default=50, help="Количество запросов на вариант")
+    args = parser.parse_args()
+
+    random.seed(0)
+    report = build_report(args.rows)
+    bench_app = build_app(report)
+
+    print(f"report rows: {args.rows}, payload: {len(dumps(report)) / 1024:.0f} KiB")
+    print(f"{'variant':<28}{'ms/request':>12}")
+    for variant in ("default", "fast", "prevalidated"):
+        per_request = asyncio.run(run_requests(bench_app, f"/{variant}", args.requests)) / 1000
+        print(f"{'endpoint ' + variant:<28}{per_request:>12.2f}")
+
+    stdlib = time_call(lambda: json.dumps(jsonable_encoder(report)).encode(), args.requests)
+    fast = time_call(lambda: dumps(report), args.requests)
+    print(f"{'serialize stdlib+encoder':<28}{stdlib:>12.2f}")
+    print(f"{'serialize dumps()':<28}{fast:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Бенчмарк определения местной даты событий по таблице смещений часового пояса.
+
+События - моменты UTC за год в порядке времени. Замеряются:
+  - astimezone - перевод каждого события средствами zoneinfo;
+  - LocalCalendar.local_date - двоичный поиск по таблице переходов зоны для каждого события;
+  - LocalCalendar.local_dates - один проход слиянием упорядоченных событий с местными полуночами;
+а также построение календаря (таблица переходов и местные полуночи) без кэша.
+
+Запуск:
+    python -m benchmarks.timezones --events 1000000 --zone Europe/Berlin
+"""
+
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app.services.aggregation import timezones
+from app.services.aggregation.timezones import local_calendar
+
+
+def time_call(function) -> tuple[float, object]:
+    """Функция замера времени одного вызова.
+
+    Args:
+        function: Функция без аргументов.
+
+    Returns:
+        Время вызова в секундах и результат.
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000, help="Количество событий")
+    parser.add_argument("--zone", default="Europe/Berlin", help="Часовой пояс IANA")
+    args = parser.parse_args()
+
+    random.seed(0)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    events = sorted(start + timedelta(seconds=random.randint(0, 365 * 86400)) for _ in range(args.events))
+    info = ZoneInfo(args.zone)
+
+    timezones._year_transitions.cache_clear()
+    timezones.offset_table.cache_clear()
+    build, calendar = time_call(lambda: local_calendar(args.zone, date(2025, 1, 1), date(2025, 12, 31)))
+    zoneinfo_elapsed, expected = time_call(lambda: [moment.astimezone(info).date() for moment in events])
+    table_elapsed, actual = time_call(lambda: [calendar.local_date(moment) for moment in events])
+    merge_elapsed, merged = time_call(lambda: calendar.local_dates(events))
+    assert actual == expected and merged == expected
+
+    print(f"events: {args.events}, zone: {args.zone}, transitions: {len(calendar.table.offsets) - 1}")
+    print(f"calendar build: {build * 1e3:.2f} ms")
+    print(f"{'function':<28}{'seconds':>10}{'us/event':>12}")
+    print(f"{'astimezone':<28}{zoneinfo_elapsed:>10.2f}{zoneinfo_elapsed / args.events * 1e6:>12.3f}")
+    print(f"{'LocalCalendar.local_date':<28}{table_elapsed:>10.2f}{table_elapsed / args.events * 1e6:>12.3f}")
+    print(f"{'LocalCalendar.local_dates':<28}{merge_elapsed:>10.2f}{merge_elapsed / args.events * 1e6:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
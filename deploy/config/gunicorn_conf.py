@@ -1,4 +1,6 @@
+import gc
 import os
+import shutil
 import multiprocessing
 
 # Настройки воркеров
@@ -14,6 +16,8 @@ graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 60))
 max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
 # Случайный разброс рестарта, помогает избежать одновременного рестарта всех воркеров
 max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 50))
+# Загрузка приложения в мастер-процессе до fork, воркеры разделяют память через copy-on-write
+preload_app = os.getenv("GUNICORN_PRELOAD", "false").lower() in ("1", "true", "yes")
 
 # Сетевые настройки
 # Привязка к интерфейсу и порту
@@ -43,3 +47,47 @@ limit_request_fields = int(os.getenv("GUNICORN_LIMIT_REQUEST_FIELDS", 20))
 proxy_protocol = bool(os.getenv("GUNICORN_PROXY_PROTOCOL", False))
 # Список разрешенных IP
 proxy_allow_ips = os.getenv("GUNICORN_PROXY_ALLOW_IPS", "*")
+
+# Настройки метрик
+# Каталог для агрегации метрик Prometheus между воркерами
+prometheus_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/mindfulweb-metrics")
+# При preload_app метрики создаются при импорте приложения в мастере, до хука on_starting
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def on_starting(server):
+    """Хук запуска мастер-процесса: очистка метрик предыдущего запуска."""
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+if preload_app:
+    # Сборщик мусора отключается до загрузки приложения, чтобы не оставлять "дыр" в страницах памяти,
+    # и включается в воркерах после fork
+    gc.disable()
+
+
+def when_ready(server):
+    """Хук готовности мастер-процесса: прогрев приложения и заморозка объектов перед fork воркеров."""
+    if preload_app:
+        from app.common.preload import warm_up
+
+        warm_up(server.app.wsgi())
+        # Объекты мастер-процесса не обходятся сборщиком мусора воркеров и не копируются при записи
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """Хук воркера после fork: сброс унаследованного пула соединений и перезапуск потока логов."""
+    if preload_app:
+        from app.common.preload import after_fork
+
+        after_fork()
+        gc.enable()
+
+
+def child_exit(server, worker):
+    """Хук завершения воркера: исключение gauge-метрик завершённого процесса из агрегации."""
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
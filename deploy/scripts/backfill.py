@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Скрипт для пересчёта дневных сводок за историю.
+
+Пространство (пользователи × дни) делится на единицы работы, которые выполняются на пуле
+процессов. Завершённые единицы записываются в файл контрольной точки: повторный запуск
+с теми же параметрами продолжит пересчёт с места остановки.
+
+Пример:
+    python deploy/scripts/backfill.py --start 2025-01-01 --end 2025-03-31 --workers 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+logger = logging.getLogger("backfill")
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def parse_args() -> argparse.Namespace:
+    from app.config import AGGREGATION_MAX_GAP
+
+    workers = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Пересчёт дневных сводок по доменам за историю")
+    parser.add_argument("--start", type=date.fromisoformat, required=True, help="Первый день (YYYY-MM-DD)")
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        default=datetime.now(timezone.utc).date(),
+        help="Последний день включительно (YYYY-MM-DD), по умолчанию сегодня",
+    )
+    parser.add_argument("--workers", type=int, default=workers, help="Количество процессов")
+    parser.add_argument("--user-ranges", type=int, default=workers * 4, help="Количество диапазонов пользователей")
+    parser.add_argument("--days-per-unit", type=int, default=7, help="Количество дней в единице работы")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="Количество строк сводки в одном upsert")
+    parser.add_argument(
+        "--max-gap", type=int, default=AGGREGATION_MAX_GAP, help="Наибольший интервал без событий, секунды"
+    )
+    parser.add_argument("--checkpoint", type=Path, default=Path("backfill.checkpoint"), help="Файл контрольной точки")
+    parser.add_argument("--shard", help="Имя шарда из DATABASE_SHARDS, по умолчанию DATABASE_URL")
+    return parser.parse_args()
+
+
+def backfill(args: argparse.Namespace) -> None:
+    from app.config import DATABASE_SHARDS, DATABASE_URL
+    from app.db.session.sharding import parse_shard_map
+    from app.services.aggregation.backfill import Checkpoint, plan_units, run_backfill
+
+    # Каждый шард пересчитывается отдельным запуском со своей контрольной точкой
+    database_url = parse_shard_map(DATABASE_SHARDS)[args.shard] if args.shard else DATABASE_URL
+    units = plan_units(args.start, args.end, args.user_ranges, args.days_per_unit)
+    logger.info(f"📋 Единиц работы: {len(units)}, процессов: {args.workers}")
+
+    progress = run_backfill(
+        database_url,
+        units,
+        Checkpoint(args.checkpoint),
+        workers=args.workers,
+        max_gap=timedelta(seconds=args.max_gap),
+        now=datetime.now(timezone.utc),
+        batch_rows=args.batch_rows,
+    )
+    logger.info(f"✅ Пересчёт завершён: {progress}")
+
+
+if __name__ == "__main__":
+    try:
+        backfill(parse_args())
+    except Exception as e:
+        logger.error(f"❌ Ошибка при пересчёте сводок: {e}")
+        sys.exit(1)
@@ -1,5 +1,9 @@
 #!/usr/bin/env python3
-"""Скрипт для инициализации базы данных."""
+"""Скрипт для инициализации базы данных.
+
+Отсутствующие таблицы создаются, а существующие дополняются столбцами и индексами, добавленными
+в модели позже: повторный запуск на рабочей базе безопасен и обновляет её схему.
+"""
 
 import sys
 import logging
@@ -17,20 +21,33 @@ sys.path.insert(0, str(project_root))
 
 
 def init_db() -> None:
+    import asyncio
+
     from sqlalchemy import text
 
-    from app.db.session.provider import manager  # noqa: F401
+    from app.db.session.provider import dispose_manager, get_shards
+    from app.db.session.sharding import fan_out
     from app.db.models.tables import Base  # noqa: F401
     from app.db.models import tables  # noqa: F401
-
-    engine = manager.get_engine()
-
-    with engine.connect() as conn:
-        conn.execute(text("SELECT 1"))
-    logger.info("✅ Подключение к базе данных успешно")
-
-    Base.metadata.create_all(bind=engine)
-    logger.info("✅ Таблицы успешно созданы")
+    from app.db.upgrade import upgrade_schema
+
+    async def create(name, manager) -> None:
+        async with manager.get_engine().begin() as conn:
+            await conn.execute(text("SELECT 1"))
+            logger.info(f"✅ Подключение к шарду {name} успешно")
+            await conn.run_sync(Base.metadata.create_all)
+            changes = await conn.run_sync(upgrade_schema, Base.metadata)
+        logger.info(f"✅ Таблицы шарда {name} успешно созданы")
+        for change in changes:
+            logger.info(f"🔧 Шард {name}: схема обновлена - {change}")
+
+    async def run() -> None:
+        try:
+            await fan_out(get_shards(), create)
+        finally:
+            await dispose_manager()
+
+    asyncio.run(run())
 
 
 if __name__ == "__main__":
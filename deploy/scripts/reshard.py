@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Скрипт для переноса пользователей между шардами базы данных после изменения карты шардов.
+
+Новая карта шардов (DATABASE_SHARDS) сначала применяется приложением, затем запускается скрипт:
+каждый шард просматривается постранично, и пользователи, принадлежащие по новой карте другому
+шарду, переносятся вместе с событиями и сводками. Шарды обрабатываются одновременно, повторный
+запуск безопасен.
+
+Пример:
+    DATABASE_SHARDS="s0=postgresql+asyncpg://...,s1=...,s2=..." python deploy/scripts/reshard.py --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    stream=sys.stdout,
+)
+logger = logging.getLogger("reshard")
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def parse_args() -> argparse.Namespace:
+    from app.config import DATABASE_SHARD_VNODES, DATABASE_SHARDS
+
+    parser = argparse.ArgumentParser(description="Перенос пользователей между шардами базы данных")
+    parser.add_argument("--shards", default=DATABASE_SHARDS, help="Новая карта шардов 'имя=URL,...'")
+    parser.add_argument("--vnodes", type=int, default=DATABASE_SHARD_VNODES, help="Количество точек кольца на шард")
+    parser.add_argument("--batch-size", type=int, default=500, help="Количество пользователей на странице")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Количество событий пользователя за запрос")
+    parser.add_argument("--concurrency", type=int, default=None, help="Количество одновременно обрабатываемых шардов")
+    parser.add_argument("--dry-run", action="store_true", help="Только подсчитать переносимых пользователей")
+    return parser.parse_args()
+
+
+async def reshard(args: argparse.Namespace) -> None:
+    from app.db.session.sharding import ShardedManager, fan_out, parse_shard_map
+    from app.services.resharding.main import ReshardingService
+
+    manager = ShardedManager(logger=logger, shards=parse_shard_map(args.shards), vnodes=args.vnodes)
+
+    async def move(name, _) -> dict[str, int]:
+        service = ReshardingService(name, manager.shards, manager.ring, chunk_size=args.chunk_size)
+        cursor, scanned, moved = None, 0, {}
+        while True:
+            batch = await service.exec(cursor, args.batch_size, dry_run=args.dry_run)
+            cursor, scanned = batch.cursor, scanned + batch.scanned
+            for target, count in batch.moved.items():
+                moved[target] = moved.get(target, 0) + count
+            if batch.exhausted:
+                break
+        logger.info(f"📦 Шард {name}: просмотрено {scanned}, перенесено {moved}")
+        return moved
+
+    try:
+        await fan_out(manager.shards, move, concurrency=args.concurrency)
+    finally:
+        for shard in manager.shards.values():
+            await shard.get_engine().dispose()
+    logger.info("✅ Перенос завершён" if not args.dry_run else "✅ Подсчёт завершён, данные не изменены")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(reshard(parse_args()))
+    except Exception as e:
+        logger.error(f"❌ Ошибка при переносе пользователей: {e}")
+        sys.exit(1)